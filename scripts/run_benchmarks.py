@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+PKGホットパスのベンチマーク
+
+DAG評価、PKG関数（基本・コア・特化・高度・特徴量抽出）、平均足・指標計算、
+足の集約、バックテスト全体を計測し、ベースラインJSONとの比較で劣化を検出する
+
+データは data/histdata/{pair}_M1.csv があれば使用し、なければ固定シードの
+ランダムウォークを生成する（ベースラインは同じデータ条件どうしで比較すること）
+
+使い方:
+    python scripts/run_benchmarks.py --save-baseline benchmarks_baseline.json
+    python scripts/run_benchmarks.py --baseline benchmarks_baseline.json   # 劣化があれば終了コード1
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.benchmark import (
+    BenchmarkCase, compare, format_report, load_results, run_benchmarks, save_results
+)
+from src.data.price_store import CandleArrays, ColumnarPriceStore
+from src.data.resampler import resample
+from src.trading.bar_builder import StreamingBarBuilder
+from src.indicators.base_indicators import BaseIndicators, calculate_heikin_ashi_arrays
+from src.indicators.streaming_indicators import IndicatorSet
+from src.pkg.memo_logic.core_pkg_functions import (
+    DokyakuFunction, IkikaerikFunction, MarketData, PKGId
+)
+from src.pkg.memo_logic.basic_pkg_functions import ASFunction, ROFunction, SGFunction, ZFunction
+from src.pkg.memo_logic.specialized_pkg_functions import KairiFunction, RangeFunction
+from src.pkg.memo_logic.advanced_pkg_functions import (
+    MomiFunction, OvershootFunction, TimeKetsugouFunction
+)
+from src.pkg.memo_logic.dag_engine_v2 import DAGEngine
+from src.pkg.feature_dag import feature_extraction
+from src.pkg.trading_signal_pkg import TradingSignalPKG
+from src.backtesting.backtest_engine import BacktestEngine, simple_strategy
+
+
+PKG_ID = PKGId.parse("391^2-126")
+WINDOW = 20           # PKG関数に渡す直近の足の本数
+RANGE_WINDOW = 180    # レンジ判定に必要な最長周期
+SLOW_CASE_BARS = 300  # 1本あたりが重いケースの本数上限
+
+
+def synthetic_m1(pair: str, bars: int, seed: int = 42) -> CandleArrays:
+    """固定シードのランダムウォーク1分足"""
+    rng = np.random.default_rng(seed)
+    base = 1.10 if pair.endswith('USD') else 150.0
+    close = base * np.exp(np.cumsum(rng.normal(0, 1e-4, bars)))
+    open_ = np.r_[close[0], close[:-1]]
+    wick = np.abs(rng.normal(0, 5e-5, (2, bars))) * base
+    start = int(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp())
+    return CandleArrays(
+        pair=pair, timeframe='M1',
+        timestamp=start + 60 * np.arange(bars, dtype=np.int64),
+        open=open_,
+        high=np.maximum(open_, close) + wick[0],
+        low=np.minimum(open_, close) - wick[1],
+        close=close,
+        volume=rng.integers(1, 100, bars).astype(np.float64),
+    )
+
+
+def load_m1(pair: str, bars: int, data_dir: str) -> CandleArrays:
+    """同梱の1分足（なければ合成データ）の末尾 bars 本"""
+    store = ColumnarPriceStore(source_dir=data_dir)
+    if os.path.exists(store.csv_path(pair, 'M1')):
+        m1 = store.load(pair, 'M1')
+        return m1.slice(max(0, len(m1) - bars), len(m1))
+    return synthetic_m1(pair, bars)
+
+
+def to_market_data(candles: CandleArrays) -> List[MarketData]:
+    """PKG関数用の足（平均足付き）"""
+    ha = calculate_heikin_ashi_arrays(candles.open, candles.high, candles.low, candles.close)
+    timestamps = pd.to_datetime(candles.timestamp, unit='s')
+    return [
+        MarketData(timestamp=timestamps[i], open=float(candles.open[i]), high=float(candles.high[i]),
+                   low=float(candles.low[i]), close=float(candles.close[i]),
+                   volume=float(candles.volume[i]),
+                   heikin_ashi_open=float(ha['ha_open'][i]), heikin_ashi_high=float(ha['ha_high'][i]),
+                   heikin_ashi_low=float(ha['ha_low'][i]), heikin_ashi_close=float(ha['ha_close'][i]))
+        for i in range(len(candles))
+    ]
+
+
+def window_case(name: str, functions, bars: List[MarketData], window: int,
+                limit: int = 0) -> BenchmarkCase:
+    """直近 window 本を渡して各関数を1本ずつ実行する逐次ケース"""
+    count = len(bars) - window
+    if limit:
+        count = min(count, limit)
+
+    def step(_, i):
+        data = {'market_data': bars[i:i + window]}
+        for function in functions:
+            function.execute(data)
+
+    return BenchmarkCase(name, max(count, 0), step=step, group='pkg')
+
+
+def build_cases(pair: str, m1: CandleArrays) -> List[BenchmarkCase]:
+    """全ベンチマークケース"""
+    m15 = resample(m1, 'M15')
+    m5 = resample(m1, 'M5')
+    m15_records = m15.to_records()
+    m15_frame = pd.DataFrame(m15.columns())
+    m15_bars = to_market_data(m15)
+    m5_bars = to_market_data(m5)
+    m1_bars = to_market_data(m1.slice(max(0, len(m1) - 3 * len(m15)), len(m1)))
+    closes = m15.close
+    cases: List[BenchmarkCase] = []
+
+    # ---- 足の集約 ----
+    cases.append(BenchmarkCase('candles.resample_m15', len(m1),
+                               run=lambda _: resample(m1, 'M15'), group='candles'))
+    timestamps, prices = m1.timestamp.tolist(), m1.close.tolist()
+    cases.append(BenchmarkCase(
+        'candles.bar_builder_ticks', len(m1),
+        setup=lambda: StreamingBarBuilder(('M1', 'M5', 'M15')),
+        step=lambda builder, i: builder.update(pair, prices[i], timestamps[i]),
+        group='candles'))
+
+    # ---- 平均足・指標 ----
+    indicators = BaseIndicators()
+    cases.append(BenchmarkCase(
+        'indicators.heikin_ashi_arrays', len(m15),
+        run=lambda _: calculate_heikin_ashi_arrays(m15.open, m15.high, m15.low, m15.close),
+        group='indicators'))
+    cases.append(BenchmarkCase('indicators.heikin_ashi_dataframe', len(m15),
+                               run=lambda _: indicators.calculate_heikin_ashi(m15_frame),
+                               group='indicators'))
+
+    def ha_step(state, i):
+        state[0] = BaseIndicators.update_heikin_ashi(state[0], m15_records[i])
+
+    cases.append(BenchmarkCase('indicators.heikin_ashi_stream', len(m15),
+                               setup=lambda: [None], step=ha_step, group='indicators'))
+    cases.append(BenchmarkCase('indicators.osma_dataframe', len(m15),
+                               run=lambda _: indicators.calculate_osma(m15_frame),
+                               group='indicators'))
+    cases.append(BenchmarkCase(
+        'indicators.streaming_set', len(m15), setup=IndicatorSet,
+        step=lambda state, i: (state.update_bar(m15_records[i]), state.snapshot()),
+        group='indicators'))
+
+    # ---- PKG関数 ----
+    z, ro = ZFunction(PKG_ID, operation_type=2), ROFunction(PKG_ID)
+    previous = np.r_[closes[0], closes[:-1]]
+
+    def basic_step(_, i):
+        diff = z.execute({'inputs': [closes[i], previous[i]]})
+        ro.execute({'input_value': diff * 1000})
+
+    cases.append(BenchmarkCase('pkg.basic_scalar', len(m15), step=basic_step, group='pkg'))
+
+    sections = np.where(closes >= previous, 1, 2)
+    sg, as_ = SGFunction(PKG_ID), ASFunction(PKG_ID, output_mode=1)
+
+    def basic_batch(_):
+        diff = z.execute_batch({'inputs': np.column_stack([closes, previous])})
+        ro.execute_batch({'input_value': diff * 1000})
+        sg.execute_batch({'section_indicators': sections, 'values_to_sum': diff})
+        as_.execute_batch({'section_indicators': sections, 'price_values': closes})
+
+    cases.append(BenchmarkCase('pkg.basic_batch', len(m15), run=basic_batch, group='pkg'))
+    cases.append(window_case('pkg.core_dokyaku_ikikaeri',
+                             [DokyakuFunction(PKG_ID), IkikaerikFunction(PKG_ID)], m15_bars, WINDOW))
+    cases.append(window_case('pkg.specialized_kairi_range',
+                             [KairiFunction(PKG_ID), RangeFunction(PKG_ID)], m15_bars, RANGE_WINDOW,
+                             SLOW_CASE_BARS))
+    cases.append(window_case('pkg.advanced_momi_overshoot',
+                             [MomiFunction(PKG_ID), OvershootFunction(PKG_ID)], m15_bars, WINDOW))
+
+    time_ketsugou = TimeKetsugouFunction(PKG_ID)
+    tk_count = min(len(m15_bars) - WINDOW, SLOW_CASE_BARS)
+
+    def time_ketsugou_step(_, i):
+        time_ketsugou.execute({'multi_timeframe_data': {
+            '1M': m1_bars[3 * i:3 * i + WINDOW],
+            '5M': m5_bars[3 * i:3 * i + WINDOW],
+            '15M': m15_bars[i:i + WINDOW],
+        }})
+
+    cases.append(BenchmarkCase('pkg.advanced_time_ketsugou', max(tk_count, 0),
+                               step=time_ketsugou_step, group='pkg'))
+
+    ticks = [feature_extraction.MarketData(pd.Timestamp(t, unit='s').to_pydatetime(), pair,
+                                           p, p + 0.003, 1000.0, 0.003)
+             for t, p in zip(timestamps[:SLOW_CASE_BARS * 10], prices)]
+    cases.append(BenchmarkCase(
+        'pkg.feature_extraction_tick', len(ticks),
+        setup=lambda: feature_extraction.FeatureExtractionLayer(pair),
+        step=lambda layer, i: layer.process_market_data(ticks[i]), group='pkg'))
+
+    # ---- DAG評価 ----
+    def dag_setup():
+        engine = DAGEngine()
+        engine.register_raw_data("AA001", 3, 9, 1, closes[0])
+        engine.register_raw_data("AA002", 3, 9, 1, closes[0])
+        engine.register_raw_data("BA001", 3, 9, 1, 0.0)
+        engine.register_function("391^1-001", "Z", ["391^0-AA001", "391^0-AA002"], operation_type=2)
+        engine.register_function("391^1-002", "RO", ["391^0-BA001"])
+        engine.register_function("391^2-001", "SL", ["391^1-002", "391^0-AA001", "391^1-001"], default=0)
+        engine.evaluate()
+        return engine
+
+    def dag_step(engine, i):
+        engine.set_inputs({"391^0-AA001": closes[i], "391^0-AA002": previous[i],
+                           "391^0-BA001": (closes[i] - previous[i]) * 1000})
+        engine.evaluate()
+
+    cases.append(BenchmarkCase('dag.engine_v2_incremental', len(m15), setup=dag_setup,
+                               step=dag_step, group='dag'))
+
+    signal_pkg = TradingSignalPKG(pair)
+    cases.append(BenchmarkCase(
+        'dag.trading_signal_stream', len(m15_records),
+        step=lambda _, i: signal_pkg.generate_signal(m15_records[i], i, m15_records, debug=False),
+        group='dag'))
+    cases.append(BenchmarkCase('dag.trading_signal_batch', len(m15_records),
+                               run=lambda _: signal_pkg.generate_signals(m15_records), group='dag'))
+
+    # ---- バックテスト全体 ----
+    cases.append(BenchmarkCase(
+        'backtest.simple_strategy', len(m15_records),
+        run=lambda _: BacktestEngine(verbose=False).run_backtest(m15_records, simple_strategy),
+        group='backtest'))
+    cases.append(BenchmarkCase(
+        'backtest.pkg_signals', len(m15_records),
+        run=lambda _: BacktestEngine(verbose=False).run_backtest_with_signals(
+            m15_records, signal_pkg.generate_signals(m15_records)),
+        group='backtest'))
+
+    return [case for case in cases if case.bars > 0]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="PKGホットパスのベンチマーク")
+    parser.add_argument('--pair', default='USDJPY')
+    parser.add_argument('--bars', type=int, default=20000, help="1分足の本数")
+    parser.add_argument('--data-dir', default='./data/histdata')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--only', default='', help="ケース名に含まれる文字列で絞り込み")
+    parser.add_argument('--no-memory', action='store_true', help="メモリ計測を省略")
+    parser.add_argument('--baseline', help="比較するベースラインJSON")
+    parser.add_argument('--save-baseline', help="計測結果をJSONで保存")
+    parser.add_argument('--threshold', type=float,
+                        help="スループット・p50の劣化閾値（例: 0.25 = 25%%）")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    m1 = load_m1(args.pair, args.bars, args.data_dir)
+    cases = [case for case in build_cases(args.pair, m1) if args.only in case.name]
+
+    baseline = load_results(args.baseline) if args.baseline else None
+    results = run_benchmarks(cases, args.repeat, args.warmup, not args.no_memory,
+                             progress=lambda r: print(f"  {r.name}: {r.bars_per_sec:,.0f} bars/s",
+                                                      file=sys.stderr))
+    print(format_report(results, baseline))
+
+    if args.save_baseline:
+        save_results(args.save_baseline, results,
+                     {'pair': args.pair, 'm1_bars': len(m1), 'repeat': args.repeat})
+        print(f"\n💾 ベースライン保存: {args.save_baseline}")
+
+    if baseline is not None:
+        thresholds = ({'bars_per_sec': args.threshold, 'p50_ms': args.threshold}
+                      if args.threshold is not None else None)
+        regressions = compare(results, baseline, thresholds)
+        if regressions:
+            print(f"\n❌ 劣化 {len(regressions)}件:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\n✅ ベースラインからの劣化なし")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -120,6 +120,7 @@ def test_database_basic():
         print(f"     ✅ 統計取得成功: {stats}")
         
         # テストファイル削除
+        db.close()
         if os.path.exists("./data/test_basic.db"):
             os.remove("./data/test_basic.db")
             print("     ✅ テストファイル削除完了")
@@ -9,57 +9,26 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from typing import Dict, List
 import csv
-from datetime import datetime
+import numpy as np
+from data.price_store import CandleArrays
+from data.resampler import resample_with_counts
 from backtesting.backtest_engine import BacktestEngine
 from backtesting.memo_strategy import MemoBasedStrategy
 
 
 def convert_to_15min(m1_data: List[Dict]) -> List[Dict]:
-    """1分足データを15分足に変換"""
+    """
+    1分足データを15分足に変換
+    
+    15本揃った足のみ採用（最後の足は形成途中でも採用）
+    """
     if not m1_data:
         return []
     
-    m15_data = []
-    current_candle = None
-    candle_count = 0
-    
-    for minute in m1_data:
-        # タイムスタンプから15分区切りを計算
-        dt = datetime.fromisoformat(minute['timestamp'].replace(' ', 'T'))
-        minute_of_hour = dt.minute
-        
-        # 15分の開始（0, 15, 30, 45）
-        is_new_candle = minute_of_hour % 15 == 0
-        
-        if is_new_candle or current_candle is None:
-            # 前のキャンドルを保存
-            if current_candle and candle_count == 15:
-                m15_data.append(current_candle)
-            
-            # 新しいキャンドル開始
-            current_candle = {
-                'timestamp': minute['timestamp'],
-                'open': minute['open'],
-                'high': minute['high'],
-                'low': minute['low'],
-                'close': minute['close'],
-                'volume': minute['volume']
-            }
-            candle_count = 1
-        else:
-            # 既存キャンドルを更新
-            if current_candle:
-                current_candle['high'] = max(current_candle['high'], minute['high'])
-                current_candle['low'] = min(current_candle['low'], minute['low'])
-                current_candle['close'] = minute['close']
-                current_candle['volume'] += minute['volume']
-                candle_count += 1
-    
-    # 最後のキャンドル
-    if current_candle and candle_count > 0:
-        m15_data.append(current_candle)
-    
-    return m15_data
+    m15, counts = resample_with_counts(CandleArrays.from_records(m1_data), 'M15')
+    keep = counts == 15
+    keep[-1] = True
+    return m15.take(np.flatnonzero(keep)).to_records()
 
 
 def run_15min_backtest():
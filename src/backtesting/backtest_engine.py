@@ -42,8 +42,9 @@ class BacktestPosition:
 class BacktestEngine:
     """バックテストエンジン"""
     
-    def __init__(self, initial_balance: float = 1000000):
+    def __init__(self, initial_balance: float = 1000000, verbose: bool = True):
         self.initial_balance = initial_balance
+        self.verbose = verbose  # Falseなら進捗表示を抑制（パラメータ探索の大量実行用）
         self.balance = initial_balance
         self.positions: List[BacktestPosition] = []
         self.closed_positions: List[BacktestPosition] = []
@@ -136,22 +137,52 @@ class BacktestEngine:
         })
     
     def run_backtest(self, price_data: List[Dict], 
-                    strategy_func) -> Dict:
+                    strategy_func, start: int = 0,
+                    end: Optional[int] = None) -> Dict:
         """
         バックテスト実行
         
         Args:
             price_data: 価格データのリスト
             strategy_func: シグナル生成関数
+            start, end: 売買する足の範囲 [start, end)。
+                        範囲外の足も履歴として strategy_func から参照できる
         
         Returns:
             バックテスト結果
         """
-        print(f"🚀 バックテスト開始: {len(price_data)}本のキャンドル")
+        return self._run(price_data,
+                         lambda candle, i: strategy_func(candle, i, price_data),
+                         start, end)
+    
+    def run_backtest_with_signals(self, price_data: List[Dict],
+                                  signals) -> Dict:
+        """
+        事前計算済みシグナルでバックテスト実行
+        
+        Args:
+            price_data: 価格データのリスト
+            signals: 各キャンドルのシグナル列（TradingSignalPKG.generate_signals 等）
+        
+        Returns:
+            バックテスト結果
+        """
+        if len(signals) != len(price_data):
+            raise ValueError("signals must have the same length as price_data")
+        signal_list = [int(s) for s in signals]
+        return self._run(price_data, lambda candle, i: signal_list[i])
+    
+    def _run(self, price_data: List[Dict], signal_at, start: int = 0,
+             end: Optional[int] = None) -> Dict:
+        """バックテストのメインループ"""
+        end = len(price_data) if end is None else end
+        if self.verbose:
+            print(f"🚀 バックテスト開始: {end - start}本のキャンドル")
         
-        for i, candle in enumerate(price_data):
+        for i in range(start, end):
+            candle = price_data[i]
             # ストラテジーからシグナル取得
-            signal = strategy_func(candle, i, price_data)
+            signal = signal_at(candle, i)
             
             # シグナル処理
             action = self.process_signal(
@@ -160,12 +191,12 @@ class BacktestEngine:
                 signal
             )
             
-            if action and i % 100 == 0:
+            if self.verbose and action and i % 100 == 0:
                 print(f"  {i}/{len(price_data)}: {action} @ {candle['close']:.2f}")
         
         # 残ポジションクローズ
-        if price_data:
-            last_candle = price_data[-1]
+        if end > start:
+            last_candle = price_data[end - 1]
             for pos in self.positions:
                 if pos.is_open:
                     self._close_position(
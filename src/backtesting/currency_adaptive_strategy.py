@@ -12,28 +12,43 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
 import csv
 
 
 class CurrencyAdaptiveStrategy:
     """通貨ペア適応型戦略"""
     
-    def __init__(self, pair: str):
+    # パラメータ探索の対象となる閾値
+    TUNABLE_PARAMS = ("momi_threshold", "profit_target", "stop_loss",
+                      "atr_multiplier", "max_consecutive_losses")
+    
+    def __init__(self, pair: str, params: Optional[Dict[str, float]] = None,
+                 verbose: bool = True):
         self.pair = pair
         self.prev_candles = []
         self.position_direction = 0
         self.entry_price = None
         self.consecutive_losses = 0
+        # 足インデックス→ATRの事前計算値（ウォークフォワード等で全期間分を共有）
+        self.atr_cache: Optional[Sequence[float]] = None
         
         # 通貨ペア別パラメータ設定
         self.params = self._get_currency_params(pair)
         
-        print(f"🎯 {pair}用パラメータ設定:")
-        for key, value in self.params.items():
-            print(f"  {key}: {value}")
+        # 指定があれば閾値を上書き（パラメータ探索用）
+        for key, value in (params or {}).items():
+            if key not in self.TUNABLE_PARAMS:
+                raise ValueError(f"Unknown parameter: {key}")
+            self.params[key] = value
+        
+        if verbose:
+            print(f"🎯 {pair}用パラメータ設定:")
+            for key, value in self.params.items():
+                print(f"  {key}: {value}")
     
-    def _get_currency_params(self, pair: str) -> Dict[str, float]:
+    @staticmethod
+    def _get_currency_params(pair: str) -> Dict[str, float]:
         """通貨ペア別パラメータを取得"""
         
         # 基本ATR分析に基づく適応型設定
@@ -118,7 +133,10 @@ class CurrencyAdaptiveStrategy:
             return 3
         
         # 適応型ATR計算
-        current_atr = self.calculate_adaptive_atr(self.prev_candles)
+        if self.atr_cache is not None:
+            current_atr = self.atr_cache[index]
+        else:
+            current_atr = self.calculate_adaptive_atr(self.prev_candles)
         adaptive_threshold = current_atr * self.params["atr_multiplier"]
         
         # 動的もみ判定
@@ -0,0 +1,520 @@
+"""
+パラメータ探索（スイープ）ランナー
+
+OptimizedStrategy / CurrencyAdaptiveStrategy / RestoredHighPerformanceStrategy の
+手調整パラメータを、通貨ペアごとにグリッド・ランダム・ラテン超方格サンプリングで探索する
+
+- 価格配列は共有メモリに1回だけ配置し、ワーカープロセスはコピーせずに列を直接参照する
+- 各バックテストはプロセスプールで並列実行し、完了順に結果を受け取って順位表を更新する
+"""
+
+import bisect
+import itertools
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from multiprocessing.util import Finalize
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtesting.backtest_engine import BacktestEngine
+from backtesting.currency_adaptive_strategy import CurrencyAdaptiveStrategy
+from backtesting.optimized_strategy import OptimizedStrategy
+from backtesting.restored_strategy import RestoredHighPerformanceStrategy
+from data.price_store import (
+    CANDLE_FIELDS, CandleArrays, CandleRecordView, ColumnarPriceStore,
+)
+
+
+STRATEGIES = {
+    'optimized': OptimizedStrategy,
+    'adaptive': CurrencyAdaptiveStrategy,
+    'restored': RestoredHighPerformanceStrategy,
+}
+
+SAMPLING_METHODS = ('grid', 'random', 'lhs')
+
+
+def base_params(strategy: str, pair: str) -> Dict[str, float]:
+    """戦略の現行（手調整）パラメータ"""
+    if strategy == 'optimized':
+        return OptimizedStrategy._get_optimized_params(pair)
+    if strategy == 'adaptive':
+        return CurrencyAdaptiveStrategy._get_currency_params(pair)
+    if strategy == 'restored':
+        return RestoredHighPerformanceStrategy(pair).params
+    raise ValueError(f"Unknown strategy: {strategy}")
+
+
+@dataclass
+class ParameterSpace:
+    """
+    探索空間
+
+    Attributes:
+        values: 離散候補（パラメータ名→候補値のリスト）
+        bounds: 連続区間（パラメータ名→(下限, 上限)）。両端が int なら整数で生成
+    """
+    values: Dict[str, Sequence] = field(default_factory=dict)
+    bounds: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.values) + list(self.bounds)
+
+    @classmethod
+    def around(cls, params: Dict[str, float], scale: float = 0.5) -> 'ParameterSpace':
+        """
+        現行パラメータの周辺を探索空間にする
+
+        実数は ±scale 倍の区間、整数（連敗許容数など）は ±1 の候補
+        """
+        space = cls()
+        for name, value in params.items():
+            if isinstance(value, int):
+                space.values[name] = [v for v in (value - 1, value, value + 1) if v >= 1]
+            else:
+                space.bounds[name] = (value * (1 - scale), value * (1 + scale))
+        return space
+
+    def sample(self, method: str = 'lhs', samples: int = 32,
+               seed: Optional[int] = None, steps: int = 3) -> List[Dict[str, float]]:
+        """
+        パラメータ組を生成
+
+        Args:
+            method: 'grid' / 'random' / 'lhs'（ラテン超方格）
+            samples: random / lhs の生成数
+            steps: grid で連続区間を分割する点数
+        """
+        if method == 'grid':
+            return self.grid(steps)
+        if method == 'random':
+            return self.random(samples, seed)
+        if method == 'lhs':
+            return self.latin_hypercube(samples, seed)
+        raise ValueError(f"Unknown sampling method: {method}")
+
+    def grid(self, steps: int = 3) -> List[Dict[str, float]]:
+        """全組み合わせ（連続区間は steps 点に等分）"""
+        axes = dict(self.values)
+        for name, (low, high) in self.bounds.items():
+            points = np.linspace(low, high, steps)
+            if _is_int_bounds(low, high):
+                axes[name] = sorted(set(int(round(p)) for p in points))
+            else:
+                axes[name] = [float(p) for p in points]
+        names = list(axes)
+        return [dict(zip(names, combo)) for combo in itertools.product(*axes.values())]
+
+    def random(self, samples: int, seed: Optional[int] = None) -> List[Dict[str, float]]:
+        """一様ランダムサンプリング"""
+        rng = np.random.default_rng(seed)
+        return self._from_unit(rng.random((samples, len(self.names))))
+
+    def latin_hypercube(self, samples: int,
+                        seed: Optional[int] = None) -> List[Dict[str, float]]:
+        """
+        ラテン超方格サンプリング
+
+        各次元を samples 個の層に分け、各層からちょうど1点を取る
+        """
+        rng = np.random.default_rng(seed)
+        dims = len(self.names)
+        strata = np.column_stack([rng.permutation(samples) for _ in range(dims)]) \
+            if dims else np.empty((samples, 0))
+        return self._from_unit((strata + rng.random((samples, dims))) / samples)
+
+    def _from_unit(self, unit: np.ndarray) -> List[Dict[str, float]]:
+        """[0, 1) の一様点を各次元の値に写像"""
+        columns: Dict[str, list] = {}
+        col = 0
+        for name, candidates in self.values.items():
+            index = np.minimum((unit[:, col] * len(candidates)).astype(int),
+                               len(candidates) - 1)
+            columns[name] = [candidates[i] for i in index]
+            col += 1
+        for name, (low, high) in self.bounds.items():
+            points = low + unit[:, col] * (high - low)
+            if _is_int_bounds(low, high):
+                columns[name] = [int(round(p)) for p in points]
+            else:
+                columns[name] = [float(p) for p in points]
+            col += 1
+        names = list(columns)
+        return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def _is_int_bounds(low, high) -> bool:
+    return isinstance(low, int) and isinstance(high, int)
+
+
+@dataclass(frozen=True)
+class SharedCandlesHandle:
+    """共有メモリ上のキャンドル列への参照（ワーカーへ渡す軽量ハンドル）"""
+    name: str
+    rows: int
+    pair: str
+    timeframe: str
+
+    def attach(self) -> Tuple[shared_memory.SharedMemory, CandleArrays]:
+        """共有メモリに接続し、コピーなしの列ビューを返す"""
+        shm = shared_memory.SharedMemory(name=self.name)
+        return shm, _column_views(shm, self.rows, self.pair, self.timeframe)
+
+
+def _column_views(shm: shared_memory.SharedMemory, rows: int,
+                  pair: str, timeframe: str) -> CandleArrays:
+    columns = {}
+    for i, (name, dtype) in enumerate(CANDLE_FIELDS):
+        columns[name] = np.ndarray((rows,), dtype=dtype, buffer=shm.buf, offset=i * rows * 8)
+    return CandleArrays.from_columns(columns, pair, timeframe)
+
+
+class SharedCandles:
+    """
+    キャンドル列を共有メモリに配置
+
+    列は [timestamp, open, high, low, close, volume] の順に連続して並ぶ（各8バイト）
+    作成したプロセスが close() で解放する
+    """
+
+    def __init__(self, candles: CandleArrays):
+        rows = len(candles)
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=max(1, rows * 8 * len(CANDLE_FIELDS)))
+        self.handle = SharedCandlesHandle(self._shm.name, rows,
+                                          candles.pair, candles.timeframe)
+        views = _column_views(self._shm, rows, candles.pair, candles.timeframe)
+        for name, column in views.columns().items():
+            column[:] = getattr(candles, name)
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self) -> 'SharedCandles':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@dataclass
+class SweepResult:
+    """1パラメータ組のバックテスト結果"""
+    pair: str
+    strategy: str
+    params: Dict[str, float]
+    metrics: Dict[str, float]
+
+    def score(self, metric: str = 'return_pct', min_trades: int = 1) -> Tuple[int, float]:
+        """順位付けキー（取引数が min_trades 未満の結果は常に下位）"""
+        return (int(self.metrics['total_trades'] >= min_trades), self.metrics[metric])
+
+
+@dataclass
+class SweepJob:
+    """1回分のバックテスト指定（足の範囲 [start, end) を売買対象にする）"""
+    pair: str
+    params: Dict[str, float]
+    start: int = 0
+    end: Optional[int] = None
+
+
+def adaptive_atr_series(market_data: List[Dict], period: int = 14) -> List[float]:
+    """
+    各足で戦略が計算するATR（calculate_adaptive_atr）を全期間分まとめて計算
+
+    戦略は足 index で直前 period 本の真の値幅の平均を使うため、
+    パラメータや期間窓に依存せず1回の計算を共有できる（値は逐次計算と完全一致）
+    """
+    return _atr_series([c['high'] for c in market_data],
+                       [c['low'] for c in market_data],
+                       [c['close'] for c in market_data], period)
+
+
+def _atr_series(highs: Sequence[float], lows: Sequence[float],
+                closes: Sequence[float], period: int = 14) -> List[float]:
+    """高値・安値・終値の列から adaptive_atr_series と同じ値を計算"""
+    lookback = period + 1
+    true_ranges = [0.0]
+    for i in range(1, len(closes)):
+        high = highs[i]
+        low = lows[i]
+        prev_close = closes[i - 1]
+        true_ranges.append(max(high - low, abs(high - prev_close), abs(low - prev_close)))
+
+    series = [0.001] * len(closes)
+    for index in range(lookback, len(closes)):
+        window = true_ranges[index - period:index]
+        series[index] = sum(window) / len(window)
+    return series
+
+
+def run_parameter_backtest(strategy: str, pair: str, market_data: List[Dict],
+                           params: Dict[str, float],
+                           initial_balance: float = 1000000,
+                           start: int = 0, end: Optional[int] = None,
+                           atr_cache: Optional[Sequence[float]] = None) -> Dict:
+    """
+    1パラメータ組でバックテストを実行
+
+    optimized / adaptive は run_adaptive_backtest と同じ利確・損切りルール、
+    restored は戦略自身のポジション管理（クローズシグナル）で実行する
+
+    Args:
+        start, end: 売買する足の範囲 [start, end)（それ以前の足は指標計算の履歴に使う）
+        atr_cache: adaptive_atr_series の結果（省略時は戦略が足ごとに計算）
+    """
+    engine = BacktestEngine(initial_balance=initial_balance, verbose=False)
+    if strategy == 'restored':
+        instance = RestoredHighPerformanceStrategy(pair, params=params)
+        return engine.run_backtest(market_data, instance.generate_signal, start, end)
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    instance = STRATEGIES[strategy](pair, params=params, verbose=False)
+    instance.atr_cache = atr_cache
+    return _run_exit_rule_backtest(engine, instance, market_data, start=start, end=end)
+
+
+def _run_exit_rule_backtest(engine: BacktestEngine, strategy, market_data: List[Dict],
+                            warmup: int = 20, start: int = 0,
+                            end: Optional[int] = None) -> Dict:
+    """利確・損切り率（params の profit_target / stop_loss）による売買ループ"""
+    profit_target = strategy.params["profit_target"]
+    stop_loss = strategy.params["stop_loss"]
+    end = len(market_data) if end is None else end
+    position = None
+
+    for i in range(max(warmup, start), end):
+        candle = market_data[i]
+        signal = strategy.generate_signal(candle, i, market_data)
+
+        if signal in [1, 2] and position is None:
+            position = engine.open_position(candle['timestamp'], candle['close'], signal, 1.0)
+        elif position is not None and position.is_open:
+            price = candle['close']
+            if position.direction == 1:
+                should_exit = (price >= position.entry_price * (1 + profit_target) or
+                               price <= position.entry_price * (1 - stop_loss))
+            else:
+                should_exit = (price <= position.entry_price * (1 - profit_target) or
+                               price >= position.entry_price * (1 + stop_loss))
+            if should_exit:
+                pnl = engine.close_position(position, candle['timestamp'], price)
+                strategy.update_performance("loss" if pnl < 0 else "win")
+                position = None
+
+    if position is not None and position.is_open:
+        last = market_data[end - 1]
+        engine.close_position(position, last['timestamp'], last['close'])
+
+    return engine.calculate_performance()
+
+
+# ワーカープロセス内のキャッシュ（共有メモリ名→(接続, レコードビュー, ATR)）
+_WORKER_DATA: Dict[str, Tuple[shared_memory.SharedMemory, CandleRecordView, List[float]]] = {}
+
+
+def _worker_data(handle: SharedCandlesHandle) -> Tuple[CandleRecordView, List[float]]:
+    """
+    共有メモリの列を戦略用レコードビューとATRにする（ワーカーごとに1回）
+
+    レコードはコピーせず、戦略が参照した行だけを共有メモリ上の列から組み立てる
+    """
+    cached = _WORKER_DATA.get(handle.name)
+    if cached is None:
+        if not _WORKER_DATA:
+            Finalize(None, _release_worker_data, exitpriority=10)
+        shm, candles = handle.attach()
+        atr = _atr_series(candles.high.tolist(), candles.low.tolist(),
+                          candles.close.tolist())
+        cached = _WORKER_DATA[handle.name] = (shm, candles.record_view(), atr)
+    return cached[1], cached[2]
+
+
+def _release_worker_data():
+    """ワーカー終了時に共有メモリへの接続を閉じる"""
+    while _WORKER_DATA:
+        _, (shm, records, _atr) = _WORKER_DATA.popitem()
+        # 列ビューが共有メモリのバッファを参照している間は close できない
+        del records
+        shm.close()
+
+
+def _run_task(handle: SharedCandlesHandle, strategy: str, params: Dict[str, float],
+              initial_balance: float, start: int, end: Optional[int]) -> Dict:
+    records, atr = _worker_data(handle)
+    return run_parameter_backtest(strategy, handle.pair, records, params,
+                                  initial_balance, start, end, atr)
+
+
+class ParameterSweep:
+    """
+    並列パラメータスイープ
+
+    使い方:
+        sweep = ParameterSweep('optimized', max_workers=4)
+        plan = sweep.plan(['USDJPY'], method='lhs', samples=64, seed=0)
+        ranked = sweep.run({'USDJPY': candles}, plan)
+        print(format_table(ranked))
+    """
+
+    def __init__(self, strategy: str = 'optimized', metric: str = 'return_pct',
+                 max_workers: Optional[int] = None, min_trades: int = 1,
+                 initial_balance: float = 1000000):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        self.strategy = strategy
+        self.metric = metric
+        self.max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self.min_trades = min_trades
+        self.initial_balance = initial_balance
+
+    def plan(self, pairs: Sequence[str], method: str = 'lhs', samples: int = 32,
+             seed: Optional[int] = None, scale: float = 0.5,
+             spaces: Optional[Dict[str, ParameterSpace]] = None
+             ) -> Dict[str, List[Dict[str, float]]]:
+        """
+        通貨ペアごとのパラメータ組を生成
+
+        spaces 未指定のペアは現行パラメータの ±scale 倍の空間を探索する
+        （現行パラメータ自体も必ず含める）
+        """
+        spaces = spaces or {}
+        plan = {}
+        for pair in pairs:
+            current = base_params(self.strategy, pair)
+            space = spaces.get(pair) or ParameterSpace.around(current, scale)
+            param_sets = space.sample(method, samples, seed)
+            plan[pair] = [current] + [dict(current, **p) for p in param_sets]
+        return plan
+
+    def run(self, pair_candles: Dict[str, CandleArrays],
+            plan: Dict[str, List[Dict[str, float]]],
+            on_result: Optional[Callable[[SweepResult, List[SweepResult]], None]] = None
+            ) -> List[SweepResult]:
+        """
+        スイープ実行
+
+        Args:
+            pair_candles: 通貨ペア→キャンドル列
+            plan: 通貨ペア→パラメータ組のリスト（plan() の戻り値）
+            on_result: 結果1件ごとに (結果, 現時点の順位表) で呼ばれるコールバック
+
+        Returns:
+            スコア降順の結果リスト
+        """
+        ranked: List[SweepResult] = []
+        keys: List[Tuple[int, float]] = []
+        jobs = [SweepJob(pair, params) for pair, param_sets in plan.items()
+                for params in param_sets]
+
+        for job, metrics in self.execute(pair_candles, jobs):
+            result = SweepResult(job.pair, self.strategy, job.params, metrics)
+            key = result.score(self.metric, self.min_trades)
+            # 降順で保持するため符号を反転したキーで挿入位置を探す
+            position = bisect.bisect_right(keys, (-key[0], -key[1]))
+            keys.insert(position, (-key[0], -key[1]))
+            ranked.insert(position, result)
+            if on_result:
+                on_result(result, ranked)
+        return ranked
+
+    def execute(self, pair_candles: Dict[str, CandleArrays],
+                jobs: Sequence[SweepJob]) -> Iterator[Tuple[SweepJob, Dict]]:
+        """
+        バックテストを実行し、完了順に (ジョブ, 結果) を返す
+
+        レコード変換とATRは通貨ペアごとに1回だけ計算し、全ジョブで共有する
+        （並列時はワーカープロセスごとに1回）
+        """
+        pairs = sorted({job.pair for job in jobs})
+
+        if self.max_workers <= 1:
+            data = {}
+            for pair in pairs:
+                records = pair_candles[pair].to_records()
+                data[pair] = (records, adaptive_atr_series(records))
+            for job in jobs:
+                records, atr = data[job.pair]
+                yield job, run_parameter_backtest(self.strategy, job.pair, records, job.params,
+                                                  self.initial_balance, job.start, job.end, atr)
+            return
+
+        shared = {pair: SharedCandles(pair_candles[pair]) for pair in pairs}
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    executor.submit(_run_task, shared[job.pair].handle, self.strategy,
+                                    job.params, self.initial_balance, job.start, job.end): job
+                    for job in jobs
+                }
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+        finally:
+            for block in shared.values():
+                block.close()
+
+
+def best_params(results: List[SweepResult]) -> Dict[str, Dict[str, float]]:
+    """順位表から通貨ペアごとの最良パラメータを抽出"""
+    best: Dict[str, Dict[str, float]] = {}
+    for result in results:
+        best.setdefault(result.pair, result.params)
+    return best
+
+
+def format_table(results: List[SweepResult], top: int = 10,
+                 metric: str = 'return_pct') -> str:
+    """順位表を文字列に整形"""
+    lines = [f"{'順位':>4} {'通貨ペア':<8} {metric:>12} {'取引数':>6} {'勝率':>6} "
+             f"{'最大DD':>7}  パラメータ"]
+    for rank, result in enumerate(results[:top], 1):
+        m = result.metrics
+        params = ", ".join(f"{k}={_format_value(v)}" for k, v in result.params.items())
+        lines.append(f"{rank:>4} {result.pair:<8} {m[metric]:>12.4f} {m['total_trades']:>6} "
+                     f"{m['win_rate']:>5.1f}% {m['max_drawdown']:>6.2f}%  {params}")
+    return "\n".join(lines)
+
+
+def _format_value(value) -> str:
+    return f"{value:.6g}" if isinstance(value, float) else str(value)
+
+
+def main():
+    """3ヶ月15分足で最適化戦略のパラメータを探索"""
+    pairs = ["USDJPY", "EURJPY", "EURUSD", "GBPJPY"]
+    store = ColumnarPriceStore()
+
+    pair_candles = {}
+    for pair in pairs:
+        if os.path.exists(store.csv_path(pair, "M15_3months")):
+            pair_candles[pair] = store.load(pair, "M15_3months")
+        else:
+            print(f"❌ データファイルなし: {store.csv_path(pair, 'M15_3months')}")
+
+    sweep = ParameterSweep('optimized')
+    plan = sweep.plan(list(pair_candles), method='lhs', samples=64, seed=0)
+    total = sum(len(p) for p in plan.values())
+    print(f"🚀 パラメータ探索開始: {total}通り × {sweep.max_workers}プロセス")
+
+    def progress(result: SweepResult, ranked: List[SweepResult]):
+        if len(ranked) % 50 == 0 or len(ranked) == total:
+            print(f"  {len(ranked)}/{total} 完了  暫定1位: {ranked[0].pair} "
+                  f"{ranked[0].metrics[sweep.metric]:.4f}")
+
+    ranked = sweep.run(pair_candles, plan, on_result=progress)
+    for pair in pair_candles:
+        print(f"\n📊 {pair} 上位パラメータ")
+        print(format_table([r for r in ranked if r.pair == pair], top=5))
+
+
+if __name__ == "__main__":
+    main()
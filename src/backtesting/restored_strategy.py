@@ -7,14 +7,18 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 from pkg.function_factory import PKGFunctionFactory
 
 
 class RestoredHighPerformanceStrategy:
     """復元版高パフォーマンス戦略（元の成功版）"""
     
-    def __init__(self, pair: str = "USDJPY"):
+    # パラメータ探索の対象となる閾値
+    TUNABLE_PARAMS = ("momi_threshold", "profit_target", "stop_loss", "dokyaku_threshold")
+    
+    def __init__(self, pair: str = "USDJPY",
+                 params: Optional[Dict[str, float]] = None):
         self.factory = PKGFunctionFactory()
         self.pair = pair
         
@@ -45,6 +49,17 @@ class RestoredHighPerformanceStrategy:
             self.profit_target = 0.80   # 80pips
             self.stop_loss = 0.40       # 40pips
             self.dokyaku_threshold = 0.003  # 0.3%
+        
+        # 指定があれば閾値を上書き（パラメータ探索用）
+        for key, value in (params or {}).items():
+            if key not in self.TUNABLE_PARAMS:
+                raise ValueError(f"Unknown parameter: {key}")
+            setattr(self, key, value)
+    
+    @property
+    def params(self) -> Dict[str, float]:
+        """現在の閾値"""
+        return {key: getattr(self, key) for key in self.TUNABLE_PARAMS}
     
     def generate_signal(self, candle: Dict, index: int, 
                        all_candles: List[Dict]) -> int:
@@ -0,0 +1,251 @@
+"""
+ウォークフォワード最適化
+
+履歴を「インサンプル（最適化）→アウトオブサンプル（検証）」の窓に分けて前進させ、
+各インサンプル窓で選んだパラメータを直後の未知区間で評価する
+（run_3months_backtest / run_adaptive_backtest のインサンプル成績だけでは過剰適合を見抜けない）
+
+- 全窓×全パラメータ組を ParameterSweep のプロセスプールでまとめて並列実行する
+- 窓は元の足列上の範囲 [start, end) として扱い、足のコピーや指標の再計算をしない
+  （レコード変換とATRは通貨ペアごとに1回だけ計算され、重なり合う窓の間で共有される）
+"""
+
+import os
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtesting.parameter_sweep import (
+    ParameterSweep, SweepJob, SweepResult, format_table
+)
+from data.price_store import CandleArrays, ColumnarPriceStore
+
+
+@dataclass
+class WalkForwardWindow:
+    """1窓分の足インデックス範囲（いずれも [start, end)）"""
+    index: int
+    train_start: int
+    train_end: int
+    test_start: int
+    test_end: int
+
+
+def walk_forward_windows(total: int, train_bars: int, test_bars: int,
+                         step: Optional[int] = None,
+                         anchored: bool = False) -> List[WalkForwardWindow]:
+    """
+    ウォークフォワード窓を生成
+
+    Args:
+        total: 足の本数
+        train_bars: インサンプル本数
+        test_bars: アウトオブサンプル本数
+        step: 窓の移動量（既定は test_bars = 検証区間が重ならない）
+        anchored: Trueならインサンプル開始を先頭に固定（拡大窓）
+    """
+    step = step or test_bars
+    if train_bars <= 0 or test_bars <= 0 or step <= 0:
+        raise ValueError("train_bars, test_bars and step must be positive")
+
+    windows = []
+    train_end = train_bars
+    while train_end + test_bars <= total:
+        windows.append(WalkForwardWindow(
+            index=len(windows),
+            train_start=0 if anchored else train_end - train_bars,
+            train_end=train_end,
+            test_start=train_end,
+            test_end=train_end + test_bars,
+        ))
+        train_end += step
+    if not windows:
+        raise ValueError(f"Not enough bars for walk-forward: {total} < {train_bars + test_bars}")
+    return windows
+
+
+@dataclass
+class WindowResult:
+    """1窓の最適化・検証結果"""
+    window: WalkForwardWindow
+    params: Dict[str, float]
+    in_sample: Dict
+    out_of_sample: Dict
+    candidates: int
+
+
+@dataclass
+class WalkForwardReport:
+    """通貨ペアごとのウォークフォワード結果"""
+    pair: str
+    strategy: str
+    initial_balance: float
+    windows: List[WindowResult]
+
+    def summary(self) -> Dict:
+        """アウトオブサンプル成績の集計（各窓は初期資金から独立に評価）"""
+        oos = [w.out_of_sample for w in self.windows]
+        total_pnl = sum(m['total_pnl'] for m in oos)
+        total_trades = sum(m['total_trades'] for m in oos)
+        winning = sum(m['winning_trades'] for m in oos)
+        is_return = sum(w.in_sample['return_pct'] for w in self.windows) / len(self.windows)
+        oos_return = total_pnl / self.initial_balance * 100
+        # 窓ごとに本数が異なる（train/test比・拡大窓）ため、効率は1本あたりの収益で比較する
+        is_per_bar = sum(w.in_sample['return_pct'] / (w.window.train_end - w.window.train_start)
+                         for w in self.windows) / len(self.windows)
+        oos_per_bar = oos_return / sum(w.window.test_end - w.window.test_start
+                                       for w in self.windows)
+        return {
+            'windows': len(self.windows),
+            'total_pnl': total_pnl,
+            'total_trades': total_trades,
+            'winning_trades': winning,
+            'losing_trades': sum(m['losing_trades'] for m in oos),
+            'win_rate': winning / total_trades * 100 if total_trades else 0,
+            'return_pct': oos_return,
+            'max_drawdown': max(m['max_drawdown'] for m in oos),
+            'in_sample_return_pct': is_return,
+            'in_sample_return_per_bar': is_per_bar,
+            'return_per_bar': oos_per_bar,
+            # 1本あたりのインサンプル収益に対する検証区間収益の比（1に近いほど過剰適合が少ない）
+            'efficiency': oos_per_bar / is_per_bar if is_per_bar else None,
+        }
+
+
+class WalkForwardOptimizer:
+    """
+    ウォークフォワード最適化
+
+    使い方:
+        sweep = ParameterSweep('optimized', max_workers=4)
+        plan = sweep.plan(['USDJPY'], method='lhs', samples=32, seed=0)
+        optimizer = WalkForwardOptimizer(sweep, train_bars=960, test_bars=480)
+        reports = optimizer.run({'USDJPY': candles}, plan)
+    """
+
+    def __init__(self, sweep: ParameterSweep, train_bars: int, test_bars: int,
+                 step: Optional[int] = None, anchored: bool = False):
+        self.sweep = sweep
+        self.train_bars = train_bars
+        self.test_bars = test_bars
+        self.step = step
+        self.anchored = anchored
+
+    def run(self, pair_candles: Dict[str, CandleArrays],
+            plan: Dict[str, List[Dict[str, float]]]) -> Dict[str, WalkForwardReport]:
+        """
+        全通貨ペアのウォークフォワード最適化を実行
+
+        Args:
+            pair_candles: 通貨ペア→キャンドル列
+            plan: 通貨ペア→候補パラメータ組（ParameterSweep.plan の戻り値）
+        """
+        windows = {
+            pair: walk_forward_windows(len(pair_candles[pair]), self.train_bars,
+                                       self.test_bars, self.step, self.anchored)
+            for pair in plan
+        }
+
+        # 1. 全窓のインサンプル最適化（全ジョブを1つのプールで並列実行）
+        train_jobs = {}
+        for pair, param_sets in plan.items():
+            for window in windows[pair]:
+                for i, params in enumerate(param_sets):
+                    job = SweepJob(pair, params, window.train_start, window.train_end)
+                    train_jobs[id(job)] = (job, window.index, i)
+        in_sample: Dict[tuple, Dict] = {}
+        for job, metrics in self.sweep.execute(pair_candles,
+                                               [job for job, _, _ in train_jobs.values()]):
+            _, window_index, param_index = train_jobs[id(job)]
+            in_sample[(job.pair, window_index, param_index)] = metrics
+
+        # 2. 各窓の最良パラメータ（同点なら候補順で先のもの）
+        best: Dict[tuple, int] = {}
+        for pair, param_sets in plan.items():
+            for window in windows[pair]:
+                best[(pair, window.index)] = max(
+                    range(len(param_sets)),
+                    key=lambda i: SweepResult(
+                        pair, self.sweep.strategy, param_sets[i],
+                        in_sample[(pair, window.index, i)]
+                    ).score(self.sweep.metric, self.sweep.min_trades)
+                )
+
+        # 3. 直後のアウトオブサンプル区間で検証
+        test_jobs = {}
+        for pair, param_sets in plan.items():
+            for window in windows[pair]:
+                job = SweepJob(pair, param_sets[best[(pair, window.index)]],
+                               window.test_start, window.test_end)
+                test_jobs[id(job)] = (job, window.index)
+        out_of_sample: Dict[tuple, Dict] = {}
+        for job, metrics in self.sweep.execute(pair_candles,
+                                               [job for job, _ in test_jobs.values()]):
+            out_of_sample[(job.pair, test_jobs[id(job)][1])] = metrics
+
+        reports = {}
+        for pair, param_sets in plan.items():
+            results = []
+            for window in windows[pair]:
+                chosen = best[(pair, window.index)]
+                results.append(WindowResult(
+                    window=window,
+                    params=param_sets[chosen],
+                    in_sample=in_sample[(pair, window.index, chosen)],
+                    out_of_sample=out_of_sample[(pair, window.index)],
+                    candidates=len(param_sets),
+                ))
+            reports[pair] = WalkForwardReport(pair, self.sweep.strategy,
+                                              self.sweep.initial_balance, results)
+        return reports
+
+
+def print_report(report: WalkForwardReport, candles: Optional[CandleArrays] = None):
+    """ウォークフォワード結果を表示"""
+    print(f"\n{'='*70}")
+    print(f"📊 {report.pair} ウォークフォワード結果（{report.strategy}）")
+    print(f"{'='*70}")
+    times = candles.timestamps_str() if candles is not None else None
+    for result in report.windows:
+        w = result.window
+        label = (f"{times[w.test_start][:10]}〜{times[w.test_end - 1][:10]}"
+                 if times else f"{w.test_start}-{w.test_end}")
+        print(f"  窓{w.index + 1:>2} 検証 {label}: "
+              f"IS {result.in_sample['return_pct']:>8.4f}% → "
+              f"OOS {result.out_of_sample['return_pct']:>8.4f}% "
+              f"({result.out_of_sample['total_trades']}回)")
+    summary = report.summary()
+    print(f"  OOS合計: {summary['return_pct']:.4f}%  取引 {summary['total_trades']}回  "
+          f"勝率 {summary['win_rate']:.1f}%  最大DD {summary['max_drawdown']:.2f}%")
+    if summary['efficiency'] is not None:
+        print(f"  ウォークフォワード効率: {summary['efficiency']:.2f}")
+
+
+def main():
+    """3ヶ月15分足で最適化戦略のウォークフォワード検証（学習2週間→検証1週間）"""
+    pairs = ["USDJPY", "EURJPY", "EURUSD", "GBPJPY"]
+    store = ColumnarPriceStore()
+
+    pair_candles = {}
+    for pair in pairs:
+        if os.path.exists(store.csv_path(pair, "M15_3months")):
+            pair_candles[pair] = store.load(pair, "M15_3months")
+        else:
+            print(f"❌ データファイルなし: {store.csv_path(pair, 'M15_3months')}")
+
+    sweep = ParameterSweep('optimized')
+    plan = sweep.plan(list(pair_candles), method='lhs', samples=32, seed=0)
+    optimizer = WalkForwardOptimizer(sweep, train_bars=96 * 10, test_bars=96 * 5)
+    print(f"🚀 ウォークフォワード最適化開始: {sweep.max_workers}プロセス")
+
+    for pair, report in optimizer.run(pair_candles, plan).items():
+        print_report(report, pair_candles[pair])
+        last = report.windows[-1]
+        print("  直近窓の採用パラメータ:")
+        print(format_table([SweepResult(pair, report.strategy, last.params, last.in_sample)], top=1))
+
+
+if __name__ == "__main__":
+    main()
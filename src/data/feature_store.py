@@ -0,0 +1,283 @@
+"""
+特徴量ストア（FeatureBundle 履歴の追記専用ディスク保存）
+通貨ペア×時間足×エクスポーターバージョンごとに、固定幅の float32 行列と時刻列をチャンク単位で保存する
+
+ディレクトリ構成:
+    {root}/{pair}_{timeframe}/v{version}/manifest.json
+    {root}/{pair}_{timeframe}/v{version}/{連番}.ts.npy   時刻（エポックナノ秒 int64）
+    {root}/{pair}_{timeframe}/v{version}/{連番}.f32.npy  特徴量（行数×特徴量数 float32）
+
+- 書き込みはチャンク容量分をメモリに貯めてまとめて行う（満杯のチャンクは以後変更しない）
+- 読み込みは .npy をメモリマップし、マニフェストの各チャンクの時刻範囲で対象チャンクだけを開く
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+DEFAULT_CHUNK_ROWS = 65536
+
+TimeLike = Union[datetime, np.datetime64, str, int]
+
+
+def to_epoch_ns(timestamp: TimeLike) -> int:
+    """時刻をエポックナノ秒に変換（タイムゾーンなしの時刻はUTCとして解釈、整数はそのまま）"""
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+    if isinstance(timestamp, datetime) and timestamp.tzinfo is not None:
+        # 浮動小数の timestamp() は丸め誤差が出るため、UTCのnaive時刻にして整数で変換
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return int(np.datetime64(timestamp, 'ns').astype(np.int64))
+
+
+def _write_json(path: str, data: Dict):
+    """一時ファイルに書いてから置き換え（読み込み中のプロセスが途中状態を見ない）"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _write_npy(path: str, array: np.ndarray):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class FeatureFrame:
+    """特徴量の時系列（timestamp はエポックナノ秒、values は行数×特徴量数）"""
+    feature_names: Tuple[str, ...]
+    timestamp: np.ndarray
+    values: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def column(self, name: str) -> np.ndarray:
+        """特徴量1列（コピーなし）"""
+        return self.values[:, self.feature_names.index(name)]
+
+
+class FeatureStoreWriter:
+    """
+    1系列（通貨ペア×時間足×バージョン）への追記
+
+    チャンク容量分のバッファを確保し、満杯になったときと flush() のときだけ書き込む。
+    書きかけの末尾チャンクは flush のたびに置き換え、満杯になったら確定する
+    """
+
+    def __init__(self, path: str, feature_names: Sequence[str], manifest: Dict):
+        self.path = path
+        self.feature_names = tuple(feature_names)
+        self.manifest = manifest
+        self.chunk_rows = manifest['chunk_rows']
+        width = len(self.feature_names)
+        self._timestamps = np.empty(self.chunk_rows, dtype=np.int64)
+        self._values = np.empty((self.chunk_rows, width), dtype=np.float32)
+        self._rows = 0       # バッファ内の行数
+        self._flushed = 0    # そのうちディスクに書き込み済みの行数
+        self.last_timestamp = manifest['chunks'][-1]['end'] if manifest['chunks'] else None
+
+        # 末尾チャンクが満杯でなければ読み戻して追記を続ける
+        chunks = manifest['chunks']
+        if chunks and chunks[-1]['rows'] < self.chunk_rows:
+            tail = chunks[-1]
+            rows = tail['rows']
+            self._timestamps[:rows] = np.load(os.path.join(path, tail['file'] + '.ts.npy'))
+            self._values[:rows] = np.load(os.path.join(path, tail['file'] + '.f32.npy'))
+            self._rows = self._flushed = rows
+
+    @property
+    def pending_rows(self) -> int:
+        """未書き込みの行数"""
+        return self._rows - self._flushed
+
+    def append(self, timestamp: TimeLike, vector: np.ndarray):
+        """1行追記"""
+        self.append_batch(np.array([to_epoch_ns(timestamp)], dtype=np.int64),
+                          np.asarray(vector, dtype=np.float32).reshape(1, -1))
+
+    def append_bundle(self, bundle):
+        """列形式バンドル（ColumnarFeatureBundle）を1行追記"""
+        if tuple(bundle.schema.names) != self.feature_names:
+            raise ValueError("Bundle schema does not match the store's feature names")
+        self.append(bundle.timestamp, bundle.values)
+
+    def append_batch(self, timestamps: Union[np.ndarray, Sequence[TimeLike]],
+                     values: np.ndarray):
+        """
+        複数行をまとめて追記
+
+        Args:
+            timestamps: 時刻（昇順、既存の末尾以降）。int64 配列ならエポックナノ秒
+            values: 行数×特徴量数の行列
+        """
+        timestamps = np.asarray(timestamps)
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            timestamps = timestamps.astype('datetime64[ns]').astype(np.int64)
+        elif timestamps.dtype != np.int64:
+            timestamps = np.fromiter((to_epoch_ns(t) for t in timestamps.tolist()),
+                                     dtype=np.int64, count=len(timestamps))
+        values = np.asarray(values, dtype=np.float32)
+        if values.ndim != 2 or values.shape != (len(timestamps), len(self.feature_names)):
+            raise ValueError(f"Expected shape ({len(timestamps)}, {len(self.feature_names)}), "
+                             f"got {values.shape}")
+        if len(timestamps) == 0:
+            return
+        if np.any(np.diff(timestamps) < 0) or (
+                self.last_timestamp is not None and timestamps[0] < self.last_timestamp):
+            raise ValueError("Timestamps must be non-decreasing (append-only store)")
+
+        offset = 0
+        while offset < len(timestamps):
+            count = min(self.chunk_rows - self._rows, len(timestamps) - offset)
+            self._timestamps[self._rows:self._rows + count] = timestamps[offset:offset + count]
+            self._values[self._rows:self._rows + count] = values[offset:offset + count]
+            self._rows += count
+            offset += count
+            if self._rows == self.chunk_rows:
+                self._write_chunk()
+                self._rows = self._flushed = 0
+        self.last_timestamp = int(timestamps[-1])
+
+    def flush(self):
+        """未書き込みの行を末尾チャンクとして書き込む"""
+        if self.pending_rows:
+            self._write_chunk()
+            self._flushed = self._rows
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self) -> 'FeatureStoreWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _write_chunk(self):
+        """バッファの行でチャンクファイルを書き、マニフェストを更新"""
+        chunks = self.manifest['chunks']
+        rows = self._rows
+        if self._flushed:
+            entry = chunks[-1]  # 書きかけの末尾チャンクを置き換え
+        else:
+            entry = {'file': f"{len(chunks):08d}"}
+            chunks.append(entry)
+        _write_npy(os.path.join(self.path, entry['file'] + '.ts.npy'), self._timestamps[:rows])
+        _write_npy(os.path.join(self.path, entry['file'] + '.f32.npy'), self._values[:rows])
+        entry.update(rows=rows, start=int(self._timestamps[0]),
+                     end=int(self._timestamps[rows - 1]))
+        _write_json(os.path.join(self.path, MANIFEST_NAME), self.manifest)
+
+
+class FeatureStore:
+    """
+    特徴量ストア
+
+    学習用の読み込みはチャンク単位のメモリマップで行い、時刻範囲の指定では
+    マニフェストの時刻範囲が重なるチャンクだけを開く（全体を走査しない）
+    """
+
+    def __init__(self, root: str = "./data/features"):
+        self.root = root
+
+    def path_for(self, pair: str, timeframe: str, version: str) -> str:
+        return os.path.join(self.root, f"{pair}_{timeframe}", f"v{version}")
+
+    def versions(self, pair: str, timeframe: str) -> List[str]:
+        """保存済みのエクスポーターバージョン"""
+        base = os.path.join(self.root, f"{pair}_{timeframe}")
+        if not os.path.isdir(base):
+            return []
+        return sorted(name[1:] for name in os.listdir(base)
+                      if os.path.exists(os.path.join(base, name, MANIFEST_NAME)))
+
+    def manifest(self, pair: str, timeframe: str, version: str) -> Dict:
+        with open(os.path.join(self.path_for(pair, timeframe, version), MANIFEST_NAME),
+                  encoding='utf-8') as f:
+            return json.load(f)
+
+    def writer(self, pair: str, timeframe: str, version: str,
+               feature_names: Sequence[str],
+               chunk_rows: int = DEFAULT_CHUNK_ROWS) -> FeatureStoreWriter:
+        """
+        系列への書き込みを開く（既存の系列は特徴量名が一致する場合だけ追記できる）
+
+        chunk_rows は新規作成時のみ有効（既存の系列はマニフェストの値を使う）
+        """
+        path = self.path_for(pair, timeframe, version)
+        manifest_path = os.path.join(path, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            manifest = self.manifest(pair, timeframe, version)
+            if manifest['feature_names'] != list(feature_names):
+                raise ValueError(f"Feature names differ from the stored schema (v{version})")
+        else:
+            os.makedirs(path, exist_ok=True)
+            manifest = {
+                'format': FORMAT_VERSION,
+                'pair': pair,
+                'timeframe': timeframe,
+                'version': version,
+                'feature_names': list(feature_names),
+                'chunk_rows': chunk_rows,
+                'chunks': [],
+            }
+            _write_json(manifest_path, manifest)
+        return FeatureStoreWriter(path, feature_names, manifest)
+
+    def writer_for(self, schema, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> FeatureStoreWriter:
+        """エクスポーターのスキーマ（FeatureSchema）に対応する系列への書き込みを開く"""
+        return self.writer(schema.currency_pair, schema.timeframe, schema.version,
+                           schema.names, chunk_rows)
+
+    def iter_chunks(self, pair: str, timeframe: str, version: str,
+                    start: Optional[TimeLike] = None,
+                    end: Optional[TimeLike] = None) -> Iterator[FeatureFrame]:
+        """
+        時刻範囲 [start, end) のチャンクを順に返す（各チャンクはメモリマップ上のビュー）
+        """
+        manifest = self.manifest(pair, timeframe, version)
+        path = self.path_for(pair, timeframe, version)
+        names = tuple(manifest['feature_names'])
+        lo = None if start is None else to_epoch_ns(start)
+        hi = None if end is None else to_epoch_ns(end)
+
+        for chunk in manifest['chunks']:
+            if (lo is not None and chunk['end'] < lo) or (hi is not None and chunk['start'] >= hi):
+                continue
+            timestamps = np.load(os.path.join(path, chunk['file'] + '.ts.npy'), mmap_mode='r')
+            values = np.load(os.path.join(path, chunk['file'] + '.f32.npy'), mmap_mode='r')
+            first = 0 if lo is None else int(np.searchsorted(timestamps, lo, side='left'))
+            last = len(timestamps) if hi is None else int(
+                np.searchsorted(timestamps, hi, side='left'))
+            if first < last:
+                yield FeatureFrame(names, timestamps[first:last], values[first:last])
+
+    def read(self, pair: str, timeframe: str, version: str,
+             start: Optional[TimeLike] = None,
+             end: Optional[TimeLike] = None) -> FeatureFrame:
+        """
+        時刻範囲 [start, end) を1つの行列として読み込み
+
+        対象が1チャンクならメモリマップのビュー、複数チャンクにまたがる場合は連結したコピー
+        """
+        frames = list(self.iter_chunks(pair, timeframe, version, start, end))
+        if len(frames) == 1:
+            return frames[0]
+        names = tuple(self.manifest(pair, timeframe, version)['feature_names'])
+        if not frames:
+            return FeatureFrame(names, np.empty(0, dtype=np.int64),
+                                np.empty((0, len(names)), dtype=np.float32))
+        return FeatureFrame(names,
+                            np.concatenate([f.timestamp for f in frames]),
+                            np.concatenate([f.values for f in frames]))
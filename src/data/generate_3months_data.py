@@ -8,6 +8,12 @@ import random
 import math
 from datetime import datetime, timedelta
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.price_store import CandleArrays, read_candle_csv
+from data.resampler import resample
 
 
 class ThreeMonthsDataGenerator:
@@ -199,60 +205,12 @@ class ThreeMonthsDataGenerator:
 
 
 def convert_to_15min_optimized(m1_filepath: str) -> str:
-    """1分足から15分足への効率的な変換"""
+    """1分足から15分足への効率的な変換（列指向の区間集約）"""
     
     print(f"📊 15分足変換中: {os.path.basename(m1_filepath)}")
     
-    m15_data = []
-    current_candle = None
-    candle_minutes = []
-    
-    with open(m1_filepath, 'r') as f:
-        reader = csv.DictReader(f)
-        
-        for row in reader:
-            # 数値変換
-            row['open'] = float(row['open'])
-            row['high'] = float(row['high'])
-            row['low'] = float(row['low'])
-            row['close'] = float(row['close'])
-            row['volume'] = float(row['volume'])
-            
-            # 時刻確認
-            dt = datetime.strptime(row['timestamp'], '%Y-%m-%d %H:%M:%S')
-            
-            # 15分の境界確認
-            if dt.minute % 15 == 0:
-                # 前のキャンドルを保存
-                if current_candle and len(candle_minutes) > 0:
-                    # 集計
-                    current_candle['high'] = max(m['high'] for m in candle_minutes)
-                    current_candle['low'] = min(m['low'] for m in candle_minutes)
-                    current_candle['close'] = candle_minutes[-1]['close']
-                    current_candle['volume'] = sum(m['volume'] for m in candle_minutes)
-                    m15_data.append(current_candle)
-                
-                # 新しいキャンドル開始
-                current_candle = {
-                    'timestamp': row['timestamp'],
-                    'open': row['open'],
-                    'high': row['high'],
-                    'low': row['low'],
-                    'close': row['close'],
-                    'volume': row['volume']
-                }
-                candle_minutes = [row]
-            else:
-                # 既存キャンドルに追加
-                candle_minutes.append(row)
-    
-    # 最後のキャンドル
-    if current_candle and candle_minutes:
-        current_candle['high'] = max(m['high'] for m in candle_minutes)
-        current_candle['low'] = min(m['low'] for m in candle_minutes)
-        current_candle['close'] = candle_minutes[-1]['close']
-        current_candle['volume'] = sum(m['volume'] for m in candle_minutes)
-        m15_data.append(current_candle)
+    m1 = CandleArrays.from_columns(read_candle_csv(m1_filepath))
+    m15_data = resample(m1, 'M15').to_records()
     
     # 15分足データ保存
     m15_filepath = m1_filepath.replace('_M1_', '_M15_')
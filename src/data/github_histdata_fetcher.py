@@ -4,10 +4,13 @@ GitHub philipperemy/FX-1-Minute-Data から直接データ取得
 """
 
 import os
+import sys
 import csv
 import urllib.request
 from typing import List, Dict
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 
 class GitHubHistDataFetcher:
     """GitHub経由でHISTDATAを自動取得"""
@@ -155,6 +158,26 @@ class GitHubHistDataFetcher:
         return data
 
 
+    def load_arrays(self, pair: str = "USDJPY",
+                    start_date: str = None,
+                    end_date: str = None):
+        """
+        列指向データ読み込み（メモリマップ、読み取り専用NumPyビュー）
+        
+        初回のみCSVを data/columnar/ に変換する
+        """
+        from data.price_store import ColumnarPriceStore
+        
+        if not os.path.exists(os.path.join(self.data_dir, f"{pair}_M1.csv")):
+            self.download_pair_data(pair)
+        
+        store = ColumnarPriceStore(
+            source_dir=self.data_dir,
+            store_dir=os.path.join(os.path.dirname(os.path.abspath(self.data_dir)), "columnar")
+        )
+        return store.load(pair, "M1", start_date, end_date)
+
+
 def run_github_backtest():
     """GitHubデータでバックテスト実行"""
     import sys
@@ -0,0 +1,347 @@
+"""
+列指向の価格データストア
+CSV（1行1辞書）の代わりに、フィールドごとの連続配列を1ファイルに格納し
+メモリマップで読み込む（ゼロコピー、読み取り専用ビュー）
+
+ファイル形式（.fxc）:
+    [MAGIC 8byte][ヘッダ長 uint32 LE][JSONヘッダ][パディング][列データ...]
+    各列は64バイト境界に配置した little-endian の連続配列
+"""
+
+import csv
+import json
+import os
+import struct
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+MAGIC = b'FXCOL\x00\x01\x00'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# 列定義（フィールド名, dtype）
+CANDLE_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ('timestamp', '<i8'),  # エポック秒（CSVの時刻をUTCとして解釈）
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+)
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+@dataclass
+class CandleArrays:
+    """キャンドル列の集合（各列はメモリマップ上の読み取り専用ビュー）"""
+    pair: str
+    timeframe: str
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """フィールド名→列の辞書"""
+        return {name: getattr(self, name) for name, _ in CANDLE_FIELDS}
+
+    def slice_time(self, start: Optional[str] = None,
+                   end: Optional[str] = None) -> 'CandleArrays':
+        """
+        時刻範囲 [start, end) で切り出し（二分探索、コピーなし）
+
+        Args:
+            start: 開始時刻（含む）'YYYY-MM-DD[ HH:MM:SS]'
+            end: 終了時刻（含まない）
+        """
+        lo = 0 if start is None else int(np.searchsorted(
+            self.timestamp, to_epoch_seconds(start), side='left'))
+        hi = len(self) if end is None else int(np.searchsorted(
+            self.timestamp, to_epoch_seconds(end), side='left'))
+        return self.slice(lo, hi)
+
+    def slice(self, lo: int, hi: int) -> 'CandleArrays':
+        """行範囲で切り出し（コピーなし）"""
+        return CandleArrays(self.pair, self.timeframe,
+                            **{name: col[lo:hi] for name, col in self.columns().items()})
+
+    def take(self, indices: np.ndarray) -> 'CandleArrays':
+        """行インデックスで抽出（コピー）"""
+        return CandleArrays(self.pair, self.timeframe,
+                            **{name: col[indices] for name, col in self.columns().items()})
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray], pair: str = '',
+                     timeframe: str = '') -> 'CandleArrays':
+        """列の辞書から生成"""
+        return cls(pair, timeframe, **{name: columns[name] for name, _ in CANDLE_FIELDS})
+
+    @classmethod
+    def from_records(cls, records: List[Dict], pair: str = '',
+                     timeframe: str = '') -> 'CandleArrays':
+        """List[Dict] 形式のキャンドルから列を生成（コピー）"""
+        columns = {
+            'timestamp': np.array([r['timestamp'] for r in records],
+                                  dtype='datetime64[s]').astype(np.int64)
+        }
+        for name in PRICE_FIELDS:
+            columns[name] = np.array([r.get(name, 0) for r in records], dtype=np.float64)
+        return cls(pair, timeframe, **columns)
+
+    def timestamps_str(self) -> List[str]:
+        """CSV互換の時刻文字列 'YYYY-MM-DD HH:MM:SS'"""
+        text = np.datetime_as_string(self.timestamp.astype('datetime64[s]'))
+        return [t.replace('T', ' ') for t in text.tolist()]
+
+    def to_records(self) -> List[Dict]:
+        """従来の List[Dict] 形式に変換（既存ストラテジーとの互換用）"""
+        names = PRICE_FIELDS
+        values = [getattr(self, name).tolist() for name in names]
+        return [
+            dict(zip(('timestamp',) + names, row))
+            for row in zip(self.timestamps_str(), *values)
+        ]
+
+    def record_view(self) -> 'CandleRecordView':
+        """to_records() と同じ形式の行を、参照時に列から組み立てるビュー（コピーなし）"""
+        return CandleRecordView(self)
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class CandleRecordView(Sequence):
+    """
+    CandleArrays を List[Dict] として参照するための読み取り専用ビュー
+
+    行の辞書は参照のたびに生成する（共有メモリ上の列をワーカーで直接読む用途）
+    """
+
+    def __init__(self, candles: CandleArrays):
+        self.candles = candles
+
+    def __len__(self) -> int:
+        return len(self.candles)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("candle index out of range")
+        return self._row(index)
+
+    def _row(self, i: int) -> Dict:
+        c = self.candles
+        timestamp = _EPOCH + timedelta(seconds=int(c.timestamp[i]))
+        return {
+            'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            'open': float(c.open[i]),
+            'high': float(c.high[i]),
+            'low': float(c.low[i]),
+            'close': float(c.close[i]),
+            'volume': float(c.volume[i]),
+        }
+
+
+def to_epoch_seconds(timestamp: str) -> int:
+    """'YYYY-MM-DD[ HH:MM:SS]' をエポック秒に変換"""
+    return int(np.datetime64(timestamp, 's').astype(np.int64))
+
+
+def write_columnar(path: str, columns: Dict[str, np.ndarray],
+                   meta: Optional[Dict] = None) -> str:
+    """
+    列データを .fxc ファイルに書き込み
+
+    一時ファイルに書いてから置き換えるため、読み込み中のマップを壊さない
+    """
+    rows = len(columns['timestamp'])
+    arrays = []
+    for name, dtype in CANDLE_FIELDS:
+        array = np.ascontiguousarray(columns[name], dtype=dtype)
+        if len(array) != rows:
+            raise ValueError(f"Column length mismatch: {name}")
+        arrays.append((name, dtype, array))
+
+    # ヘッダ長が確定するまでオフセットを再計算
+    header_size = 0
+    while True:
+        offset = _align(len(MAGIC) + 4 + header_size)
+        fields = []
+        for name, dtype, array in arrays:
+            fields.append({'name': name, 'dtype': dtype, 'offset': offset})
+            offset = _align(offset + array.nbytes)
+        header = json.dumps({
+            'version': FORMAT_VERSION,
+            'rows': rows,
+            'fields': fields,
+            'meta': meta or {},
+        }).encode('utf-8')
+        if len(header) == header_size:
+            break
+        header_size = len(header)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for field, (_, _, array) in zip(fields, arrays):
+            f.write(b'\x00' * (field['offset'] - f.tell()))
+            f.write(array.tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_header(path: str) -> Dict:
+    """ヘッダのみ読み込み"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a columnar price file: {path}")
+        (header_len,) = struct.unpack('<I', f.read(4))
+        return json.loads(f.read(header_len).decode('utf-8'))
+
+
+def load_columnar(path: str) -> CandleArrays:
+    """
+    .fxc ファイルをメモリマップで読み込み
+
+    各列はファイルを直接参照する読み取り専用ビュー（コピーなし）
+    """
+    header = read_header(path)
+    rows = header['rows']
+    meta = header.get('meta', {})
+
+    columns: Dict[str, np.ndarray] = {}
+    if rows == 0:
+        for field in header['fields']:
+            columns[field['name']] = np.empty(0, dtype=field['dtype'])
+    else:
+        mm = np.memmap(path, dtype=np.uint8, mode='r')
+        for field in header['fields']:
+            columns[field['name']] = np.ndarray(
+                shape=(rows,), dtype=field['dtype'], buffer=mm, offset=field['offset']
+            )
+
+    return CandleArrays(
+        pair=meta.get('pair', ''),
+        timeframe=meta.get('timeframe', ''),
+        **{name: columns[name] for name, _ in CANDLE_FIELDS}
+    )
+
+
+def read_candle_csv(csv_path: str) -> Dict[str, np.ndarray]:
+    """既存形式のCSV（timestamp,open,high,low,close,volume）を列に変換"""
+    timestamps: List[str] = []
+    values: Dict[str, List[str]] = {name: [] for name in PRICE_FIELDS}
+    with open(csv_path, 'r', newline='') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            timestamps.append(row['timestamp'])
+            for name in PRICE_FIELDS:
+                values[name].append(row.get(name) or 0)
+
+    columns = {
+        'timestamp': np.array(timestamps, dtype='datetime64[s]').astype(np.int64)
+    }
+    for name in PRICE_FIELDS:
+        columns[name] = np.array(values[name], dtype=np.float64)
+    return columns
+
+
+def convert_csv(csv_path: str, out_path: Optional[str] = None,
+                pair: str = '', timeframe: str = '') -> str:
+    """CSVを .fxc に一度だけ変換"""
+    if out_path is None:
+        out_path = os.path.splitext(csv_path)[0] + '.fxc'
+    stat = os.stat(csv_path)
+    meta = {
+        'pair': pair,
+        'timeframe': timeframe,
+        'source': os.path.basename(csv_path),
+        'source_size': stat.st_size,
+        'source_mtime': stat.st_mtime,
+    }
+    return write_columnar(out_path, read_candle_csv(csv_path), meta)
+
+
+class ColumnarPriceStore:
+    """
+    通貨ペア×時間足ごとの列指向ストア
+
+    data/histdata/{pair}_{timeframe}.csv を初回に data/columnar/ へ変換し、
+    以降はメモリマップで読み込む。CSVが更新された場合は再変換する。
+    """
+
+    def __init__(self, source_dir: str = "./data/histdata",
+                 store_dir: str = "./data/columnar"):
+        self.source_dir = source_dir
+        self.store_dir = store_dir
+
+    def csv_path(self, pair: str, timeframe: str = "M1") -> str:
+        return os.path.join(self.source_dir, f"{pair}_{timeframe}.csv")
+
+    def path_for(self, pair: str, timeframe: str = "M1") -> str:
+        return os.path.join(self.store_dir, f"{pair}_{timeframe}.fxc")
+
+    def is_stale(self, pair: str, timeframe: str = "M1") -> bool:
+        """列ファイルが未作成、または元CSVより古いか"""
+        path = self.path_for(pair, timeframe)
+        if not os.path.exists(path):
+            return True
+        source = self.csv_path(pair, timeframe)
+        if not os.path.exists(source):
+            return False
+        meta = read_header(path).get('meta', {})
+        stat = os.stat(source)
+        return (meta.get('source_size') != stat.st_size or
+                meta.get('source_mtime') != stat.st_mtime)
+
+    def convert(self, pair: str, timeframe: str = "M1") -> str:
+        """CSVから列ファイルを生成"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        return convert_csv(self.csv_path(pair, timeframe),
+                           self.path_for(pair, timeframe), pair, timeframe)
+
+    def load(self, pair: str, timeframe: str = "M1",
+             start_date: Optional[str] = None,
+             end_date: Optional[str] = None) -> CandleArrays:
+        """列データを読み込み（必要なら変換）"""
+        if self.is_stale(pair, timeframe):
+            self.convert(pair, timeframe)
+        arrays = load_columnar(self.path_for(pair, timeframe))
+        if start_date or end_date:
+            arrays = arrays.slice_time(start_date, end_date)
+        return arrays
+
+
+def main():
+    """data/histdata の全CSVを一括変換"""
+    store = ColumnarPriceStore()
+    for filename in sorted(os.listdir(store.source_dir)):
+        if not filename.endswith('.csv'):
+            continue
+        pair, timeframe = os.path.splitext(filename)[0].split('_', 1)
+        path = store.convert(pair, timeframe)
+        print(f"✅ {filename} → {path} ({len(load_columnar(path)):,}本)")
+
+
+if __name__ == "__main__":
+    main()
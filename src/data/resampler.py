@@ -0,0 +1,191 @@
+"""
+マルチタイムフレーム・リサンプラー
+1分足の列データから M5/M15/M30/H1/H4 を区間集約（reduceat）で一括生成する
+
+- 足の区切りはエポック秒の時間足境界（ギャップ・週末は空区間として足を作らない）
+- 上位足は元ファイルのハッシュをキーにディスクへキャッシュする
+"""
+
+import hashlib
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.price_store import (
+    CandleArrays, ColumnarPriceStore, load_columnar, write_columnar
+)
+
+
+# 時間足（分）
+TIMEFRAME_MINUTES: Dict[str, int] = {
+    'M1': 1,
+    'M5': 5,
+    'M15': 15,
+    'M30': 30,
+    'H1': 60,
+    'H4': 240,
+}
+
+# 分表記の別名（M60=H1, M240=H4）
+TIMEFRAME_ALIASES: Dict[str, str] = {'M60': 'H1', 'M240': 'H4'}
+
+HIGHER_TIMEFRAMES = ('M5', 'M15', 'M30', 'H1', 'H4')
+
+
+def normalize_timeframe(timeframe: str) -> str:
+    """時間足表記を正規化"""
+    timeframe = TIMEFRAME_ALIASES.get(timeframe, timeframe)
+    if timeframe not in TIMEFRAME_MINUTES:
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+    return timeframe
+
+
+def resample_with_counts(m1: CandleArrays, timeframe: str):
+    """
+    1分足を上位足に集約し、各足を構成する1分足の本数も返す
+
+    Args:
+        m1: 時刻昇順の1分足
+        timeframe: 変換先の時間足
+
+    Returns:
+        (上位足, 構成本数) ※ timestamp は足の開始時刻
+    """
+    timeframe = normalize_timeframe(timeframe)
+    seconds = TIMEFRAME_MINUTES[timeframe] * 60
+
+    timestamp = np.asarray(m1.timestamp, dtype=np.int64)
+    if len(timestamp) == 0:
+        return _empty(m1.pair, timeframe), np.empty(0, dtype=np.int64)
+
+    # 区間の開始位置（バケット番号が変わる位置）
+    bucket = timestamp // seconds
+    starts = np.flatnonzero(np.concatenate(([True], bucket[1:] != bucket[:-1])))
+    ends = np.append(starts[1:], len(timestamp))
+
+    bars = CandleArrays(
+        pair=m1.pair,
+        timeframe=timeframe,
+        timestamp=bucket[starts] * seconds,
+        open=np.asarray(m1.open)[starts],
+        high=np.maximum.reduceat(np.asarray(m1.high), starts),
+        low=np.minimum.reduceat(np.asarray(m1.low), starts),
+        close=np.asarray(m1.close)[ends - 1],
+        volume=np.add.reduceat(np.asarray(m1.volume), starts),
+    )
+    return bars, ends - starts
+
+
+def resample(m1: CandleArrays, timeframe: str,
+             drop_incomplete: bool = False) -> CandleArrays:
+    """
+    1分足を上位足に集約
+
+    Args:
+        m1: 時刻昇順の1分足
+        timeframe: 変換先の時間足
+        drop_incomplete: Trueなら構成本数が足りない足（ギャップを含む足）を除外
+    """
+    bars, counts = resample_with_counts(m1, timeframe)
+    if drop_incomplete:
+        bars = bars.take(np.flatnonzero(counts == TIMEFRAME_MINUTES[bars.timeframe]))
+    return bars
+
+
+def resample_all(m1: CandleArrays,
+                 timeframes: Iterable[str] = HIGHER_TIMEFRAMES) -> Dict[str, CandleArrays]:
+    """1分足を含む全時間足を生成"""
+    result = {'M1': m1}
+    for timeframe in timeframes:
+        timeframe = normalize_timeframe(timeframe)
+        if timeframe != 'M1':
+            result[timeframe] = resample(m1, timeframe)
+    return result
+
+
+def resample_records(m1_records: List[Dict], timeframe: str,
+                     drop_incomplete: bool = False) -> List[Dict]:
+    """List[Dict] 形式の1分足を集約（既存バックテストとの互換用）"""
+    if not m1_records:
+        return []
+    return resample(CandleArrays.from_records(m1_records), timeframe,
+                    drop_incomplete).to_records()
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """ファイル内容のSHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MultiTimeframeCache:
+    """
+    上位足のディスクキャッシュ
+
+    {cache_dir}/{元ファイルハッシュ先頭16桁}/{pair}_{timeframe}.fxc に保存し、
+    元ファイルが変わればハッシュが変わるため自動的に再生成される
+    """
+
+    def __init__(self, cache_dir: str = "./data/columnar/resampled"):
+        self.cache_dir = cache_dir
+        self._digests: Dict[Tuple[str, float], str] = {}
+
+    def _cache_path(self, source_path: str, pair: str, timeframe: str) -> str:
+        key = (source_path, os.path.getmtime(source_path))
+        digest = self._digests.get(key)
+        if digest is None:
+            digest = self._digests[key] = file_digest(source_path)[:16]
+        return os.path.join(self.cache_dir, digest, f"{pair}_{timeframe}.fxc")
+
+    def load(self, source_path: str, m1: CandleArrays,
+             timeframes: Iterable[str] = HIGHER_TIMEFRAMES) -> Dict[str, CandleArrays]:
+        """
+        全時間足を取得（キャッシュがあればメモリマップで読み込み）
+
+        Args:
+            source_path: 1分足の元ファイル（CSVまたは.fxc）
+            m1: 元ファイルから読み込んだ1分足
+        """
+        result = {'M1': m1}
+        for timeframe in timeframes:
+            timeframe = normalize_timeframe(timeframe)
+            if timeframe == 'M1':
+                continue
+            path = self._cache_path(source_path, m1.pair, timeframe)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                write_columnar(path, resample(m1, timeframe).columns(),
+                               {'pair': m1.pair, 'timeframe': timeframe,
+                                'source': os.path.basename(source_path)})
+            result[timeframe] = load_columnar(path)
+        return result
+
+
+def load_all_timeframes(pair: str, store: Optional[ColumnarPriceStore] = None,
+                        cache: Optional[MultiTimeframeCache] = None,
+                        timeframes: Iterable[str] = HIGHER_TIMEFRAMES
+                        ) -> Dict[str, CandleArrays]:
+    """
+    通貨ペアの全時間足（M1〜H4）を読み込み
+
+    1分足は列指向ストアから、上位足はキャッシュから取得する
+    """
+    store = store or ColumnarPriceStore()
+    cache = cache or MultiTimeframeCache(os.path.join(store.store_dir, "resampled"))
+    m1 = store.load(pair, "M1")
+    source = store.csv_path(pair, "M1")
+    if not os.path.exists(source):
+        source = store.path_for(pair, "M1")
+    return cache.load(source, m1, timeframes)
+
+
+def _empty(pair: str, timeframe: str) -> CandleArrays:
+    return CandleArrays(pair, timeframe, np.empty(0, dtype=np.int64),
+                        *(np.empty(0) for _ in range(5)))
@@ -55,6 +55,87 @@ except ImportError:
         ha_close: float
         direction: int  # 1: 陽線, -1: 陰線
 
+# 平均足漸化式のJITコンパイル（numbaがあれば使用）
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+@dataclass
+class HeikinAshiState:
+    """ストリーミング平均足の状態（最新1本分）"""
+    ha_open: float
+    ha_high: float
+    ha_low: float
+    ha_close: float
+    direction: int  # 1: 陽線, -1: 陰線
+    reversal: int   # 1: 転換, 0: 継続
+
+
+def _ha_open_recurrence_python(ha_close: np.ndarray, first_open: float) -> np.ndarray:
+    """平均足Open漸化式（純Python版、リスト上で逐次計算）"""
+    closes = ha_close.tolist()
+    ha_open = [first_open] * len(closes)
+    prev = first_open
+    for i in range(1, len(closes)):
+        prev = (prev + closes[i - 1]) / 2
+        ha_open[i] = prev
+    return np.array(ha_open, dtype=np.float64)
+
+
+def _ha_open_recurrence_kernel(ha_close: np.ndarray, first_open: float) -> np.ndarray:
+    """平均足Open漸化式: ha_open[i] = (ha_open[i-1] + ha_close[i-1]) / 2"""
+    n = ha_close.shape[0]
+    ha_open = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return ha_open
+    ha_open[0] = first_open
+    for i in range(1, n):
+        ha_open[i] = (ha_open[i - 1] + ha_close[i - 1]) / 2
+    return ha_open
+
+
+if NUMBA_AVAILABLE:
+    ha_open_recurrence = njit(cache=True)(_ha_open_recurrence_kernel)
+else:
+    ha_open_recurrence = _ha_open_recurrence_python
+
+
+def calculate_heikin_ashi_arrays(open_: np.ndarray, high: np.ndarray,
+                                 low: np.ndarray, close: np.ndarray
+                                 ) -> Dict[str, np.ndarray]:
+    """
+    平均足を連続したfloat64配列上で計算
+    
+    ha_open のみ漸化式（O(n)）、それ以外は配列演算で求める
+    """
+    open_ = np.ascontiguousarray(open_, dtype=np.float64)
+    high = np.ascontiguousarray(high, dtype=np.float64)
+    low = np.ascontiguousarray(low, dtype=np.float64)
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    
+    ha_close = (open_ + high + low + close) / 4
+    first_open = float((open_[0] + close[0]) / 2) if len(open_) else 0.0
+    ha_open = ha_open_recurrence(ha_close, first_open)
+    
+    ha_high = np.maximum(np.maximum(high, ha_open), ha_close)
+    ha_low = np.minimum(np.minimum(low, ha_open), ha_close)
+    
+    direction = np.where(ha_close > ha_open, 1, -1)
+    reversal = np.ones(len(direction), dtype=np.int64)
+    reversal[1:] = (direction[1:] != direction[:-1]).astype(np.int64)
+    
+    return {
+        'ha_open': ha_open,
+        'ha_high': ha_high,
+        'ha_low': ha_low,
+        'ha_close': ha_close,
+        'ha_direction': direction,
+        'ha_reversal': reversal,
+    }
+
 
 class BaseIndicators:
     """
@@ -71,30 +152,44 @@ class BaseIndicators:
         メモ: 平均足の等速予知による今足と前足の到達距離差分が小さい時の判定
         """
         ha_df = df.copy()
-        ha_df['ha_close'] = (df['open'] + df['high'] + df['low'] + df['close']) / 4
         
-        # 初期値設定
-        ha_df.loc[0, 'ha_open'] = (df.loc[0, 'open'] + df.loc[0, 'close']) / 2
+        # 平均足Open（前の平均足のOpen+Closeの平均）は配列上の漸化式で計算
+        ha_columns = calculate_heikin_ashi_arrays(
+            df['open'].to_numpy(), df['high'].to_numpy(),
+            df['low'].to_numpy(), df['close'].to_numpy()
+        )
+        for column, values in ha_columns.items():
+            ha_df[column] = values
         
-        # 平均足Open計算（前の平均足のOpen+Closeの平均）
-        for i in range(1, len(ha_df)):
-            ha_df.loc[i, 'ha_open'] = (ha_df.loc[i-1, 'ha_open'] + 
-                                       ha_df.loc[i-1, 'ha_close']) / 2
+        return ha_df
+    
+    @staticmethod
+    def update_heikin_ashi(last_state: Optional[HeikinAshiState],
+                           new_bar: Dict[str, float]) -> HeikinAshiState:
+        """
+        平均足の逐次更新（ストリーミング用、O(1)）
         
-        # 平均足High/Low計算
-        ha_df['ha_high'] = df[['high', 'ha_open', 'ha_close']].max(axis=1)
-        ha_df['ha_low'] = df[['low', 'ha_open', 'ha_close']].min(axis=1)
+        calculate_heikin_ashi と同一の計算式で、直前の状態と新しい足から
+        次の平均足を求める
+        """
+        ha_close = (new_bar['open'] + new_bar['high'] + new_bar['low'] + new_bar['close']) / 4
         
-        # 方向判定（陰陽）
-        ha_df['ha_direction'] = np.where(
-            ha_df['ha_close'] > ha_df['ha_open'], 1, -1
-        )
+        if last_state is None:
+            ha_open = (new_bar['open'] + new_bar['close']) / 2
+        else:
+            ha_open = (last_state.ha_open + last_state.ha_close) / 2
         
-        # 転換判定
-        ha_df['ha_reversal'] = (ha_df['ha_direction'] != 
-                                ha_df['ha_direction'].shift(1)).astype(int)
+        direction = 1 if ha_close > ha_open else -1
+        reversal = 1 if last_state is None or direction != last_state.direction else 0
         
-        return ha_df
+        return HeikinAshiState(
+            ha_open=ha_open,
+            ha_high=max(new_bar['high'], ha_open, ha_close),
+            ha_low=min(new_bar['low'], ha_open, ha_close),
+            ha_close=ha_close,
+            direction=direction,
+            reversal=reversal
+        )
     
     def calculate_osma(self, df: pd.DataFrame, 
                        fast_period: int = 12, 
@@ -0,0 +1,239 @@
+"""
+逐次更新型の指標（ストリーミング用）
+
+新しい価格1件ごとに O(1)（移動高安値は償却 O(1)）で更新し、全期間を再計算しない。
+銘柄ごとに IndicatorSet を1つ持ち、価格イベントごとに1回だけ更新して
+同じスナップショットを全サブスクライバーで共有する
+"""
+
+import math
+from collections import deque
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+
+class StreamingSMA:
+    """単純移動平均（固定長の循環配列＋合計の差分更新）"""
+
+    # 浮動小数点の誤差蓄積を防ぐため、この回数ごとに合計を取り直す
+    RESYNC_INTERVAL = 4096
+
+    def __init__(self, period: int, source: str = 'close'):
+        if period <= 0:
+            raise ValueError(f"period must be positive: {period}")
+        self.period = period
+        self.source = source
+        self._window = [0.0] * period
+        self._index = 0
+        self._count = 0
+        self._sum = 0.0
+        self._updates = 0
+
+    def update(self, price: float) -> float:
+        """価格を1件追加して最新値を返す"""
+        price = float(price)
+        self._sum += price - self._window[self._index]
+        self._window[self._index] = price
+        self._index = (self._index + 1) % self.period
+        self._count = min(self._count + 1, self.period)
+        self._updates += 1
+        if self._updates % self.RESYNC_INTERVAL == 0:
+            self._sum = math.fsum(self._window)
+        return self.value
+
+    def update_bar(self, bar: Mapping[str, float]) -> float:
+        return self.update(bar[self.source])
+
+    @property
+    def ready(self) -> bool:
+        return self._count >= self.period
+
+    @property
+    def value(self) -> float:
+        """期間分そろうまでは 0.0（fast_sma と同じ）"""
+        return self._sum / self.period if self.ready else 0.0
+
+
+class StreamingEMA:
+    """指数移動平均（初値は最初の価格、fast_ema と同じ漸化式）"""
+
+    def __init__(self, period: int, source: str = 'close'):
+        if period <= 0:
+            raise ValueError(f"period must be positive: {period}")
+        self.period = period
+        self.source = source
+        self.alpha = 2.0 / (period + 1)
+        self.count = 0
+        self._value = 0.0
+
+    def update(self, price: float) -> float:
+        """価格を1件追加して最新値を返す"""
+        price = float(price)
+        if self.count == 0:
+            self._value = price
+        else:
+            self._value += self.alpha * (price - self._value)
+        self.count += 1
+        return self._value
+
+    def update_bar(self, bar: Mapping[str, float]) -> float:
+        return self.update(bar[self.source])
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class StreamingMACD:
+    """MACD / シグナル / OsMA（ヒストグラム）"""
+
+    def __init__(self, fast_period: int = 12, slow_period: int = 26,
+                 signal_period: int = 9, source: str = 'close'):
+        self.slow_period = slow_period
+        self.source = source
+        self.fast = StreamingEMA(fast_period)
+        self.slow = StreamingEMA(slow_period)
+        self.signal = StreamingEMA(signal_period)
+
+    def update(self, price: float) -> Tuple[float, float, float]:
+        """価格を1件追加して (MACD, シグナル, OsMA) を返す"""
+        macd_line = self.fast.update(price) - self.slow.update(price)
+        self.signal.update(macd_line)
+        return self.value
+
+    def update_bar(self, bar: Mapping[str, float]) -> Tuple[float, float, float]:
+        return self.update(bar[self.source])
+
+    @property
+    def value(self) -> Tuple[float, float, float]:
+        """遅い方の期間分そろうまでは (0, 0, 0)"""
+        if self.slow.count < self.slow_period:
+            return 0.0, 0.0, 0.0
+        macd_line = self.fast.value - self.slow.value
+        signal_line = self.signal.value
+        return macd_line, signal_line, macd_line - signal_line
+
+
+class StreamingATR:
+    """ATR（True Range の単純移動平均、fast_atr と同じ定義）"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._true_ranges = StreamingSMA(period)
+        self._prev_close: Optional[float] = None
+
+    def update(self, high: float, low: float, close: float) -> float:
+        """足を1本追加して最新値を返す（最初の足は前日終値がないため TR なし）"""
+        if self._prev_close is not None:
+            true_range = max(high - low, abs(high - self._prev_close), abs(low - self._prev_close))
+            self._true_ranges.update(true_range)
+        self._prev_close = float(close)
+        return self.value
+
+    def update_bar(self, bar: Mapping[str, float]) -> float:
+        return self.update(bar['high'], bar['low'], bar['close'])
+
+    @property
+    def value(self) -> float:
+        return self._true_ranges.value
+
+
+class RollingExtremum:
+    """移動最大値／最小値（単調キュー、償却 O(1)）"""
+
+    def __init__(self, period: int, mode: str = 'max', source: str = 'close'):
+        if mode not in ('max', 'min'):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.period = period
+        self.mode = mode
+        self.source = source
+        self._queue = deque()  # (通し番号, 値)、先頭が窓内の極値
+        self._index = 0
+
+    def update(self, price: float) -> float:
+        """価格を1件追加して窓内の極値を返す"""
+        price = float(price)
+        queue = self._queue
+        if self.mode == 'max':
+            while queue and queue[-1][1] <= price:
+                queue.pop()
+        else:
+            while queue and queue[-1][1] >= price:
+                queue.pop()
+        queue.append((self._index, price))
+        if queue[0][0] <= self._index - self.period:
+            queue.popleft()
+        self._index += 1
+        return queue[0][1]
+
+    def update_bar(self, bar: Mapping[str, float]) -> float:
+        return self.update(bar[self.source])
+
+    @property
+    def value(self) -> float:
+        return self._queue[0][1] if self._queue else 0.0
+
+
+class RollingHighLow:
+    """移動高値・安値（高値は high、安値は low の系列から）"""
+
+    def __init__(self, period: int = 20):
+        self.period = period
+        self.high = RollingExtremum(period, 'max', 'high')
+        self.low = RollingExtremum(period, 'min', 'low')
+
+    def update(self, high: float, low: float) -> Tuple[float, float]:
+        return self.high.update(high), self.low.update(low)
+
+    def update_bar(self, bar: Mapping[str, float]) -> Tuple[float, float]:
+        return self.update(bar['high'], bar['low'])
+
+    @property
+    def value(self) -> Tuple[float, float]:
+        return self.high.value, self.low.value
+
+
+def default_indicator_states() -> Dict[str, object]:
+    """EventDrivenEngine の標準指標"""
+    return {
+        'sma_20': StreamingSMA(20),
+        'ema_12': StreamingEMA(12),
+        'atr_14': StreamingATR(14),
+        'macd': StreamingMACD(12, 26, 9),
+        'high_low_20': RollingHighLow(20),
+    }
+
+
+class IndicatorSet:
+    """
+    1銘柄分の指標状態
+    
+    update_bar で全指標を1回だけ更新し、snapshot は次の更新まで同じ
+    読み取り専用マッピングを返す（サブスクライバー間で共有）
+    """
+
+    def __init__(self, states: Optional[Dict[str, object]] = None):
+        self.states = states if states is not None else default_indicator_states()
+        self.count = 0
+        self._snapshot: Optional[Mapping[str, object]] = None
+
+    def add(self, name: str, state) -> object:
+        """指標を追加（同名があれば既存の状態を共有、新規の状態は以降の足から計算）"""
+        if name not in self.states:
+            self.states[name] = state
+            self._snapshot = None
+        return self.states[name]
+
+    def update_bar(self, bar: Mapping[str, float]):
+        """足（high/low/close）を1本追加"""
+        for state in self.states.values():
+            state.update_bar(bar)
+        self.count += 1
+        self._snapshot = None
+
+    def snapshot(self) -> Mapping[str, object]:
+        """最新値のスナップショット（更新がなければ同じオブジェクト）"""
+        if self._snapshot is None:
+            self._snapshot = MappingProxyType(
+                {name: state.value for name, state in self.states.items()})
+        return self._snapshot
\ No newline at end of file
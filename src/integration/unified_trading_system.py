@@ -25,7 +25,7 @@ from optimization.advanced_event_engine import AdvancedEventEngine, EventPriorit
 from risk_management.enhanced_risk_manager import EnhancedRiskManager, RiskLimits, Position
 from monitoring.error_handler import ErrorHandler, AlertLevel
 from trading.websocket_stream import StreamingTradingEngine
-# import memos.pkg_functions as pkg  # 将来実装予定
+from trading.pkg_signal_pipeline import PKGSignalPipeline, BUY_SIGNAL, SELL_SIGNAL
 
 
 @dataclass
@@ -116,6 +116,17 @@ class SystemMonitor:
 class UnifiedTradingSystem:
     """統合FX取引システム"""
     
+    # シグナル判定の時間足
+    SIGNAL_TIMEFRAME = 'M15'
+    
+    # ATRが揃うまでの既定値
+    ATR_DEFAULTS = {
+        "USDJPY": 0.30,
+        "EURJPY": 0.35,
+        "EURUSD": 0.0003,
+        "GBPJPY": 0.40
+    }
+    
     def __init__(self, initial_balance: float = 1000000):
         print("🏗️ 統合FX取引システム初期化中...")
         
@@ -145,8 +156,9 @@ class UnifiedTradingSystem:
         self.trade_history = []
         self.daily_pnl = {}
         
-        # PKGストラテジー統合（将来実装予定）
-        self.pkg_strategy = None
+        # PKGストラテジー統合（通貨ペア別の足・ATR・平均足の状態を保持）
+        self.pkg_pipeline = PKGSignalPipeline(timeframe=self.SIGNAL_TIMEFRAME,
+                                              symbols=self.ATR_DEFAULTS)
         
         # イベントハンドラー登録
         self._setup_event_handlers()
@@ -288,21 +300,28 @@ class UnifiedTradingSystem:
         )
     
     async def _generate_pkg_signal(self, symbol: str, price_data: Dict) -> int:
-        """PKG戦略シグナル生成"""
+        """
+        PKG戦略シグナル生成
+        
+        ティックを足に集約し、足が確定したときだけPKG DAGを評価する。
+        
+        Returns:
+            1=買い, 2=売り, 0=待機（足が確定していない場合も0）
+        """
         try:
-            # 簡易的なPKG戦略実装
             close_price = price_data.get('mid', price_data.get('close', 0))
             
             if close_price == 0:
                 return 0
             
-            # ここで実際のPKG関数を呼び出す
-            # 現在は簡易実装
-            import random
+            signal = self.pkg_pipeline.update(
+                symbol, close_price,
+                price_data.get('timestamp', time.time()),
+                price_data.get('volume', 1)
+            )
             
-            # 5%の確率でシグナル生成
-            if random.random() < 0.05:
-                return random.choice([1, 2])  # 買い or 売り
+            if signal in (BUY_SIGNAL, SELL_SIGNAL):
+                return signal
             
             return 0  # 待機
             
@@ -311,16 +330,11 @@ class UnifiedTradingSystem:
             return 0
     
     def _calculate_atr(self, symbol: str) -> float:
-        """簡易ATR計算"""
-        # 実際の実装では過去データから計算
-        # 現在は固定値
-        atr_defaults = {
-            "USDJPY": 0.30,
-            "EURJPY": 0.35,
-            "EURUSD": 0.0003,
-            "GBPJPY": 0.40
-        }
-        return atr_defaults.get(symbol, 0.30)
+        """確定足のATR（期間分の足が揃うまでは通貨ペア別の既定値）"""
+        atr = self.pkg_pipeline.atr(symbol)
+        if atr:
+            return atr
+        return self.ATR_DEFAULTS.get(symbol, 0.30)
     
     async def _execute_trade(self, symbol: str, signal: int, risk_check: Dict):
         """取引執行"""
@@ -11,10 +11,18 @@
 import time
 import statistics
 from collections import deque
-from typing import Dict, List, Callable, Optional
+from typing import Dict, List, Callable, Mapping, Optional
 import asyncio
 import threading
 from dataclasses import dataclass
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indicators.streaming_indicators import IndicatorSet
+
+# 指標を返し始めるまでに必要な足の本数
+MIN_INDICATOR_BARS = 20
 
 
 def fast_sma(prices: List[float], period: int) -> float:
@@ -124,7 +132,7 @@ class EventDrivenEngine:
     def __init__(self):
         self.event_queue = asyncio.Queue()
         self.price_buffers = {}
-        self.indicators_cache = {}
+        self.indicator_sets: Dict[str, IndicatorSet] = {}  # 銘柄ごとの逐次更新指標
         self.subscribers = {}
         self.is_running = False
         
@@ -195,9 +203,10 @@ class EventDrivenEngine:
         buffers['lows'].append(price_data['low'])
         buffers['timestamps'].append(event.timestamp)
         
-        # 指標更新（キャッシュクリア）
-        if symbol in self.indicators_cache:
-            self.indicators_cache[symbol] = {}
+        # 指標を O(1) で更新（サブスクライバー数によらず1回）
+        if symbol not in self.indicator_sets:
+            self.indicator_sets[symbol] = IndicatorSet()
+        self.indicator_sets[symbol].update_bar(price_data)
         
         # サブスクライバーに通知
         if "PRICE_UPDATE" in self.subscribers:
@@ -211,37 +220,16 @@ class EventDrivenEngine:
             for callback in self.subscribers["SIGNAL_CHECK"]:
                 await callback(event)
     
-    def calculate_indicators(self, symbol: str) -> Dict:
-        """高速指標計算（Numba最適化）"""
-        if symbol not in self.price_buffers:
-            return {}
-        
-        # キャッシュチェック
-        if symbol in self.indicators_cache and self.indicators_cache[symbol]:
-            return self.indicators_cache[symbol]
-        
-        buffers = self.price_buffers[symbol]
-        
-        if len(buffers['prices']) < 20:
+    def calculate_indicators(self, symbol: str) -> Mapping:
+        """
+        最新の指標（価格更新時に逐次計算済み）
+        
+        次の価格更新までは全サブスクライバーに同じ読み取り専用マッピングを返す
+        """
+        indicator_set = self.indicator_sets.get(symbol)
+        if indicator_set is None or indicator_set.count < MIN_INDICATOR_BARS:
             return {}
-        
-        # リストに変換
-        prices = buffers['prices'].to_list()
-        highs = buffers['highs'].to_list()
-        lows = buffers['lows'].to_list()
-        
-        # 高速指標計算
-        indicators = {
-            'sma_20': fast_sma(prices, 20),
-            'ema_12': fast_ema(prices, 12),
-            'atr_14': fast_atr(highs, lows, prices, 14),
-            'macd': fast_macd(prices)
-        }
-        
-        # キャッシュ保存
-        self.indicators_cache[symbol] = indicators
-        
-        return indicators
+        return indicator_set.snapshot()
     
     def get_performance_stats(self) -> Dict:
         """パフォーマンス統計"""
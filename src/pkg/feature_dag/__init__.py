@@ -21,7 +21,8 @@ from .feature_extraction import FeatureExtractionLayer, MarketData, HeikinAshiDa
 from .dag_config_manager import DAGConfigManager, NodeDefinition, DAGStructure
 from .export_contract import (
     StandardFeatureExporter, VersionedExportManager, FeatureBundle, 
-    StandardizedFeature, FeatureMetadata, DataQuality, default_export_manager
+    StandardizedFeature, FeatureMetadata, DataQuality, default_export_manager,
+    FeatureSchema, ColumnarFeatureBundle
 )
 
 __version__ = "2.0.0"
@@ -51,5 +52,7 @@ __all__ = [
     "StandardizedFeature",
     "FeatureMetadata", 
     "DataQuality",
-    "default_export_manager"
+    "default_export_manager",
+    "FeatureSchema",
+    "ColumnarFeatureBundle"
 ]
\ No newline at end of file
@@ -17,6 +17,9 @@ from collections import defaultdict, deque
 
 logger = logging.getLogger(__name__)
 
+# 階層ごとの既定レイテンシ予算（ミリ秒）。ノードの parameters の latency_budget_ms で上書き可能
+DEFAULT_LATENCY_BUDGET_MS = {0: 1.0, 1: 3.0, 2: 3.0, 3: 3.0, 4: 2.0, 5: 2.0}
+
 @dataclass
 class NodeDefinition:
     """ノード定義データクラス"""
@@ -224,6 +227,13 @@ class DAGConfigManager:
             raise KeyError(f"Node {node_id} not found")
         return self.nodes[node_id]
     
+    def get_latency_budget(self, node_id: str) -> float:
+        """ノードのレイテンシ予算（ミリ秒）を取得"""
+        node = self.get_node_definition(node_id)
+        if 'latency_budget_ms' in node.parameters:
+            return float(node.parameters['latency_budget_ms'])
+        return DEFAULT_LATENCY_BUDGET_MS.get(node.layer, 3.0)
+    
     def get_layer_nodes(self, layer: int) -> List[str]:
         """指定階層のノード一覧を取得"""
         if not self.dag_structure:
@@ -11,6 +11,8 @@ from enum import Enum
 import statistics
 import math
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 class DataQuality(Enum):
@@ -84,6 +86,162 @@ class FeatureBundle:
             if feature.metadata.quality_score >= min_quality
         }
 
+# 品質レベルの下限（DataQuality の境界、昇順）
+QUALITY_LEVEL_BOUNDS = (0.3, 0.5, 0.7, 0.9)
+QUALITY_LEVELS = (DataQuality.INVALID, DataQuality.POOR, DataQuality.FAIR,
+                  DataQuality.GOOD, DataQuality.EXCELLENT)
+
+@dataclass(frozen=True, eq=False)
+class FeatureSchema:
+    """
+    列形式エクスポートのスキーマ（エクスポーターのバージョンごとに1回だけコンパイル）
+    
+    特徴量の並び・ID・正規化パラメータを配列に固定し、ティックごとの処理を
+    ベクトル演算1回で済ませる。正規化は value * scale + bias を clip_low〜clip_high に収める形に統一
+    """
+    version: str
+    currency_pair: str
+    timeframe: str
+    names: tuple
+    feature_ids: tuple
+    index: Dict[str, int]
+    range_low: np.ndarray
+    range_high: np.ndarray
+    scale: np.ndarray
+    bias: np.ndarray
+    clip_low: np.ndarray
+    clip_high: np.ndarray
+    
+    @classmethod
+    def compile(cls, feature_mapping: Dict[str, Dict[str, Any]], currency_pair: str,
+                timeframe: str, version: str) -> "FeatureSchema":
+        """特徴量マッピングからスキーマを構築"""
+        names = tuple(feature_mapping)
+        size = len(names)
+        range_low = np.empty(size)
+        range_high = np.empty(size)
+        scale = np.ones(size)
+        bias = np.zeros(size)
+        clip_low = np.full(size, -np.inf)
+        clip_high = np.full(size, np.inf)
+        
+        for i, name in enumerate(names):
+            mapping = feature_mapping[name]
+            low, high = mapping.get("expected_range", [-1, 1])
+            range_low[i], range_high[i] = low, high
+            normalization = mapping.get("normalization", "none")
+            if normalization == "minmax":
+                # [0, 1]に正規化（範囲幅0なら0.5固定）
+                if high != low:
+                    scale[i] = 1.0 / (high - low)
+                    bias[i] = -low * scale[i]
+                else:
+                    scale[i], bias[i] = 0.0, 0.5
+                clip_low[i], clip_high[i] = 0.0, 1.0
+            elif normalization == "zscore":
+                # 期待範囲の中央を平均、範囲の1/4を標準偏差と仮定（_normalize_feature と同じ）
+                std = (high - low) / 4
+                if std > 0:
+                    scale[i] = 1.0 / std
+                    bias[i] = -((low + high) / 2) * scale[i]
+                else:
+                    scale[i] = 0.0
+        
+        return cls(
+            version=version,
+            currency_pair=currency_pair,
+            timeframe=timeframe,
+            names=names,
+            feature_ids=tuple(f"{currency_pair}_{timeframe}_{name}" for name in names),
+            index={name: i for i, name in enumerate(names)},
+            range_low=range_low,
+            range_high=range_high,
+            scale=scale,
+            bias=bias,
+            clip_low=clip_low,
+            clip_high=clip_high
+        )
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def normalize(self, values: np.ndarray) -> np.ndarray:
+        """正規化（最後の軸が特徴量、複数バンドルの行列もそのまま扱える）"""
+        return np.clip(values * self.scale + self.bias, self.clip_low, self.clip_high)
+    
+    def quality(self, normalized: np.ndarray) -> np.ndarray:
+        """品質スコア（_calculate_quality_score のベクトル版）"""
+        low, high = self.range_low, self.range_high
+        with np.errstate(invalid='ignore', divide='ignore'):
+            distance = np.maximum(low - normalized, normalized - high)
+            penalty = np.minimum(1.0, np.maximum(distance, 0.0) / (high - low))
+            range_score = np.where(np.isnan(penalty), 0.0, 1.0 - penalty)
+            validity = np.where(np.isfinite(normalized),
+                                np.where(np.abs(normalized) > 1000, 0.1, 1.0), 0.0)
+        return range_score * validity
+
+@dataclass
+class ColumnarFeatureBundle:
+    """
+    列形式の特徴量バンドル
+    
+    特徴量ごとのオブジェクトを作らず、スキーマ順の float32 ベクトルと品質ベクトルだけを持つ。
+    ティックに含まれなかった特徴量は値・品質とも0で present が False
+    """
+    timestamp: datetime
+    schema: FeatureSchema
+    values: np.ndarray
+    quality: np.ndarray
+    present: np.ndarray
+    
+    @property
+    def currency_pair(self) -> str:
+        return self.schema.currency_pair
+    
+    @property
+    def timeframe(self) -> str:
+        return self.schema.timeframe
+    
+    @property
+    def version(self) -> str:
+        return self.schema.version
+    
+    @property
+    def feature_count(self) -> int:
+        return int(np.count_nonzero(self.present))
+    
+    def get_feature_vector(self, feature_names: Optional[List[str]] = None) -> np.ndarray:
+        """特徴量ベクトルを取得（名前指定時はスキーマにない特徴量を0.0で補う）"""
+        if feature_names is None:
+            return self.values
+        index = self.schema.index
+        vector = np.zeros(len(feature_names), dtype=np.float32)
+        for i, name in enumerate(feature_names):
+            position = index.get(name)
+            if position is not None:
+                vector[i] = self.values[position]
+        return vector
+    
+    def quality_summary(self) -> Dict[str, Any]:
+        """品質サマリー（_calculate_quality_summary と同じ項目）"""
+        scores = self.quality[self.present].astype(np.float64)
+        if scores.size == 0:
+            return {"overall_quality": 0.0, "feature_count": 0}
+        
+        level_counts = np.bincount(np.searchsorted(QUALITY_LEVEL_BOUNDS, scores, side='right'),
+                                   minlength=len(QUALITY_LEVELS))
+        overall = float(scores.mean())
+        return {
+            "overall_quality": overall,
+            "feature_count": int(scores.size),
+            "quality_distribution": {level.value: int(count)
+                                     for level, count in zip(QUALITY_LEVELS, level_counts) if count},
+            "avg_confidence": overall,
+            "min_quality": float(scores.min()),
+            "max_quality": float(scores.max()),
+            "valid_feature_ratio": float(np.count_nonzero(scores >= 0.3)) / scores.size
+        }
+
 @runtime_checkable
 class FeatureExporter(Protocol):
     """特徴量エクスポーターインターフェース"""
@@ -104,6 +262,17 @@ class StandardFeatureExporter:
         self.timeframe = timeframe
         self.feature_mapping = self._initialize_feature_mapping()
         self.version = "1.0"
+        self._schema: Optional[FeatureSchema] = None
+    
+    @property
+    def schema(self) -> FeatureSchema:
+        """列形式エクスポートのスキーマ（バージョン変更時のみ再コンパイル）"""
+        schema = self._schema
+        if schema is None or schema.version != self.version:
+            schema = FeatureSchema.compile(self.feature_mapping, self.currency_pair,
+                                           self.timeframe, self.version)
+            self._schema = schema
+        return schema
         
     def _initialize_feature_mapping(self) -> Dict[str, Dict[str, Any]]:
         """特徴量マッピング設定を初期化"""
@@ -240,6 +409,70 @@ class StandardFeatureExporter:
             version=self.version
         )
     
+    def export_columnar(self, raw_features: Dict[str, Any],
+                        timestamp: Optional[datetime] = None) -> ColumnarFeatureBundle:
+        """
+        生の特徴量データを列形式でエクスポート
+        
+        export_features と同じ値・品質スコアを、スキーマ順の float32 ベクトルで返す
+        （同じ特徴量名が複数ノードにあれば後のノードの値を使う）
+        
+        Args:
+            raw_features: ノードID→特徴量の辞書
+            timestamp: 特徴量の元になった足の時刻（省略時は現在時刻）
+        """
+        schema = self.schema
+        index = schema.index
+        raw = np.zeros(len(schema))
+        present = np.zeros(len(schema), dtype=bool)
+        
+        for node_data in raw_features.values():
+            if isinstance(node_data, dict):
+                for feature_name, value in node_data.items():
+                    position = index.get(feature_name)
+                    if position is not None and isinstance(value, (int, float)):
+                        raw[position] = value
+                        present[position] = True
+        
+        normalized = schema.normalize(raw)
+        quality = schema.quality(normalized)
+        normalized[~present] = 0.0
+        quality[~present] = 0.0
+        
+        return ColumnarFeatureBundle(
+            timestamp=timestamp if timestamp is not None else datetime.now(),
+            schema=schema,
+            values=normalized.astype(np.float32),
+            quality=quality.astype(np.float32),
+            present=present
+        )
+    
+    def validate_columnar(self, bundle: ColumnarFeatureBundle) -> tuple[bool, List[str]]:
+        """列形式バンドルの妥当性を検証（validate_export と同じ基準）"""
+        errors = []
+        schema = bundle.schema
+        
+        if not bundle.present.any():
+            errors.append("No features in bundle")
+        
+        if bundle.quality_summary().get("overall_quality", 0) < 0.3:
+            errors.append("Overall quality too low")
+        
+        for req_feature in ["unified_signal", "signal_strength"]:
+            position = schema.index.get(req_feature)
+            if position is None or not bundle.present[position]:
+                errors.append(f"Missing required feature: {req_feature}")
+        
+        for position in np.flatnonzero(bundle.present & (bundle.quality < 0.1)):
+            errors.append(f"Feature {schema.feature_ids[position]} has very low quality: "
+                          f"{bundle.quality[position]}")
+        
+        for position in np.flatnonzero(bundle.present & ~np.isfinite(bundle.values)):
+            errors.append(f"Feature {schema.feature_ids[position]} has invalid value: "
+                          f"{bundle.values[position]}")
+        
+        return len(errors) == 0, errors
+    
     def _normalize_feature(self, feature_name: str, value: float) -> float:
         """特徴量の正規化"""
         mapping = self.feature_mapping.get(feature_name, {})
@@ -368,6 +601,44 @@ class VersionedExportManager:
     def __init__(self):
         self.exporters: Dict[str, StandardFeatureExporter] = {}
         self.version_history: List[str] = []
+        self.feature_store = None
+        self._store_writers: Dict[tuple, Any] = {}
+    
+    def attach_feature_store(self, feature_store) -> None:
+        """列形式エクスポートの結果を特徴量ストア（data.feature_store.FeatureStore）に追記する"""
+        self.flush_feature_store()
+        self.feature_store = feature_store
+        self._store_writers = {}
+    
+    def flush_feature_store(self) -> None:
+        """特徴量ストアへの未書き込み分を書き込む"""
+        for writer in self._store_writers.values():
+            writer.flush()
+    
+    def export_columnar(self, raw_features: Dict[str, Any],
+                        version: Optional[str] = None,
+                        timestamp: Optional[datetime] = None) -> ColumnarFeatureBundle:
+        """
+        列形式エクスポート（特徴量ストアが設定されていれば追記）
+        
+        ストアの行は timestamp（市場データの足の時刻）で記録するため、
+        ストア設定時は timestamp の指定が必須
+        """
+        if self.feature_store is not None and timestamp is None:
+            raise ValueError("timestamp of the market data is required when a feature store is attached")
+        exporter = self.get_exporter(version)
+        bundle = exporter.export_columnar(raw_features, timestamp)
+        
+        if self.feature_store is not None:
+            schema = bundle.schema
+            key = (schema.currency_pair, schema.timeframe, schema.version)
+            writer = self._store_writers.get(key)
+            if writer is None:
+                writer = self.feature_store.writer_for(schema)
+                self._store_writers[key] = writer
+            writer.append_bundle(bundle)
+        
+        return bundle
         
     def register_exporter(self, version: str, exporter: StandardFeatureExporter) -> None:
         """エクスポーターを登録"""
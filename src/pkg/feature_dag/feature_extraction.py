@@ -3,18 +3,35 @@
 階層1-5: PKG準拠の特徴量計算とマルチタイムフレーム統合
 """
 
+import asyncio
 import logging
+import threading
 import time
-from typing import Dict, List, Any, Optional, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Deque, Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import math
 import statistics
 
-from .dag_config_manager import DAGConfigManager, NodeDefinition
+from .dag_config_manager import DAGConfigManager
+from .ring_buffer import FieldRingBuffer
 
 logger = logging.getLogger(__name__)
 
+# 1ティックあたりの処理時間の上限（ミリ秒）
+TICK_BUDGET_MS = 30.0
+
+# 非同期処理の出力で、前回値で代用したノードIDの一覧を入れるキー
+STALE_NODES_KEY = "stale_nodes"
+
+# 履歴の保持件数とフィールド（timestamp はUNIX秒）
+HISTORY_CAPACITY = 100
+PRICE_FIELDS = ("mid", "bid", "ask", "volume", "spread", "timestamp")
+HEIKIN_ASHI_FIELDS = ("open", "high", "low", "close", "direction")
+
 @dataclass
 class MarketData:
     """市場データ構造"""
@@ -34,6 +51,41 @@ class HeikinAshiData:
     close: float
     direction: int  # 1: 上昇, -1: 下降, 0: 横ばい
 
+@dataclass
+class NodeBinding:
+    """実行用に事前解決したノード（関数・入力・予算）"""
+    node_id: str
+    function: Callable[[Dict[str, Any], Dict[str, Any]], Any]
+    inputs: Tuple[str, ...]
+    parameters: Dict[str, Any]
+    budget_ms: float
+
+@dataclass
+class NodeLatencyStats:
+    """ノードごとの実行時間（直近 window 件）と締切超過の集計"""
+    budget_ms: float
+    window: int = 1000
+    samples: Deque[float] = field(default_factory=deque)
+    call_count: int = 0
+    deadline_misses: int = 0
+    stale_count: int = 0
+    
+    def record(self, elapsed_ms: float) -> None:
+        """実行時間を記録"""
+        self.call_count += 1
+        self.samples.append(elapsed_ms)
+        if len(self.samples) > self.window:
+            self.samples.popleft()
+        if elapsed_ms > self.budget_ms:
+            self.deadline_misses += 1
+    
+    def percentile(self, q: float) -> float:
+        """パーセンタイル（最近傍順位法）"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
 class FeatureExtractionLayer:
     """特徴量抽出層メインクラス"""
     
@@ -43,14 +95,41 @@ class FeatureExtractionLayer:
         self.config_manager = DAGConfigManager()
         self.config_manager.load_configuration()
         
-        # データキャッシュ
-        self.price_history: List[MarketData] = []
-        self.heikin_ashi_history: List[HeikinAshiData] = []
+        # データキャッシュ（固定容量のリングバッファ、直近の窓はコピーなしで参照）
+        self._prices = FieldRingBuffer(PRICE_FIELDS, HISTORY_CAPACITY)
+        self._heikin_ashi = FieldRingBuffer(HEIKIN_ASHI_FIELDS, HISTORY_CAPACITY)
         self.feature_cache: Dict[str, Any] = {}
+        # 非同期処理のワーカースレッドが参照する、投入時点の履歴の複製
+        self._tick_history = threading.local()
         
         # パフォーマンス監視
         self.execution_times: Dict[str, List[float]] = {}
-        
+        self.node_stats: Dict[str, NodeLatencyStats] = {}
+        
+        # 締切付き実行（前回の正常値、締切後も実行中のノード）
+        self.tick_budget_ms = TICK_BUDGET_MS
+        self.last_good: Dict[str, Any] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._node_pool: Optional[ThreadPoolExecutor] = None
+        
+        # ノード関数は毎回名前で引かず、構成読み込み時に1回だけ解決する
+        self._bindings: List[NodeBinding] = []
+        self._binding_map: Dict[str, NodeBinding] = {}
+        self._levels: List[List[NodeBinding]] = []  # 互いに依存しないノードの組（実行順）
+        self.rebind()
+        
+    @property
+    def prices(self) -> FieldRingBuffer:
+        """価格履歴（非同期ノードの実行中は投入したティック時点の複製）"""
+        history = getattr(self._tick_history, "buffers", None)
+        return self._prices if history is None else history[0]
+    
+    @property
+    def heikin_ashi(self) -> FieldRingBuffer:
+        """平均足履歴（非同期ノードの実行中は投入したティック時点の複製）"""
+        history = getattr(self._tick_history, "buffers", None)
+        return self._heikin_ashi if history is None else history[1]
+    
     def _get_currency_code(self, currency: str) -> str:
         """通貨コードを取得"""
         mapping = {
@@ -60,6 +139,43 @@ class FeatureExtractionLayer:
         }
         return mapping.get(currency, "1")
     
+    def rebind(self) -> None:
+        """
+        実行順序・ノード関数・レイテンシ予算を解決し直す
+        
+        構成を読み込み直したときに呼ぶ（パラメータは参照を保持するため
+        update_node_parameters の変更はそのまま反映される）
+        """
+        self._bindings = []
+        for node_id in self.config_manager.get_execution_order():
+            node_def = self.config_manager.get_node_definition(node_id)
+            function = getattr(self, node_def.function, None)
+            if function is None:
+                logger.warning(f"Function {node_def.function} not implemented, "
+                               f"node {node_id} outputs defaults")
+                function = partial(self._default_output_function, node_id)
+            
+            budget_ms = self.config_manager.get_latency_budget(node_id)
+            self._bindings.append(NodeBinding(
+                node_id=node_id,
+                function=function,
+                inputs=tuple(node_def.inputs),
+                parameters=node_def.parameters,
+                budget_ms=budget_ms
+            ))
+            stats = self.node_stats.setdefault(node_id, NodeLatencyStats(budget_ms))
+            stats.budget_ms = budget_ms
+        self._binding_map = {binding.node_id: binding for binding in self._bindings}
+        
+        levels: Dict[str, int] = {}
+        self._levels = []
+        for binding in self._bindings:
+            level = 1 + max((levels[i] for i in binding.inputs if i in levels), default=-1)
+            levels[binding.node_id] = level
+            if level == len(self._levels):
+                self._levels.append([])
+            self._levels[level].append(binding)
+    
     def process_market_data(self, market_data: MarketData) -> Dict[str, Any]:
         """市場データを処理してすべての特徴量を計算"""
         start_time = time.time()
@@ -68,120 +184,210 @@ class FeatureExtractionLayer:
         self._update_data_history(market_data)
         
         # 実行順序に従って各ノードを処理
-        execution_order = self.config_manager.get_execution_order()
         results = {}
         
-        for node_id in execution_order:
+        for binding in self._bindings:
+            node_start = time.perf_counter()
             try:
-                node_result = self._execute_node(node_id, results)
-                results.update(node_result)
+                results[binding.node_id] = self._run_binding(binding, results)
+                self.last_good[binding.node_id] = results[binding.node_id]
                 
             except Exception as e:
-                logger.error(f"Error executing node {node_id}: {e}")
+                logger.error(f"Error executing node {binding.node_id}: {e}")
                 # エラー時はデフォルト値を設定
-                results[node_id] = self._get_default_node_output(node_id)
+                results[binding.node_id] = self._get_default_node_output(binding.node_id)
+            self.node_stats[binding.node_id].record((time.perf_counter() - node_start) * 1000)
         
         # 実行時間を記録
         execution_time = (time.time() - start_time) * 1000
         self._record_execution_time("process_market_data", execution_time)
         
         # 30ms制約のチェック
-        if execution_time > 30:
-            logger.warning(f"Execution time exceeded 30ms: {execution_time:.2f}ms")
+        if execution_time > self.tick_budget_ms:
+            logger.warning(f"Execution time exceeded {self.tick_budget_ms:.0f}ms: {execution_time:.2f}ms")
         
         return results
     
-    def _update_data_history(self, market_data: MarketData) -> None:
-        """データ履歴を更新"""
-        self.price_history.append(market_data)
+    async def process_market_data_async(self, market_data: MarketData) -> Dict[str, Any]:
+        """
+        締切付きで市場データを処理
+        
+        互いに依存しないノード（同じ依存段）はワーカースレッドへ同時に投入し、
+        ノードの予算（とティック全体の残り時間）を過ぎたら待たずに前回の正常値を使う。
+        代用したノードは results[STALE_NODES_KEY] に入る。
+        締切を過ぎたノードは完了するまで再投入せず、完了した時点の値が次の正常値になる
+        （ノードは投入したティック時点の履歴の複製を参照するため、次のティックの
+        履歴更新と重なっても結果は変わらない）
+        （ノード関数は Python 実装のため、同時に進むのは主に GIL を解放する NumPy 演算と待ち時間）
+        """
+        tick_start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        if self._node_pool is None:
+            self._node_pool = ThreadPoolExecutor(max_workers=len(self._bindings) + 1,
+                                                 thread_name_prefix="feature-node")
         
-        # 履歴サイズ制限（最新100件）
-        if len(self.price_history) > 100:
-            self.price_history = self.price_history[-100:]
+        self._update_data_history(market_data)
+        history = (self._prices.copy(), self._heikin_ashi.copy())
+        
+        results: Dict[str, Any] = {}
+        stale: List[str] = []
+        for level in self._levels:
+            remaining_ms = self.tick_budget_ms - (time.perf_counter() - tick_start) * 1000
+            outcomes = await asyncio.gather(*(
+                self._run_with_deadline(loop, binding, self._binding_inputs(binding, results),
+                                        history, min(binding.budget_ms, remaining_ms))
+                for binding in level
+            ))
+            
+            for binding, (completed, result) in zip(level, outcomes):
+                if not completed:
+                    # 締切超過・実行中・残り時間なし: 前回の正常値で代用
+                    result = self.last_good.get(
+                        binding.node_id, self._get_default_node_output(binding.node_id))
+                    self.node_stats[binding.node_id].stale_count += 1
+                    stale.append(binding.node_id)
+                results[binding.node_id] = result
+        
+        results[STALE_NODES_KEY] = stale
+        self._record_execution_time("process_market_data_async",
+                                    (time.perf_counter() - tick_start) * 1000)
+        return results
     
-    def _execute_node(self, node_id: str, context: Dict[str, Any]) -> Dict[str, Any]:
-        """個別ノードを実行"""
-        node_def = self.config_manager.get_node_definition(node_id)
-        
-        # 入力データを準備
-        input_data = self._prepare_input_data(node_def, context)
-        
-        # 対応する関数を実行
-        function_name = node_def.function
-        if hasattr(self, function_name):
-            function = getattr(self, function_name)
-            result = function(input_data, node_def.parameters)
-        else:
-            raise NotImplementedError(f"Function {function_name} not implemented")
-        
-        return {node_id: result}
+    async def _run_with_deadline(self, loop: asyncio.AbstractEventLoop, binding: NodeBinding,
+                                 input_data: Dict[str, Any],
+                                 history: Tuple[FieldRingBuffer, FieldRingBuffer],
+                                 timeout_ms: float) -> Tuple[bool, Any]:
+        """ノードをワーカースレッドで実行し、締切内に完了したかと結果を返す"""
+        if binding.node_id in self._inflight or timeout_ms <= 0:
+            return False, None
+        
+        future = loop.run_in_executor(self._node_pool, self._timed_binding,
+                                      binding, input_data, history)
+        try:
+            result, elapsed_ms = await asyncio.wait_for(asyncio.shield(future), timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            self._inflight[binding.node_id] = future
+            future.add_done_callback(partial(self._finish_late_node, binding))
+            return False, None
+        except Exception as e:
+            logger.error(f"Error executing node {binding.node_id}: {e}")
+            return True, self._get_default_node_output(binding.node_id)
+        
+        self.node_stats[binding.node_id].record(elapsed_ms)
+        self.last_good[binding.node_id] = result
+        return True, result
+    
+    def close(self) -> None:
+        """非同期処理用のワーカースレッドを停止"""
+        if self._node_pool is not None:
+            self._node_pool.shutdown(wait=True)
+            self._node_pool = None
     
-    def _prepare_input_data(self, node_def: NodeDefinition, context: Dict[str, Any]) -> Dict[str, Any]:
+    def _binding_inputs(self, binding: NodeBinding, context: Dict[str, Any]) -> Dict[str, Any]:
         """ノード実行用の入力データを準備"""
         input_data = {}
-        
-        for input_id in node_def.inputs:
+        for input_id in binding.inputs:
             if input_id in context:
                 input_data[input_id] = context[input_id]
             else:
-                logger.warning(f"Missing input {input_id} for node {node_def.id}")
-        
+                logger.warning(f"Missing input {input_id} for node {binding.node_id}")
         return input_data
     
-    # 階層1: 基本指標計算関数群
+    def _run_binding(self, binding: NodeBinding, context: Dict[str, Any]) -> Any:
+        """事前解決したノードを実行"""
+        return binding.function(self._binding_inputs(binding, context), binding.parameters)
     
-    def calculate_heikin_ashi(self, input_data: Dict[str, Any], parameters: Dict[str, Any]) -> Dict[str, float]:
-        """平均足計算"""
-        if not self.price_history:
-            return self._get_default_heikin_ashi()
-        
-        current_data = self.price_history[-1]
-        smoothing = parameters.get('smoothing_factor', 0.1)
-        
-        # 前回の平均足データを取得
-        prev_ha = self.heikin_ashi_history[-1] if self.heikin_ashi_history else None
-        
-        if prev_ha is None:
+    def _timed_binding(self, binding: NodeBinding, input_data: Dict[str, Any],
+                       history: Tuple[FieldRingBuffer, FieldRingBuffer]) -> Tuple[Any, float]:
+        """実行時間付きでノードを実行（ワーカースレッド側、履歴は投入時点の複製）"""
+        self._tick_history.buffers = history
+        try:
+            start = time.perf_counter()
+            result = binding.function(input_data, binding.parameters)
+            return result, (time.perf_counter() - start) * 1000
+        finally:
+            self._tick_history.buffers = None
+    
+    def _finish_late_node(self, binding: NodeBinding, future: asyncio.Future) -> None:
+        """締切後に完了したノードの結果を次の正常値にする"""
+        self._inflight.pop(binding.node_id, None)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Error executing node {binding.node_id}: {error}")
+            return
+        result, elapsed_ms = future.result()
+        self.node_stats[binding.node_id].record(elapsed_ms)
+        self.last_good[binding.node_id] = result
+    
+    def _default_output_function(self, node_id: str, input_data: Dict[str, Any],
+                                 parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """未実装ノードの代わりにデフォルト値を返す"""
+        return self._get_default_node_output(node_id)
+    
+    def _update_data_history(self, market_data: MarketData) -> None:
+        """
+        データ履歴を更新
+        
+        平均足は前回の平均足に依存する漸化式のため、ノードの実行（締切超過による
+        スキップや遅延完了）に左右されないようティックごとにここで1本追加する
+        """
+        bid, ask = market_data.bid, market_data.ask
+        self._prices.append((
+            (bid + ask) / 2,
+            bid,
+            ask,
+            market_data.volume,
+            market_data.spread,
+            market_data.timestamp.timestamp()
+        ))
+        
+        ha_close = (bid + ask) / 2
+        if not len(self._heikin_ashi):
             # 初回計算
-            ha_close = (current_data.bid + current_data.ask) / 2
             ha_open = ha_close
-            ha_high = max(current_data.bid, current_data.ask)
-            ha_low = min(current_data.bid, current_data.ask)
+            ha_high = max(bid, ask)
+            ha_low = min(bid, ask)
         else:
-            # 平均足計算
-            ha_close = (current_data.bid + current_data.ask) / 2
-            ha_open = (prev_ha.open + prev_ha.close) / 2
-            ha_high = max(current_data.bid, current_data.ask, ha_open)
-            ha_low = min(current_data.bid, current_data.ask, ha_open)
+            # 平均足計算（前回の平均足から）
+            ha_open = (self._heikin_ashi.last("open") + self._heikin_ashi.last("close")) / 2
+            ha_high = max(bid, ask, ha_open)
+            ha_low = min(bid, ask, ha_open)
         
         # 方向判定
         direction = 1 if ha_close > ha_open else (-1 if ha_close < ha_open else 0)
-        
-        # 履歴に追加
-        ha_data = HeikinAshiData(ha_open, ha_high, ha_low, ha_close, direction)
-        self.heikin_ashi_history.append(ha_data)
-        
-        # 履歴サイズ制限
-        if len(self.heikin_ashi_history) > 100:
-            self.heikin_ashi_history = self.heikin_ashi_history[-100:]
+        self._heikin_ashi.append((ha_open, ha_high, ha_low, ha_close, direction))
+    
+    def _execute_node(self, node_id: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        """個別ノードを実行"""
+        binding = self._binding_map.get(node_id)
+        if binding is None:
+            raise KeyError(f"Node {node_id} not found")
+        return {node_id: self._run_binding(binding, context)}
+    
+    # 階層1: 基本指標計算関数群
+    
+    def calculate_heikin_ashi(self, input_data: Dict[str, Any], parameters: Dict[str, Any]) -> Dict[str, float]:
+        """平均足計算（最新の平均足。履歴への追加は _update_data_history で行う）"""
+        if not len(self.heikin_ashi):
+            return self._get_default_heikin_ashi()
         
         return {
-            "ha_open": ha_open,
-            "ha_high": ha_high,
-            "ha_low": ha_low,
-            "ha_close": ha_close,
-            "ha_direction": direction
+            "ha_open": self.heikin_ashi.last("open"),
+            "ha_high": self.heikin_ashi.last("high"),
+            "ha_low": self.heikin_ashi.last("low"),
+            "ha_close": self.heikin_ashi.last("close"),
+            "ha_direction": int(self.heikin_ashi.last("direction"))
         }
     
     def calculate_price_changes(self, input_data: Dict[str, Any], parameters: Dict[str, Any]) -> Dict[str, float]:
         """価格変化計算"""
-        if len(self.price_history) < 2:
+        if len(self.prices) < 2:
             return {"price_change": 0.0, "price_change_pct": 0.0, "price_momentum": 0.0}
         
-        current = self.price_history[-1]
-        previous = self.price_history[-2]
-        current_price = (current.bid + current.ask) / 2
-        previous_price = (previous.bid + previous.ask) / 2
+        current_price = self.prices.last("mid")
+        previous_price = self.prices.last("mid", 2)
         
         price_change = current_price - previous_price
         price_change_pct = price_change / previous_price if previous_price != 0 else 0.0
@@ -191,13 +397,12 @@ class FeatureExtractionLayer:
         momentum_values = []
         
         for period in periods:
-            if len(self.price_history) > period:
-                past_data = self.price_history[-(period+1)]
-                past_price = (past_data.bid + past_data.ask) / 2
+            if len(self.prices) > period:
+                past_price = self.prices.last("mid", period + 1)
                 momentum = (current_price - past_price) / past_price if past_price != 0 else 0.0
                 momentum_values.append(momentum)
         
-        price_momentum = statistics.mean(momentum_values) if momentum_values else 0.0
+        price_momentum = sum(momentum_values) / len(momentum_values) if momentum_values else 0.0
         
         return {
             "price_change": price_change,
@@ -209,21 +414,20 @@ class FeatureExtractionLayer:
         """レンジ指標計算"""
         periods = parameters.get('range_periods', 20)
         
-        if len(self.price_history) < periods:
+        if len(self.prices) < periods:
             return {"range_width": 0.0, "range_position": 0.5, "volatility_index": 0.0}
         
-        recent_data = self.price_history[-periods:]
-        prices = [(d.bid + d.ask) / 2 for d in recent_data]
+        prices = self.prices.window("mid", periods)
         
-        range_high = max(prices)
-        range_low = min(prices)
+        range_high = float(prices.max())
+        range_low = float(prices.min())
         range_width = range_high - range_low
         
-        current_price = prices[-1]
+        current_price = float(prices[-1])
         range_position = (current_price - range_low) / range_width if range_width > 0 else 0.5
         
         # ボラティリティ指標（標準偏差）
-        volatility_index = statistics.stdev(prices) if len(prices) > 1 else 0.0
+        volatility_index = float(prices.std(ddof=1)) if len(prices) > 1 else 0.0
         
         return {
             "range_width": range_width,
@@ -238,23 +442,23 @@ class FeatureExtractionLayer:
         threshold = parameters.get('deviation_threshold', 0.02)
         lookback = parameters.get('lookback_periods', 50)
         
-        if len(self.heikin_ashi_history) < 3:
+        if len(self.heikin_ashi) < 3:
             return {"deviation_score": 0.0, "deviation_direction": 0, "confidence_level": 0.0}
         
         # 前々足乖離による方向判断（同逆判定の核心概念）
-        current_ha = self.heikin_ashi_history[-1]
-        prev_ha = self.heikin_ashi_history[-2]
-        prev_prev_ha = self.heikin_ashi_history[-3] if len(self.heikin_ashi_history) >= 3 else prev_ha
+        current_close = self.heikin_ashi.last("close")
+        prev_close = self.heikin_ashi.last("close", 2)
+        prev_prev_close = self.heikin_ashi.last("close", 3)
         
         # 乖離計算
-        deviation_1 = abs(current_ha.close - prev_ha.close) / prev_ha.close if prev_ha.close != 0 else 0
-        deviation_2 = abs(prev_ha.close - prev_prev_ha.close) / prev_prev_ha.close if prev_prev_ha.close != 0 else 0
+        deviation_1 = abs(current_close - prev_close) / prev_close if prev_close != 0 else 0
+        deviation_2 = abs(prev_close - prev_prev_close) / prev_prev_close if prev_prev_close != 0 else 0
         
         deviation_score = (deviation_1 + deviation_2) / 2
         
         # 方向一致性判定
-        current_direction = current_ha.direction
-        prev_direction = prev_ha.direction
+        current_direction = self.heikin_ashi.last("direction")
+        prev_direction = self.heikin_ashi.last("direction", 2)
         direction_agreement = 1 if current_direction == prev_direction else -1
         
         # 信頼度計算
@@ -270,17 +474,14 @@ class FeatureExtractionLayer:
         """モメンタム指標計算"""
         ma_periods = parameters.get('ma_periods', [5, 10, 20])
         
-        if len(self.price_history) < max(ma_periods):
+        if len(self.prices) < max(ma_periods):
             return {"momentum_strength": 0.0, "momentum_acceleration": 0.0, "trend_stability": 0.0}
         
-        prices = [(d.bid + d.ask) / 2 for d in self.price_history]
-        
-        # 移動平均計算
+        # 移動平均計算（直近の窓をそのまま参照）
         mas = []
         for period in ma_periods:
-            if len(prices) >= period:
-                ma = statistics.mean(prices[-period:])
-                mas.append(ma)
+            if len(self.prices) >= period:
+                mas.append(float(self.prices.window("mid", period).mean()))
         
         if len(mas) < 2:
             return {"momentum_strength": 0.0, "momentum_acceleration": 0.0, "trend_stability": 0.0}
@@ -323,12 +524,14 @@ class FeatureExtractionLayer:
         min_range = parameters.get('min_range_width', 3)
         max_range = parameters.get('max_range_width', 10)
         
-        if len(self.price_history) < 10:
+        if len(self.prices) < 10:
             return {"momi_score": 0.0, "momi_direction": 0, "pattern_confidence": 0.0}
         
         # 最近10期間の価格レンジを計算
-        recent_prices = [(d.bid + d.ask) / 2 for d in self.price_history[-10:]]
-        price_range = max(recent_prices) - min(recent_prices)
+        recent_prices = self.prices.window("mid", 10)
+        recent_high = float(recent_prices.max())
+        recent_low = float(recent_prices.min())
+        price_range = recent_high - recent_low
         
         # pipsに変換（USDJPY基準、0.01が1pip）
         price_range_pips = price_range * 100
@@ -340,8 +543,8 @@ class FeatureExtractionLayer:
             momi_score = 0.0
         
         # 方向判定（レンジ内での位置）
-        current_price = recent_prices[-1]
-        range_position = (current_price - min(recent_prices)) / (max(recent_prices) - min(recent_prices))
+        current_price = float(recent_prices[-1])
+        range_position = (current_price - recent_low) / price_range
         momi_direction = 1 if range_position > 0.6 else (-1 if range_position < 0.4 else 0)
         
         # パターン信頼度
@@ -357,12 +560,11 @@ class FeatureExtractionLayer:
         """同逆パターン検出"""
         agreement_threshold = parameters.get('agreement_threshold', 0.7)
         
-        if len(self.heikin_ashi_history) < 3:
+        if len(self.heikin_ashi) < 3:
             return {"dokyaku_score": 0.0, "direction_agreement": False, "reliability_score": 0.0}
         
         # 最近3本の平均足方向を分析
-        recent_ha = self.heikin_ashi_history[-3:]
-        directions = [ha.direction for ha in recent_ha]
+        directions = self.heikin_ashi.window("direction", 3).tolist()
         
         # 方向一致性計算
         if len(set(directions)) == 1:
@@ -379,10 +581,8 @@ class FeatureExtractionLayer:
             direction_agreement = False
         
         # 信頼度計算（ボリュームと価格変化を考慮）
-        if len(self.price_history) >= 3:
-            volume_trend = []
-            for i in range(3):
-                volume_trend.append(self.price_history[-(i+1)].volume)
+        if len(self.prices) >= 3:
+            volume_trend = self.prices.window("volume", 3).tolist()
             
             volume_mean = statistics.mean(volume_trend) if volume_trend else 0.0
             volume_consistency = 1.0 - statistics.stdev(volume_trend) / volume_mean if volume_mean > 0 and len(volume_trend) > 1 else 0.0
@@ -525,6 +725,20 @@ class FeatureExtractionLayer:
         if len(self.execution_times[function_name]) > 50:
             self.execution_times[function_name] = self.execution_times[function_name][-50:]
     
+    def get_node_latency_metrics(self) -> Dict[str, Dict[str, float]]:
+        """ノードごとの p50/p99 実行時間と予算超過の集計"""
+        return {
+            node_id: {
+                "p50_ms": stats.percentile(50),
+                "p99_ms": stats.percentile(99),
+                "budget_ms": stats.budget_ms,
+                "call_count": stats.call_count,
+                "deadline_misses": stats.deadline_misses,
+                "stale_count": stats.stale_count
+            }
+            for node_id, stats in self.node_stats.items()
+        }
+    
     def get_performance_metrics(self) -> Dict[str, Any]:
         """パフォーマンスメトリクスを取得"""
         metrics = {}
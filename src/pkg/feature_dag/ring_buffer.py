@@ -0,0 +1,66 @@
+"""
+固定容量リングバッファ（フィールドごとの配列）
+ティック履歴を毎回リストで切り詰めずに保持し、直近 n 件をコピーなしのNumPyビューで返す
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+
+class FieldRingBuffer:
+    """
+    フィールドごとの固定容量リングバッファ
+
+    各値を位置 i と i+capacity の2か所に書き込むため、直近 n 件は常に
+    連続した領域になり、window() はスライス（コピーなしのビュー）を返せる。
+    ビューは次の append で上書きされ得るため、同じティック内で使い切ること
+    （別スレッドで後から読む場合は copy() した複製を渡す）
+    """
+
+    def __init__(self, fields: Sequence[str], capacity: int = 100):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self._index = {name: i for i, name in enumerate(self.fields)}
+        self._data = np.zeros((len(self.fields), 2 * capacity), dtype=np.float64)
+        self._head = 0  # 次に書き込む位置 [0, capacity)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, values: Sequence[float]) -> None:
+        """1件追加（fields と同じ順の値）"""
+        head = self._head
+        self._data[:, head] = values
+        self._data[:, head + self.capacity] = values
+        self._head = head + 1 if head + 1 < self.capacity else 0
+        if self._size < self.capacity:
+            self._size += 1
+
+    def window(self, field: str, n: int = None) -> np.ndarray:
+        """直近 n 件（古い順）のビュー。n 省略時は保持している全件"""
+        n = self._size if n is None else min(n, self._size)
+        end = self._head + self.capacity
+        return self._data[self._index[field], end - n:end]
+
+    def last(self, field: str, back: int = 1) -> float:
+        """back 件前の値（1 = 最新）"""
+        if not 1 <= back <= self._size:
+            raise IndexError(f"{field}: {back} back of {self._size}")
+        return float(self._data[self._index[field], self._head + self.capacity - back])
+
+    def copy(self) -> 'FieldRingBuffer':
+        """現在の内容の複製（以後の append の影響を受けない）"""
+        clone = FieldRingBuffer(self.fields, self.capacity)
+        clone._data[:] = self._data
+        clone._head = self._head
+        clone._size = self._size
+        return clone
+
+    def clear(self) -> None:
+        """全件削除"""
+        self._head = 0
+        self._size = 0
\ No newline at end of file
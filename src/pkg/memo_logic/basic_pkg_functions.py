@@ -10,7 +10,7 @@ Excel関数のパッケージ照合メモの内容をベースに実装
 
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional, Tuple, Union, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
 import logging
 import math
@@ -21,6 +21,45 @@ from .core_pkg_functions import (
     TimeFrame, Currency, Period
 )
 
+# ==========================================
+# 配列カーネル（execute_batch）用の補助
+# ==========================================
+# execute_batch(arrays) は execute と同じキーを配列で受け取り、評価結果を配列で返す。
+# - 行ごとの関数（Z/SL/MN/RO/NL）: 各キーの先頭次元が評価回数 N。リスト入力は (N, k) 行列
+# - 系列関数（CO/SG/AS/SS）: 各キーは長さ N の系列で、結果の i 番目は
+#   先頭から i 番目までの系列に execute を適用した値（価格履歴全体を一度に評価）
+
+def _matrix(values: Any) -> np.ndarray:
+    """行ごとのリスト入力を (N, k) 行列に揃える"""
+    matrix = np.asarray(values)
+    return matrix.reshape(-1, 1) if matrix.ndim == 1 else matrix
+
+def _column(values: Any, size: int) -> np.ndarray:
+    """スカラーまたは長さ N の配列を長さ N の列に揃える"""
+    return np.broadcast_to(np.asarray(values), (size,))
+
+def _section_ids(section_indicators: np.ndarray) -> np.ndarray:
+    """区間指標の切替りごとに 0, 1, 2... と増える区間番号"""
+    changes = np.empty(len(section_indicators), dtype=bool)
+    changes[:1] = False
+    changes[1:] = section_indicators[1:] != section_indicators[:-1]
+    return np.cumsum(changes)
+
+def _aligned_sections(indicators: Any, values: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """区間指標と値を短い方の長さに揃える"""
+    indicators = np.asarray(indicators)
+    values = np.asarray(values, dtype=float)
+    length = min(len(indicators), len(values))
+    return indicators[:length], values[:length]
+
+def _section_running_sums(sections: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """各時点の現区間の累積和と、現区間の開始位置"""
+    positions = np.arange(len(values))
+    starts = np.maximum.accumulate(np.where(np.r_[True, sections[1:] != sections[:-1]], positions, 0))
+    totals = np.cumsum(values)
+    before_start = np.where(starts > 0, totals[starts - 1], 0.0)
+    return totals - before_start, starts
+
 class ZFunction(BasePKGFunction):
     """
     Z関数 - 算術演算PKG関数
@@ -47,6 +86,20 @@ class ZFunction(BasePKGFunction):
             self.logger.warning(f"Unsupported Z operation type: {self.operation_type}")
             return 0.0
     
+    def execute_batch(self, arrays: Dict[str, Any]) -> np.ndarray:
+        """Z関数の配列評価（inputs: (N, k) 行列）"""
+        inputs = _matrix(arrays.get('inputs', []))
+        size, width = inputs.shape
+        if self.operation_type == 2:
+            if width < 2:
+                return np.zeros(size)
+            return (inputs[:, 0] - inputs[:, 1]).astype(float)
+        elif self.operation_type == 8:
+            # 不足分は0扱い、int() と同じく0方向に切り捨ててから mod 8
+            sums = inputs[:, :8].astype(float).sum(axis=1)
+            return np.trunc(sums).astype(np.int64) % 8
+        return np.zeros(size)
+    
     def _execute_z2(self, inputs: List[float]) -> float:
         """
         Z(2) - 2入力減算関数
@@ -133,6 +186,29 @@ class SLFunction(BasePKGFunction):
             # 範囲外の場合、default値を返す
             # 後段関数はこの値を検知して適切に処理すること
             return default_value
+    
+    def execute_batch(self, arrays: Dict[str, Any]) -> np.ndarray:
+        """
+        SL関数の配列評価
+        
+        condition: (N,)、options: (N, k) 行列、default: スカラーまたは (N,)
+        """
+        condition = np.asarray(arrays.get('condition', 0))
+        options = _matrix(arrays.get('options', np.empty((condition.size, 0))))
+        size, width = options.shape
+        default_value = _column(arrays.get('default', 0), size)
+        
+        if condition.dtype.kind in 'biuf':
+            selected = _column(condition, size) != 0
+        else:
+            # 数値・真偽値以外の条件は偽（第2オプション）扱い
+            selected = np.array([isinstance(c, (bool, int, float, np.number, np.bool_)) and c != 0
+                                 for c in _column(condition, size)], dtype=bool)
+        
+        if width == 0:
+            return np.array(default_value)
+        second = options[:, 1] if width > 1 else default_value
+        return np.where(selected, options[:, 0], second)
 
 class MNFunction(BasePKGFunction):
     """
@@ -172,6 +248,14 @@ class MNFunction(BasePKGFunction):
                     return time_data.timestamp.minute
                     
         return 0
+    
+    def execute_batch(self, arrays: Dict[str, Any]) -> np.ndarray:
+        """MN関数の配列評価（時刻の配列から分を取得、NaT は 0）"""
+        key = {1: 'current_time', 2: 'time_data'}.get(self.mode)
+        if key is None or key not in arrays:
+            return np.zeros(len(next(iter(arrays.values()), [])), dtype=np.int64)
+        minutes = pd.DatetimeIndex(arrays[key]).minute.to_numpy(dtype=float, na_value=0.0)
+        return minutes.astype(np.int64)
 
 class COFunction(BasePKGFunction):
     """
@@ -206,6 +290,27 @@ class COFunction(BasePKGFunction):
         # 通常のカウント処理
         recent_data = time_series[-window_size:] if window_size < len(time_series) else time_series
         return sum(1 for value in recent_data if value == target_code)
+    
+    def execute_batch(self, arrays: Dict[str, Any]) -> np.ndarray:
+        """
+        CO関数の系列評価
+        
+        time_series: 長さ N の系列、target_code / window_size: スカラー（window_size 省略時は先頭から）
+        """
+        time_series = np.asarray(arrays.get('time_series', []))
+        target_code = arrays.get('target_code', 1)
+        window_size = arrays.get('window_size')
+        size = len(time_series)
+        
+        if window_size is not None and window_size <= 0:
+            return np.zeros(size, dtype=np.int64)
+        if isinstance(target_code, (int, float)) and target_code > 0:
+            return np.full(size, sum(range(1, int(target_code) + 1)), dtype=np.int64)
+        
+        counts = np.cumsum(time_series == target_code)
+        if window_size is not None and window_size < size:
+            counts[window_size:] = counts[window_size:] - counts[:-window_size]
+        return counts.astype(np.int64)
 
 class SGFunction(BasePKGFunction):
     """
@@ -250,6 +355,12 @@ class SGFunction(BasePKGFunction):
         
         # 最新の区間の合計を返す
         return section_sums[-1] if section_sums else 0.0
+    
+    def execute_batch(self, arrays: Dict[str, Any]) -> np.ndarray:
+        """SG関数の系列評価（各時点の現区間の合計）"""
+        indicators, values = _aligned_sections(arrays.get('section_indicators', []),
+                                               arrays.get('values_to_sum', []))
+        return _section_running_sums(indicators, values)[0]
 
 class ASFunction(BasePKGFunction):
     """
@@ -311,6 +422,25 @@ class ASFunction(BasePKGFunction):
                 return 0.0
         
         return 0.0
+    
+    def execute_batch(self, arrays: Dict[str, Any]) -> np.ndarray:
+        """AS関数の系列評価（各時点の現区間／前区間の平均）"""
+        indicators, prices = _aligned_sections(arrays.get('section_indicators', []),
+                                               arrays.get('price_values', []))
+        size = len(prices)
+        if size == 0 or self.output_mode not in (1, 2):
+            return np.zeros(size)
+        
+        running_sums, starts = _section_running_sums(indicators, prices)
+        if self.output_mode == 1:
+            return running_sums / (np.arange(size) - starts + 1)
+        
+        # 前区間は確定済みなので区間ごとの平均を引く
+        section_ids = _section_ids(indicators)
+        boundaries = np.flatnonzero(np.r_[True, section_ids[1:] != section_ids[:-1]])
+        section_means = np.add.reduceat(prices, boundaries) / np.diff(np.r_[boundaries, size])
+        previous = section_ids - 1
+        return np.where(previous >= 0, section_means[np.maximum(previous, 0)], 0.0)
 
 class SSFunction(BasePKGFunction):
     """
@@ -343,6 +473,33 @@ class SSFunction(BasePKGFunction):
             
         return self.last_established_period
     
+    def execute_batch(self, arrays: Dict[str, Any]) -> np.ndarray:
+        """
+        SS関数の系列評価（execute を順に N 回呼んだのと同じく、保持周期も更新する）
+        
+        trigger_signals: (N, k) の真偽値・数値行列、period_candidates: 候補リスト、
+        current_period_data: {'volatility': (N,)}
+        """
+        triggers = _matrix(arrays.get('trigger_signals', []))
+        size, width = triggers.shape
+        candidates = sorted(arrays.get('period_candidates', [10, 15, 30, 45, 60, 90, 180]))
+        volatility = _column(arrays.get('current_period_data', {}).get('volatility', 0.5), size)
+        if size == 0:
+            return np.zeros(0, dtype=np.int64)
+        
+        established = (triggers != 0).sum(axis=1) > width / 2 if width else np.zeros(size, dtype=bool)
+        if candidates:
+            optimal = np.where(volatility > 0.7, candidates[0],
+                               np.where(volatility < 0.3, candidates[-1], candidates[len(candidates) // 2]))
+        else:
+            optimal = np.full(size, 10)
+        
+        # 直近の成立時点の周期を保持（未成立なら従来の保持値）
+        latest = np.maximum.accumulate(np.where(established, np.arange(size), -1))
+        periods = np.where(latest >= 0, optimal[np.maximum(latest, 0)], self.last_established_period)
+        self.last_established_period = int(periods[-1])
+        return periods.astype(np.int64)
+    
     def _check_trigger_establishment(self, trigger_signals: List, current_data: Dict) -> bool:
         """トリガー成立の確認"""
         if not trigger_signals:
@@ -471,6 +628,11 @@ class ROFunction(BasePKGFunction):
         result = math.trunc(float(input_value))
         
         return int(result)
+    
+    def execute_batch(self, arrays: Dict[str, Any]) -> np.ndarray:
+        """RO関数の配列評価（0方向への切り捨て）"""
+        values = np.asarray(arrays.get('input_value', 0.0), dtype=float)
+        return np.trunc(np.atleast_1d(values)).astype(np.int64)
 
 class NLFunction(BasePKGFunction):
     """
@@ -507,6 +669,30 @@ class NLFunction(BasePKGFunction):
         else:
             return 0.0
     
+    def execute_batch(self, arrays: Dict[str, Any]) -> np.ndarray:
+        """
+        NL関数の配列評価
+        
+        price_data / period_data: (N, k) 行列、baseline: スカラーまたは (N,)
+        """
+        key = 'price_data' if self.mode in (1, 2) else 'period_data'
+        candidates = _matrix(np.asarray(arrays.get(key, []), dtype=float))
+        size = len(candidates)
+        baseline = _column(np.asarray(arrays.get('baseline', 0.0), dtype=float), size)
+        if self.mode not in (1, 2, 3, 4):
+            return np.zeros(size)
+        
+        upper = self.mode in (1, 3)
+        if upper:
+            mask = candidates > baseline[:, None]
+            nearest = np.where(mask, candidates, np.inf).min(axis=1, initial=np.inf)
+        else:
+            mask = candidates < baseline[:, None]
+            nearest = np.where(mask, candidates, -np.inf).max(axis=1, initial=-np.inf)
+        # 該当なしは基準値（周期は整数に切り捨て）
+        fallback = baseline if self.mode in (1, 2) else np.trunc(baseline)
+        return np.where(mask.any(axis=1), nearest, fallback)
+    
     def _get_nearest_upper_price(self, price_data: List, baseline: float) -> float:
         """基準線より上の最も近い価格"""
         upper_prices = [price for price in price_data if price > baseline]
@@ -532,8 +718,13 @@ class BasicPKGFunctionFactory:
     """基本PKG関数のファクトリークラス"""
     
     @staticmethod
-    def create_function(function_type: str, pkg_id: PKGId, **kwargs) -> BasePKGFunction:
-        """PKG関数の生成"""
+    def create_function(function_type: str, pkg_id: PKGId, batch: bool = False,
+                        **kwargs) -> Union[BasePKGFunction, Callable[[Dict[str, Any]], np.ndarray]]:
+        """
+        PKG関数の生成
+        
+        batch=True の場合は関数オブジェクトの代わりに配列カーネル（execute_batch）を返す
+        """
         function_map = {
             'Z': ZFunction,
             'SL': SLFunction,
@@ -551,7 +742,12 @@ class BasicPKGFunctionFactory:
             raise ValueError(f"Unknown function type: {function_type}")
             
         function_class = function_map[function_type]
-        return function_class(pkg_id, **kwargs)
+        function = function_class(pkg_id, **kwargs)
+        if not batch:
+            return function
+        if not hasattr(function, 'execute_batch'):
+            raise ValueError(f"No batch kernel for function type: {function_type}")
+        return function.execute_batch
 
 # 使用例とテスト用のサンプルデータ
 if __name__ == "__main__":
@@ -12,11 +12,17 @@ Week 6: PKG関数ロジック実装 - コアPKG関数
 """
 
 import math
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
 from enum import Enum
 import logging
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime
+from collections import OrderedDict
+import copy
+import dataclasses
+import functools
+import hashlib
+import threading
 
 # 統一データモデルのインポート
 import sys
@@ -129,8 +135,192 @@ class OperationSignal:
     timestamp: datetime
     metadata: Dict = None
 
+# ==========================================
+# 結果キャッシュ（メモ化）
+# ==========================================
+CACHE_POLICIES = ('lru', 'fifo')
+
+def _freeze(value: Any) -> Any:
+    """入力を内容だけで決まる不変の形に変換（変換できない値は TypeError）"""
+    if value is None or isinstance(value, (bool, int, float, str, bytes, date)):
+        return value
+    if isinstance(value, Enum):
+        return (type(value).__name__, value.value)
+    if isinstance(value, dict):
+        return tuple((str(k), _freeze(v)) for k, v in sorted(value.items(), key=lambda kv: str(kv[0])))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if hasattr(value, 'dtype') and hasattr(value, 'tobytes'):  # NumPy配列・スカラー
+        return (value.dtype.str, getattr(value, 'shape', ()), value.tobytes())
+    if hasattr(value, '__dict__'):  # データクラス等
+        return (type(value).__qualname__, _freeze(vars(value)))
+    raise TypeError(f"cannot hash {type(value).__name__} by content")
+
+def bar_fields(bars: List[Any], count: int, fields: Tuple[str, ...]) -> Tuple:
+    """直近 count 本の足から指定フィールドだけを取り出したタプル（cache_input 用）"""
+    return tuple(tuple(getattr(bar, name) for name in fields) for bar in bars[-count:])
+
+def _key_form(value: Any) -> Any:
+    """キーに使う形（bar_fields の結果のようにそのままハッシュできるタプルは変換しない）"""
+    if isinstance(value, tuple):
+        try:
+            hash(value)
+            return value
+        except TypeError:
+            pass
+    return _freeze(value)
+
+def content_hash(data: Any) -> str:
+    """入力データの内容ハッシュ"""
+    return hashlib.blake2b(repr(_freeze(data)).encode(), digest_size=16).hexdigest()
+
+class PKGResultCache:
+    """
+    PKG関数1種類分の結果キャッシュ（上限件数つき）
+    
+    policy:
+        lru  - ヒットした要素を最新扱いにし、最も使われていないものから追い出す
+        fifo - 登録順に追い出す（ヒットしても順序を変えない）
+    """
+    
+    def __init__(self, max_size: int = 128, policy: str = 'lru'):
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"Unknown cache policy: {policy}")
+        self.max_size = max_size
+        self.policy = policy
+        self.entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """(見つかったか, 値)"""
+        with self._lock:
+            if key in self.entries:
+                self.hits += 1
+                if self.policy == 'lru':
+                    self.entries.move_to_end(key)
+                return True, self.entries[key]
+            self.misses += 1
+            return False, None
+    
+    def put(self, key: Hashable, value: Any):
+        """登録（上限を超えたら追い出す）"""
+        with self._lock:
+            self.entries[key] = value
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'policy': self.policy,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+# 関数クラス -> 結果キャッシュ（全インスタンスで共有）
+_RESULT_CACHES: Dict[type, PKGResultCache] = {}
+_RESULT_CACHES_LOCK = threading.Lock()
+
+def _result_cache(function_class: type) -> PKGResultCache:
+    cache = _RESULT_CACHES.get(function_class)
+    if cache is None:
+        with _RESULT_CACHES_LOCK:
+            cache = _RESULT_CACHES.setdefault(
+                function_class,
+                PKGResultCache(function_class.cache_size, function_class.cache_policy)
+            )
+    return cache
+
+def get_result_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """関数ごとのキャッシュ統計"""
+    return {cls.__name__: cache.stats() for cls, cache in list(_RESULT_CACHES.items())}
+
+def clear_result_caches():
+    """全関数の結果キャッシュを破棄"""
+    with _RESULT_CACHES_LOCK:
+        _RESULT_CACHES.clear()
+
+# 同逆・行帰・乖離の判定が参照する足のフィールド
+PRICE_KEY_FIELDS = ('timestamp', 'high', 'low', 'close', 'heikin_ashi_open', 'heikin_ashi_close')
+
+def _detach(value: Any) -> Any:
+    """
+    キャッシュ内の値と共有しない複製
+    
+    不変なスカラーはそのまま、データクラスは浅い複製に辞書・リストの属性だけ複製し直す
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if dataclasses.is_dataclass(value):
+        clone = copy.copy(value)
+        for name, attr in vars(clone).items():
+            if isinstance(attr, (dict, list)):
+                setattr(clone, name, copy.deepcopy(attr))
+        return clone
+    return copy.deepcopy(value)
+
+def _memoized(execute: Callable) -> Callable:
+    """
+    純粋関数かつキャッシュ有効なら (pkg_id, 設定, 入力の内容) をキーに結果を再利用
+    
+    ヒット・ミスにかかわらず結果は on_result() に渡す（統計更新等の副作用用）
+    """
+    @functools.wraps(execute)
+    def wrapper(self, data, *args, **kwargs):
+        if not (self.pure and self.cache_enabled) or args or kwargs:
+            value = execute(self, data, *args, **kwargs)
+        else:
+            try:
+                key = self.get_cache_key(data)
+            except TypeError:
+                # 内容でハッシュできない入力はキャッシュしない
+                key = None
+            if key is None:
+                value = execute(self, data)
+            else:
+                cache = _result_cache(type(self))
+                found, value = cache.get(key)
+                if found:
+                    value = _detach(value)
+                else:
+                    value = execute(self, data)
+                    cache.put(key, _detach(value))
+        self.on_result(value)
+        return value
+    return wrapper
+
 class BasePKGFunction:
-    """PKG関数の基底クラス"""
+    """
+    PKG関数の基底クラス
+    
+    結果キャッシュ（オプトイン）:
+        pure = True を宣言した関数は configure_cache() で有効にすると、同じ pkg_id・同じ入力内容の
+        execute 呼び出しで前回の結果の複製を返す。ヒット時は execute 自体は実行されないため、
+        統計更新等の副作用は execute ではなく on_result() に書くこと。
+        結果に影響する設定値は cache_state()、結果を決める入力の範囲は cache_input() で返すこと
+    """
+    
+    pure = False           # 同じ入力なら同じ出力を返す（外部状態に依存しない）
+    cache_enabled = False  # 結果キャッシュの有効化（configure_cache で設定）
+    cache_size = 128       # キャッシュ上限件数
+    cache_policy = 'lru'   # 追い出し方式（CACHE_POLICIES）
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if 'execute' in cls.__dict__:
+            cls.execute = _memoized(cls.__dict__['execute'])
     
     def __init__(self, pkg_id: PKGId):
         self.pkg_id = pkg_id
@@ -145,9 +335,49 @@ class BasePKGFunction:
         """入力データの検証"""
         return True
     
-    def get_cache_key(self, data: Dict[str, any]) -> str:
-        """キャッシュキーの生成"""
-        return str(hash(str(data)))
+    def cache_state(self) -> Tuple:
+        """結果に影響するインスタンス設定（閾値等）"""
+        return ()
+    
+    def cache_input(self, data: Dict[str, any]) -> Any:
+        """結果を決める入力の部分（キャッシュキーでハッシュする範囲）"""
+        return data
+    
+    def on_result(self, result: Any):
+        """execute の結果を受け取る（キャッシュヒット時も呼ばれる）"""
+    
+    def get_cache_key(self, data: Dict[str, any]) -> Tuple:
+        """
+        キャッシュキーの生成（pkg_id・設定・入力を内容だけで決まる不変の形にしたタプル）
+        
+        文字列化してハッシュするより速く、辞書の等価比較で衝突しても取り違えない
+        """
+        return (str(self.pkg_id), _key_form(self.cache_state()), _key_form(self.cache_input(data)))
+    
+    @classmethod
+    def configure_cache(cls, enabled: bool = True, max_size: Optional[int] = None,
+                        policy: Optional[str] = None):
+        """
+        結果キャッシュを設定（このクラスと派生クラスに適用、既存のキャッシュは破棄）
+        
+        BasePKGFunction で呼ぶと pure を宣言した全関数に適用される
+        """
+        if policy is not None and policy not in CACHE_POLICIES:
+            raise ValueError(f"Unknown cache policy: {policy}")
+        cls.cache_enabled = enabled
+        if max_size is not None:
+            cls.cache_size = max_size
+        if policy is not None:
+            cls.cache_policy = policy
+        with _RESULT_CACHES_LOCK:
+            for function_class in [c for c in _RESULT_CACHES if issubclass(c, cls)]:
+                del _RESULT_CACHES[function_class]
+    
+    @classmethod
+    def cache_stats(cls) -> Dict[str, Any]:
+        """このクラスのキャッシュ統計"""
+        cache = _RESULT_CACHES.get(cls)
+        return cache.stats() if cache else PKGResultCache(cls.cache_size, cls.cache_policy).stats()
 
 class DokyakuFunction(BasePKGFunction):
     """
@@ -160,6 +390,8 @@ class DokyakuFunction(BasePKGFunction):
     - 平均足の転換確定と基準線交点のタイミング評価
     """
     
+    pure = True
+    
     def __init__(self, pkg_id: PKGId):
         super().__init__(pkg_id)
         self.performance_stats = {
@@ -204,9 +436,21 @@ class DokyakuFunction(BasePKGFunction):
             }
         )
         
-        self._update_performance_stats(signal)
         return signal
     
+    def on_result(self, result: Optional[OperationSignal]):
+        """シグナルを出したら統計を更新（キャッシュヒット時も数える）"""
+        if result is not None:
+            self._update_performance_stats(result)
+    
+    def cache_state(self) -> Tuple:
+        """信頼度の基準に勝率を使うためキーに含める"""
+        return (self.performance_stats['win_rate'],)
+    
+    def cache_input(self, data: Dict[str, any]) -> Any:
+        """判定に使うのは直近5本の時刻・高安・終値・平均足の始値と終値だけ"""
+        return bar_fields(data.get('market_data', []), 5, PRICE_KEY_FIELDS)
+    
     def _calculate_dokyaku_direction(self, prev_prev: MarketData, 
                                    prev: MarketData, current: MarketData) -> int:
         """
@@ -343,6 +587,8 @@ class IkikaerikFunction(BasePKGFunction):
     - 内包関係による時間足統合
     """
     
+    pure = True
+    
     def __init__(self, pkg_id: PKGId):
         super().__init__(pkg_id)
         
@@ -375,6 +621,10 @@ class IkikaerikFunction(BasePKGFunction):
         
         return signal
     
+    def cache_input(self, data: Dict[str, any]) -> Any:
+        """判定に使うのは直近10本の時刻・高安・終値・平均足の始値と終値だけ"""
+        return bar_fields(data.get('market_data', []), 10, PRICE_KEY_FIELDS)
+    
     def _determine_ikikaeri_pattern(self, market_data: List[MarketData]) -> str:
         """
         行帰パターンの判定
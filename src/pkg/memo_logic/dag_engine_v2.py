@@ -16,11 +16,14 @@ from enum import Enum
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from simple_pkg_test_runner import (
     BasicPKGFunctionFactory,
     PKGId, TimeFrame, Period, Currency
 )
+from utils.dag_cache import _same_value
+from utils.layer_executor import LayerExecutor, NodeTask, group_levels
 
 @dataclass
 class PKGNode:
@@ -41,13 +44,33 @@ class DAGEngine:
     """
     関数型DAG評価エンジン
     階層的PKG構造を管理・実行
+    
+    実行計画（トポロジカル順・依存先・階層）はノード登録で構造が変わったときだけ作り直し、
+    評価では前回から変化したノード（set_inputs で更新した生データ、新規・再登録した関数）と
+    その依存先だけを再計算する
     """
     
-    def __init__(self):
+    def __init__(self, executor: Optional[LayerExecutor] = None):
+        """
+        Args:
+            executor: 階層並列実行エンジン（省略時は逐次実行）
+        """
         self.nodes: Dict[str, PKGNode] = {}
         self.raw_data_values: Dict[str, Any] = {}  # 生データの値
         self.execution_order: List[str] = []
         self.logger = logging.getLogger(__name__)
+        self.executor = executor
+        
+        # 実行計画（graph_version が変わったときだけ作り直す）
+        self.graph_version = 0
+        self._plan_version = -1
+        self._order_index: Dict[str, int] = {}
+        self._dependents: Dict[str, List[str]] = defaultdict(list)
+        self._levels: List[List[str]] = []
+        
+        # 次回評価で再計算の起点になるノード
+        self._dirty: Set[str] = set()
+        self.last_evaluated: List[str] = []
         
         # PKG関数ファクトリー
         self.function_factory = BasicPKGFunctionFactory()
@@ -70,6 +93,8 @@ class DAGEngine:
         
         self.nodes[pkg_id] = node
         self.raw_data_values[pkg_id] = value
+        self.graph_version += 1
+        self._dirty.add(pkg_id)
         
         self.logger.debug(f"生データ登録: {pkg_id} = {value}")
         
@@ -92,8 +117,86 @@ class DAGEngine:
         )
         
         self.nodes[pkg_id] = node
+        self.graph_version += 1
+        self._dirty.add(pkg_id)
         self.logger.debug(f"関数登録: {pkg_id} = {function_type}({input_refs})")
         
+    def set_inputs(self, values: Dict[str, Any]) -> int:
+        """
+        生データの値をまとめて更新（構造は変わらないので実行計画はそのまま）
+        
+        Args:
+            values: PKG ID（例: "391^0-AA001"）-> 値
+            
+        Returns:
+            値が変化したノード数
+        """
+        changed = 0
+        for pkg_id, value in values.items():
+            node = self.nodes.get(pkg_id)
+            if node is None or node.node_type != "RAW_DATA":
+                raise KeyError(f"生データノードではありません: {pkg_id}")
+            if _same_value(node.cached_value, value):
+                continue
+            node.cached_value = value
+            self.raw_data_values[pkg_id] = value
+            self._dirty.add(pkg_id)
+            changed += 1
+        return changed
+    
+    def _ensure_plan(self):
+        """
+        構造が変わっていれば実行計画を作り直す
+        """
+        if self._plan_version == self.graph_version:
+            return
+        
+        self.execution_order = self._topological_sort()
+        self._order_index = {pkg_id: i for i, pkg_id in enumerate(self.execution_order)}
+        self._dependents = defaultdict(list)
+        for pkg_id in self.execution_order:
+            for input_ref in self.nodes[pkg_id].input_refs:
+                self._dependents[input_ref].append(pkg_id)
+        self._levels = group_levels(self.execution_order,
+                                    lambda pkg_id: self.nodes[pkg_id].input_refs)
+        self._plan_version = self.graph_version
+    
+    def _reset_affected(self) -> List[str]:
+        """
+        変化したノードの推移的な依存先を未評価に戻し、再計算する関数ノードを実行順で返す
+        """
+        affected = set()
+        stack = list(self._dirty)
+        while stack:
+            pkg_id = stack.pop()
+            if pkg_id in affected:
+                continue
+            affected.add(pkg_id)
+            stack.extend(self._dependents.get(pkg_id, ()))
+        
+        pending = []
+        for pkg_id in affected:
+            node = self.nodes[pkg_id]
+            if node.node_type == "FUNCTION":
+                node.is_evaluated = False
+                pending.append(pkg_id)
+        pending.sort(key=self._order_index.__getitem__)
+        return pending
+    
+    def _input_values(self, node: PKGNode, results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        入力値を収集（今回の評価結果を優先し、なければ前回の値）
+        """
+        input_values = {}
+        for input_ref in node.input_refs:
+            if input_ref in results:
+                input_values[input_ref] = results[input_ref]
+            elif input_ref in self.nodes:
+                input_values[input_ref] = self.nodes[input_ref].cached_value
+            else:
+                self.logger.warning(f"入力 {input_ref} が見つかりません")
+        return input_values
+    
     def _topological_sort(self) -> List[str]:
         """
         トポロジカルソートで実行順序を決定
@@ -132,54 +235,72 @@ class DAGEngine:
         """
         DAGを評価して結果を返す
         """
-        # 実行順序を決定
-        self.execution_order = self._topological_sort()
+        # 実行計画は構造が変わったときだけ作り直す
+        self._ensure_plan()
+        pending = self._reset_affected()
         
-        results = {}
         start_time = time.time()
         
-        for pkg_id in self.execution_order:
-            node = self.nodes[pkg_id]
-            
-            # すでに評価済み（生データやキャッシュ）
-            if node.is_evaluated:
-                results[pkg_id] = node.cached_value
-                continue
-            
-            # 関数ノードの評価
-            if node.node_type == "FUNCTION":
-                # 入力値を収集
-                input_values = {}
-                for input_ref in node.input_refs:
-                    if input_ref in results:
-                        input_values[input_ref] = results[input_ref]
-                    else:
-                        self.logger.warning(f"入力 {input_ref} が見つかりません")
+        if self.executor is not None:
+            self._evaluate_layers(pending)
+        else:
+            for pkg_id in pending:
+                node = self.nodes[pkg_id]
                 
-                # PKG関数を実行
+                # PKG関数を実行（入力は実行順で先に確定済み）
+                input_values = self._input_values(node, {})
                 result = self._execute_function(node, input_values)
                 
                 # 結果を保存
                 node.cached_value = result
                 node.is_evaluated = True
-                results[pkg_id] = result
                 
                 self.logger.debug(f"評価: {pkg_id} = {result}")
         
+        self._dirty.clear()
+        self.last_evaluated = pending
+        
         elapsed = time.time() - start_time
         self.logger.info(f"DAG評価完了: {elapsed*1000:.2f}ms")
         
         # 指定されたPKG IDの結果のみ返す
         if target_pkg_ids:
-            return {pkg_id: results[pkg_id] for pkg_id in target_pkg_ids 
-                   if pkg_id in results}
+            return {pkg_id: self.nodes[pkg_id].cached_value for pkg_id in target_pkg_ids 
+                   if pkg_id in self.nodes}
         
-        return results
+        return {pkg_id: self.nodes[pkg_id].cached_value for pkg_id in self.execution_order}
+    
+    def _evaluate_layers(self, pending: List[str]):
+        """
+        依存の深さごとに同一階層のノードをまとめて実行（重いノードは並列）
+        """
+        pending_set = set(pending)
+        levels = [[pkg_id for pkg_id in level if pkg_id in pending_set]
+                  for level in self._levels]
+        
+        def make_task(pkg_id: str, results: Dict[str, Any]) -> NodeTask:
+            node = self.nodes[pkg_id]
+            func, data = self._prepare_function(node, self._input_values(node, results))
+            return NodeTask(pkg_id, func.execute, (data,), node.function_type)
+        
+        results = self.executor.run_layers(levels, make_task)
+        for pkg_id, result in results.items():
+            node = self.nodes[pkg_id]
+            node.cached_value = result
+            node.is_evaluated = True
+            self.logger.debug(f"評価: {pkg_id} = {result}")
     
     def _execute_function(self, node: PKGNode, input_values: Dict[str, Any]) -> Any:
         """
         PKG関数を実行
         """
+        func, data = self._prepare_function(node, input_values)
+        return func.execute(data)
+    
+    def _prepare_function(self, node: PKGNode, input_values: Dict[str, Any]):
+        """
+        PKG関数インスタンスと入力データを用意
+        """
         # PKG IDをパース
         parsed_id = PKGId.parse(node.pkg_id)
         
@@ -229,8 +350,7 @@ class DAGEngine:
                 elif node.function_type == 'RO':
                     data['input_value'] = primary_input
         
-        # 関数を実行
-        return func.execute(data)
+        return func, data
     
     def visualize_graph(self) -> str:
         """
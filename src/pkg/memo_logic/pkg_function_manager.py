@@ -22,6 +22,12 @@ from collections import defaultdict, deque
 from enum import Enum
 import time
 from datetime import datetime
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.layer_executor import LayerExecutor, NodeTask, group_levels
 
 # PKG基本要素のインポート
 from core_pkg_functions import (
@@ -63,11 +69,15 @@ class PKGFunctionManager:
     - 自動実行順序決定
     - キャッシュ管理
     - パフォーマンス監視
+    - 階層並列実行（executor 指定時）
     """
     
-    def __init__(self):
+    def __init__(self, executor: Optional[LayerExecutor] = None):
         self.logger = logging.getLogger(__name__)
         
+        # 階層並列実行（None なら従来どおり逐次実行）
+        self.executor = executor
+        
         # PKG関数レジストリ
         self.nodes: Dict[str, PKGNodeDefinition] = {}  # str(PKGId) -> PKGNodeDefinition
         self.raw_data_store: Dict[str, Any] = {}
@@ -233,45 +243,49 @@ class PKGFunctionManager:
         results = {}
         layer_times = defaultdict(float)
         
-        # 階層順に実行
-        for pkg_id_str in self.execution_order:
-            layer_start = time.time()
-            node = self.nodes[pkg_id_str]
+        if self.executor is not None:
+            # 同一階層をまとめて実行（重いノードは並列）
+            results = self._evaluate_layers(layer_times)
+        else:
+            # 階層順に実行
+            for pkg_id_str in self.execution_order:
+                layer_start = time.time()
+                node = self.nodes[pkg_id_str]
             
-            # キャッシュチェック
-            if self._is_cache_valid(node):
-                results[pkg_id_str] = node.cached_result
-                self.performance_stats['cache_hits'] += 1
-                continue
+                # キャッシュチェック
+                if self._is_cache_valid(node):
+                    results[pkg_id_str] = node.cached_result
+                    self.performance_stats['cache_hits'] += 1
+                    continue
             
-            # 関数実行
-            try:
-                if node.function_type == "RAW_DATA":
-                    # 生データは既にキャッシュ済み
-                    result = node.cached_result
-                else:
-                    # 依存データを収集
-                    input_data = self._collect_input_data(node, results)
+                # 関数実行
+                try:
+                    if node.function_type == "RAW_DATA":
+                        # 生データは既にキャッシュ済み
+                        result = node.cached_result
+                    else:
+                        # 依存データを収集
+                        input_data = self._collect_input_data(node, results)
                     
-                    # PKG関数を実行
-                    result = node.function_instance.execute(input_data)
+                        # PKG関数を実行
+                        result = node.function_instance.execute(input_data)
                     
-                    # 統計更新
-                    node.evaluation_count += 1
-                    node.last_evaluation_time = datetime.now()
+                        # 統計更新
+                        node.evaluation_count += 1
+                        node.last_evaluation_time = datetime.now()
                 
-                # 結果をキャッシュ
-                node.cached_result = result
-                results[pkg_id_str] = result
+                    # 結果をキャッシュ
+                    node.cached_result = result
+                    results[pkg_id_str] = result
                 
-                layer_time = time.time() - layer_start
-                layer_times[node.layer] += layer_time
+                    layer_time = time.time() - layer_start
+                    layer_times[node.layer] += layer_time
                 
-                self.logger.debug(f"評価完了: {pkg_id_str} = {result} ({layer_time*1000:.2f}ms)")
+                    self.logger.debug(f"評価完了: {pkg_id_str} = {result} ({layer_time*1000:.2f}ms)")
                 
-            except Exception as e:
-                self.logger.error(f"評価エラー {pkg_id_str}: {e}")
-                results[pkg_id_str] = None
+                except Exception as e:
+                    self.logger.error(f"評価エラー {pkg_id_str}: {e}")
+                    results[pkg_id_str] = None
         
         # 性能統計更新
         total_time = time.time() - start_time
@@ -289,6 +303,58 @@ class PKGFunctionManager:
         
         return results
     
+    def _evaluate_layers(self, layer_times: Dict[int, float]) -> Dict[str, Any]:
+        """
+        依存の深さが同じノードをまとめて LayerExecutor で実行
+        
+        時間結合等の重いノードだけがプールへ投げられ、軽いノードは呼び出し元で実行される。
+        階層ごとの時間は、深さグループの実行時間をグループ内の最上位階層に計上する
+        """
+        results = {}
+        levels = group_levels(
+            self.execution_order,
+            lambda pkg_id_str: [str(dep) for dep in self.nodes[pkg_id_str].input_dependencies]
+        )
+        for level in levels:
+            level_start = time.time()
+            tasks = []
+            for pkg_id_str in level:
+                node = self.nodes[pkg_id_str]
+                
+                # キャッシュ・生データはそのまま使う
+                if self._is_cache_valid(node):
+                    results[pkg_id_str] = node.cached_result
+                    self.performance_stats['cache_hits'] += 1
+                    continue
+                if node.function_type == "RAW_DATA":
+                    results[pkg_id_str] = node.cached_result
+                    continue
+                
+                try:
+                    input_data = self._collect_input_data(node, results)
+                except Exception as e:
+                    self.logger.error(f"評価エラー {pkg_id_str}: {e}")
+                    results[pkg_id_str] = None
+                    continue
+                tasks.append(NodeTask(pkg_id_str, node.function_instance.execute,
+                                      (input_data,), node.function_type))
+            
+            for pkg_id_str, result in self.executor.run_layer(tasks, return_exceptions=True).items():
+                node = self.nodes[pkg_id_str]
+                if isinstance(result, Exception):
+                    self.logger.error(f"評価エラー {pkg_id_str}: {result}")
+                    results[pkg_id_str] = None
+                    continue
+                
+                node.evaluation_count += 1
+                node.last_evaluation_time = datetime.now()
+                node.cached_result = result
+                results[pkg_id_str] = result
+            
+            layer_times[max(self.nodes[pkg_id_str].layer for pkg_id_str in level)] += time.time() - level_start
+        
+        return results
+    
     def get_integrated_trading_signal(self, market_data: Dict[str, List[MarketData]],
                                     currency: Currency = Currency.USDJPY) -> Dict[str, Any]:
         """
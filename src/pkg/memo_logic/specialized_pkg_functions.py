@@ -5,14 +5,14 @@ Week 6: 専門PKG関数実装
 
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
 import logging
 import math
 
 from .core_pkg_functions import (
     BasePKGFunction, PKGId, MarketData, OperationSignal,
-    TimeFrame, Currency, Period
+    TimeFrame, Currency, Period, PRICE_KEY_FIELDS, bar_fields
 )
 
 class KairiFunction(BasePKGFunction):
@@ -25,9 +25,18 @@ class KairiFunction(BasePKGFunction):
     - 乖離方向に対しての前足T周期増減/前足S周期増減
     """
     
+    pure = True
+    
     def __init__(self, pkg_id: PKGId):
         super().__init__(pkg_id)
         self.kairi_threshold = 0.001  # 乖離閾値（0.1%）
+    
+    def cache_state(self) -> Tuple:
+        return (self.kairi_threshold,)
+    
+    def cache_input(self, data: Dict[str, any]) -> Any:
+        """判定に使うのは直近15本の終値・平均足だけ（本数による分岐も15本までで決まる）"""
+        return bar_fields(data.get('market_data', []), 15, PRICE_KEY_FIELDS)
         
     def execute(self, data: Dict[str, any]) -> OperationSignal:
         """乖離判断の実行"""
@@ -303,9 +312,14 @@ class RangeFunction(BasePKGFunction):
     - レンジ: 180-90、90-30、30-10等の動的判定
     """
     
+    pure = True
+    
     def __init__(self, pkg_id: PKGId):
         super().__init__(pkg_id)
         self.periods = [10, 30, 90, 180]  # 主要周期
+    
+    def cache_state(self) -> Tuple:
+        return tuple(self.periods)
         
     def execute(self, data: Dict[str, any]) -> OperationSignal:
         """レンジ判定の実行"""
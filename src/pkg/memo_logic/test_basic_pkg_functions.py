@@ -491,6 +491,103 @@ class TestBasicPKGFunctionFactory:
         with pytest.raises(ValueError, match="Unknown function type"):
             BasicPKGFunctionFactory.create_function('UNKNOWN', pkg_id)
 
+class TestBatchKernels:
+    """配列カーネル（execute_batch）のテスト: 1件ずつの execute と同じ結果"""
+    
+    rng = np.random.default_rng(7)
+    
+    def test_z_batch(self):
+        pkg_id = TestPKGIds.create_test_pkg_id()
+        for operation_type, width in ((2, 2), (8, 8), (8, 5)):
+            inputs = self.rng.normal(0, 10, (50, width))
+            func = ZFunction(pkg_id, operation_type=operation_type)
+            expected = [func.execute({'inputs': list(row)}) for row in inputs]
+            np.testing.assert_array_equal(func.execute_batch({'inputs': inputs}), expected)
+    
+    def test_sl_batch(self):
+        pkg_id = TestPKGIds.create_test_pkg_id()
+        func = SLFunction(pkg_id)
+        condition = self.rng.integers(0, 2, 30)
+        for width in (2, 1, 0):
+            options = self.rng.normal(size=(30, width))
+            expected = [func.execute({'condition': int(c), 'options': list(o), 'default': -1})
+                        for c, o in zip(condition, options)]
+            result = func.execute_batch({'condition': condition, 'options': options, 'default': -1})
+            np.testing.assert_array_equal(result, expected)
+    
+    def test_mn_and_ro_batch(self):
+        pkg_id = TestPKGIds.create_test_pkg_id()
+        times = pd.date_range('2024-01-01 09:00', periods=40, freq='7min')
+        mn = MNFunction(pkg_id, mode=2)
+        np.testing.assert_array_equal(
+            mn.execute_batch({'time_data': times}),
+            [mn.execute({'time_data': t}) for t in times])
+        
+        values = self.rng.normal(0, 5, 40)
+        ro = ROFunction(pkg_id)
+        np.testing.assert_array_equal(
+            ro.execute_batch({'input_value': values}),
+            [ro.execute({'input_value': v}) for v in values])
+    
+    def test_series_functions_over_history(self):
+        """系列関数の i 番目は先頭から i 番目までを execute した値"""
+        pkg_id = TestPKGIds.create_test_pkg_id()
+        sections = np.repeat([1, 2, 1, 2, 1], [3, 1, 4, 2, 5])
+        prices = 110.0 + self.rng.normal(0, 0.1, len(sections))
+        codes = self.rng.integers(0, 3, len(sections))
+        
+        def prefixes(**series):
+            return [{k: list(v[:i + 1]) for k, v in series.items()} for i in range(len(sections))]
+        
+        sg = SGFunction(pkg_id)
+        np.testing.assert_allclose(
+            sg.execute_batch({'section_indicators': sections, 'values_to_sum': prices}),
+            [sg.execute(d) for d in prefixes(section_indicators=sections, values_to_sum=prices)])
+        
+        for mode in (1, 2):
+            func = ASFunction(pkg_id, output_mode=mode)
+            np.testing.assert_allclose(
+                func.execute_batch({'section_indicators': sections, 'price_values': prices}),
+                [func.execute(d) for d in prefixes(section_indicators=sections, price_values=prices)])
+        
+        co = COFunction(pkg_id)
+        for target_code, window_size in ((0, 4), (0, None), (5, 3)):
+            params = {'target_code': target_code}
+            if window_size is not None:
+                params['window_size'] = window_size
+            expected = [co.execute({**d, **params}) for d in prefixes(time_series=codes)]
+            np.testing.assert_array_equal(co.execute_batch({'time_series': codes, **params}), expected)
+    
+    def test_ss_batch_holds_period(self):
+        pkg_id = TestPKGIds.create_test_pkg_id()
+        triggers = self.rng.integers(0, 2, (30, 3))
+        volatility = self.rng.uniform(0, 1, 30)
+        scalar, batch = SSFunction(pkg_id), SSFunction(pkg_id)
+        expected = [scalar.execute({'trigger_signals': list(t),
+                                    'current_period_data': {'volatility': v}})
+                    for t, v in zip(triggers, volatility)]
+        result = batch.execute_batch({'trigger_signals': triggers,
+                                      'current_period_data': {'volatility': volatility}})
+        np.testing.assert_array_equal(result, expected)
+        assert batch.last_established_period == scalar.last_established_period
+    
+    def test_nl_batch(self):
+        pkg_id = TestPKGIds.create_test_pkg_id()
+        lines = 110.0 + self.rng.normal(0, 0.5, (40, 4))
+        baseline = 110.0 + self.rng.normal(0, 1.0, 40)
+        for mode in (1, 2, 3, 4):
+            func = NLFunction(pkg_id, mode=mode)
+            key = 'price_data' if mode <= 2 else 'period_data'
+            expected = [func.execute({key: list(row), 'baseline': b}) for row, b in zip(lines, baseline)]
+            np.testing.assert_array_equal(func.execute_batch({key: lines, 'baseline': baseline}), expected)
+    
+    def test_factory_returns_batch_kernel(self):
+        pkg_id = TestPKGIds.create_test_pkg_id()
+        kernel = BasicPKGFunctionFactory.create_function('Z', pkg_id, batch=True, operation_type=2)
+        np.testing.assert_array_equal(kernel({'inputs': np.array([[3.0, 1.0], [1.0, 3.0]])}), [2.0, -2.0])
+        with pytest.raises(ValueError, match="No batch kernel"):
+            BasicPKGFunctionFactory.create_function('I', pkg_id, batch=True)
+
 # 統合テスト
 class TestPKGFunctionIntegration:
     """PKG関数統合テスト"""
@@ -3,11 +3,13 @@
 完全な関数型DAGアーキテクチャ
 """
 
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable
 from dataclasses import dataclass
 from enum import Enum
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -82,6 +84,19 @@ class PKGBaseFunction:
     def evaluate(self, inputs: Dict[str, Any]) -> Any:
         """純粋関数としての評価"""
         raise NotImplementedError
+    
+    def evaluate_array(self, inputs: Dict[str, np.ndarray], size: int) -> np.ndarray:
+        """
+        系列全体の配列評価
+        
+        既定実装は要素ごとに evaluate を適用する。高速化が必要な関数は
+        同一セマンティクスの配列演算でオーバーライドする。
+        """
+        names = list(inputs)
+        columns = [inputs[name].tolist() for name in names]
+        return np.array([
+            self.evaluate(dict(zip(names, row))) for row in zip(*columns)
+        ] if names else [self.evaluate({}) for _ in range(size)])
 
 
 class ZFunction(PKGBaseFunction):
@@ -182,14 +197,24 @@ class PKGNode:
     dependencies: List[str]  # 依存する記号またはPKG ID
     formula: str  # 関数式の説明
     
+    @staticmethod
+    def dependency_source(dep: str) -> str:
+        """依存先の参照元を判定: 'raw'=生データ, 'pkg'=PKG ID, 'context'=その他"""
+        if dep.startswith('A'):  # 生データ記号
+            return 'raw'
+        if '^' in dep:  # PKG ID
+            return 'pkg'
+        return 'context'
+    
     def evaluate(self, context: Dict[str, Any]) -> Any:
         """ノードの評価（純粋関数）"""
         # 依存データを収集
         inputs = {}
         for dep in self.dependencies:
-            if dep.startswith('A'):  # 生データ記号
+            source = self.dependency_source(dep)
+            if source == 'raw':
                 inputs[dep] = context.get('raw_data', {}).get(dep, 0)
-            elif '^' in dep:  # PKG ID
+            elif source == 'pkg':
                 inputs[dep] = context.get('pkg_cache', {}).get(dep, 0)
             else:
                 inputs[dep] = context.get(dep, 0)
@@ -217,6 +242,11 @@ class Layer1Nodes:
                 if range_val < threshold:
                     return 3  # もみ（待機）
                 return 1  # もみなし（取引可能）
+            
+            def evaluate_array(self, inputs: Dict[str, np.ndarray], size: int) -> np.ndarray:
+                range_val = inputs.get('CA001', np.zeros(size))
+                threshold = inputs.get('threshold', 0.3)
+                return np.where(range_val < threshold, 3, 1)
         
         return PKGNode(
             pkg_id="191^1-101",
@@ -240,6 +270,13 @@ class Layer1Nodes:
                 elif current < prev * 0.999:  # 0.1%以上下降
                     return 2
                 return 3  # 中立
+            
+            def evaluate_array(self, inputs: Dict[str, np.ndarray], size: int) -> np.ndarray:
+                current = inputs.get('AA001', np.zeros(size))
+                prev = inputs.get('AA002', np.zeros(size))
+                return np.select(
+                    [current > prev * 1.001, current < prev * 0.999], [1, 2], 3
+                )
         
         return PKGNode(
             pkg_id="191^1-102",
@@ -259,6 +296,11 @@ class Layer1Nodes:
                 ha_open = inputs.get('AB301', 0)
                 
                 return 1 if ha_close > ha_open else 2
+            
+            def evaluate_array(self, inputs: Dict[str, np.ndarray], size: int) -> np.ndarray:
+                ha_close = inputs.get('AB304', np.zeros(size))
+                ha_open = inputs.get('AB301', np.zeros(size))
+                return np.where(ha_close > ha_open, 1, 2)
         
         return PKGNode(
             pkg_id="191^1-103",
@@ -283,6 +325,12 @@ class Layer1Nodes:
                 ha_above = ha_close > base_line
                 
                 return 2 if (real_above != ha_above) else 1
+            
+            def evaluate_array(self, inputs: Dict[str, np.ndarray], size: int) -> np.ndarray:
+                real_price = inputs.get('AA001', np.zeros(size))
+                ha_close = inputs.get('AB304', np.zeros(size))
+                base_line = inputs.get('base_line', 10.0)
+                return np.where((real_price > base_line) != (ha_close > base_line), 2, 1)
         
         return PKGNode(
             pkg_id="191^1-104",
@@ -321,6 +369,20 @@ class Layer2Nodes:
                     return price_dir
                 
                 return 3  # 判定不能
+            
+            def evaluate_array(self, inputs: Dict[str, np.ndarray], size: int) -> np.ndarray:
+                price_dir = inputs.get('191^1-102', np.full(size, 3))
+                heikin_dir = inputs.get('191^1-103', np.full(size, 3))
+                kairi = inputs.get('191^1-104', np.ones(size))
+                
+                reversal = ((kairi == 2) & (price_dir != 3) & (heikin_dir != 3)
+                            & (price_dir != heikin_dir))
+                agreed = (price_dir == heikin_dir) & (price_dir != 3)
+                return np.select(
+                    [reversal, agreed],
+                    [np.where(price_dir == 1, 3, 1), price_dir],
+                    3
+                )
         
         return PKGNode(
             pkg_id="191^2-201",
@@ -348,6 +410,11 @@ class Layer2Nodes:
                     return 3  # 待機
                 
                 return 3
+            
+            def evaluate_array(self, inputs: Dict[str, np.ndarray], size: int) -> np.ndarray:
+                heikin_dir = inputs.get('191^1-103', np.full(size, 3))
+                price_dir = inputs.get('191^1-102', np.full(size, 3))
+                return np.where((heikin_dir == price_dir) & (price_dir != 3), price_dir, 3)
         
         return PKGNode(
             pkg_id="191^2-202",
@@ -371,6 +438,11 @@ class Layer2Nodes:
                     return price_dir
                 
                 return 0  # ブレイクアウトなし
+            
+            def evaluate_array(self, inputs: Dict[str, np.ndarray], size: int) -> np.ndarray:
+                momi = inputs.get('191^1-101', np.ones(size))
+                price_dir = inputs.get('191^1-102', np.full(size, 3))
+                return np.where((momi == 1) & (price_dir != 3), price_dir, 0)
         
         return PKGNode(
             pkg_id="191^2-203",
@@ -421,6 +493,19 @@ class Layer3Nodes:
                     return priority_signals[min_key][1]
                 
                 return 3  # デフォルトは待機
+            
+            def evaluate_array(self, inputs: Dict[str, np.ndarray], size: int) -> np.ndarray:
+                momi = inputs.get('191^1-101', np.ones(size))
+                dokyaku = inputs.get('191^2-201', np.full(size, 3))
+                breakout = inputs.get('191^2-203', np.zeros(size))
+                
+                # strong（優先度2）とdokyaku（優先度3）は同値を返すため
+                # dokyaku != 3 の条件に集約できる
+                return np.select(
+                    [momi == 3, breakout != 0, dokyaku != 3],
+                    [3, breakout, dokyaku],
+                    3
+                )
         
         return PKGNode(
             pkg_id="191^3-301",
@@ -430,15 +515,156 @@ class Layer3Nodes:
         )
 
 
+# ==========================================
+# コンパイル済み実行計画
+# ==========================================
+@dataclass
+class CompiledPKGPlan:
+    """
+    DAGをスロット番号付きのフラットな実行計画に変換したもの
+    
+    スロット配置: [定数0] [生データ記号...] [ノード出力...]
+    各ステップは (出力スロット, 評価関数, 配列評価関数, ((入力名, 入力スロット), ...))
+    """
+    raw_symbols: List[str]
+    node_ids: List[str]
+    steps: List[Tuple[int, Callable[[Dict[str, Any]], Any],
+                      Callable[[Dict[str, np.ndarray], int], np.ndarray],
+                      Tuple[Tuple[str, int], ...]]]
+    node_slots: Dict[str, int]
+    layer_slots: Dict[str, List[Tuple[str, int]]]
+    output_slot: int
+    slot_count: int
+    
+    ZERO_SLOT = 0
+    
+    def execute(self, raw_data: Dict[str, float]) -> List[Any]:
+        """計画を実行し、全スロットの値を返す"""
+        slots: List[Any] = [0] * self.slot_count
+        get = raw_data.get
+        for index, symbol in enumerate(self.raw_symbols, start=1):
+            slots[index] = get(symbol, 0)
+        
+        return self.execute_into(slots)
+    
+    def execute_into(self, slots: List[Any]) -> List[Any]:
+        """
+        生データスロットが埋まった既存のスロット列でノードだけを実行
+        
+        ストリーミング評価で通貨ペアごとに確保したスロット列を使い回すためのもの。
+        """
+        for out_slot, func, _, inputs in self.steps:
+            slots[out_slot] = func({name: slots[i] for name, i in inputs})
+        
+        return slots
+    
+    def execute_batch(self, raw_columns: Dict[str, np.ndarray],
+                      size: int) -> List[np.ndarray]:
+        """計画を系列全体に対して配列演算で実行し、全スロットの列を返す"""
+        zeros = np.zeros(size, dtype=np.int64)
+        slots: List[np.ndarray] = [zeros] * self.slot_count
+        for index, symbol in enumerate(self.raw_symbols, start=1):
+            slots[index] = raw_columns.get(symbol, zeros)
+        
+        for out_slot, _, array_func, inputs in self.steps:
+            slots[out_slot] = array_func({name: slots[i] for name, i in inputs}, size)
+        
+        return slots
+    
+    def debug_info(self, slots: List[Any]) -> Dict[str, Dict[str, Any]]:
+        """階層別のデバッグ情報を構築"""
+        return {
+            layer: {node_id: slots[i] for node_id, i in members}
+            for layer, members in self.layer_slots.items()
+        }
+
+
+def compile_pkg_plan(nodes: Dict[str, PKGNode],
+                     output_id: str = '191^3-301') -> CompiledPKGPlan:
+    """
+    ノードグラフを実行計画にコンパイル
+    
+    依存関係から階層を求め、階層順（同一階層内は登録順）に並べる。
+    存在しないPKG IDやコンテキスト参照は定数0スロットに解決する
+    （PKGNode.evaluate の既定値と同じ挙動）。
+    """
+    # 階層レベル計算（PKG依存の最大レベル+1）
+    levels: Dict[str, int] = {}
+    
+    def level_of(node_id: str, visiting: Tuple[str, ...] = ()) -> int:
+        if node_id in levels:
+            return levels[node_id]
+        if node_id in visiting:
+            raise ValueError(f"Circular dependency detected at {node_id}")
+        level = 1
+        for dep in nodes[node_id].dependencies:
+            if PKGNode.dependency_source(dep) == 'pkg' and dep in nodes:
+                level = max(level, level_of(dep, visiting + (node_id,)) + 1)
+        levels[node_id] = level
+        return level
+    
+    for node_id in nodes:
+        level_of(node_id)
+    
+    node_ids = sorted(nodes, key=lambda k: levels[k])  # 安定ソートで登録順を維持
+    
+    raw_symbols: List[str] = []
+    for node_id in node_ids:
+        for dep in nodes[node_id].dependencies:
+            if PKGNode.dependency_source(dep) == 'raw' and dep not in raw_symbols:
+                raw_symbols.append(dep)
+    
+    raw_slots = {symbol: i for i, symbol in enumerate(raw_symbols, start=1)}
+    node_slots = {node_id: len(raw_symbols) + 1 + i
+                  for i, node_id in enumerate(node_ids)}
+    
+    steps = []
+    layer_slots: Dict[str, List[Tuple[str, int]]] = {}
+    for node_id in node_ids:
+        node = nodes[node_id]
+        inputs = []
+        for dep in node.dependencies:
+            source = PKGNode.dependency_source(dep)
+            if source == 'raw':
+                slot = raw_slots[dep]
+            elif source == 'pkg':
+                slot = node_slots.get(dep, CompiledPKGPlan.ZERO_SLOT)
+            else:
+                slot = CompiledPKGPlan.ZERO_SLOT
+            inputs.append((dep, slot))
+        steps.append((node_slots[node_id], node.function.evaluate,
+                      node.function.evaluate_array, tuple(inputs)))
+        
+        try:
+            layer = f"layer{PKGID.parse(node_id).hierarchy}"
+        except ValueError:
+            layer = f"layer{levels[node_id]}"
+        layer_slots.setdefault(layer, []).append((node_id, node_slots[node_id]))
+    
+    return CompiledPKGPlan(
+        raw_symbols=raw_symbols,
+        node_ids=node_ids,
+        steps=steps,
+        node_slots=node_slots,
+        layer_slots=layer_slots,
+        output_slot=node_slots.get(output_id, -1),
+        slot_count=len(raw_symbols) + len(node_ids) + 1
+    )
+
+
 # ==========================================
 # PKG DAGマネージャー
 # ==========================================
 class PKGDAGManager:
     """PKG DAG全体を管理（ステートレス）"""
     
+    FINAL_NODE_ID = '191^3-301'
+    
     def __init__(self):
         self.nodes = {}
+        self.plan: Optional[CompiledPKGPlan] = None
         self._build_dag()
+        self.compile()
     
     def _build_dag(self):
         """DAGを構築"""
@@ -456,48 +682,55 @@ class PKGDAGManager:
         # 階層3ノード
         self.nodes['191^3-301'] = Layer3Nodes.create_final_signal_node()
     
-    def evaluate(self, raw_data: Dict[str, float]) -> Tuple[int, Dict[str, Any]]:
+    def compile(self) -> CompiledPKGPlan:
+        """
+        実行計画をコンパイル
+        
+        nodes を変更した場合は再度呼び出すこと。
+        """
+        self.plan = compile_pkg_plan(self.nodes, self.FINAL_NODE_ID)
+        return self.plan
+    
+    def evaluate(self, raw_data: Dict[str, float],
+                 debug: bool = True) -> Tuple[int, Dict[str, Any]]:
         """
         DAG全体を評価（純粋関数、ステートレス）
         
         Args:
             raw_data: 生データ記号の辞書
+            debug: Falseの場合デバッグ情報を構築しない（バックテスト用）
             
         Returns:
             (signal, debug_info): シグナル（1:買い, 2:売り, 3:待機）とデバッグ情報
         """
-        context = {
-            'raw_data': raw_data,
-            'pkg_cache': {}
-        }
-        
-        # トポロジカルソートに従って評価
-        evaluation_order = [
-            # 階層1（並列実行可能）
-            ['191^1-101', '191^1-102', '191^1-103', '191^1-104'],
-            # 階層2（並列実行可能）
-            ['191^2-201', '191^2-202', '191^2-203'],
-            # 階層3
-            ['191^3-301']
-        ]
-        
-        for layer in evaluation_order:
-            for node_id in layer:
-                if node_id in self.nodes:
-                    result = self.nodes[node_id].evaluate(context)
-                    context['pkg_cache'][node_id] = result
+        plan = self.plan if self.plan is not None else self.compile()
+        slots = plan.execute(raw_data)
         
         # 最終シグナル
-        final_signal = context['pkg_cache'].get('191^3-301', 3)
+        final_signal = slots[plan.output_slot] if plan.output_slot >= 0 else 3
         
-        # デバッグ情報
-        debug_info = {
-            'layer1': {k: v for k, v in context['pkg_cache'].items() if k.startswith('191^1')},
-            'layer2': {k: v for k, v in context['pkg_cache'].items() if k.startswith('191^2')},
-            'layer3': {k: v for k, v in context['pkg_cache'].items() if k.startswith('191^3')},
-        }
+        if not debug:
+            return final_signal, {}
+        
+        return final_signal, plan.debug_info(slots)
+    
+    def evaluate_batch(self, raw_columns: Dict[str, np.ndarray],
+                       size: int) -> np.ndarray:
+        """
+        DAG全体を系列単位で評価（各ノードを配列演算として実行）
         
-        return final_signal, debug_info
+        Args:
+            raw_columns: 生データ記号ごとの列
+            size: 系列長
+            
+        Returns:
+            各行の最終シグナル
+        """
+        plan = self.plan if self.plan is not None else self.compile()
+        if plan.output_slot < 0:
+            return np.full(size, 3, dtype=np.int64)
+        slots = plan.execute_batch(raw_columns, size)
+        return np.asarray(slots[plan.output_slot], dtype=np.int64)
 
 
 # ==========================================
@@ -523,10 +756,14 @@ class TradingSignalPKG:
             self.momi_threshold = 0.50
     
     def generate_signal(self, candle: Dict, index: int, 
-                       all_candles: List[Dict]) -> Tuple[int, Dict]:
+                       all_candles: List[Dict],
+                       debug: bool = True) -> Tuple[int, Dict]:
         """
         シグナル生成（ステートレス）
         
+        Args:
+            debug: Falseの場合デバッグ情報を省略（バックテスト高速化）
+        
         Returns:
             (signal, debug_info): シグナルとデバッグ情報
         """
@@ -537,10 +774,83 @@ class TradingSignalPKG:
         raw_data = self._calculate_raw_data(candle, index, all_candles)
         
         # DAG評価（純粋関数）
-        signal, debug_info = self.dag_manager.evaluate(raw_data)
+        signal, debug_info = self.dag_manager.evaluate(raw_data, debug=debug)
         
         return signal, debug_info
     
+    def generate_signals(self, candles: Any) -> np.ndarray:
+        """
+        系列全体のシグナルを一括生成（generate_signal の結果と完全一致）
+        
+        Args:
+            candles: キャンドル辞書のリスト、または
+                     'open'/'high'/'low'/'close' の配列を持つ辞書
+        
+        Returns:
+            各キャンドルのシグナル配列（1:買い, 2:売り, 3:待機）
+        """
+        columns = self._candle_columns(candles)
+        size = len(columns['close'])
+        signals = np.full(size, 3, dtype=np.int64)
+        if size <= 3:
+            return signals
+        
+        raw_columns = self._calculate_raw_columns(columns)
+        signals[3:] = self.dag_manager.evaluate_batch(raw_columns, size)[3:]
+        return signals
+    
+    @staticmethod
+    def _candle_columns(candles: Any) -> Dict[str, np.ndarray]:
+        """キャンドルをOHLCのfloat64列に変換"""
+        if isinstance(candles, dict):
+            return {key: np.asarray(candles[key], dtype=np.float64)
+                    for key in ('open', 'high', 'low', 'close')}
+        return {key: np.fromiter((c[key] for c in candles), dtype=np.float64,
+                                 count=len(candles))
+                for key in ('open', 'high', 'low', 'close')}
+    
+    def _calculate_raw_columns(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """生データ記号の列を計算（_calculate_raw_data の配列版、index >= 2 で有効）"""
+        def shift(values: np.ndarray, periods: int) -> np.ndarray:
+            shifted = np.empty_like(values)
+            shifted[periods:] = values[:-periods]
+            shifted[:periods] = values[0]
+            return shifted
+        
+        o, h, l, c = columns['open'], columns['high'], columns['low'], columns['close']
+        prev_o, prev_h, prev_l, prev_c = (shift(x, 1) for x in (o, h, l, c))
+        prev2_o, prev2_c = shift(o, 2), shift(c, 2)
+        
+        # 平均足計算（前々足を起点に前足の平均足を算出）
+        ha_prev_open = (prev2_o + prev2_c) / 2
+        ha_prev_close = (prev2_o + shift(h, 2) + shift(l, 2) + prev2_c) / 4
+        ha_open = (ha_prev_open + ha_prev_close) / 2
+        ha_close = (prev_o + prev_h + prev_l + prev_c) / 4
+        ha_high = np.maximum(np.maximum(prev_h, ha_open), ha_close)
+        ha_low = np.minimum(np.minimum(prev_l, ha_open), ha_close)
+        
+        change = np.zeros_like(c)
+        np.divide(c - prev_c, prev_c, out=change, where=prev_c != 0)
+        
+        return {
+            # 基本価格データ
+            'AA001': c,
+            'AA002': prev_c,
+            'AA003': h,
+            'AA004': l,
+            'AA005': o,
+            
+            # 派生価格データ（平均足）
+            'AB301': ha_open,
+            'AB302': ha_high,
+            'AB303': ha_low,
+            'AB304': ha_close,
+            
+            # 計算指標
+            'CA001': h - l,
+            'CA002': change,
+        }
+    
     def _calculate_raw_data(self, candle: Dict, index: int, 
                            all_candles: List[Dict]) -> Dict[str, float]:
         """生データ記号の値を計算"""
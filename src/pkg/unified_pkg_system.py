@@ -3,11 +3,13 @@
 生データ層も含めてすべてPKG ID形式で管理
 """
 
-from typing import Dict, List, Any, Optional, Tuple, Union
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -179,6 +181,59 @@ class PKGIDFactory:
         ).__str__()
 
 
+# ==========================================
+# 通貨バッチ評価用のコンパイル済みDAG
+# ==========================================
+# 生データ層の連番 -> evaluate_multi_currency の入力キー
+RAW_DATA_FIELDS = {
+    RawDataSequence.CURRENT_PRICE: 'current_price',
+    RawDataSequence.PREV_CLOSE: 'prev_close',
+    RawDataSequence.HA_OPEN: 'ha_open',
+    RawDataSequence.HA_CLOSE: 'ha_close',
+    RawDataSequence.RANGE_WIDTH: 'range_width',
+}
+
+# 関数ノードの既定値（_evaluate_node の簡略版と同じ値: 階層 -> 値）
+DEMO_NODE_VALUES = {1: 1, 2: 1, 3: 3}
+
+# ノード関数: 依存ノードの値（通貨方向の配列）を受け取り、通貨方向の配列を返す
+# （スカラーを返した場合は通貨数分に複製する）
+NodeKernel = Callable[..., Union[np.ndarray, float]]
+
+
+@dataclass
+class CompiledPKGGraph:
+    """
+    通貨桁を除いたDAGテンプレートをスロット番号で保持したもの
+
+    PKG IDは通貨だけが異なる同じ構造を通貨ごとに複製しているため、構造は1回だけ
+    コンパイルし、通貨を配列の次元（バッチ）として全ノードを一括計算する
+    """
+    template_ids: List[str]                         # スロット -> 通貨桁を {cur} にしたID
+    raw_slots: List[Tuple[int, str]]                # (スロット, 入力キー)
+    steps: List[Tuple[int, NodeKernel, Tuple[int, ...]]]  # (スロット, 関数, 依存スロット) 実行順
+    output_slot: int
+
+    def evaluate(self, columns: Dict[str, np.ndarray], size: int) -> List[np.ndarray]:
+        """
+        全ノードを通貨バッチで評価
+
+        Args:
+            columns: 入力キー -> 通貨ごとの値の配列（すべて長さ size）
+            size: 通貨数（バッチの大きさ）
+
+        Returns:
+            スロット -> 通貨ごとの値の配列
+        """
+        values: List[Optional[np.ndarray]] = [None] * len(self.template_ids)
+        for slot, field in self.raw_slots:
+            values[slot] = columns[field]
+        for slot, kernel, dep_slots in self.steps:
+            result = kernel(*[values[dep] for dep in dep_slots])
+            values[slot] = np.full(size, result) if np.ndim(result) == 0 else result
+        return values
+
+
 # ==========================================
 # 統一PKGシステム
 # ==========================================
@@ -192,6 +247,10 @@ class UnifiedPKGSystem:
         self.timeframe_code = self._get_timeframe_code(timeframe)
         self.nodes = {}
         self._build_dag()
+        
+        # 通貨バッチ評価（ノード関数は連番ごと、未登録なら簡略版の値）
+        self.kernels: Dict[int, NodeKernel] = {}
+        self._compiled: Optional[CompiledPKGGraph] = None
     
     def _get_currency_code(self, pair: str) -> int:
         """通貨ペアコード取得"""
@@ -311,10 +370,68 @@ class UnifiedPKGSystem:
         new_id = parsed.for_timeframe(target_code)
         return str(new_id)
     
+    def set_kernel(self, sequence: int, kernel: NodeKernel):
+        """
+        関数ノードの計算を登録（連番単位で全通貨共通）
+        
+        kernel は依存ノードの値（通貨方向の配列）を依存順に受け取り、
+        通貨方向の配列を返すこと
+        """
+        self.kernels[sequence] = kernel
+        self._compiled = None
+    
+    def _default_kernel(self, hierarchy: int) -> NodeKernel:
+        """簡略版の関数ノード（_evaluate_node と同じ定数。通貨数分への複製は評価側で行う）"""
+        value = DEMO_NODE_VALUES[hierarchy]
+        return lambda *inputs: value
+    
+    def compile(self) -> CompiledPKGGraph:
+        """
+        DAGを通貨に依存しないテンプレートにコンパイル（ノード関数の変更時のみ再構築）
+        """
+        if self._compiled is not None:
+            return self._compiled
+        
+        def template(node_id: str) -> str:
+            parsed = UnifiedPKGID.parse(node_id)
+            return f"{parsed.timeframe}{parsed.period}{{cur}}^{parsed.hierarchy}-{parsed.sequence:03d}"
+        
+        # 階層順（依存は常に下位階層）
+        order = sorted(self.nodes, key=lambda node_id: (UnifiedPKGID.parse(node_id).hierarchy, node_id))
+        slots = {node_id: slot for slot, node_id in enumerate(order)}
+        
+        raw_slots, steps = [], []
+        for node_id in order:
+            parsed = UnifiedPKGID.parse(node_id)
+            info = self.nodes[node_id]
+            if info['type'] == 'raw_data':
+                raw_slots.append((slots[node_id], RAW_DATA_FIELDS[parsed.sequence]))
+                continue
+            dep_slots = tuple(slots[dep] for dep in info['dependencies'])
+            if any(dep >= slots[node_id] for dep in dep_slots):
+                raise ValueError(f"上位階層への依存: {node_id}")
+            kernel = self.kernels.get(parsed.sequence) or self._default_kernel(parsed.hierarchy)
+            steps.append((slots[node_id], kernel, dep_slots))
+        
+        tf, cur = self.timeframe_code, self.currency_code
+        self._compiled = CompiledPKGGraph(
+            template_ids=[template(node_id) for node_id in order],
+            raw_slots=raw_slots,
+            steps=steps,
+            output_slot=slots[f"{tf}9{cur}^3-301"],
+        )
+        return self._compiled
+    
     def evaluate_multi_currency(self, raw_data: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
         """
         複数通貨の同時評価
         
+        コンパイル済みDAGを1回だけ辿り、各ノードを全通貨分まとめて計算する
+        
+        ノードの判定ロジックは set_kernel() で登録したものだけが実行される。
+        未登録のノードは _evaluate_node と同じ簡略版の定数を返すため、
+        既定のままでは実際の判定は何もベクトル化されていない
+        
         Args:
             raw_data: {
                 "USDJPY": {"current_price": 110.5, ...},
@@ -322,28 +439,25 @@ class UnifiedPKGSystem:
                 ...
             }
         """
-        results = {}
+        graph = self.compile()
+        pairs = list(raw_data)
+        if not pairs:
+            return {}
         
-        for pair, data in raw_data.items():
+        # 通貨を列とする入力配列（構造体の配列 → 配列の構造体）
+        columns = {
+            field: np.array([raw_data[pair].get(field, 0) for pair in pairs], dtype=float)
+            for _, field in graph.raw_slots
+        }
+        signals = graph.evaluate(columns, len(pairs))[graph.output_slot]
+        
+        results = {}
+        tf = self.timeframe_code
+        for i, pair in enumerate(pairs):
             currency_code = self._get_currency_code(pair)
-            tf = self.timeframe_code
-            
-            # 通貨別の生データIDで値を設定
-            context = {
-                f"{tf}9{currency_code}^0-001": data.get('current_price', 0),
-                f"{tf}9{currency_code}^0-002": data.get('prev_close', 0),
-                f"{tf}9{currency_code}^0-101": data.get('ha_open', 0),
-                f"{tf}9{currency_code}^0-104": data.get('ha_close', 0),
-                f"{tf}9{currency_code}^0-201": data.get('range_width', 0),
-            }
-            
-            # DAG評価（簡略版）
-            # 実際は各ノードの関数を評価
-            final_signal_id = f"{tf}9{currency_code}^3-301"
-            
             results[pair] = {
-                'signal_id': final_signal_id,
-                'signal': self._evaluate_node(final_signal_id, context),
+                'signal_id': f"{tf}9{currency_code}^3-301",
+                'signal': signals[i].item(),
                 'currency_code': currency_code
             }
         
@@ -0,0 +1,147 @@
+"""
+ストリーミング足生成（ティック→OHLC）
+通貨ペア×時間足ごとに実行中の足を保持し、時間境界を越えた時点で確定足を通知する
+
+1ティックあたりの処理は時間足数に比例する定数時間（保持ティック数に依存しない）
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, tzinfo
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple, Union
+
+
+# 時間足の秒数
+TIMEFRAME_SECONDS: Dict[str, int] = {
+    'M1': 60,
+    'M5': 300,
+    'M15': 900,
+    'M30': 1800,
+    'H1': 3600,
+    'H4': 14400,
+}
+
+TimestampLike = Union[float, int, str, datetime]
+
+
+def to_epoch(timestamp: TimestampLike) -> Tuple[float, Optional[tzinfo]]:
+    """タイムスタンプをエポック秒とタイムゾーンに変換（ISO文字列は1回だけパース）"""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp), None
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return timestamp.timestamp(), timestamp.tzinfo
+
+
+@dataclass
+class Bar:
+    """OHLC足（実行中または確定済み）"""
+    symbol: str
+    timeframe: str
+    start: float          # 足の開始時刻（エポック秒）
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    tick_count: int
+    tz: Optional[tzinfo] = None
+
+    @property
+    def timestamp(self) -> str:
+        """足の開始時刻（ISO形式）"""
+        return datetime.fromtimestamp(self.start, tz=self.tz).isoformat()
+
+    def to_dict(self) -> Dict:
+        """従来のキャンドル辞書形式に変換"""
+        return {
+            'timestamp': self.timestamp,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume
+        }
+
+
+class StreamingBarBuilder:
+    """
+    インクリメンタル足生成器
+
+    各 (symbol, timeframe) の実行中の足を保持し、ティック毎に
+    高値・安値・終値・出来高を更新する。ティックが次の時間境界に入ったら
+    実行中の足を確定して購読者に通知する。
+    """
+
+    def __init__(self, timeframes: Sequence[str] = ('M15',),
+                 history_size: int = 500):
+        unknown = [tf for tf in timeframes if tf not in TIMEFRAME_SECONDS]
+        if unknown:
+            raise ValueError(f"Unknown timeframes: {unknown}")
+
+        self.timeframes = list(timeframes)
+        self.history_size = history_size
+        self._periods = [(tf, TIMEFRAME_SECONDS[tf]) for tf in self.timeframes]
+        self._current: Dict[Tuple[str, str], Bar] = {}
+        self._completed: Dict[Tuple[str, str], Deque[Bar]] = {}
+        self._subscribers: List[Callable[[Bar], None]] = []
+        self.late_ticks = 0  # 確定済みの足に属する遅延ティック数（時間足ごとに計上）
+
+    def subscribe(self, callback: Callable[[Bar], None]):
+        """確定足通知のコールバック登録"""
+        self._subscribers.append(callback)
+
+    def update(self, symbol: str, price: float, timestamp: TimestampLike,
+               volume: float = 1) -> List[Bar]:
+        """
+        ティックを取り込み、確定した足のリストを返す
+
+        Args:
+            symbol: 通貨ペア
+            price: ティック価格
+            timestamp: ティック時刻（エポック秒、ISO文字列、datetime）
+            volume: 出来高（既定はティック数として1）
+        """
+        epoch, tz = to_epoch(timestamp)
+        closed: List[Bar] = []
+
+        for timeframe, seconds in self._periods:
+            key = (symbol, timeframe)
+            start = epoch - epoch % seconds
+            bar = self._current.get(key)
+
+            if bar is None or start > bar.start:
+                if bar is not None:
+                    closed.append(bar)
+                    self._completed_bars(key).append(bar)
+                self._current[key] = Bar(symbol, timeframe, start, price, price,
+                                         price, price, volume, 1, tz)
+            elif start < bar.start:
+                self.late_ticks += 1
+            else:
+                if price > bar.high:
+                    bar.high = price
+                elif price < bar.low:
+                    bar.low = price
+                bar.close = price
+                bar.volume += volume
+                bar.tick_count += 1
+
+        for bar in closed:
+            for callback in self._subscribers:
+                callback(bar)
+
+        return closed
+
+    def current_bar(self, symbol: str, timeframe: str) -> Optional[Bar]:
+        """実行中の足"""
+        return self._current.get((symbol, timeframe))
+
+    def completed_bars(self, symbol: str, timeframe: str) -> List[Bar]:
+        """確定済みの足（古い順、最大 history_size 本）"""
+        return list(self._completed.get((symbol, timeframe), ()))
+
+    def _completed_bars(self, key: Tuple[str, str]) -> Deque[Bar]:
+        if key not in self._completed:
+            self._completed[key] = deque(maxlen=self.history_size)
+        return self._completed[key]
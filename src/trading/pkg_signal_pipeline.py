@@ -0,0 +1,155 @@
+"""
+PKGシグナルのストリーミングパイプライン
+ティック → 確定足（StreamingBarBuilder） → ATR・平均足（増分） → コンパイル済みPKG DAG → シグナル
+
+通貨ペアごとの状態は事前確保したスロットに保持し、1ティックあたりの処理は定数時間
+（DAGは足が確定したときだけ1回評価する）。生データ記号は TradingSignalPKG と同じ定義なので、
+確定足の列に対する TradingSignalPKG.generate_signals と同じシグナルになる
+"""
+
+import os
+import sys
+from typing import Dict, Iterable, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from trading.bar_builder import Bar, StreamingBarBuilder, TimestampLike
+from indicators.streaming_indicators import StreamingATR
+from pkg.trading_signal_pkg import PKGDAGManager
+
+
+# DAGのシグナル値
+BUY_SIGNAL = 1
+SELL_SIGNAL = 2
+WAIT_SIGNAL = 3
+
+# シグナル判定に必要な確定足の本数（generate_signal の index >= 3）
+MIN_SIGNAL_BARS = 4
+
+# 確定足ごとに書き込む生データ記号（SymbolSignalState.raw_values と同じ順）
+RAW_SYMBOLS = ('AA001', 'AA002', 'AA003', 'AA004', 'AA005',
+               'AB301', 'AB302', 'AB303', 'AB304', 'CA001', 'CA002')
+
+
+class SymbolSignalState:
+    """通貨ペアごとの増分状態（スロット列・平均足・ATRを生成時に確保して使い回す）"""
+
+    __slots__ = ('symbol', 'bar_count', 'prev_close', 'seed_open', 'seed_close',
+                 'ha_open', 'ha_high', 'ha_low', 'ha_close', 'atr', 'slots', 'signal')
+
+    def __init__(self, symbol: str, slot_count: int, atr_period: int):
+        self.symbol = symbol
+        self.bar_count = 0
+        self.prev_close = 0.0
+        # 前足の平均足の起点（前足自身の始値・終値の平均と4本値平均）
+        self.seed_open = 0.0
+        self.seed_close = 0.0
+        # 前足の平均足（次の確定足で AB301〜AB304 になる）
+        self.ha_open = 0.0
+        self.ha_high = 0.0
+        self.ha_low = 0.0
+        self.ha_close = 0.0
+        self.atr = StreamingATR(atr_period)
+        self.slots: List[float] = [0] * slot_count
+        self.signal = WAIT_SIGNAL
+
+    def raw_values(self, open_: float, high: float, low: float, close: float):
+        """確定足の生データ記号の値（TradingSignalPKG._calculate_raw_data と同じ定義）"""
+        prev_close = self.prev_close
+        change = (close - prev_close) / prev_close if prev_close != 0 else 0
+        return (close, prev_close, high, low, open_,
+                self.ha_open, self.ha_high, self.ha_low, self.ha_close,
+                high - low, change)
+
+    def advance(self, open_: float, high: float, low: float, close: float):
+        """確定足を前足として取り込み、次の足で使う平均足を更新"""
+        ha_close = (open_ + high + low + close) / 4
+        if self.bar_count == 0:
+            ha_open = ((open_ + close) / 2 + ha_close) / 2
+        else:
+            ha_open = (self.seed_open + self.seed_close) / 2
+        self.ha_open = ha_open
+        self.ha_close = ha_close
+        self.ha_high = max(high, ha_open, ha_close)
+        self.ha_low = min(low, ha_open, ha_close)
+
+        self.seed_open = (open_ + close) / 2
+        self.seed_close = ha_close
+        self.prev_close = close
+        self.bar_count += 1
+        self.atr.update(high, low, close)
+
+
+class PKGSignalPipeline:
+    """通貨ペア別のPKGシグナル生成（ティック入力、確定足ごとにDAGを評価）"""
+
+    def __init__(self, timeframe: str = 'M15', atr_period: int = 14,
+                 symbols: Iterable[str] = (), history_size: int = 100):
+        self.timeframe = timeframe
+        self.atr_period = atr_period
+        self.bar_builder = StreamingBarBuilder(timeframes=(timeframe,),
+                                               history_size=history_size)
+        # DAGはノードが状態を持たないため全通貨ペアで1つの実行計画を共有する
+        self.plan = PKGDAGManager().plan
+        # (RAW_SYMBOLS 内の位置, スロット番号)。計画が参照しない記号は書き込まない
+        slot_of = {symbol: i for i, symbol in enumerate(self.plan.raw_symbols, start=1)}
+        self._raw_slots = tuple((position, slot_of[symbol])
+                                for position, symbol in enumerate(RAW_SYMBOLS)
+                                if symbol in slot_of)
+        self._states: Dict[str, SymbolSignalState] = {}
+        for symbol in symbols:
+            self.state(symbol)
+
+    def state(self, symbol: str) -> SymbolSignalState:
+        """通貨ペアの状態（初回のみ確保）"""
+        state = self._states.get(symbol)
+        if state is None:
+            state = SymbolSignalState(symbol, self.plan.slot_count, self.atr_period)
+            self._states[symbol] = state
+        return state
+
+    def update(self, symbol: str, price: float, timestamp: TimestampLike,
+               volume: float = 1) -> Optional[int]:
+        """
+        ティックを取り込み、足が確定した場合はそのシグナルを返す
+
+        Returns:
+            確定足のシグナル（1:買い, 2:売り, 3:待機）、確定足がなければ None
+        """
+        signal = None
+        for bar in self.bar_builder.update(symbol, price, timestamp, volume):
+            signal = self.on_bar(bar)
+        return signal
+
+    def on_bar(self, bar: Bar) -> int:
+        """確定足1本を取り込んでシグナルを返す"""
+        return self.update_bar(bar.symbol, bar.open, bar.high, bar.low, bar.close)
+
+    def update_bar(self, symbol: str, open_: float, high: float,
+                   low: float, close: float) -> int:
+        """確定足の4本値を取り込んでシグナルを返す"""
+        state = self.state(symbol)
+        if state.bar_count + 1 >= MIN_SIGNAL_BARS:
+            values = state.raw_values(open_, high, low, close)
+            slots = state.slots
+            for position, slot in self._raw_slots:
+                slots[slot] = values[position]
+            plan = self.plan
+            plan.execute_into(slots)
+            state.signal = slots[plan.output_slot] if plan.output_slot >= 0 else WAIT_SIGNAL
+        else:
+            state.signal = WAIT_SIGNAL
+        state.advance(open_, high, low, close)
+        return state.signal
+
+    def signal(self, symbol: str) -> int:
+        """直近の確定足のシグナル"""
+        state = self._states.get(symbol)
+        return state.signal if state is not None else WAIT_SIGNAL
+
+    def atr(self, symbol: str) -> Optional[float]:
+        """確定足のATR（期間分の足が揃うまでは None）"""
+        state = self._states.get(symbol)
+        if state is None or state.bar_count <= state.atr.period:
+            return None
+        return state.atr.value
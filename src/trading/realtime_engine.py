@@ -5,11 +5,18 @@ Week 3: 実際の取引システム実装
 
 import asyncio
 import json
+from collections import deque
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Callable
 import threading
 import time
 import queue
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trading.bar_builder import StreamingBarBuilder, Bar, to_epoch
 
 
 class MarketDataStream:
@@ -166,9 +173,14 @@ class RealtimeEngine:
         self.total_pnl = 0.0
         self.start_time = None
         
-        # 価格履歴（15分足生成用）
-        self.price_history = {}
-        self.current_candles = {}
+        # 価格履歴（過去24時間のティック、古い順）
+        self.price_history: Dict[str, deque] = {}
+        self.history_window = timedelta(hours=24).total_seconds()
+        
+        # 15分足のインクリメンタル生成
+        self.bar_builder = StreamingBarBuilder(timeframes=('M15',))
+        self.bar_builder.subscribe(self._on_bar_closed)
+        self.completed_candles: Dict[str, deque] = {}
         
     def set_strategy(self, strategy):
         """取引戦略設定"""
@@ -210,8 +222,10 @@ class RealtimeEngine:
         price = tick_data['mid']
         timestamp = tick_data['timestamp']
         
-        # 価格履歴更新
-        self._update_price_history(symbol, tick_data)
+        # 価格履歴・足更新（タイムスタンプのパースは受信時の1回のみ）
+        tick_time = datetime.fromisoformat(timestamp)
+        self._update_price_history(symbol, tick_data, tick_time)
+        self.bar_builder.update(symbol, price, tick_time)
         
         # 未実現損益更新
         self._update_unrealized_pnl(symbol, price)
@@ -226,55 +240,37 @@ class RealtimeEngine:
             # シグナル処理
             self._process_signal(symbol, signal, price, timestamp)
     
-    def _update_price_history(self, symbol: str, tick_data: Dict):
-        """価格履歴更新（15分足用）"""
-        if symbol not in self.price_history:
-            self.price_history[symbol] = []
-        
-        self.price_history[symbol].append({
+    def _update_price_history(self, symbol: str, tick_data: Dict,
+                              tick_time: datetime):
+        """価格履歴更新（過去24時間、償却O(1)）"""
+        history = self.price_history.get(symbol)
+        if history is None:
+            history = self.price_history[symbol] = deque()
+        
+        epoch = to_epoch(tick_time)[0]
+        history.append({
             'timestamp': tick_data['timestamp'],
+            'epoch': epoch,
             'price': tick_data['mid'],
             'bid': tick_data['bid'],
             'ask': tick_data['ask']
         })
         
-        # 過去24時間分のみ保持
-        cutoff_time = datetime.now() - timedelta(hours=24)
-        self.price_history[symbol] = [
-            p for p in self.price_history[symbol]
-            if datetime.fromisoformat(p['timestamp']) > cutoff_time
-        ]
+        # 過去24時間分のみ保持（古い側から期限切れを除去）
+        cutoff = epoch - self.history_window
+        while history and history[0]['epoch'] <= cutoff:
+            history.popleft()
     
     def _get_current_candle(self, symbol: str) -> Optional[Dict]:
         """現在の15分足キャンドル取得"""
-        if symbol not in self.price_history or not self.price_history[symbol]:
-            return None
-        
-        # 最新の15分間のデータ取得
-        now = datetime.now()
-        minute_start = now.replace(second=0, microsecond=0)
-        minute_start = minute_start.replace(minute=(minute_start.minute // 15) * 15)
-        
-        # 15分間のティックデータ取得
-        candle_ticks = []
-        for tick in self.price_history[symbol]:
-            tick_time = datetime.fromisoformat(tick['timestamp'])
-            if tick_time >= minute_start:
-                candle_ticks.append(tick)
-        
-        if not candle_ticks:
-            return None
-        
-        # OHLC生成
-        prices = [t['price'] for t in candle_ticks]
-        return {
-            'timestamp': minute_start.isoformat(),
-            'open': prices[0],
-            'high': max(prices),
-            'low': min(prices),
-            'close': prices[-1],
-            'volume': len(candle_ticks)
-        }
+        bar = self.bar_builder.current_bar(symbol, 'M15')
+        return bar.to_dict() if bar else None
+    
+    def _on_bar_closed(self, bar: Bar):
+        """15分足確定時の処理"""
+        if bar.symbol not in self.completed_candles:
+            self.completed_candles[bar.symbol] = deque(maxlen=96)  # 24時間分
+        self.completed_candles[bar.symbol].append(bar.to_dict())
     
     def _update_unrealized_pnl(self, symbol: str, price: float):
         """未実現損益更新"""
@@ -0,0 +1,263 @@
+"""
+ベンチマーク計測とリグレッション判定
+
+各ケースのスループット（bars/s）、レイテンシ（p50/p99）、ピークメモリを計測し、
+JSONのベースラインと比較して閾値を超える劣化を検出する
+
+ケースの種類:
+    一括（run）: 1回の呼び出しで bars 本を処理。レイテンシは1回の呼び出し時間
+    逐次（step）: 1本ずつ呼び出し。レイテンシは1本あたりの処理時間
+"""
+
+import json
+import platform
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+FORMAT_VERSION = 1
+
+# 劣化とみなす変化率（bars_per_sec は低下、それ以外は増加）
+DEFAULT_THRESHOLDS = {
+    'bars_per_sec': 0.25,
+    'p50_ms': 0.25,
+    'p99_ms': 0.50,
+    'peak_memory_kb': 0.50,
+}
+
+# これより小さいレイテンシ同士の比較は計測誤差として無視
+NOISE_FLOOR_MS = 0.01
+
+# 閾値に上乗せする反復間ばらつき（noise）の倍数
+NOISE_MULTIPLIER = 3.0
+
+# p99 はこのサンプル数に満たなければ判定しない（少数だと単なる最大値になる）
+MIN_P99_SAMPLES = 100
+
+# ばらつきで閾値を広げる指標（時間に関するもの）
+TIMING_METRICS = ('bars_per_sec', 'p50_ms', 'p99_ms')
+
+
+@dataclass
+class BenchmarkCase:
+    """ベンチマークケース（run か step のどちらかを指定）"""
+    name: str
+    bars: int
+    run: Optional[Callable[[Any], Any]] = None          # 一括: run(state)
+    step: Optional[Callable[[Any, int], Any]] = None    # 逐次: step(state, i)
+    setup: Optional[Callable[[], Any]] = None           # 各反復の前に呼ぶ（計測外）
+    group: str = ''
+
+    def __post_init__(self):
+        if (self.run is None) == (self.step is None):
+            raise ValueError(f"{self.name}: specify exactly one of run / step")
+
+    @property
+    def mode(self) -> str:
+        return 'batch' if self.run is not None else 'stream'
+
+
+@dataclass
+class BenchmarkResult:
+    """ケース1件の計測結果"""
+    name: str
+    group: str
+    mode: str
+    bars: int
+    iterations: int
+    samples: int
+    bars_per_sec: float
+    p50_ms: float
+    p99_ms: float
+    mean_ms: float
+    peak_memory_kb: float
+    noise: float = 0.0  # 反復ごとの所要時間の相対ばらつき（中央絶対偏差 / 中央値）
+
+
+@dataclass
+class Regression:
+    """ベースラインからの劣化"""
+    name: str
+    metric: str
+    baseline: float
+    current: float
+    change: float  # 劣化方向を正とした変化率
+
+    def __str__(self) -> str:
+        return (f"{self.name} {self.metric}: {self.baseline:.4g} -> {self.current:.4g} "
+                f"({self.change:+.1%})")
+
+
+def _execute(case: BenchmarkCase, state: Any, timings: Optional[List[int]]) -> int:
+    """1反復を実行し、所要時間（ns）を返す"""
+    clock = time.perf_counter_ns
+    if case.run is not None:
+        start = clock()
+        case.run(state)
+        elapsed = clock() - start
+        if timings is not None:
+            timings.append(elapsed)
+        return elapsed
+
+    step = case.step
+    total = 0
+    for i in range(case.bars):
+        start = clock()
+        step(state, i)
+        elapsed = clock() - start
+        total += elapsed
+        if timings is not None:
+            timings.append(elapsed)
+    return total
+
+
+def run_case(case: BenchmarkCase, repeat: int = 5, warmup: int = 1,
+             measure_memory: bool = True) -> BenchmarkResult:
+    """
+    ケースを計測（ウォームアップ後に repeat 回、メモリは別の1回で計測）
+
+    スループットは最速の反復から求める（他プロセスやGCで遅れた反復に引きずられない）。
+    反復ごとの所要時間のばらつきを noise として記録し、比較時の閾値に反映する
+    """
+    for _ in range(warmup):
+        _execute(case, case.setup() if case.setup else None, None)
+
+    timings: List[int] = []
+    repeat_ns: List[int] = []
+    for _ in range(repeat):
+        state = case.setup() if case.setup else None
+        repeat_ns.append(_execute(case, state, timings))
+
+    peak_kb = 0.0
+    if measure_memory:
+        state = case.setup() if case.setup else None
+        tracemalloc.start()
+        try:
+            _execute(case, state, None)
+            peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+
+    samples_ms = np.asarray(timings, dtype=np.float64) / 1e6
+    per_repeat = np.asarray(repeat_ns, dtype=np.float64)
+    best_ns = per_repeat.min()
+    median_ns = np.median(per_repeat)
+    noise = float(np.median(np.abs(per_repeat - median_ns)) / median_ns) if median_ns else 0.0
+    return BenchmarkResult(
+        name=case.name,
+        group=case.group,
+        mode=case.mode,
+        bars=case.bars,
+        iterations=repeat,
+        samples=len(timings),
+        bars_per_sec=case.bars / (best_ns / 1e9) if best_ns else float('inf'),
+        p50_ms=float(np.percentile(samples_ms, 50)),
+        p99_ms=float(np.percentile(samples_ms, 99)),
+        mean_ms=float(samples_ms.mean()),
+        peak_memory_kb=peak_kb,
+        noise=noise,
+    )
+
+
+def run_benchmarks(cases: Iterable[BenchmarkCase], repeat: int = 5, warmup: int = 1,
+                   measure_memory: bool = True,
+                   progress: Optional[Callable[[BenchmarkResult], None]] = None
+                   ) -> Dict[str, BenchmarkResult]:
+    """全ケースを計測"""
+    results = {}
+    for case in cases:
+        result = run_case(case, repeat, warmup, measure_memory)
+        results[case.name] = result
+        if progress:
+            progress(result)
+    return results
+
+
+def environment() -> Dict[str, str]:
+    """計測環境（ベースラインとの比較時の参考情報）"""
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'numpy': np.__version__,
+    }
+
+
+def save_results(path: str, results: Dict[str, BenchmarkResult],
+                 meta: Optional[Dict[str, Any]] = None):
+    """計測結果をJSONで保存（ベースラインとして使用可能）"""
+    document = {
+        'version': FORMAT_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'meta': meta or {},
+        'results': {name: asdict(result) for name, result in results.items()},
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    """保存済みの計測結果（ケース名→指標の辞書）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    if document.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported benchmark file version: {document.get('version')}")
+    return document['results']
+
+
+def compare(results: Dict[str, BenchmarkResult], baseline: Dict[str, Dict[str, Any]],
+            thresholds: Optional[Dict[str, float]] = None) -> List[Regression]:
+    """
+    ベースラインと比較して閾値を超える劣化を返す
+    
+    ベースラインにないケース、条件（本数・方式）が異なるケースは比較しない。
+    時間の指標は、両者の noise の大きい方の NOISE_MULTIPLIER 倍を閾値に上乗せする。
+    p99 はどちらかのサンプル数が MIN_P99_SAMPLES 未満なら判定しない
+    """
+    limits = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if not reference or reference.get('bars') != result.bars or reference.get('mode') != result.mode:
+            continue
+        noise = max(reference.get('noise', 0.0), result.noise)
+        for metric, limit in limits.items():
+            before, after = reference.get(metric), getattr(result, metric)
+            if not before:
+                continue
+            if metric == 'p99_ms' and min(reference.get('samples', 0), result.samples) < MIN_P99_SAMPLES:
+                continue
+            if metric in TIMING_METRICS:
+                limit += NOISE_MULTIPLIER * noise
+            if metric == 'bars_per_sec':
+                change = (before - after) / before
+            else:
+                if metric.endswith('_ms') and max(before, after) < NOISE_FLOOR_MS:
+                    continue
+                change = (after - before) / before
+            if change > limit:
+                regressions.append(Regression(name, metric, before, after, change))
+    return regressions
+
+
+def format_report(results: Dict[str, BenchmarkResult],
+                  baseline: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """計測結果の表（ベースラインがあればスループットの変化率を併記）"""
+    header = (f"{'case':<40} {'mode':<6} {'bars/s':>12} {'p50 ms':>10} {'p99 ms':>10} "
+              f"{'peak KB':>10} {'noise':>7}")
+    lines = [header, '-' * len(header)]
+    for name, result in results.items():
+        line = (f"{name:<40} {result.mode:<6} {result.bars_per_sec:>12,.0f} "
+                f"{result.p50_ms:>10.4f} {result.p99_ms:>10.4f} {result.peak_memory_kb:>10,.0f} {result.noise:>7.1%}")
+        reference = (baseline or {}).get(name)
+        if reference and reference.get('bars_per_sec'):
+            line += f"  ({result.bars_per_sec / reference['bars_per_sec'] - 1:+.1%})"
+        lines.append(line)
+    return '\n'.join(lines)
\ No newline at end of file
@@ -4,6 +4,9 @@ DAGキャッシュシステム
 
 DAG構造を初回構築後キャッシュし、再利用することで
 毎サイクルの再構築オーバーヘッドを削減
+
+ノード値は時刻ではなくバージョン番号で管理し、変化した入力の
+推移的な依存先だけを再計算する（変化のない枝には一切触れない）
 """
 
 from typing import Dict, List, Set, Optional, Any, Tuple
@@ -22,6 +25,9 @@ class DAGNode:
     dependencies: Set[str] = field(default_factory=set)
     cache_value: Optional[Any] = None
     cache_timestamp: Optional[float] = None
+    version: int = 0                     # 値が変化した時点のクロック
+    dep_versions: Dict[str, int] = field(default_factory=dict)  # 計算時の依存先バージョン
+    evaluated: bool = False
     
     def is_cache_valid(self, max_age_ms: float = 1000) -> bool:
         """キャッシュの有効性確認"""
@@ -31,6 +37,16 @@ class DAGNode:
         return age_ms < max_age_ms
 
 
+def _same_value(a: Any, b: Any) -> bool:
+    """値の同一判定（配列など比較できない値は変化ありとみなす）"""
+    if a is b:
+        return True
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):
+        return False
+
+
 class DAGCache:
     """
     DAGキャッシュ管理クラス
@@ -53,6 +69,17 @@ class DAGCache:
         self.cache_hits: int = 0
         self.cache_misses: int = 0
         
+        # 構造バージョン（ノード・エッジ追加で更新、トポロジカル順序の再構築判定に使用）
+        self.structure_version: int = 0
+        self._order_version: int = -1
+        self._order_index: Dict[str, int] = {}
+        
+        # 値のバージョン管理（単調増加クロック）
+        self.clock: int = 0
+        self.input_values: Dict[str, Any] = {}
+        self.input_versions: Dict[str, int] = {}
+        self.dirty: Set[str] = set()
+        
     def add_node(self, node_id: str, level: int, dependencies: Optional[Set[str]] = None):
         """ノード追加"""
         if node_id not in self.nodes:
@@ -68,6 +95,9 @@ class DAGCache:
                 if dep_id not in self.reverse_adjacency:
                     self.reverse_adjacency[dep_id] = set()
                 self.reverse_adjacency[dep_id].add(node_id)
+            
+            self.structure_version += 1
+            self.dirty.add(node_id)
     
     def add_edge(self, from_id: str, to_id: str):
         """エッジ追加（from_id -> to_id）"""
@@ -78,6 +108,9 @@ class DAGCache:
             if from_id not in self.reverse_adjacency:
                 self.reverse_adjacency[from_id] = set()
             self.reverse_adjacency[from_id].add(to_id)
+            
+            self.structure_version += 1
+            self.mark_dirty(to_id, include_self=True)
     
     def is_dag_valid(self) -> bool:
         """DAG構造の有効性確認（循環検出）"""
@@ -108,6 +141,8 @@ class DAGCache:
         """
         トポロジカルソート実行
         
+        構造（ノード・エッジ）が変わらない限り前回の結果を再利用する
+        
         Args:
             force_rebuild: 強制再構築フラグ
             
@@ -115,19 +150,18 @@ class DAGCache:
             トポロジカル順序のノードIDリスト
         """
         # キャッシュ確認
-        if not force_rebuild and self.topological_order is not None:
-            if self.dag_built_timestamp:
-                age_ms = (time.time() - self.dag_built_timestamp) * 1000
-                if age_ms < self.cache_ttl_ms:
-                    self.cache_hits += 1
-                    logger.debug(f"Topological order cache hit (age: {age_ms:.1f}ms)")
-                    return self.topological_order
+        if (not force_rebuild and self.topological_order is not None
+                and self._order_version == self.structure_version):
+            self.cache_hits += 1
+            return self.topological_order
         
         self.cache_misses += 1
         start_time = time.time()
         
         # Kahn's algorithm
-        in_degree = {node_id: len(deps) for node_id, deps in self.adjacency_list.items()}
+        # 入力値（ノードではない依存元）は次数に数えない
+        in_degree = {node_id: sum(1 for dep in deps if dep in self.nodes)
+                     for node_id, deps in self.adjacency_list.items()}
         queue = [node_id for node_id, degree in in_degree.items() if degree == 0]
         result = []
         
@@ -146,6 +180,8 @@ class DAGCache:
             raise ValueError("DAGに循環が存在します")
         
         self.topological_order = result
+        self._order_index = {node_id: i for i, node_id in enumerate(result)}
+        self._order_version = self.structure_version
         self.dag_built_timestamp = time.time()
         self.build_time_ms = (time.time() - start_time) * 1000
         
@@ -157,10 +193,84 @@ class DAGCache:
         return self.build_topological_order(force_rebuild=False)
     
     def cache_node_value(self, node_id: str, value: Any):
-        """ノード値のキャッシュ"""
+        """ノード値のキャッシュ（外部からの書き込み。値が変われば依存先を dirty にする）"""
         if node_id in self.nodes:
-            self.nodes[node_id].cache_value = value
-            self.nodes[node_id].cache_timestamp = time.time()
+            node = self.nodes[node_id]
+            if self.store_value(node_id, value, node.dep_versions):
+                self.mark_dirty(node_id)
+    
+    def store_value(self, node_id: str, value: Any,
+                    dep_versions: Dict[str, int]) -> bool:
+        """
+        評価結果を保存
+        
+        Returns:
+            値が変化したか（変化した場合のみバージョンを進める）
+        """
+        node = self.nodes[node_id]
+        changed = not node.evaluated or not _same_value(node.cache_value, value)
+        if changed:
+            self.clock += 1
+            node.version = self.clock
+        node.cache_value = value
+        node.cache_timestamp = time.time()
+        node.dep_versions = dep_versions
+        node.evaluated = True
+        return changed
+    
+    def current_version(self, node_id: str) -> int:
+        """ノードまたは入力の現在のバージョン"""
+        node = self.nodes.get(node_id)
+        if node is not None:
+            return node.version
+        return self.input_versions.get(node_id, 0)
+    
+    def mark_dirty(self, source_id: str, include_self: bool = False) -> Set[str]:
+        """
+        source_id（入力またはノード）の推移的な依存先を dirty にする
+        
+        Returns:
+            新たに dirty にしたノード
+        """
+        marked = set()
+        stack = [source_id]
+        if include_self and source_id in self.nodes:
+            marked.add(source_id)
+        while stack:
+            for dependent in self.reverse_adjacency.get(stack.pop(), ()):
+                if dependent not in marked:
+                    marked.add(dependent)
+                    stack.append(dependent)
+        marked -= self.dirty
+        self.dirty |= marked
+        return marked
+    
+    def update_inputs(self, input_values: Dict[str, Any]) -> List[str]:
+        """
+        入力値を更新し、変化した入力の依存先を dirty にする
+        
+        Returns:
+            変化した入力ID（追加・削除を含む）
+        """
+        previous = self.input_values
+        changed = [key for key, value in input_values.items()
+                   if key not in previous or not _same_value(previous[key], value)]
+        changed.extend(key for key in previous if key not in input_values)
+        
+        if changed:
+            self.clock += 1
+            for key in changed:
+                self.input_versions[key] = self.clock
+                self.mark_dirty(key)
+        self.input_values = dict(input_values)
+        return changed
+    
+    def pop_dirty(self) -> List[str]:
+        """dirty ノードをトポロジカル順に取り出す"""
+        self.get_evaluation_order()
+        dirty = sorted(self.dirty, key=self._order_index.__getitem__)
+        self.dirty = set()
+        return dirty
     
     def get_cached_value(self, node_id: str, max_age_ms: Optional[float] = None) -> Optional[Any]:
         """キャッシュ値取得"""
@@ -182,6 +292,8 @@ class DAGCache:
             if node_id in self.nodes:
                 self.nodes[node_id].cache_value = None
                 self.nodes[node_id].cache_timestamp = None
+                self.nodes[node_id].evaluated = False
+                self.dirty.add(node_id)
                 
                 # 依存先も連鎖的に無効化
                 for dependent in self.reverse_adjacency.get(node_id, set()):
@@ -191,6 +303,8 @@ class DAGCache:
             for node in self.nodes.values():
                 node.cache_value = None
                 node.cache_timestamp = None
+                node.evaluated = False
+            self.dirty = set(self.nodes)
     
     def get_dependencies(self, node_id: str) -> Set[str]:
         """依存関係取得"""
@@ -227,19 +341,28 @@ class DAGCache:
         self.dag_built_timestamp = None
         self.cache_hits = 0
         self.cache_misses = 0
+        self.structure_version += 1
+        self._order_index = {}
+        self.input_values = {}
+        self.input_versions = {}
+        self.dirty = set()
 
 
 class OptimizedDAGEvaluator:
     """
     最適化されたDAG評価エンジン
     
-    キャッシュとバッチ処理により高速化
+    変化した入力の推移的な依存先だけを再計算する（変更駆動評価）。
+    再計算した結果が前回と同じなら、その先の依存先も再計算しない。
     """
     
     def __init__(self, cache: DAGCache):
         self.cache = cache
         self.evaluation_count = 0
         self.total_evaluation_time_ms = 0
+        self.nodes_evaluated = 0
+        self.nodes_skipped = 0
+        self.last_evaluated: List[str] = []
         
     def evaluate(self, 
                 input_values: Dict[str, Any],
@@ -251,45 +374,75 @@ class OptimizedDAGEvaluator:
         Args:
             input_values: 入力値の辞書
             evaluation_func: 各ノードの評価関数 func(node_id, dependencies) -> value
-            use_cache: キャッシュ使用フラグ
+                             （同じ依存値なら同じ値を返す純粋関数であること）
+            use_cache: Falseなら全ノードを再計算（キャッシュ状態は変更しない）
             
         Returns:
             各ノードの評価結果
         """
         start_time = time.time()
-        results = {}
         
         # トポロジカル順序で評価
         order = self.cache.get_evaluation_order()
         
-        for node_id in order:
-            # キャッシュ確認
-            if use_cache:
-                cached_value = self.cache.get_cached_value(node_id, max_age_ms=1000)
-                if cached_value is not None:
-                    results[node_id] = cached_value
-                    continue
+        if use_cache:
+            results = self._evaluate_incremental(input_values, evaluation_func, order)
+        else:
+            results = {}
+            for node_id in order:
+                dependencies = self._collect_dependencies(node_id, results, input_values)
+                results[node_id] = evaluation_func(node_id, dependencies)
+            self.last_evaluated = list(order)
+            self.nodes_evaluated += len(order)
+        
+        self.evaluation_count += 1
+        self.total_evaluation_time_ms += (time.time() - start_time) * 1000
+        
+        return results
+    
+    def _evaluate_incremental(self, input_values: Dict[str, Any],
+                              evaluation_func: callable,
+                              order: List[str]) -> Dict[str, Any]:
+        """dirty ノードだけをトポロジカル順に再計算"""
+        cache = self.cache
+        nodes = cache.nodes
+        cache.update_inputs(input_values)
+        
+        evaluated = []
+        for node_id in cache.pop_dirty():
+            node = nodes[node_id]
+            dep_versions = {dep_id: cache.current_version(dep_id)
+                            for dep_id in node.dependencies}
+            # 依存先が再計算されても値が変わっていなければ再計算不要
+            if node.evaluated and dep_versions == node.dep_versions:
+                continue
             
-            # 依存値収集
             dependencies = {}
-            for dep_id in self.cache.get_dependencies(node_id):
-                if dep_id in results:
-                    dependencies[dep_id] = results[dep_id]
+            for dep_id in node.dependencies:
+                dep = nodes.get(dep_id)
+                if dep is not None:
+                    dependencies[dep_id] = dep.cache_value
                 elif dep_id in input_values:
                     dependencies[dep_id] = input_values[dep_id]
             
-            # 評価実行
-            value = evaluation_func(node_id, dependencies)
-            results[node_id] = value
-            
-            # キャッシュ保存
-            if use_cache:
-                self.cache.cache_node_value(node_id, value)
+            cache.store_value(node_id, evaluation_func(node_id, dependencies), dep_versions)
+            evaluated.append(node_id)
         
-        self.evaluation_count += 1
-        self.total_evaluation_time_ms += (time.time() - start_time) * 1000
-        
-        return results
+        self.last_evaluated = evaluated
+        self.nodes_evaluated += len(evaluated)
+        self.nodes_skipped += len(order) - len(evaluated)
+        return {node_id: nodes[node_id].cache_value for node_id in order}
+    
+    def _collect_dependencies(self, node_id: str, results: Dict[str, Any],
+                              input_values: Dict[str, Any]) -> Dict[str, Any]:
+        """依存値収集（計算済みノード値を優先）"""
+        dependencies = {}
+        for dep_id in self.cache.get_dependencies(node_id):
+            if dep_id in results:
+                dependencies[dep_id] = results[dep_id]
+            elif dep_id in input_values:
+                dependencies[dep_id] = input_values[dep_id]
+        return dependencies
     
     def get_statistics(self) -> Dict[str, Any]:
         """評価統計取得"""
@@ -298,6 +451,8 @@ class OptimizedDAGEvaluator:
             'evaluation_count': self.evaluation_count,
             'total_evaluation_time_ms': self.total_evaluation_time_ms,
             'average_evaluation_time_ms': avg_time,
+            'nodes_evaluated': self.nodes_evaluated,
+            'nodes_skipped': self.nodes_skipped,
             'cache_statistics': self.cache.get_statistics()
         }
 
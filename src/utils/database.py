@@ -7,52 +7,334 @@ import sqlite3
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from itertools import repeat
 from typing import Dict, List, Optional, Tuple, Any
 from contextlib import contextmanager
+import atexit
+import logging
 import os
 import json
+import queue
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.price_store import CandleArrays, PRICE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+
+# 書き込み遅延キューの停止指示
+_STOP = object()
+
+# 書き込み遅延キューがロック競合で再試行するときの待ち時間（秒、倍々に延ばして上限で頭打ち）
+RETRY_INITIAL_DELAY = 0.05
+RETRY_MAX_DELAY = 2.0
+
+
+def _is_transient(error: Exception) -> bool:
+    """待てば成功しうるエラー（他の接続が書き込みロックを持っている）か"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+class _FlushMarker:
+    """flush() の待ち合わせ（それまでに落とした記録の件数を返す）"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.dropped = 0
+
+# 一括取り込みの1回の executemany で渡す行数
+BULK_CHUNK_SIZE = 50000
+
+# 接続ごとのプリペアドステートメントキャッシュ数（SQL文字列が同一なら再コンパイルしない）
+STATEMENT_CACHE_SIZE = 256
+
+# 価格データの月別パーティション（通貨ペア×時間足×月ごとのテーブル、エポック秒がクラスタキー）
+CREATE_PRICE_PARTITION_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        timestamp INTEGER PRIMARY KEY, -- エポック秒
+        open REAL NOT NULL,
+        high REAL NOT NULL,
+        low REAL NOT NULL,
+        close REAL NOT NULL,
+        volume REAL
+    ) WITHOUT ROWID
+"""
+
+INSERT_PRICE_SQL = """
+    INSERT OR IGNORE INTO {table} 
+    (timestamp, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+SELECT_PRICE_SQL = """
+    SELECT timestamp, open, high, low, close, volume 
+    FROM {table} 
+    WHERE timestamp BETWEEN ? AND ?
+    ORDER BY timestamp
+"""
+
+UPSERT_PARTITION_SQL = """
+    INSERT INTO price_partitions 
+    (instrument, timeframe, month, table_name, start_ts, end_ts, row_count)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (instrument, timeframe, month) DO UPDATE SET
+        start_ts = MIN(start_ts, excluded.start_ts),
+        end_ts = MAX(end_ts, excluded.end_ts),
+        row_count = row_count + excluded.row_count
+"""
+
+# 範囲指定なしの読み込みで使う時刻の下限・上限（エポック秒）
+MIN_EPOCH = -(1 << 62)
+MAX_EPOCH = 1 << 62
+
+INSERT_HEIKIN_ASHI_SQL = """
+    INSERT OR REPLACE INTO heikin_ashi_data 
+    (instrument, timeframe, timestamp, ha_open, ha_high, ha_low, ha_close, ha_direction, ha_reversal)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_SIGNAL_SQL = """
+    INSERT OR REPLACE INTO operation_signals 
+    (instrument, timeframe, timestamp, dokyaku_signal, ikikaeri_signal, 
+     momi_signal, overshoot_signal, overall_signal, confidence, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_TRADE_SQL = """
+    INSERT INTO trades 
+    (instrument, trade_type, entry_time, entry_price, exit_time, exit_price,
+     units, profit_loss, stop_loss_price, take_profit_price, entry_signal_id, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_PERFORMANCE_SQL = """
+    INSERT INTO performance_log (operation_name, execution_time)
+    VALUES (?, ?)
+"""
+
+
+def timestamp_strings(timestamps: Any) -> List[str]:
+    """
+    時刻列を保存形式の文字列に一括変換
+    
+    sqlite3 が datetime を保存する形式（'YYYY-MM-DD HH:MM:SS[.ffffff]'）と同じにする。
+    小数部は要素ごとに判定し、マイクロ秒が0なら付けない（同じ時刻は常に同じ文字列になり、
+    UNIQUE 制約や INSERT OR IGNORE の重複判定がバッチの内容に左右されない）。
+    整数列はエポック秒として扱う（ColumnarPriceStore の timestamp 列）
+    """
+    if isinstance(timestamps, pd.DatetimeIndex) and timestamps.tz is not None:
+        timestamps = timestamps.tz_convert(None)
+    values = np.asarray(timestamps)
+    if np.issubdtype(values.dtype, np.integer):
+        values = values.astype('datetime64[s]')
+    elif not np.issubdtype(values.dtype, np.datetime64):
+        values = np.array(pd.to_datetime(values), dtype='datetime64[ns]')
+    
+    microseconds = values.astype('datetime64[us]')
+    whole = np.datetime_as_string(microseconds, unit='s')
+    fractional = microseconds.astype(np.int64) % 1_000_000 != 0
+    if fractional.any():
+        whole = np.where(fractional, np.datetime_as_string(microseconds, unit='us'), whole)
+    return np.char.replace(whole, 'T', ' ').tolist()
+
+
+def epoch_seconds(timestamps: Any) -> np.ndarray:
+    """時刻列をエポック秒（int64）に一括変換（秒未満は切り捨て、整数列はエポック秒として扱う）"""
+    if isinstance(timestamps, pd.DatetimeIndex) and timestamps.tz is not None:
+        timestamps = timestamps.tz_convert(None)
+    values = np.asarray(timestamps)
+    if np.issubdtype(values.dtype, np.integer):
+        return values.astype(np.int64)
+    if not np.issubdtype(values.dtype, np.datetime64):
+        values = np.array(pd.to_datetime(values), dtype='datetime64[ns]')
+    return values.astype('datetime64[s]').astype(np.int64)
+
+
+def _epoch_second(value: Any) -> int:
+    """時刻1つ（文字列・datetime）をエポック秒に変換"""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tz is not None:
+        timestamp = timestamp.tz_convert(None)
+    return int(timestamp.value // 1_000_000_000)
+
+
+def partition_table(instrument: str, timeframe: str, month: str) -> str:
+    """価格データのパーティションテーブル名（引用符付き）"""
+    name = f"price_data/{instrument}/{timeframe}/{month}"
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _frame_timestamps(df: pd.DataFrame) -> Any:
+    """DataFrame の時刻（timestamp 列があれば列、なければインデックス）"""
+    if 'timestamp' in df.columns:
+        return df['timestamp'].to_numpy()
+    return df.index
+
+
+def _column_list(source: Any, name: str, size: int, default: float = 0) -> List:
+    """列を Python のリストに変換（列がなければ既定値）"""
+    if isinstance(source, pd.DataFrame):
+        column = source[name].to_numpy() if name in source.columns else None
+    elif isinstance(source, dict):
+        column = source.get(name)
+    else:
+        column = getattr(source, name, None)
+    if column is None:
+        return [default] * size
+    return np.asarray(column).tolist()
+
+
+def _column_array(source: Any, name: str, size: int, default: float = 0) -> np.ndarray:
+    """列を float64 配列に変換（列がなければ既定値）"""
+    if isinstance(source, pd.DataFrame):
+        column = source[name].to_numpy() if name in source.columns else None
+    elif isinstance(source, dict):
+        column = source.get(name)
+    else:
+        column = getattr(source, name, None)
+    if column is None:
+        return np.full(size, default, dtype=np.float64)
+    return np.asarray(column, dtype=np.float64)
 
 
 class DatabaseManager:
     """
     FX取引システム用データベース管理クラス
+    
+    接続はスレッドごとに1本を使い回す（WALモード、プリペアドステートメントは接続単位でキャッシュ）。
+    価格データは通貨ペア×時間足×月ごとのテーブルに分け、price_partitions に各テーブルの時刻範囲を持つ
     """
     
     def __init__(self, db_path: str = "./data/fx_trading.db"):
         self.db_path = db_path
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._write_behind: Optional['WriteBehindQueue'] = None
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """新しい接続を開いてWALモードに設定"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row  # 辞書形式でアクセス可能
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # WALではコミットごとのfsyncを省いても破損しない
+        return conn
+    
     @contextmanager
     def get_connection(self):
-        """データベース接続のコンテキストマネージャー"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # 辞書形式でアクセス可能
+        """
+        データベース接続のコンテキストマネージャー（呼び出しスレッドの接続を再利用）
+        
+        transaction() の外で例外が起きた場合は未コミットの変更をロールバックする
+        （接続を使い回すため、開いたままのトランザクションを次の呼び出しに持ち越さない）
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._connections_lock:
+                self._connections.append(conn)
         try:
             yield conn
-        finally:
+        except BaseException:
+            if not self._local.depth and conn.in_transaction:
+                conn.rollback()
+            raise
+    
+    def _commit(self, conn: sqlite3.Connection):
+        """transaction() の外側でだけコミット"""
+        if not self._local.depth:
+            conn.commit()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        複数の保存をまとめて1回でコミット
+        
+        ブロック内の save_* はコミットせず、ブロックを抜けた時点で一括コミット（例外時はロールバック）
+        """
+        with self.get_connection() as conn:
+            self._local.depth += 1
+            try:
+                yield conn
+            except BaseException:
+                self._local.depth -= 1
+                if not self._local.depth:
+                    conn.rollback()
+                raise
+            self._local.depth -= 1
+            self._commit(conn)
+    
+    @contextmanager
+    def bulk_load(self):
+        """
+        一括取り込み用のトランザクション（synchronous=OFF）
+        
+        取り込み中の電源断ではそのトランザクションが失われうるが、WALのため既存データは壊れない。
+        既にトランザクション内であればそのトランザクションに含める（同期設定は変えない）
+        """
+        with self.get_connection() as conn:
+            if conn.in_transaction or self._local.depth:
+                with self.transaction():
+                    yield conn
+                return
+            conn.execute("PRAGMA synchronous=OFF")
+            try:
+                with self.transaction():
+                    yield conn
+            finally:
+                conn.execute("PRAGMA synchronous=NORMAL")
+    
+    def write_behind(self, **kwargs) -> 'WriteBehindQueue':
+        """
+        書き込み遅延キュー（初回呼び出しで開始し、以降は同じキューを返す）
+        
+        取引ループからは save_trade などの代わりにこのキューの同名メソッドを呼ぶ。
+        引数は WriteBehindQueue と同じ（初回のみ有効）
+        """
+        if self._write_behind is None:
+            self._write_behind = WriteBehindQueue(self, **kwargs)
+        return self._write_behind
+    
+    def close(self):
+        """書き込み遅延キューを書き切ってから全スレッドの接続を閉じる"""
+        if self._write_behind is not None:
+            self._write_behind.close()
+            self._write_behind = None
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
             conn.close()
+        self._local = threading.local()
     
     def init_database(self):
         """データベース初期化・テーブル作成"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # 価格データテーブル
+            # 価格データのパーティション管理テーブル（実データは月別テーブル）
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS price_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                CREATE TABLE IF NOT EXISTS price_partitions (
                     instrument TEXT NOT NULL,
                     timeframe TEXT NOT NULL,
-                    timestamp DATETIME NOT NULL,
-                    open REAL NOT NULL,
-                    high REAL NOT NULL,
-                    low REAL NOT NULL,
-                    close REAL NOT NULL,
-                    volume INTEGER,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(instrument, timeframe, timestamp)
-                )
+                    month TEXT NOT NULL,      -- YYYY-MM
+                    table_name TEXT NOT NULL,
+                    start_ts INTEGER NOT NULL, -- 最初の足（エポック秒）
+                    end_ts INTEGER NOT NULL,   -- 最後の足（エポック秒）
+                    row_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (instrument, timeframe, month)
+                ) WITHOUT ROWID
             """)
             
             # 平均足データテーブル
@@ -145,99 +427,203 @@ class DatabaseManager:
             """)
             
             # インデックス作成
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_price_data_lookup ON price_data (instrument, timeframe, timestamp)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_heikin_ashi_lookup ON heikin_ashi_data (instrument, timeframe, timestamp)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_operation_signals_lookup ON operation_signals (instrument, timeframe, timestamp)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_lookup ON trades (instrument, entry_time)")
             
             conn.commit()
+            
+            # 旧形式（単一の price_data テーブル）があればパーティションへ移行
+            legacy = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'price_data'"
+            ).fetchone()
+            if legacy:
+                self._migrate_legacy_price_data()
+            
             print("✅ データベース初期化完了")
     
+    def _migrate_legacy_price_data(self):
+        """旧形式の price_data を月別パーティションへ移して削除（1トランザクション）"""
+        with self.transaction() as conn:
+            series = conn.execute(
+                "SELECT DISTINCT instrument, timeframe FROM price_data"
+            ).fetchall()
+            for instrument, timeframe in series:
+                df = pd.read_sql_query(
+                    """SELECT timestamp, open, high, low, close, volume FROM price_data
+                       WHERE instrument = ? AND timeframe = ?""",
+                    conn, params=[instrument, timeframe]
+                )
+                self.bulk_ingest_price_data(instrument, timeframe, df)
+            conn.execute("DROP TABLE price_data")
+        print(f"📦 旧形式の価格データを移行: {len(series)} 系列")
+    
     def save_price_data(self, instrument: str, timeframe: str, df: pd.DataFrame):
         """価格データ保存"""
+        count = self.bulk_ingest_price_data(instrument, timeframe, df)
+        print(f"💾 価格データ保存: {instrument} {timeframe} ({count} records)")
+    
+    def bulk_ingest_price_data(self, instrument: str, timeframe: str, data: Any,
+                               chunk_size: int = BULK_CHUNK_SIZE) -> int:
+        """
+        価格データの一括取り込み（重複は無視）
+        
+        行ごとの辞書を作らず、列から直接タプルを生成して月別パーティションに
+        chunk_size 行ずつ挿入する。全体を1トランザクション（synchronous=OFF）で行う
+        
+        Args:
+            data: DataFrame（DatetimeIndex または timestamp 列）、
+                  列の辞書、または CandleArrays（timestamp はエポック秒）
+        
+        Returns:
+            入力行数
+        """
+        if isinstance(data, pd.DataFrame):
+            timestamps = epoch_seconds(_frame_timestamps(data))
+        elif isinstance(data, dict):
+            timestamps = epoch_seconds(data['timestamp'])
+        else:
+            timestamps = epoch_seconds(data.timestamp)
+        size = len(timestamps)
+        columns = [_column_array(data, name, size) for name in PRICE_FIELDS]
+        
+        # 月の境界で区切るため時刻順に並べる（通常は並んでいるのでコピーしない）
+        if np.any(timestamps[1:] < timestamps[:-1]):
+            order = np.argsort(timestamps, kind='stable')
+            timestamps = timestamps[order]
+            columns = [column[order] for column in columns]
+        
+        months = timestamps.astype('datetime64[s]').astype('datetime64[M]')
+        bounds = [0, *(np.flatnonzero(months[1:] != months[:-1]) + 1).tolist(), size]
+        
+        with self.bulk_load() as conn:
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                if lo == hi:
+                    continue
+                month = str(months[lo])
+                table = partition_table(instrument, timeframe, month)
+                conn.execute(CREATE_PRICE_PARTITION_SQL.format(table=table))
+                insert_sql = INSERT_PRICE_SQL.format(table=table)
+                changes = conn.total_changes
+                for start in range(lo, hi, chunk_size):
+                    end = min(start + chunk_size, hi)
+                    conn.executemany(insert_sql, zip(
+                        timestamps[start:end].tolist(),
+                        *(column[start:end].tolist() for column in columns)
+                    ))
+                conn.execute(UPSERT_PARTITION_SQL, (
+                    instrument, timeframe, month, table,
+                    int(timestamps[lo]), int(timestamps[hi - 1]),
+                    conn.total_changes - changes
+                ))
+        return size
+    
+    def list_price_partitions(self, instrument: Optional[str] = None,
+                              timeframe: Optional[str] = None) -> List[Dict[str, Any]]:
+        """価格データのパーティション一覧（時刻順）"""
+        query = "SELECT * FROM price_partitions WHERE 1=1"
+        params = []
+        if instrument:
+            query += " AND instrument = ?"
+            params.append(instrument)
+        if timeframe:
+            query += " AND timeframe = ?"
+            params.append(timeframe)
+        query += " ORDER BY instrument, timeframe, start_ts"
+        with self.get_connection() as conn:
+            return [dict(row) for row in conn.execute(query, params)]
+    
+    def read_price_arrays(self,
+                          instrument: str,
+                          timeframe: str,
+                          start_date: Optional[Any] = None,
+                          end_date: Optional[Any] = None) -> CandleArrays:
+        """
+        価格データを列配列で読み込み（start_date〜end_date、両端を含む）
+        
+        時刻範囲が重なるパーティションだけを主キーの範囲で読み、DataFrame を経由しない
+        
+        Returns:
+            CandleArrays（timestamp はエポック秒）
+        """
+        lo = MIN_EPOCH if start_date is None else _epoch_second(start_date)
+        hi = MAX_EPOCH if end_date is None else _epoch_second(end_date)
+        
+        blocks = []
         with self.get_connection() as conn:
-            # DataFrameをSQLiteに保存
-            records = []
-            for timestamp, row in df.iterrows():
-                records.append({
-                    'instrument': instrument,
-                    'timeframe': timeframe,
-                    'timestamp': timestamp,
-                    'open': row['open'],
-                    'high': row['high'],
-                    'low': row['low'],
-                    'close': row['close'],
-                    'volume': row.get('volume', 0)
-                })
-            
-            # バッチ挿入（重複は無視）
             cursor = conn.cursor()
-            cursor.executemany("""
-                INSERT OR IGNORE INTO price_data 
-                (instrument, timeframe, timestamp, open, high, low, close, volume)
-                VALUES (:instrument, :timeframe, :timestamp, :open, :high, :low, :close, :volume)
-            """, records)
-            
-            conn.commit()
-            print(f"💾 価格データ保存: {instrument} {timeframe} ({len(records)} records)")
+            cursor.row_factory = None  # タプルのまま受け取る
+            tables = cursor.execute("""
+                SELECT table_name FROM price_partitions
+                WHERE instrument = ? AND timeframe = ? AND end_ts >= ? AND start_ts <= ?
+                ORDER BY start_ts
+            """, (instrument, timeframe, lo, hi)).fetchall()
+            for (table,) in tables:
+                rows = cursor.execute(SELECT_PRICE_SQL.format(table=table), (lo, hi)).fetchall()
+                if rows:
+                    blocks.append(np.array(rows, dtype=np.float64))
+        
+        data = np.concatenate(blocks) if blocks else np.empty((0, len(PRICE_FIELDS) + 1))
+        columns = {'timestamp': data[:, 0].astype(np.int64)}
+        for i, name in enumerate(PRICE_FIELDS, start=1):
+            columns[name] = data[:, i]
+        return CandleArrays.from_columns(columns, instrument, timeframe)
     
     def load_price_data(self, 
                         instrument: str, 
                         timeframe: str,
                         start_date: Optional[str] = None,
                         end_date: Optional[str] = None) -> pd.DataFrame:
-        """価格データ読み込み"""
-        with self.get_connection() as conn:
-            query = """
-                SELECT timestamp, open, high, low, close, volume 
-                FROM price_data 
-                WHERE instrument = ? AND timeframe = ?
-            """
-            params = [instrument, timeframe]
-            
-            if start_date:
-                query += " AND timestamp >= ?"
-                params.append(start_date)
-            
-            if end_date:
-                query += " AND timestamp <= ?"
-                params.append(end_date)
-            
-            query += " ORDER BY timestamp"
-            
-            df = pd.read_sql_query(query, conn, params=params, parse_dates=['timestamp'])
-            
-            if not df.empty:
-                df.set_index('timestamp', inplace=True)
-            
-            return df
+        """価格データ読み込み（read_price_arrays の結果を時刻インデックスの DataFrame に変換）"""
+        arrays = self.read_price_arrays(instrument, timeframe, start_date, end_date)
+        index = pd.DatetimeIndex(arrays.timestamp.astype('datetime64[s]').astype('datetime64[ns]'),
+                                 name='timestamp')
+        return pd.DataFrame({name: getattr(arrays, name) for name in PRICE_FIELDS}, index=index)
+    
+    def drop_price_partitions(self, before: Any,
+                              instrument: Optional[str] = None,
+                              timeframe: Optional[str] = None) -> int:
+        """
+        全体が before より古いパーティションをテーブルごと削除（行単位の DELETE はしない）
+        
+        Returns:
+            削除したパーティション数
+        """
+        cutoff = _epoch_second(before)
+        query = "SELECT instrument, timeframe, month, table_name FROM price_partitions WHERE end_ts < ?"
+        params: List[Any] = [cutoff]
+        if instrument:
+            query += " AND instrument = ?"
+            params.append(instrument)
+        if timeframe:
+            query += " AND timeframe = ?"
+            params.append(timeframe)
+        
+        with self.transaction() as conn:
+            partitions = conn.execute(query, params).fetchall()
+            for partition_instrument, partition_timeframe, month, table in partitions:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.execute(
+                    "DELETE FROM price_partitions WHERE instrument = ? AND timeframe = ? AND month = ?",
+                    (partition_instrument, partition_timeframe, month)
+                )
+        return len(partitions)
     
     def save_heikin_ashi_data(self, instrument: str, timeframe: str, df: pd.DataFrame):
         """平均足データ保存"""
-        with self.get_connection() as conn:
-            records = []
-            for timestamp, row in df.iterrows():
-                records.append({
-                    'instrument': instrument,
-                    'timeframe': timeframe,
-                    'timestamp': timestamp,
-                    'ha_open': row['ha_open'],
-                    'ha_high': row['ha_high'],
-                    'ha_low': row['ha_low'],
-                    'ha_close': row['ha_close'],
-                    'ha_direction': row['ha_direction'],
-                    'ha_reversal': row.get('ha_reversal', 0)
-                })
-            
-            cursor = conn.cursor()
-            cursor.executemany("""
-                INSERT OR REPLACE INTO heikin_ashi_data 
-                (instrument, timeframe, timestamp, ha_open, ha_high, ha_low, ha_close, ha_direction, ha_reversal)
-                VALUES (:instrument, :timeframe, :timestamp, :ha_open, :ha_high, :ha_low, :ha_close, :ha_direction, :ha_reversal)
-            """, records)
-            
-            conn.commit()
-            print(f"💾 平均足データ保存: {instrument} {timeframe} ({len(records)} records)")
+        timestamps = timestamp_strings(_frame_timestamps(df))
+        size = len(timestamps)
+        columns = [_column_list(df, name, size) for name in
+                   ('ha_open', 'ha_high', 'ha_low', 'ha_close', 'ha_direction', 'ha_reversal')]
+        
+        with self.transaction() as conn:
+            for start in range(0, size, BULK_CHUNK_SIZE):
+                end = start + BULK_CHUNK_SIZE
+                conn.executemany(INSERT_HEIKIN_ASHI_SQL, zip(
+                    repeat(instrument), repeat(timeframe), timestamps[start:end],
+                    *(column[start:end] for column in columns)
+                ))
+        print(f"💾 平均足データ保存: {instrument} {timeframe} ({size} records)")
     
     def save_operation_signal(self, 
                               instrument: str,
@@ -252,12 +638,7 @@ class DatabaseManager:
             
             metadata_json = json.dumps(metadata) if metadata else None
             
-            cursor.execute("""
-                INSERT OR REPLACE INTO operation_signals 
-                (instrument, timeframe, timestamp, dokyaku_signal, ikikaeri_signal, 
-                 momi_signal, overshoot_signal, overall_signal, confidence, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+            cursor.execute(INSERT_SIGNAL_SQL, (
                 instrument, timeframe, timestamp,
                 signals.get('dokyaku', 0),
                 signals.get('ikikaeri', 0),
@@ -268,7 +649,7 @@ class DatabaseManager:
                 metadata_json
             ))
             
-            conn.commit()
+            self._commit(conn)
             return cursor.lastrowid
     
     def save_trade(self, trade_data: Dict[str, Any]) -> int:
@@ -276,12 +657,7 @@ class DatabaseManager:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute("""
-                INSERT INTO trades 
-                (instrument, trade_type, entry_time, entry_price, exit_time, exit_price,
-                 units, profit_loss, stop_loss_price, take_profit_price, entry_signal_id, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+            cursor.execute(INSERT_TRADE_SQL, (
                 trade_data['instrument'],
                 trade_data['trade_type'],
                 trade_data['entry_time'],
@@ -296,7 +672,7 @@ class DatabaseManager:
                 trade_data.get('status', 'OPEN')
             ))
             
-            conn.commit()
+            self._commit(conn)
             return cursor.lastrowid
     
     def save_backtest_result(self, result_data: Dict[str, Any]) -> int:
@@ -328,7 +704,7 @@ class DatabaseManager:
                 parameters_json
             ))
             
-            conn.commit()
+            self._commit(conn)
             return cursor.lastrowid
     
     def get_operation_signals(self, 
@@ -395,12 +771,8 @@ class DatabaseManager:
     def log_performance(self, operation_name: str, execution_time: float):
         """パフォーマンス記録"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO performance_log (operation_name, execution_time)
-                VALUES (?, ?)
-            """, (operation_name, execution_time))
-            conn.commit()
+            conn.execute(INSERT_PERFORMANCE_SQL, (operation_name, execution_time))
+            self._commit(conn)
     
     def get_database_stats(self) -> Dict[str, int]:
         """データベース統計情報"""
@@ -408,16 +780,30 @@ class DatabaseManager:
             cursor = conn.cursor()
             
             stats = {}
-            tables = ['price_data', 'heikin_ashi_data', 'operation_signals', 'trades', 'backtest_results']
+            cursor.execute("SELECT COALESCE(SUM(row_count), 0) FROM price_partitions")
+            stats['price_data'] = cursor.fetchone()[0]
             
+            tables = ['heikin_ashi_data', 'operation_signals', 'trades', 'backtest_results']
             for table in tables:
                 cursor.execute(f"SELECT COUNT(*) FROM {table}")
                 stats[table] = cursor.fetchone()[0]
             
             return stats
     
-    def cleanup_old_data(self, days_to_keep: int = 90):
-        """古いデータのクリーンアップ"""
+    def cleanup_old_data(self, days_to_keep: int = 90,
+                         price_days_to_keep: Optional[int] = None):
+        """
+        古いデータのクリーンアップ
+        
+        Args:
+            days_to_keep: パフォーマンスログの保持日数
+            price_days_to_keep: 価格データの保持日数（指定時のみ、期限切れの月別パーティションを削除）
+        """
+        if price_days_to_keep is not None:
+            cutoff = pd.Timestamp.utcnow().tz_convert(None) - pd.Timedelta(days=price_days_to_keep)
+            dropped = self.drop_price_partitions(cutoff)
+            print(f"🧹 古い価格データのパーティション {dropped} 件削除")
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
@@ -428,11 +814,231 @@ class DatabaseManager:
             """.format(days_to_keep))
             
             deleted_rows = cursor.rowcount
-            conn.commit()
+            self._commit(conn)
             
             print(f"🧹 古いパフォーマンスログ {deleted_rows} 件削除")
 
 
+class WriteBehindQueue:
+    """
+    書き込み遅延キュー（取引・判定結果・パフォーマンス記録の非同期保存）
+    
+    呼び出し側はキューに積むだけで戻り、専用スレッドが batch_size 件または
+    flush_interval 秒ごとに1トランザクションでまとめて書き込む。
+    書き込みは投入順で、コミットもその順に行うため、異常終了後のデータベースには
+    投入された記録の先頭からの一部が残る（途中が欠けることはない）。
+    
+    ロック競合（database is locked / busy）は記録を落とさず、間隔を延ばしながら
+    成功するまで再試行する（その間の投入はキューに溜まり、is_backlogged で分かる）。
+    落とすのは制約違反など、その記録自体が書けない場合だけ
+    """
+    
+    # キューの使用率がこれを超えたら滞留とみなす
+    BACKLOG_RATIO = 0.8
+    
+    def __init__(self, db: 'DatabaseManager', max_queue: int = 10000,
+                 batch_size: int = 500, flush_interval: float = 0.05,
+                 block: bool = True, put_timeout: Optional[float] = None,
+                 start: bool = True):
+        """
+        Args:
+            max_queue: キューの上限（満杯時は block に従って待つか拒否する）
+            batch_size: 1トランザクションの最大件数
+            flush_interval: 最初の1件から書き込みまでに後続を待つ最大秒数
+            block: 満杯時に空きを待つか（False なら即座に拒否）
+            put_timeout: 空きを待つ最大秒数（None は無期限）
+        """
+        self.db = db
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block = block
+        self.put_timeout = put_timeout
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._failed_at_flush = 0
+        self.enqueued = 0
+        self.written = 0
+        self.rejected = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        if start:
+            self.start()
+    
+    def start(self):
+        """書き込みスレッドを開始"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+    
+    @property
+    def depth(self) -> int:
+        """キューに残っている件数"""
+        return self._queue.qsize()
+    
+    @property
+    def is_backlogged(self) -> bool:
+        """書き込みが追いついていないか（呼び出し側が投入を間引く目安）"""
+        return self._queue.qsize() >= self.max_queue * self.BACKLOG_RATIO
+    
+    def submit(self, method: str, *args, **kwargs) -> bool:
+        """
+        DatabaseManager のメソッド呼び出しを積む
+        
+        Returns:
+            受け付けたか（キューが満杯で拒否した場合は False）
+        """
+        if self._closed:
+            raise RuntimeError("Write-behind queue is closed")
+        try:
+            self._queue.put((getattr(self.db, method), args, kwargs),
+                            block=self.block, timeout=self.put_timeout)
+        except queue.Full:
+            self.rejected += 1
+            return False
+        self.enqueued += 1
+        return True
+    
+    def save_trade(self, trade_data: Dict[str, Any]) -> bool:
+        return self.submit('save_trade', trade_data)
+    
+    def save_operation_signal(self, instrument: str, timeframe: str, timestamp: datetime,
+                              signals: Dict[str, Any], confidence: float = 0.0,
+                              metadata: Optional[Dict] = None) -> bool:
+        return self.submit('save_operation_signal', instrument, timeframe, timestamp,
+                           signals, confidence, metadata)
+    
+    def log_performance(self, operation_name: str, execution_time: float) -> bool:
+        return self.submit('log_performance', operation_name, execution_time)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        ここまでに積んだ記録のコミットを待つ
+        
+        Returns:
+            すべて書き込めたか（タイムアウトした場合、前回の flush 以降に
+            落とした記録がある場合は False。落とした件数は failed に累計）
+        
+        Raises:
+            RuntimeError: close() 済み
+        """
+        if self._closed:
+            raise RuntimeError("Write-behind queue is closed")
+        if self._thread is None:
+            return self._queue.empty()
+        marker = _FlushMarker()
+        self._queue.put(marker)
+        return marker.done.wait(timeout) and not marker.dropped
+    
+    def close(self, timeout: Optional[float] = None):
+        """残りをすべて書き込んでからスレッドを止める"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            atexit.unregister(self.close)
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            'depth': self.depth,
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'rejected': self.rejected,
+            'failed': self.failed,
+            'retries': self.retries,
+            'batches': self.batches,
+        }
+    
+    def _run(self):
+        """書き込みスレッド本体"""
+        while True:
+            item = self._queue.get()
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            # 記録以外（flush の Event・停止）が来たら手前までを先に書き込む
+            while isinstance(item, tuple):
+                batch.append(item)
+                item = None
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            
+            if batch:
+                self._write(batch)
+            if isinstance(item, _FlushMarker):
+                self._release(item)
+            elif item is _STOP:
+                self._drain()
+                return
+    
+    def _release(self, marker: _FlushMarker):
+        """flush() の待ちを解除（前回の flush 以降に落とした件数を添える）"""
+        marker.dropped = self.failed - self._failed_at_flush
+        self._failed_at_flush = self.failed
+        marker.done.set()
+    
+    def _drain(self):
+        """停止指示の後に積まれたもの（close と競合した投入・flush）を処理"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(item, tuple):
+                self._write([item])
+            elif isinstance(item, _FlushMarker):
+                self._release(item)
+    
+    def _commit(self, batch: List[Tuple]):
+        """1トランザクションで書き込み（ロック競合の間は待って再試行、それ以外のエラーは送出）"""
+        delay = RETRY_INITIAL_DELAY
+        while True:
+            try:
+                with self.db.transaction():
+                    for method, args, kwargs in batch:
+                        method(*args, **kwargs)
+                return
+            except Exception as e:
+                if not _is_transient(e):
+                    raise
+                self.retries += 1
+                logger.warning(f"Write-behind waiting for database lock ({delay:.2f}s): {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, RETRY_MAX_DELAY)
+    
+    def _write(self, batch: List[Tuple]):
+        """1トランザクションで書き込み（失敗時は1件ずつ書き直して失敗分だけ落とす）"""
+        try:
+            self._commit(batch)
+            self.written += len(batch)
+            self.batches += 1
+            return
+        except Exception as e:
+            logger.warning(f"Write-behind batch failed, retrying one by one: {e}")
+        
+        for record in batch:
+            method = record[0]
+            try:
+                self._commit([record])
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Write-behind record dropped ({method.__name__}): {e}")
+        self.batches += 1
+
+
 if __name__ == "__main__":
     # テスト実行
     print("🗄️  データベース管理クラス テスト開始")
@@ -468,5 +1074,6 @@ if __name__ == "__main__":
     print("\n✅ データベーステスト完了！")
     
     # テストファイル削除
+    db.close()
     os.remove("./data/test_fx_trading.db")
     print("🧹 テストファイル削除完了")
\ No newline at end of file
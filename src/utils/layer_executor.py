@@ -0,0 +1,251 @@
+"""
+階層並列DAG実行エンジン
+
+同じ階層（依存関係の深さが同じ）のノードは互いに独立なので、重いノードだけを
+スレッドプール／プロセスプールに投げて同時に実行し、軽いノードは呼び出し元で
+そのまま実行する。どのノードを投げるかはノード種別ごとの実測コストで判断する。
+
+バックエンド:
+    inline  - すべて逐次実行（従来動作）
+    thread  - スレッドプール（I/Oや NumPy などGILを解放する処理向け）
+    process - プロセスプール（純Pythonの重い計算向け。関数と引数はpickle可能であること、
+              関数インスタンスへの副作用は呼び出し元に反映されない）
+"""
+
+import logging
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+BACKENDS = ('inline', 'thread', 'process')
+
+# ノード種別ごとの事前コスト見積り（ミリ秒、メモ仕様の目標値）
+DEFAULT_COST_PRIORS_MS: Dict[str, float] = {
+    'TimeKetsugou': 564.9,
+    'Overshoot': 550.6,
+    'MomiOvershoot': 550.6,
+    'Momi': 77.0,
+    'Yochi': 60.0,
+    'Dokyaku': 50.0,
+    'Ikikaeri': 50.0,
+    'Range': 40.0,
+    'Kairi': 30.0,
+}
+
+# プールへ投げる際の固定オーバーヘッドの目安（ミリ秒）
+DEFAULT_OFFLOAD_THRESHOLD_MS: Dict[str, float] = {
+    'inline': float('inf'),
+    'thread': 1.0,
+    'process': 20.0,
+}
+
+
+@dataclass
+class NodeTask:
+    """1ノード分の実行単位 func(*args)"""
+    node_id: str
+    func: Callable
+    args: Tuple = ()
+    cost_key: str = ''  # コストモデルのキー（関数タイプ等）
+
+
+class CostModel:
+    """
+    ノード種別ごとの実行コスト見積り
+
+    事前値から始め、実測値の指数移動平均で更新する
+    """
+
+    def __init__(self, priors_ms: Optional[Dict[str, float]] = None,
+                 default_ms: float = 0.1, alpha: float = 0.2):
+        self.estimates_ms: Dict[str, float] = dict(
+            DEFAULT_COST_PRIORS_MS if priors_ms is None else priors_ms)
+        self.default_ms = default_ms
+        self.alpha = alpha
+        self.samples: Dict[str, int] = defaultdict(int)
+
+    def estimate(self, cost_key: str) -> float:
+        return self.estimates_ms.get(cost_key, self.default_ms)
+
+    def observe(self, cost_key: str, elapsed_ms: float):
+        """実測値を反映（初回の実測は事前値を置き換える）"""
+        if self.samples[cost_key] == 0:
+            self.estimates_ms[cost_key] = elapsed_ms
+        else:
+            previous = self.estimates_ms[cost_key]
+            self.estimates_ms[cost_key] = previous + self.alpha * (elapsed_ms - previous)
+        self.samples[cost_key] += 1
+
+
+def _timed_call(func: Callable, args: Tuple) -> Tuple[Any, float]:
+    """実行時間付きで呼び出し（プール内で実行されるためモジュール関数）"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def group_levels(order: Iterable[str],
+                 dependencies: Callable[[str], Iterable[str]]) -> List[List[str]]:
+    """
+    トポロジカル順のノードを依存の深さごとにグループ化
+
+    同じグループ内のノードは互いに依存しない（PKG階層が一貫していれば
+    階層番号ごとのグループをさらに細分したものになる）
+    """
+    levels: Dict[str, int] = {}
+    groups: List[List[str]] = []
+    for node_id in order:
+        level = max((levels[dep] + 1 for dep in dependencies(node_id) if dep in levels),
+                    default=0)
+        levels[node_id] = level
+        while len(groups) <= level:
+            groups.append([])
+        groups[level].append(node_id)
+    return groups
+
+
+@dataclass
+class LayerStats:
+    """階層ごとの実行統計"""
+    layers: int = 0
+    tasks: int = 0
+    offloaded: int = 0
+    total_time_ms: float = 0.0
+
+
+class LayerExecutor:
+    """
+    階層並列実行
+
+    使い方:
+        executor = LayerExecutor('thread', max_workers=4)
+        results = executor.run_layer([NodeTask(id, func.execute, (data,), 'Range'), ...])
+    """
+
+    def __init__(self, backend: str = 'thread', max_workers: Optional[int] = None,
+                 offload_threshold_ms: Optional[float] = None,
+                 cost_model: Optional[CostModel] = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        self.backend = backend
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.offload_threshold_ms = (DEFAULT_OFFLOAD_THRESHOLD_MS[backend]
+                                     if offload_threshold_ms is None else offload_threshold_ms)
+        self.cost_model = cost_model or CostModel()
+        self.stats = LayerStats()
+        self._pool: Optional[Executor] = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.backend == 'process':
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='dag-layer')
+        return self._pool
+
+    def plan(self, tasks: List[NodeTask]) -> Tuple[List[NodeTask], List[NodeTask]]:
+        """
+        プールへ投げるタスクと呼び出し元で実行するタスクに分ける
+
+        見積りが閾値以上のタスクを投げる。ただし投げる候補が1件だけで、
+        残りの軽いタスクの合計も閾値未満なら並列化の利益がないため投げない
+        """
+        if self.backend == 'inline' or len(tasks) < 2:
+            return [], list(tasks)
+        heavy, light = [], []
+        for task in tasks:
+            if self.cost_model.estimate(task.cost_key) >= self.offload_threshold_ms:
+                heavy.append(task)
+            else:
+                light.append(task)
+        if len(heavy) == 1:
+            light_cost = sum(self.cost_model.estimate(t.cost_key) for t in light)
+            if light_cost < self.offload_threshold_ms:
+                return [], list(tasks)
+        return heavy, light
+
+    def run_layer(self, tasks: List[NodeTask],
+                  return_exceptions: bool = False) -> Dict[str, Any]:
+        """
+        1階層分のタスクを実行
+
+        Args:
+            tasks: 互いに依存しないタスク
+            return_exceptions: Trueなら例外を送出せず結果として返す
+
+        Returns:
+            node_id -> 結果
+        """
+        start = time.perf_counter()
+        offload, local = self.plan(tasks)
+        futures = [(task, self._get_pool().submit(_timed_call, task.func, task.args))
+                   for task in offload]
+
+        results: Dict[str, Any] = {}
+        first_error: Optional[BaseException] = None
+        for task in local:
+            try:
+                results[task.node_id], elapsed = _timed_call(task.func, task.args)
+                self.cost_model.observe(task.cost_key, elapsed)
+            except Exception as e:
+                results[task.node_id] = e
+                first_error = first_error or e
+        for task, future in futures:
+            try:
+                results[task.node_id], elapsed = future.result()
+                self.cost_model.observe(task.cost_key, elapsed)
+            except Exception as e:
+                results[task.node_id] = e
+                first_error = first_error or e
+
+        self.stats.layers += 1
+        self.stats.tasks += len(tasks)
+        self.stats.offloaded += len(offload)
+        self.stats.total_time_ms += (time.perf_counter() - start) * 1000
+
+        if first_error is not None and not return_exceptions:
+            raise first_error
+        return results
+
+    def run_layers(self, layers: Iterable[List[str]],
+                   make_task: Callable[[str, Dict[str, Any]], Optional[NodeTask]],
+                   results: Optional[Dict[str, Any]] = None,
+                   return_exceptions: bool = False) -> Dict[str, Any]:
+        """
+        階層を順に実行
+
+        Args:
+            layers: 階層ごとのノードID（group_levels、DAGConfigManager の layer_groups、
+                    DAGCache.get_level_nodes 等。同一階層内に依存がないこと）
+            make_task: (node_id, これまでの結果) -> NodeTask。None なら実行しない
+            results: 既知の値（生データ等）
+
+        Returns:
+            全ノードの結果
+        """
+        results = dict(results or {})
+        for layer in layers:
+            tasks = [task for task in (make_task(node_id, results) for node_id in layer)
+                     if task is not None]
+            if tasks:
+                results.update(self.run_layer(tasks, return_exceptions))
+        return results
+
+    def shutdown(self):
+        """プールを停止"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def __enter__(self) -> 'LayerExecutor':
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
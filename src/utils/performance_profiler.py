@@ -9,15 +9,206 @@ import time
 import cProfile
 import pstats
 import io
-from contextlib import contextmanager
-from typing import Dict, List, Optional, Any, Callable
+import json
+import math
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict
+from datetime import datetime
 import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 計測モード
+#   detailed: 全記録を保持（開発・解析用）
+#   sampling: 固定メモリのヒストグラムにサンプリング記録（本番常時有効用）
+PROFILER_MODES = ('detailed', 'sampling')
+
+# ヒストグラムの分解能（2のべき乗区間ごとに 2^(SUB_BUCKET_BITS-1) 分割、相対誤差 1/64 以下）
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+MAX_VALUE_BITS = 42  # ns単位で約73分まで
+MAX_VALUE_NS = (1 << MAX_VALUE_BITS) - 1
+BUCKET_COUNT = SUB_BUCKET_COUNT + (MAX_VALUE_BITS - SUB_BUCKET_BITS) * SUB_BUCKET_HALF
+
+
+def _bucket_index(value_ns: int) -> int:
+    """値（ns）→バケット番号"""
+    if value_ns < SUB_BUCKET_COUNT:
+        return value_ns
+    shift = value_ns.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (value_ns >> shift) - SUB_BUCKET_HALF
+
+
+def _bucket_range(index: int) -> Tuple[int, int]:
+    """バケット番号→値の範囲 [下限, 上限]（ns）"""
+    if index < SUB_BUCKET_COUNT:
+        return index, index
+    shift, offset = divmod(index - SUB_BUCKET_COUNT, SUB_BUCKET_HALF)
+    shift += 1
+    sub = offset + SUB_BUCKET_HALF
+    return sub << shift, ((sub + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    対数線形バケットのレイテンシヒストグラム（HDR形式、固定メモリ）
+    
+    記録は O(1)、パーセンタイルは読み出し時にバケットを走査して求める
+    """
+    
+    __slots__ = ('counts', 'count', 'total_ns', 'min_ns', 'max_ns')
+    
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = MAX_VALUE_NS
+        self.max_ns = 0
+    
+    def record(self, value_ns: int):
+        """値（ns）を1件記録（範囲外は上限に丸める）"""
+        value_ns = min(max(int(value_ns), 0), MAX_VALUE_NS)
+        self.counts[_bucket_index(value_ns)] += 1
+        self.count += 1
+        self.total_ns += value_ns
+        if value_ns < self.min_ns:
+            self.min_ns = value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+    
+    def merge(self, other: 'LatencyHistogram'):
+        """他のヒストグラムを加算"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.min_ns = min(self.min_ns, other.min_ns)
+        self.max_ns = max(self.max_ns, other.max_ns)
+    
+    def copy(self) -> 'LatencyHistogram':
+        clone = LatencyHistogram()
+        clone.counts = list(self.counts)
+        clone.count, clone.total_ns = self.count, self.total_ns
+        clone.min_ns, clone.max_ns = self.min_ns, self.max_ns
+        return clone
+    
+    def percentile(self, percent: float) -> int:
+        """パーセンタイル値（ns、バケットの中央値を実測の最小・最大で制限）"""
+        if self.count == 0:
+            return 0
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                low, high = _bucket_range(index)
+                return min(max((low + high) // 2, self.min_ns), self.max_ns)
+        return self.max_ns
+
+
+class _OperationSamples:
+    """1スレッド・1操作分の記録"""
+    
+    __slots__ = ('histogram', 'calls')
+    
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.calls = 0
+
+
+class _SampleTimer:
+    """サンプル対象の呼び出しを計測するコンテキストマネージャー"""
+    
+    __slots__ = ('histogram', 'start')
+    
+    def __init__(self, histogram: LatencyHistogram):
+        self.histogram = histogram
+    
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return None
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.record(time.perf_counter_ns() - self.start)
+        return False
+
+
+_SKIP = nullcontext()
+
+
+class SampledRecorder:
+    """
+    スレッドごとにロックなしで記録し、読み出し時に合算するレコーダー
+    
+    操作ごとに sample_rate の割合（N回に1回）だけ時間を計測し、呼び出し回数は全件数える。
+    ロックを取るのはスレッドの初回登録と読み出し時のみ
+    """
+    
+    def __init__(self, sample_rate: float = 1.0):
+        if not 0 < sample_rate <= 1:
+            raise ValueError(f"sample_rate must be in (0, 1]: {sample_rate}")
+        self.sample_rate = sample_rate
+        self.interval = max(1, round(1 / sample_rate))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stores: List[Tuple[threading.Thread, Dict[str, _OperationSamples]]] = []
+        self._retired: Dict[str, _OperationSamples] = {}  # 終了したスレッドの記録
+    
+    def _store(self) -> Dict[str, _OperationSamples]:
+        store = getattr(self._local, 'store', None)
+        if store is None:
+            store = self._local.store = {}
+            with self._lock:
+                self._stores.append((threading.current_thread(), store))
+        return store
+    
+    def timer(self, operation: str):
+        """呼び出し1回分のコンテキストマネージャー（サンプル対象外は何もしない）"""
+        store = self._store()
+        samples = store.get(operation)
+        if samples is None:
+            samples = store[operation] = _OperationSamples()
+        samples.calls += 1
+        if samples.calls % self.interval:
+            return _SKIP
+        return _SampleTimer(samples.histogram)
+    
+    def merged(self) -> Dict[str, _OperationSamples]:
+        """全スレッドの記録を合算した複製"""
+        result: Dict[str, _OperationSamples] = {}
+        
+        def add(operation: str, samples: _OperationSamples, target: Dict[str, _OperationSamples]):
+            merged = target.get(operation)
+            if merged is None:
+                merged = target[operation] = _OperationSamples()
+            merged.histogram.merge(samples.histogram)
+            merged.calls += samples.calls
+        
+        with self._lock:
+            alive = []
+            for thread, store in self._stores:
+                if thread.is_alive():
+                    alive.append((thread, store))
+                else:
+                    for operation, samples in list(store.items()):
+                        add(operation, samples, self._retired)
+            self._stores = alive
+            sources = [dict(store) for _, store in alive] + [self._retired]
+        
+        for store in sources:
+            for operation, samples in store.items():
+                add(operation, samples, result)
+        return result
+    
+    def clear(self):
+        with self._lock:
+            for _, store in self._stores:
+                store.clear()
+            self._retired.clear()
+
 
 @dataclass
 class TimingRecord:
@@ -58,28 +249,44 @@ class PerformanceProfiler:
         'DAG評価': 15.0,   # 推定値
     }
     
-    def __init__(self, enable_cprofile: bool = False):
+    def __init__(self, enable_cprofile: bool = False, mode: str = 'detailed',
+                 sample_rate: float = 1.0):
         """
         Args:
             enable_cprofile: cProfileによる詳細プロファイリング有効化
+            mode: 'detailed'（全記録を保持）または 'sampling'（固定メモリ、本番用）
+            sample_rate: sampling モードで時間を計測する呼び出しの割合
         """
+        if mode not in PROFILER_MODES:
+            raise ValueError(f"Unknown profiler mode: {mode}")
         self.enable_cprofile = enable_cprofile
+        self.mode = mode
+        self.sampler = SampledRecorder(sample_rate) if mode == 'sampling' else None
         self.timings: List[TimingRecord] = []
         self.operation_stats: Dict[str, List[float]] = defaultdict(list)
         self.active_timings: Dict[str, TimingRecord] = {}
         self.lock = threading.Lock()
         self.profiler: Optional[cProfile.Profile] = None
         
-    @contextmanager
     def measure(self, operation: str, **metadata):
         """
         処理時間計測コンテキストマネージャー
         
+        sampling モードでは記録オブジェクトを作らず None を渡し、目標超過の判定は
+        読み出し時（snapshot）に行う
+        
         Usage:
             with profiler.measure('同逆判定', timeframe='M1'):
                 # 処理実行
                 pass
         """
+        if self.sampler is not None:
+            return self.sampler.timer(operation)
+        return self._measure_detailed(operation, **metadata)
+    
+    @contextmanager
+    def _measure_detailed(self, operation: str, **metadata):
+        """全記録を保持する計測"""
         record = TimingRecord(
             operation=operation,
             start_time=time.time(),
@@ -145,6 +352,77 @@ class PerformanceProfiler:
             return result
         return None
     
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        操作ごとの統計（p50/p95/p99 を含む）
+        
+        sampling モードでは count は全呼び出し回数、sampled は計測した回数で、
+        時間の統計はサンプルから求める（total_ms は平均×呼び出し回数の推定値）
+        """
+        if self.sampler is None:
+            with self.lock:
+                durations_by_op = {op: list(d) for op, d in self.operation_stats.items() if d}
+            return {op: self._duration_stats(op, durations)
+                    for op, durations in durations_by_op.items()}
+        
+        result = {}
+        for op, samples in self.sampler.merged().items():
+            histogram = samples.histogram
+            if histogram.count == 0:
+                continue
+            avg_ms = histogram.total_ns / histogram.count / 1e6
+            target = self.TARGETS.get(op)
+            result[op] = {
+                'operation': op,
+                'count': samples.calls,
+                'sampled': histogram.count,
+                'min_ms': histogram.min_ns / 1e6,
+                'max_ms': histogram.max_ns / 1e6,
+                'avg_ms': avg_ms,
+                'total_ms': avg_ms * samples.calls,
+                'p50_ms': histogram.percentile(50) / 1e6,
+                'p95_ms': histogram.percentile(95) / 1e6,
+                'p99_ms': histogram.percentile(99) / 1e6,
+                'target_ms': target,
+                'target_met': target is None or histogram.max_ns / 1e6 <= target,
+            }
+        return result
+    
+    def _duration_stats(self, operation: str, durations: List[float]) -> Dict[str, Any]:
+        """全記録からの統計"""
+        ordered = sorted(durations)
+        
+        def percentile(percent: float) -> float:
+            return ordered[max(1, math.ceil(percent / 100 * len(ordered))) - 1]
+        
+        return {
+            'operation': operation,
+            'count': len(durations),
+            'sampled': len(durations),
+            'min_ms': ordered[0],
+            'max_ms': ordered[-1],
+            'avg_ms': sum(durations) / len(durations),
+            'total_ms': sum(durations),
+            'p50_ms': percentile(50),
+            'p95_ms': percentile(95),
+            'p99_ms': percentile(99),
+            'target_ms': self.TARGETS.get(operation),
+            'target_met': ordered[-1] <= self.TARGETS.get(operation, float('inf'))
+        }
+    
+    def export(self, path: Optional[str] = None) -> Dict[str, Any]:
+        """統計をエクスポート（path を指定するとJSONで保存）"""
+        document = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'mode': self.mode,
+            'sample_rate': self.sampler.sample_rate if self.sampler else 1.0,
+            'operations': self.snapshot(),
+        }
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(document, f, ensure_ascii=False, indent=2)
+        return document
+    
     def get_statistics(self, operation: Optional[str] = None) -> Dict[str, Any]:
         """
         統計情報取得
@@ -152,44 +430,20 @@ class PerformanceProfiler:
         Args:
             operation: 特定操作の統計のみ取得（Noneで全体）
         """
+        stats = self.snapshot()
         if operation:
-            if operation not in self.operation_stats:
-                return {}
-            
-            durations = self.operation_stats[operation]
-            if not durations:
-                return {}
-            
-            return {
-                'operation': operation,
-                'count': len(durations),
-                'min_ms': min(durations),
-                'max_ms': max(durations),
-                'avg_ms': sum(durations) / len(durations),
-                'total_ms': sum(durations),
-                'target_ms': self.TARGETS.get(operation),
-                'target_met': all(d <= self.TARGETS.get(operation, float('inf')) 
-                                for d in durations)
+            return stats.get(operation, {})
+        
+        # サマリー追加
+        if stats:
+            stats['_summary'] = {
+                'total_operations': sum(s['count'] for s in stats.values()),
+                'total_time_ms': sum(s['total_ms'] for s in stats.values()),
+                'operations_types': len(stats),
+                'targets_met': sum(1 for s in stats.values() if s.get('target_met', False))
             }
-        else:
-            # 全体統計
-            stats = {}
-            for op in self.operation_stats:
-                stats[op] = self.get_statistics(op)
-            
-            # サマリー追加
-            all_durations = [d for durations in self.operation_stats.values() 
-                           for d in durations]
-            if all_durations:
-                stats['_summary'] = {
-                    'total_operations': len(all_durations),
-                    'total_time_ms': sum(all_durations),
-                    'operations_types': len(self.operation_stats),
-                    'targets_met': sum(1 for s in stats.values() 
-                                     if s.get('target_met', False))
-                }
-            
-            return stats
+        
+        return stats
     
     def get_bottlenecks(self, top_n: int = 5) -> List[Dict[str, Any]]:
         """
@@ -203,11 +457,8 @@ class PerformanceProfiler:
         """
         bottlenecks = []
         
-        for operation, durations in self.operation_stats.items():
-            if not durations:
-                continue
-            
-            avg_ms = sum(durations) / len(durations)
+        for operation, stat in self.snapshot().items():
+            avg_ms = stat['avg_ms']
             target = self.TARGETS.get(operation, float('inf'))
             
             if avg_ms > target:
@@ -217,7 +468,7 @@ class PerformanceProfiler:
                     'target_ms': target,
                     'excess_ms': avg_ms - target,
                     'excess_percent': ((avg_ms - target) / target) * 100,
-                    'count': len(durations)
+                    'count': stat['count']
                 })
         
         # 超過時間でソート
@@ -257,6 +508,8 @@ class PerformanceProfiler:
                 print(f"   目標: {target}ms")
             print(f"   回数: {stat.get('count', 0)}")
             print(f"   範囲: {stat.get('min_ms', 0):.2f}ms - {stat.get('max_ms', 0):.2f}ms")
+            print(f"   p50/p95/p99: {stat.get('p50_ms', 0):.2f} / {stat.get('p95_ms', 0):.2f} / "
+                  f"{stat.get('p99_ms', 0):.2f}ms")
             print()
         
         # ボトルネック表示
@@ -283,6 +536,8 @@ class PerformanceProfiler:
             self.timings.clear()
             self.operation_stats.clear()
             self.active_timings.clear()
+        if self.sampler is not None:
+            self.sampler.clear()
 
 
 def benchmark_function(func: Callable, *args, iterations: int = 100, **kwargs) -> Dict[str, float]:
@@ -120,6 +120,7 @@ def test_database_operations():
     print(f"✅ データベース統計: {stats}")
     
     # テストファイル削除
+    db.close()
     os.remove("./data/test_integration.db")
     print("✅ データベース操作テスト完了\n")
     return True
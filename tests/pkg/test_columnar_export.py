@@ -0,0 +1,117 @@
+"""
+列形式エクスポートのテスト
+
+スキーマはバージョンごとに1回だけコンパイルされ、float32 ベクトルと品質ベクトルが
+特徴量オブジェクト版のエクスポートと同じ内容になることを確認
+"""
+
+import logging
+import sys
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.pkg.feature_dag.export_contract import StandardFeatureExporter
+from src.pkg.feature_dag.feature_extraction import FeatureExtractionLayer, MarketData
+
+
+def extract_features(count: int = 5):
+    """特徴量抽出層の出力（最後のティック）"""
+    extractor = FeatureExtractionLayer("USDJPY")
+    raw_features = None
+    for i in range(count):
+        offset = 0.01 * (i % 4)
+        raw_features = extractor.process_market_data(MarketData(
+            datetime(2024, 1, 1), "USDJPY", 110.0 + offset, 110.003 + offset, 1000.0, 0.003))
+    return raw_features
+
+
+class TestColumnarExport(unittest.TestCase):
+    """列形式エクスポートのテスト"""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.WARNING)
+        cls.raw_features = extract_features()
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def setUp(self):
+        self.exporter = StandardFeatureExporter("USDJPY", "M1")
+
+    def test_matches_object_export(self):
+        """値・品質・品質サマリーが export_features と一致する"""
+        bundle = self.exporter.export_features(self.raw_features)
+        columnar = self.exporter.export_columnar(self.raw_features)
+        schema = columnar.schema
+
+        self.assertEqual(columnar.values.dtype, np.float32)
+        self.assertEqual(columnar.quality.dtype, np.float32)
+        self.assertEqual(columnar.feature_count, len(bundle.features))
+        for feature_id, feature in bundle.features.items():
+            position = schema.feature_ids.index(feature_id)
+            self.assertTrue(columnar.present[position])
+            self.assertAlmostEqual(float(columnar.values[position]), feature.value, places=5)
+            self.assertAlmostEqual(float(columnar.quality[position]),
+                                   feature.metadata.quality_score, places=6)
+
+        summary = columnar.quality_summary()
+        for key, value in bundle.quality_summary.items():
+            if isinstance(value, float):
+                self.assertAlmostEqual(summary[key], value, places=6, msg=key)
+            else:
+                self.assertEqual(summary[key], value, key)
+        self.assertEqual(self.exporter.validate_columnar(columnar),
+                         self.exporter.validate_export(bundle))
+
+    def test_schema_compiled_once_per_version(self):
+        """スキーマは使い回され、バージョン変更時だけ作り直す"""
+        schema = self.exporter.export_columnar(self.raw_features).schema
+        self.assertIs(self.exporter.export_columnar(self.raw_features).schema, schema)
+        self.exporter.version = "1.1"
+        bundle = self.exporter.export_columnar(self.raw_features)
+        self.assertIsNot(bundle.schema, schema)
+        self.assertEqual(bundle.version, "1.1")
+        self.assertEqual(schema.feature_ids[0], "USDJPY_M1_price_change")
+
+    def test_missing_features(self):
+        """ティックにない特徴量は0で present が False、検証で欠落を報告する"""
+        bundle = self.exporter.export_columnar({"391^1-002": {"price_change_pct": 0.0}})
+        position = bundle.schema.index["price_change_pct"]
+        self.assertEqual(bundle.feature_count, 1)
+        self.assertAlmostEqual(float(bundle.values[position]), 0.5)
+        self.assertEqual(np.count_nonzero(bundle.values), 1)
+        self.assertEqual(bundle.get_feature_vector(["price_change_pct", "unknown"]).tolist(),
+                         [0.5, 0.0])
+        is_valid, errors = self.exporter.validate_columnar(bundle)
+        self.assertFalse(is_valid)
+        self.assertIn("Missing required feature: unified_signal", errors)
+
+    def test_normalize_matrix(self):
+        """正規化と品質はバンドルを並べた行列にもそのまま適用でき、スカラー版と一致する"""
+        schema = self.exporter.schema
+        rng = np.random.default_rng(0)
+        matrix = rng.normal(0, 0.05, size=(50, len(schema)))
+        matrix[0, 0] = np.nan
+        normalized = schema.normalize(matrix)
+        quality = schema.quality(normalized)
+        for row in (0, 1, 49):
+            for i, name in enumerate(schema.names):
+                expected = self.exporter._normalize_feature(name, matrix[row, i])
+                if np.isnan(expected):
+                    self.assertEqual(quality[row, i], 0.0)
+                    continue
+                self.assertAlmostEqual(normalized[row, i], expected, places=9)
+                self.assertAlmostEqual(quality[row, i],
+                                       self.exporter._calculate_quality_score(name, expected),
+                                       places=9)
+
+
+if __name__ == '__main__':
+    unittest.main()
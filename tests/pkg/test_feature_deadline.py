@@ -0,0 +1,183 @@
+"""
+特徴量抽出層の締切付き実行のテスト
+
+予算を超えたノードは前回の正常値で代用され、ティックが待たされないことを確認
+"""
+
+import asyncio
+import logging
+import sys
+import time
+import unittest
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.pkg.feature_dag.feature_extraction import (
+    FeatureExtractionLayer, MarketData, STALE_NODES_KEY
+)
+
+HEIKIN_ASHI_NODE = "391^1-001"
+PRICE_CHANGE_NODE = "391^1-002"
+RANGE_NODE = "391^1-003"
+
+
+def sleep_then(function, seconds, input_data, parameters):
+    """遅いノード（seconds 待ってから元の関数を実行）"""
+    time.sleep(seconds)
+    return function(input_data, parameters)
+
+
+def make_tick(i: int) -> MarketData:
+    """テスト用ティック"""
+    offset = 0.01 * (i % 7)
+    return MarketData(datetime.now(), "USDJPY", 110.0 + offset, 110.003 + offset,
+                      1000.0 + i, 0.003)
+
+
+class TestFeatureDeadline(unittest.TestCase):
+    """締切付き実行のテスト"""
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.extractor = FeatureExtractionLayer("USDJPY")
+        # スレッド受け渡しの揺らぎで偶然締切を過ぎないよう予算を広げる
+        for binding in self.extractor._bindings:
+            binding.budget_ms = 20.0
+        self.extractor.tick_budget_ms = 200.0
+
+    def tearDown(self):
+        self.extractor.close()
+        logging.disable(logging.NOTSET)
+
+    def test_async_matches_sync(self):
+        """締切内なら同期版と同じ特徴量（エクスポートのタイムスタンプを除く）"""
+        reference = FeatureExtractionLayer("USDJPY")
+
+        async def run():
+            for i in range(30):
+                expected = reference.process_market_data(make_tick(i))
+                actual = await self.extractor.process_market_data_async(make_tick(i))
+                self.assertEqual(actual.pop(STALE_NODES_KEY), [])
+                for node_id, value in expected.items():
+                    if node_id != "391^5-001":
+                        self.assertEqual(actual[node_id], value, node_id)
+
+        asyncio.run(run())
+
+    def test_slow_node_uses_last_good_value(self):
+        """予算超過ノードは前回値で代用し、完了後はその値が次の正常値になる"""
+        binding = self.extractor._binding_map[RANGE_NODE]
+        binding.budget_ms = 5.0
+
+        def slow_range(input_data, parameters):
+            time.sleep(0.05)
+            return {"range_width": 9.0, "range_position": 0.5, "volatility_index": 0.0}
+
+        async def run():
+            first = await self.extractor.process_market_data_async(make_tick(0))
+            good = first[RANGE_NODE]
+
+            binding.function = slow_range
+            start = time.perf_counter()
+            second = await self.extractor.process_market_data_async(make_tick(1))
+            self.assertLess(time.perf_counter() - start, 0.04)
+            self.assertEqual(second[STALE_NODES_KEY], [RANGE_NODE])
+            self.assertEqual(second[RANGE_NODE], good)
+
+            # 実行中は再投入しない
+            third = await self.extractor.process_market_data_async(make_tick(2))
+            self.assertEqual(third[RANGE_NODE], good)
+
+            await asyncio.sleep(0.1)
+            fourth = await self.extractor.process_market_data_async(make_tick(3))
+            self.assertEqual(fourth[RANGE_NODE]["range_width"], 9.0)
+            await asyncio.sleep(0.1)
+
+        asyncio.run(run())
+        stats = self.extractor.get_node_latency_metrics()[RANGE_NODE]
+        self.assertGreaterEqual(stats["deadline_misses"], 1)
+        self.assertEqual(stats["stale_count"], 3)
+
+    def test_independent_nodes_run_concurrently(self):
+        """同じ依存段のノードは同時に投入され、待ち時間が重なる"""
+        for node_id in (HEIKIN_ASHI_NODE, PRICE_CHANGE_NODE, RANGE_NODE):
+            binding = self.extractor._binding_map[node_id]
+            binding.budget_ms = 150.0
+            binding.function = partial(sleep_then, binding.function, 0.05)
+
+        async def run():
+            start = time.perf_counter()
+            results = await self.extractor.process_market_data_async(make_tick(0))
+            self.assertEqual(results[STALE_NODES_KEY], [])
+            self.assertLess(time.perf_counter() - start, 0.12)
+
+        asyncio.run(run())
+
+    def test_skipped_heikin_ashi_keeps_history(self):
+        """平均足ノードが締切を過ぎても、平均足の履歴は1ティック1本で順序どおり"""
+        reference = FeatureExtractionLayer("USDJPY")
+        binding = self.extractor._binding_map[HEIKIN_ASHI_NODE]
+        fast = binding.function
+
+        async def run():
+            for i in range(6):
+                binding.function = partial(sleep_then, fast, 0.05) if i == 2 else fast
+                reference.process_market_data(make_tick(i))
+                await self.extractor.process_market_data_async(make_tick(i))
+            await asyncio.sleep(0.1)
+
+        asyncio.run(run())
+        for name in reference.heikin_ashi.fields:
+            self.assertEqual(self.extractor.heikin_ashi.window(name).tolist(),
+                             reference.heikin_ashi.window(name).tolist(), name)
+
+    def test_late_node_reads_its_own_tick(self):
+        """次のティックにまたがった遅いノードは、投入したティック時点の履歴で計算する"""
+        reference = FeatureExtractionLayer("USDJPY")
+        binding = self.extractor._binding_map[RANGE_NODE]
+        fast = binding.function
+
+        async def run():
+            for i in range(25):
+                reference.process_market_data(make_tick(i))
+                await self.extractor.process_market_data_async(make_tick(i))
+            expected = reference.process_market_data(make_tick(25))[RANGE_NODE]
+
+            binding.function = partial(sleep_then, fast, 0.05)
+            await self.extractor.process_market_data_async(make_tick(25))
+            binding.function = fast
+            for i in range(26, 29):
+                spike = MarketData(datetime.now(), "USDJPY", 120.0 + i, 120.003 + i, 1000.0, 0.003)
+                await self.extractor.process_market_data_async(spike)
+            await asyncio.sleep(0.1)
+            return expected
+
+        expected = asyncio.run(run())
+        self.assertEqual(self.extractor.last_good[RANGE_NODE], expected)
+
+    def test_latency_metrics(self):
+        """ノードごとに p50/p99 と構成の予算を公開する"""
+        extractor = FeatureExtractionLayer("USDJPY")
+        for i in range(20):
+            extractor.process_market_data(make_tick(i))
+        metrics = extractor.get_node_latency_metrics()
+        self.assertEqual(set(metrics), set(extractor.config_manager.get_execution_order()))
+        for node_id, stats in metrics.items():
+            self.assertEqual(stats["call_count"], 20)
+            extractor.node_stats[node_id].window = 5
+            extractor.node_stats[node_id].record(0.1)
+            self.assertEqual(extractor.get_node_latency_metrics()[node_id]["call_count"], 21)
+            self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+            self.assertEqual(stats["budget_ms"],
+                             extractor.config_manager.get_latency_budget(node_id))
+
+        extractor.config_manager.update_node_parameters(RANGE_NODE, {"latency_budget_ms": 7.5})
+        extractor.rebind()
+        self.assertEqual(extractor.get_node_latency_metrics()[RANGE_NODE]["budget_ms"], 7.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+フィールド別リングバッファのテスト
+
+容量を超えて書き込んでも直近の窓が正しい順で、コピーなしのビューであることを確認
+"""
+
+import sys
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.pkg.feature_dag.ring_buffer import FieldRingBuffer
+from src.pkg.feature_dag.feature_extraction import (
+    FeatureExtractionLayer, MarketData, HISTORY_CAPACITY
+)
+
+
+class TestFieldRingBuffer(unittest.TestCase):
+    """リングバッファのテスト"""
+
+    def setUp(self):
+        self.buffer = FieldRingBuffer(("close", "volume"), capacity=5)
+
+    def test_window_after_wraparound(self):
+        """容量を超えても直近 n 件が古い順に並ぶ"""
+        for i in range(13):
+            self.buffer.append((float(i), float(i * 10)))
+        self.assertEqual(len(self.buffer), 5)
+        np.testing.assert_array_equal(self.buffer.window("close"), [8, 9, 10, 11, 12])
+        np.testing.assert_array_equal(self.buffer.window("volume", 3), [100, 110, 120])
+        self.assertEqual(self.buffer.last("close"), 12.0)
+        self.assertEqual(self.buffer.last("close", 5), 8.0)
+        with self.assertRaises(IndexError):
+            self.buffer.last("close", 6)
+
+    def test_window_is_view(self):
+        """窓はコピーではなく内部配列のビュー"""
+        for i in range(7):
+            self.buffer.append((float(i), 0.0))
+        window = self.buffer.window("close", 4)
+        self.assertTrue(np.shares_memory(window, self.buffer._data))
+        self.assertTrue(window.flags['C_CONTIGUOUS'])
+
+    def test_copy_is_independent(self):
+        """複製は元のバッファへの以後の追加の影響を受けない"""
+        for i in range(7):
+            self.buffer.append((float(i), 0.0))
+        snapshot = self.buffer.copy()
+        for i in range(7, 10):
+            self.buffer.append((float(i), 0.0))
+        np.testing.assert_array_equal(snapshot.window("close"), [2, 3, 4, 5, 6])
+        self.assertEqual(snapshot.last("close"), 6.0)
+        self.assertFalse(np.shares_memory(snapshot._data, self.buffer._data))
+
+    def test_partial_fill(self):
+        """満杯になる前は保持件数までの窓"""
+        self.buffer.append((1.0, 2.0))
+        self.buffer.append((3.0, 4.0))
+        np.testing.assert_array_equal(self.buffer.window("close", 10), [1.0, 3.0])
+        self.buffer.clear()
+        self.assertEqual(len(self.buffer), 0)
+        self.assertEqual(len(self.buffer.window("close")), 0)
+
+
+class TestFeatureHistory(unittest.TestCase):
+    """特徴量抽出層の履歴のテスト"""
+
+    def test_history_is_bounded(self):
+        """履歴は固定容量で、平均足も同じ件数だけ保持する"""
+        extractor = FeatureExtractionLayer("USDJPY")
+        for i in range(HISTORY_CAPACITY + 20):
+            extractor.process_market_data(MarketData(
+                datetime(2024, 1, 1), "USDJPY", 110.0 + i * 0.001, 110.003 + i * 0.001,
+                1000.0, 0.003))
+        self.assertEqual(len(extractor.prices), HISTORY_CAPACITY)
+        self.assertEqual(len(extractor.heikin_ashi), HISTORY_CAPACITY)
+        self.assertAlmostEqual(extractor.prices.last("mid"),
+                               110.0015 + (HISTORY_CAPACITY + 19) * 0.001)
+
+
+if __name__ == '__main__':
+    unittest.main()
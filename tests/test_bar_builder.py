@@ -0,0 +1,88 @@
+"""
+StreamingBarBuilder のテスト
+
+ティック全走査によるOHLC生成と同じ結果になることを確認
+"""
+
+import unittest
+import random
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from src.trading.bar_builder import StreamingBarBuilder, TIMEFRAME_SECONDS
+
+
+def make_ticks(count: int, seed: int = 0):
+    """テスト用ティック（不規則間隔、週末の空白を含む）"""
+    rng = random.Random(seed)
+    t = datetime(2024, 1, 5, 20, 0)
+    price = 150.0
+    ticks = []
+    for i in range(count):
+        t += timedelta(seconds=rng.randint(1, 120))
+        if i == count // 2:
+            t += timedelta(hours=49)  # 週末ギャップ
+        price += rng.gauss(0, 0.01)
+        ticks.append((t, price))
+    return ticks
+
+
+def reference_bars(ticks, seconds: int):
+    """ティックを全走査してOHLCを生成（参照実装）"""
+    buckets = {}
+    for t, price in ticks:
+        epoch = t.timestamp()
+        buckets.setdefault(epoch - epoch % seconds, []).append(price)
+    return [(start, p[0], max(p), min(p), p[-1], len(p))
+            for start, p in sorted(buckets.items())]
+
+
+class TestStreamingBarBuilder(unittest.TestCase):
+    """インクリメンタル足生成のテスト"""
+
+    def test_matches_full_rescan(self):
+        """全時間足で全走査と同じOHLCVを生成"""
+        ticks = make_ticks(3000)
+        builder = StreamingBarBuilder(timeframes=list(TIMEFRAME_SECONDS))
+        emitted = []
+        builder.subscribe(emitted.append)
+        for t, price in ticks:
+            builder.update('USDJPY', price, t.isoformat())
+
+        for timeframe, seconds in TIMEFRAME_SECONDS.items():
+            bars = [b for b in emitted if b.timeframe == timeframe]
+            bars.append(builder.current_bar('USDJPY', timeframe))
+            actual = [(b.start, b.open, b.high, b.low, b.close, b.volume) for b in bars]
+            self.assertEqual(actual, reference_bars(ticks, seconds), timeframe)
+
+    def test_closed_bars_returned_on_boundary(self):
+        """境界を越えたティックで確定足が返る"""
+        builder = StreamingBarBuilder(timeframes=('M15',))
+        start = datetime(2024, 1, 8, 9, 0)
+        self.assertEqual(builder.update('EURJPY', 162.0, start), [])
+        self.assertEqual(builder.update('EURJPY', 162.5, start + timedelta(minutes=14)), [])
+        closed = builder.update('EURJPY', 161.9, start + timedelta(minutes=15))
+        self.assertEqual(len(closed), 1)
+        self.assertEqual(closed[0].to_dict()['timestamp'], start.isoformat())
+        self.assertEqual((closed[0].high, closed[0].close), (162.5, 162.5))
+        self.assertEqual(len(builder.completed_bars('EURJPY', 'M15')), 1)
+
+    def test_late_tick_is_ignored(self):
+        """確定済みの足に属する遅延ティックは無視"""
+        builder = StreamingBarBuilder(timeframes=('M1',))
+        t = datetime(2024, 1, 8, 9, 0)
+        builder.update('USDJPY', 150.0, t + timedelta(minutes=1))
+        builder.update('USDJPY', 140.0, t)
+        self.assertEqual(builder.late_ticks, 1)
+        self.assertEqual(builder.current_bar('USDJPY', 'M1').low, 150.0)
+
+    def test_unknown_timeframe(self):
+        with self.assertRaises(ValueError):
+            StreamingBarBuilder(timeframes=('M2',))
+
+
+if __name__ == '__main__':
+    unittest.main()
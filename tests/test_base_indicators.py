@@ -0,0 +1,78 @@
+"""
+BaseIndicators 平均足計算のテスト
+
+配列漸化式版・逐次更新版が従来の行ごとの定義と一致することを確認
+"""
+
+import unittest
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.indicators.base_indicators import (
+    BaseIndicators, _ha_open_recurrence_kernel, _ha_open_recurrence_python
+)
+
+
+def make_ohlc(count: int, seed: int = 0) -> pd.DataFrame:
+    """テスト用OHLCデータ（タイムスタンプインデックス）"""
+    rng = np.random.default_rng(seed)
+    close = rng.standard_normal(count).cumsum() * 0.1 + 150
+    open_ = close + rng.standard_normal(count) * 0.05
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + 0.02,
+        'low': np.minimum(open_, close) - 0.02,
+        'close': close,
+    }, index=pd.date_range('2024-01-01', periods=count, freq='1min'))
+
+
+class TestHeikinAshi(unittest.TestCase):
+    """平均足計算のテスト"""
+
+    def setUp(self):
+        self.indicators = BaseIndicators()
+        self.df = make_ohlc(500)
+
+    def test_matches_row_definition(self):
+        """行ごとの定義式と完全一致"""
+        result = self.indicators.calculate_heikin_ashi(self.df)
+        ha_open = (self.df['open'].iloc[0] + self.df['close'].iloc[0]) / 2
+        for i in range(len(self.df)):
+            row = self.df.iloc[i]
+            ha_close = (row['open'] + row['high'] + row['low'] + row['close']) / 4
+            if i > 0:
+                ha_open = (result['ha_open'].iloc[i - 1] + result['ha_close'].iloc[i - 1]) / 2
+            self.assertEqual(result['ha_open'].iloc[i], ha_open)
+            self.assertEqual(result['ha_close'].iloc[i], ha_close)
+            self.assertEqual(result['ha_high'].iloc[i], max(row['high'], ha_open, ha_close))
+            self.assertEqual(result['ha_low'].iloc[i], min(row['low'], ha_open, ha_close))
+        self.assertEqual(result['ha_reversal'].iloc[0], 1)
+
+    def test_recurrence_backends_agree(self):
+        """JIT版カーネルとPython版の漸化式が一致"""
+        ha_close = np.random.default_rng(1).standard_normal(1000)
+        np.testing.assert_array_equal(
+            _ha_open_recurrence_kernel(ha_close, 0.5),
+            _ha_open_recurrence_python(ha_close, 0.5)
+        )
+        self.assertEqual(len(_ha_open_recurrence_python(np.empty(0), 0.0)), 0)
+
+    def test_incremental_update_matches_batch(self):
+        """逐次更新がバッチ計算と一致"""
+        result = self.indicators.calculate_heikin_ashi(self.df)
+        state = None
+        for i, bar in enumerate(self.df.to_dict('records')):
+            state = BaseIndicators.update_heikin_ashi(state, bar)
+            self.assertEqual(state.ha_open, result['ha_open'].iloc[i])
+            self.assertEqual(state.ha_high, result['ha_high'].iloc[i])
+            self.assertEqual(state.ha_low, result['ha_low'].iloc[i])
+            self.assertEqual(state.ha_close, result['ha_close'].iloc[i])
+            self.assertEqual(state.direction, result['ha_direction'].iloc[i])
+            self.assertEqual(state.reversal, result['ha_reversal'].iloc[i])
+
+
+if __name__ == '__main__':
+    unittest.main()
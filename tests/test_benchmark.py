@@ -0,0 +1,122 @@
+"""
+ベンチマーク計測・リグレッション判定のテスト
+
+計測値の集計、ベースラインJSONの保存・読込、閾値による劣化検出と、
+全ケースが小さなデータで実行できることを確認
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from dataclasses import replace
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.benchmark import (
+    BenchmarkCase, compare, load_results, run_benchmarks, run_case, save_results
+)
+
+
+class TestRunCase(unittest.TestCase):
+    """計測のテスト"""
+
+    def test_stream_case_times_each_bar(self):
+        """逐次ケースは1本ごとにサンプルを取り、反復ごとに setup し直す"""
+        setups = []
+
+        def setup():
+            setups.append(1)
+            return []
+
+        case = BenchmarkCase('stream', 50, setup=setup, step=lambda state, i: state.append(i))
+        result = run_case(case, repeat=3, warmup=1, measure_memory=False)
+        self.assertEqual(result.mode, 'stream')
+        self.assertEqual(result.samples, 150)
+        self.assertEqual(len(setups), 4)
+        self.assertLessEqual(result.p50_ms, result.p99_ms)
+        self.assertGreater(result.bars_per_sec, 0)
+
+    def test_batch_case_and_memory(self):
+        """一括ケースは呼び出しごとにサンプルを取り、ピークメモリを計測する"""
+        case = BenchmarkCase('batch', 1000, run=lambda _: [0.0] * 100000)
+        result = run_case(case, repeat=2)
+        self.assertEqual((result.mode, result.samples), ('batch', 2))
+        self.assertGreater(result.peak_memory_kb, 700)
+
+    def test_throughput_from_fastest_repeat(self):
+        """遅れた反復はスループットに影響せず、ばらつきとして記録される"""
+        delays = iter([0.0, 0.05, 0.005, 0.005, 0.005, 0.005])
+        case = BenchmarkCase('spiky', 10, setup=lambda: next(delays),
+                             run=lambda delay: time.sleep(delay))
+        result = run_case(case, repeat=5, warmup=1, measure_memory=False)
+        self.assertGreater(result.bars_per_sec, 10 / 0.02)
+        self.assertGreater(result.noise, 0.0)
+
+    def test_case_requires_one_body(self):
+        with self.assertRaises(ValueError):
+            BenchmarkCase('none', 1)
+
+
+class TestBaseline(unittest.TestCase):
+    """ベースライン比較のテスト"""
+
+    def setUp(self):
+        case = BenchmarkCase('sleep', 10, step=lambda state, i: time.sleep(0.001))
+        self.results = run_benchmarks([case], repeat=1, warmup=0, measure_memory=False)
+        self.path = os.path.join(tempfile.mkdtemp(), 'baseline.json')
+        save_results(self.path, self.results, {'pair': 'USDJPY'})
+
+    def test_roundtrip_has_no_regression(self):
+        baseline = load_results(self.path)
+        self.assertEqual(baseline['sleep']['bars'], 10)
+        self.assertEqual(compare(self.results, baseline), [])
+
+    def test_detects_regression_beyond_threshold(self):
+        """閾値を超えるスループット低下・レイテンシ増加を検出する"""
+        baseline = load_results(self.path)
+        result = self.results['sleep']
+        slower = replace(result, bars_per_sec=result.bars_per_sec * 0.5, p50_ms=result.p50_ms * 1.1)
+        metrics = {r.metric for r in compare({'sleep': slower}, baseline)}
+        self.assertEqual(metrics, {'bars_per_sec'})
+        self.assertEqual(compare({'sleep': slower}, baseline, {'bars_per_sec': 0.6}), [])
+
+    def test_noise_widens_threshold(self):
+        """反復間のばらつきが大きい計測どうしは、その分だけ大きな変化まで許容する"""
+        baseline = load_results(self.path)
+        result = self.results['sleep']
+        slower = replace(result, bars_per_sec=result.bars_per_sec * 0.6)
+        self.assertEqual([r.metric for r in compare({'sleep': slower}, baseline)], ['bars_per_sec'])
+        self.assertEqual(compare({'sleep': replace(slower, noise=0.1)}, baseline), [])
+
+    def test_p99_needs_enough_samples(self):
+        """サンプル数が少ない p99 は判定しない"""
+        baseline = load_results(self.path)
+        result = replace(self.results['sleep'], p99_ms=self.results['sleep'].p99_ms * 3)
+        self.assertEqual(compare({'sleep': result}, baseline), [])
+        baseline['sleep']['samples'] = result.samples = 200
+        self.assertEqual([r.metric for r in compare({'sleep': result}, baseline)], ['p99_ms'])
+
+    def test_skips_incomparable_cases(self):
+        """本数の違うケースやベースラインにないケースは比較しない"""
+        baseline = load_results(self.path)
+        result = replace(self.results['sleep'], bars=20, bars_per_sec=1.0)
+        self.assertEqual(compare({'sleep': result, 'new': result}, baseline), [])
+
+
+class TestBenchmarkCases(unittest.TestCase):
+    """ベンチマークケース一式のスモークテスト"""
+
+    def test_all_cases_run_on_small_data(self):
+        from scripts.run_benchmarks import build_cases, synthetic_m1
+        cases = build_cases('USDJPY', synthetic_m1('USDJPY', 3600))
+        groups = {case.group for case in cases}
+        self.assertEqual(groups, {'candles', 'indicators', 'pkg', 'dag', 'backtest'})
+        for case in cases:
+            if case.step is not None:
+                case = replace(case, bars=min(case.bars, 5))
+            run_case(case, repeat=1, warmup=0, measure_memory=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
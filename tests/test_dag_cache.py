@@ -0,0 +1,94 @@
+"""
+DAGキャッシュの変更駆動評価のテスト
+
+変化した入力の推移的な依存先だけが再計算されることを確認
+"""
+
+import unittest
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.dag_cache import DAGCache, OptimizedDAGEvaluator
+
+
+def build_cache() -> DAGCache:
+    """1分足系統と4時間足系統が最終判断で合流するDAG"""
+    cache = DAGCache()
+    cache.add_node("191^1-1", level=1, dependencies={"AA001"})            # 1分足終値
+    cache.add_node("191^1-2", level=1, dependencies={"AA240"})            # 4時間足終値
+    cache.add_node("191^2-1", level=2, dependencies={"191^1-1"})
+    cache.add_node("191^2-2", level=2, dependencies={"191^1-2"})
+    cache.add_node("191^2-3", level=2, dependencies={"191^2-2"})
+    cache.add_node("191^3-1", level=3, dependencies={"191^2-1", "191^2-3"})
+    return cache
+
+
+def sum_func(node_id, dependencies):
+    """依存値の合計（入力は単一値）"""
+    return sum(dependencies.values())
+
+
+class TestIncrementalEvaluation(unittest.TestCase):
+    """変更駆動評価のテスト"""
+
+    def setUp(self):
+        self.cache = build_cache()
+        self.evaluator = OptimizedDAGEvaluator(self.cache)
+
+    def test_first_evaluation_computes_all(self):
+        """初回は全ノードを計算し、全再計算と同じ結果"""
+        inputs = {"AA001": 1.0, "AA240": 10.0}
+        results = self.evaluator.evaluate(inputs, sum_func)
+        self.assertEqual(len(self.evaluator.last_evaluated), 6)
+        self.assertEqual(results, self.evaluator.evaluate(inputs, sum_func, use_cache=False))
+        self.assertEqual(results["191^3-1"], 11.0)
+
+    def test_only_dependents_of_changed_input(self):
+        """1分足だけ動いたら4時間足系統には触れない"""
+        self.evaluator.evaluate({"AA001": 1.0, "AA240": 10.0}, sum_func)
+        results = self.evaluator.evaluate({"AA001": 2.0, "AA240": 10.0}, sum_func)
+        self.assertEqual(self.evaluator.last_evaluated, ["191^1-1", "191^2-1", "191^3-1"])
+        self.assertEqual(results["191^3-1"], 12.0)
+        self.assertEqual(results["191^2-3"], 10.0)
+
+    def test_unchanged_inputs_evaluate_nothing(self):
+        """入力が変わらなければ何も再計算しない（経過時間に依存しない）"""
+        inputs = {"AA001": 1.0, "AA240": 10.0}
+        self.evaluator.evaluate(inputs, sum_func)
+        self.evaluator.evaluate(dict(inputs), sum_func)
+        self.assertEqual(self.evaluator.last_evaluated, [])
+
+    def test_early_cutoff(self):
+        """再計算しても値が変わらなければその先は再計算しない"""
+        sign = lambda node_id, deps: 1 if sum(deps.values()) > 0 else -1
+        self.evaluator.evaluate({"AA001": 1.0, "AA240": 10.0}, sign)
+        self.evaluator.evaluate({"AA001": 5.0, "AA240": 10.0}, sign)
+        self.assertEqual(self.evaluator.last_evaluated, ["191^1-1"])
+
+    def test_structure_change(self):
+        """ノード追加で順序を作り直し、新ノードだけ計算"""
+        inputs = {"AA001": 1.0, "AA240": 10.0}
+        self.evaluator.evaluate(inputs, sum_func)
+        self.cache.add_node("191^4-1", level=4, dependencies={"191^3-1"})
+        results = self.evaluator.evaluate(inputs, sum_func)
+        self.assertEqual(self.evaluator.last_evaluated, ["191^4-1"])
+        self.assertEqual(results["191^4-1"], 11.0)
+        self.assertIn("191^4-1", self.cache.get_evaluation_order())
+
+    def test_external_write_and_invalidate(self):
+        """外部書き込み・無効化は依存先の再計算を引き起こす"""
+        inputs = {"AA001": 1.0, "AA240": 10.0}
+        self.evaluator.evaluate(inputs, sum_func)
+        self.cache.cache_node_value("191^2-2", 100.0)
+        results = self.evaluator.evaluate(inputs, sum_func)
+        self.assertEqual(self.evaluator.last_evaluated, ["191^2-3", "191^3-1"])
+        self.assertEqual(results["191^3-1"], 101.0)
+
+        self.cache.invalidate_cache("191^2-2")
+        results = self.evaluator.evaluate(inputs, sum_func)
+        self.assertEqual(results["191^3-1"], 11.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
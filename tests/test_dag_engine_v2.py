@@ -0,0 +1,71 @@
+"""
+DAGエンジン（dag_engine_v2）の差分評価のテスト
+
+実行計画が構造変更時だけ作り直され、生データ更新の依存先だけが再計算されることを確認
+"""
+
+import unittest
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from src.pkg.memo_logic.dag_engine_v2 import DAGEngine
+
+
+def build_engine() -> DAGEngine:
+    """2系統（AA001/AA002 と BA001）が最終ノードで合流するDAG"""
+    engine = DAGEngine()
+    engine.register_raw_data("AA001", 3, 9, 1, 110.50)
+    engine.register_raw_data("AA002", 3, 9, 1, 110.45)
+    engine.register_raw_data("BA001", 3, 9, 1, 0.95)
+    engine.register_function("391^1-001", "Z", ["391^0-AA001", "391^0-AA002"], operation_type=2)
+    engine.register_function("391^1-002", "RO", ["391^0-BA001"])
+    engine.register_function("391^2-001", "SL", ["391^1-002", "391^0-AA001", "391^1-001"], default=0)
+    return engine
+
+
+class TestDAGEngineIncremental(unittest.TestCase):
+    """差分評価のテスト"""
+
+    def setUp(self):
+        self.engine = build_engine()
+        self.engine.evaluate()
+
+    def test_plan_reused_until_structure_changes(self):
+        """実行計画は構造が変わったときだけ作り直す"""
+        order = self.engine.execution_order
+        self.engine.set_inputs({"391^0-AA001": 111.0})
+        self.engine.evaluate()
+        self.assertIs(self.engine.execution_order, order)
+
+        self.engine.register_function("391^3-001", "RO", ["391^2-001"])
+        self.engine.evaluate()
+        self.assertIsNot(self.engine.execution_order, order)
+        self.assertEqual(self.engine.last_evaluated, ["391^3-001"])
+
+    def test_set_inputs_propagates(self):
+        """生データ更新は依存先だけを再計算し、全体再構築と同じ結果"""
+        self.assertEqual(self.engine.set_inputs({"391^0-AA002": 110.00}), 1)
+        results = self.engine.evaluate()
+        self.assertEqual(self.engine.last_evaluated, ["391^1-001", "391^2-001"])
+
+        fresh = build_engine()
+        fresh.set_inputs({"391^0-AA002": 110.00})
+        self.assertEqual(results, fresh.evaluate())
+        self.assertAlmostEqual(results["391^1-001"], 0.5)
+
+    def test_unchanged_inputs_evaluate_nothing(self):
+        """値が変わらなければ再計算しない"""
+        self.assertEqual(self.engine.set_inputs({"391^0-AA001": 110.50}), 0)
+        self.engine.evaluate()
+        self.assertEqual(self.engine.last_evaluated, [])
+
+    def test_set_inputs_rejects_function_nodes(self):
+        """生データ以外は set_inputs で更新できない"""
+        with self.assertRaises(KeyError):
+            self.engine.set_inputs({"391^1-001": 1.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,293 @@
+"""
+データベース管理クラスの一括取り込み・接続再利用のテスト
+"""
+
+import unittest
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.database import DatabaseManager, WriteBehindQueue, timestamp_strings
+
+
+def make_candles(rows: int, start: str = '2024-01-01') -> pd.DataFrame:
+    """テスト用M1足"""
+    price = 150.0 + np.arange(rows) * 0.01
+    return pd.DataFrame({
+        'open': price, 'high': price + 0.02, 'low': price - 0.02,
+        'close': price + 0.01, 'volume': np.arange(rows) + 100
+    }, index=pd.date_range(start, periods=rows, freq='1min'))
+
+
+class TestDatabaseManager(unittest.TestCase):
+    """一括取り込みと接続管理のテスト"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'fx.db')
+        self.db = DatabaseManager(self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def count(self, table: str) -> int:
+        """別接続から見えるコミット済みの行数"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_bulk_ingest_in_chunks(self):
+        """列から直接チャンク単位で取り込み、重複は無視する"""
+        df = make_candles(1000)
+        self.assertEqual(self.db.bulk_ingest_price_data('USD_JPY', 'M1', df, chunk_size=128), 1000)
+        self.db.save_price_data('USD_JPY', 'M1', make_candles(20, '2024-01-01 16:30'))
+        self.assertEqual(self.db.get_database_stats()['price_data'], 1010)
+
+        loaded = self.db.load_price_data('USD_JPY', 'M1', end_date='2024-01-01 00:09:00')
+        self.assertEqual(len(loaded), 10)
+        np.testing.assert_allclose(loaded['close'].to_numpy(), df['close'].to_numpy()[:10])
+        self.assertEqual(loaded.index[0], pd.Timestamp('2024-01-01'))
+
+    def test_columnar_input(self):
+        """エポック秒の列（CandleArrays と同じ形）も取り込める"""
+        df = make_candles(5)
+        columns = {name: df[name].to_numpy() for name in df.columns}
+        columns['timestamp'] = df.index.to_numpy().astype('datetime64[s]').astype(np.int64)
+        self.db.bulk_ingest_price_data('EUR_USD', 'M1', columns)
+        loaded = self.db.load_price_data('EUR_USD', 'M1')
+        self.assertEqual(list(loaded.index), list(df.index))
+        self.assertEqual(loaded['volume'].tolist(), df['volume'].tolist())
+
+    def test_monthly_partitions(self):
+        """月ごとに WITHOUT ROWID のテーブルを作り、範囲読み込みは重なる月だけを読む"""
+        df = make_candles(4, '2024-01-31 23:58')  # 1月2本・2月2本
+        df = pd.concat([df, make_candles(3, '2024-03-10')])
+        self.db.bulk_ingest_price_data('USD_JPY', 'M1', df.iloc[::-1])
+        partitions = self.db.list_price_partitions('USD_JPY', 'M1')
+        self.assertEqual([p['month'] for p in partitions], ['2024-01', '2024-02', '2024-03'])
+        self.assertEqual([p['row_count'] for p in partitions], [2, 2, 3])
+        conn = sqlite3.connect(self.db_path)
+        try:
+            ddl = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?",
+                               ('price_data/USD_JPY/M1/2024-02',)).fetchone()[0]
+        finally:
+            conn.close()
+        self.assertIn('WITHOUT ROWID', ddl)
+
+        statements = []
+        with self.db.get_connection() as conn:
+            conn.set_trace_callback(statements.append)
+            arrays = self.db.read_price_arrays('USD_JPY', 'M1', '2024-02-01', '2024-02-01 00:00:30')
+            conn.set_trace_callback(None)
+        self.assertEqual(arrays.timestamp.tolist(), [int(pd.Timestamp('2024-02-01').timestamp())])
+        self.assertEqual(arrays.timestamp.dtype, np.int64)
+        np.testing.assert_allclose(arrays.close, df['close'].to_numpy()[2:3])
+        self.assertFalse(any('2024-01' in s or '2024-03' in s for s in statements))
+
+    def test_drop_partitions_and_legacy_migration(self):
+        """旧形式の price_data は初期化時に移行し、保持期間外の月はテーブルごと削除する"""
+        self.db.close()
+        os.remove(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""CREATE TABLE price_data (id INTEGER PRIMARY KEY, instrument TEXT,
+                        timeframe TEXT, timestamp DATETIME, open REAL, high REAL, low REAL,
+                        close REAL, volume INTEGER, UNIQUE(instrument, timeframe, timestamp))""")
+        conn.executemany(
+            "INSERT INTO price_data VALUES (NULL, 'USD_JPY', 'H1', ?, 1, 2, 0.5, 1.5, 10)",
+            [('2023-11-30 23:00:00',), ('2023-12-01 00:00:00',), ('2024-01-01 00:00:00',)])
+        conn.commit()
+        conn.close()
+
+        self.db = DatabaseManager(self.db_path)
+        self.assertEqual(self.db.get_database_stats()['price_data'], 3)
+        self.assertEqual(len(self.db.load_price_data('USD_JPY', 'H1')), 3)
+        self.assertEqual(self.db.drop_price_partitions('2023-12-01'), 1)
+        self.assertEqual([p['month'] for p in self.db.list_price_partitions()],
+                         ['2023-12', '2024-01'])
+        loaded = self.db.load_price_data('USD_JPY', 'H1')
+        self.assertEqual(loaded.index[0], pd.Timestamp('2023-12-01'))
+        self.assertEqual(self.count(
+            "sqlite_master WHERE name LIKE 'price_data%'"), 2)
+
+    def test_timestamp_format_matches_sqlite_adapter(self):
+        """保存形式は sqlite3 の datetime 変換と同じ"""
+        self.assertEqual(timestamp_strings(pd.DatetimeIndex(['2024-01-02 03:04:05'])),
+                         [str(datetime(2024, 1, 2, 3, 4, 5))])
+        self.assertEqual(timestamp_strings(pd.DatetimeIndex(['2024-01-02 03:04:05.25'])),
+                         [str(datetime(2024, 1, 2, 3, 4, 5, 250000))])
+
+    def test_timestamp_format_is_per_element(self):
+        """同じ時刻はバッチ内の他の要素に関係なく同じ文字列になる"""
+        moments = [datetime(2024, 1, 2, 3, 4, 5), datetime(2024, 1, 2, 3, 4, 5, 250000)]
+        self.assertEqual(timestamp_strings(pd.DatetimeIndex(moments)), [str(m) for m in moments])
+        self.db.save_heikin_ashi_data('USD_JPY', 'M1', pd.DataFrame(
+            {'ha_close': [1.0]}, index=pd.DatetimeIndex(moments[:1])))
+        self.db.save_heikin_ashi_data('USD_JPY', 'M1', pd.DataFrame(
+            {'ha_close': [2.0, 3.0]}, index=pd.DatetimeIndex(moments)))
+        self.assertEqual(self.count('heikin_ashi_data'), 2)
+
+    def test_persistent_wal_connection(self):
+        """接続はスレッドごとに再利用され、WALモードで開く"""
+        with self.db.get_connection() as first, self.db.get_connection() as second:
+            self.assertIs(first, second)
+            self.assertEqual(first.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(
+            self.db.get_connection().__enter__()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], first)
+
+    def test_transaction_groups_commits(self):
+        """transaction 内の保存はブロック終了時に1回でコミットし、例外時は破棄する"""
+        with self.db.transaction():
+            for i in range(5):
+                self.db.save_operation_signal('USD_JPY', 'M1', datetime(2024, 1, 1, 0, i),
+                                              {'overall': 1}, confidence=0.5)
+                self.db.log_performance('tick', 0.1)
+            self.assertEqual(self.count('operation_signals'), 0)
+        self.assertEqual(self.count('operation_signals'), 5)
+        self.assertEqual(self.count('performance_log'), 5)
+
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.log_performance('tick', 0.2)
+                raise RuntimeError("abort")
+        self.assertEqual(self.count('performance_log'), 5)
+
+        self.db.log_performance('tick', 0.3)
+        self.assertEqual(self.count('performance_log'), 6)
+
+    def test_failed_statement_rolls_back(self):
+        """transaction 外で失敗した変更は接続に残らず、後のコミットに混ざらない"""
+        with self.assertRaises(sqlite3.IntegrityError):
+            with self.db.get_connection() as conn:
+                conn.execute("INSERT INTO performance_log (operation_name, execution_time) "
+                             "VALUES ('partial', 1.0)")
+                conn.execute("INSERT INTO performance_log (operation_name, execution_time) "
+                             "VALUES (NULL, 1.0)")
+        self.assertFalse(conn.in_transaction)
+        self.db.log_performance('tick', 0.1)
+        self.assertEqual(self.count("performance_log WHERE operation_name = 'partial'"), 0)
+        self.assertEqual(self.count('performance_log'), 1)
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    """書き込み遅延キューのテスト"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'fx.db')
+        self.db = DatabaseManager(self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def read(self, query: str):
+        """別接続でコミット済みの内容を読む"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(query).fetchall()
+        finally:
+            conn.close()
+
+    def test_batches_in_submission_order(self):
+        """投入順のまま、件数単位のトランザクションにまとめて書き込む"""
+        writer = self.db.write_behind(batch_size=50, flush_interval=1.0)
+        self.assertIs(self.db.write_behind(), writer)
+        for i in range(200):
+            self.assertTrue(writer.log_performance(f"op{i}", float(i)))
+        self.assertTrue(writer.flush(timeout=5))
+
+        rows = self.read("SELECT operation_name, execution_time FROM performance_log ORDER BY id")
+        self.assertEqual(rows, [(f"op{i}", float(i)) for i in range(200)])
+        self.assertEqual(writer.stats()['written'], 200)
+        self.assertLessEqual(writer.batches, 5)
+
+    def test_flush_on_close(self):
+        """close は積まれた記録をすべて書き込んでから止まる"""
+        writer = self.db.write_behind(flush_interval=0.5)
+        for i in range(20):
+            writer.save_operation_signal('USD_JPY', 'M1', datetime(2024, 1, 1, 0, i),
+                                         {'overall': 1}, 0.5)
+            writer.save_trade({'instrument': 'USD_JPY', 'trade_type': 'BUY',
+                               'entry_time': datetime(2024, 1, 1, 0, i),
+                               'entry_price': 150.0, 'units': 1000})
+        self.db.close()
+        self.assertEqual(self.read("SELECT COUNT(*) FROM operation_signals")[0][0], 20)
+        self.assertEqual(self.read("SELECT COUNT(*) FROM trades")[0][0], 20)
+        with self.assertRaises(RuntimeError):
+            writer.log_performance('late', 1.0)
+
+    def test_backpressure(self):
+        """満杯なら拒否して件数を数え、滞留を通知する"""
+        writer = WriteBehindQueue(self.db, max_queue=4, block=False, start=False)
+        results = [writer.log_performance('tick', 0.1) for _ in range(6)]
+        self.assertEqual(results, [True] * 4 + [False] * 2)
+        self.assertTrue(writer.is_backlogged)
+        self.assertEqual(writer.rejected, 2)
+
+        writer.start()
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertFalse(writer.is_backlogged)
+        writer.close()
+        self.assertEqual(self.read("SELECT COUNT(*) FROM performance_log")[0][0], 4)
+
+    def test_failed_record_does_not_block_others(self):
+        """書き込みに失敗した記録だけを落とし、前後の記録は順に書き込む"""
+        writer = self.db.write_behind()
+        writer.log_performance('before', 1.0)
+        writer.save_trade({'instrument': 'USD_JPY', 'trade_type': 'BUY',
+                           'entry_time': None, 'entry_price': 150.0, 'units': 1000})
+        writer.log_performance('after', 2.0)
+        self.assertFalse(writer.flush(timeout=5))
+        self.assertEqual(writer.failed, 1)
+        self.assertEqual(self.read("SELECT operation_name FROM performance_log ORDER BY id"),
+                         [('before',), ('after',)])
+        writer.log_performance('next', 3.0)
+        self.assertTrue(writer.flush(timeout=5))
+
+    def test_lock_contention_is_retried(self):
+        """他の接続が書き込みロックを持つ間は記録を落とさずに待って再試行する"""
+        writer = self.db.write_behind()
+        writer.log_performance('warmup', 0.0)
+        self.assertTrue(writer.flush(timeout=5))
+        for conn in self.db._connections:
+            conn.execute("PRAGMA busy_timeout = 1")
+
+        blocker = sqlite3.connect(self.db_path)
+        blocker.execute("BEGIN IMMEDIATE")
+        try:
+            writer.log_performance('a', 1.0)
+            writer.log_performance('b', 2.0)
+            self.assertFalse(writer.flush(timeout=0.3))
+        finally:
+            blocker.rollback()
+            blocker.close()
+        self.assertTrue(writer.flush(timeout=10))
+        self.assertEqual((writer.failed, writer.written), (0, 3))
+        self.assertGreater(writer.retries, 0)
+        self.assertEqual(self.read("SELECT operation_name FROM performance_log ORDER BY id"),
+                         [('warmup',), ('a',), ('b',)])
+
+    def test_flush_after_close_raises(self):
+        """close 後の flush は待たずに RuntimeError"""
+        writer = self.db.write_behind()
+        writer.close()
+        with self.assertRaises(RuntimeError):
+            writer.flush()
+
+
+if __name__ == '__main__':
+    unittest.main()
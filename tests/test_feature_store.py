@@ -0,0 +1,122 @@
+"""
+特徴量ストアのテスト
+
+チャンク単位の追記・再オープン後の追記・時刻範囲の読み込みと、
+エクスポートマネージャーからの書き込みを確認
+"""
+
+import unittest
+import logging
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.feature_store import FeatureStore, to_epoch_ns
+from src.pkg.feature_dag.export_contract import StandardFeatureExporter, VersionedExportManager
+
+NAMES = ('a', 'b', 'c')
+MINUTE_NS = 60 * 10 ** 9
+START_NS = to_epoch_ns('2024-01-01')
+
+
+def make_rows(start: int, count: int):
+    """1分間隔の時刻と行番号入りの行列"""
+    index = np.arange(start, start + count)
+    values = np.stack([index, index * 2, -index], axis=1).astype(np.float32)
+    return START_NS + index * MINUTE_NS, values
+
+
+class TestFeatureStore(unittest.TestCase):
+    """特徴量ストアのテスト"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = FeatureStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_chunked_append_and_read(self):
+        """まとめて書いた行がチャンクに分かれ、全件を順に読める"""
+        with self.store.writer('USDJPY', 'M1', '1.0', NAMES, chunk_rows=100) as writer:
+            writer.append_batch(*make_rows(0, 250))
+            self.assertEqual(writer.pending_rows, 50)
+        manifest = self.store.manifest('USDJPY', 'M1', '1.0')
+        self.assertEqual([c['rows'] for c in manifest['chunks']], [100, 100, 50])
+
+        frame = self.store.read('USDJPY', 'M1', '1.0')
+        timestamps, values = make_rows(0, 250)
+        np.testing.assert_array_equal(frame.timestamp, timestamps)
+        np.testing.assert_array_equal(frame.values, values)
+        self.assertEqual(frame.values.dtype, np.float32)
+        np.testing.assert_array_equal(frame.column('b'), values[:, 1])
+
+    def test_reopen_continues_tail_chunk(self):
+        """再オープンすると書きかけの末尾チャンクに続けて追記する"""
+        with self.store.writer('USDJPY', 'M1', '1.0', NAMES, chunk_rows=100) as writer:
+            writer.append_batch(*make_rows(0, 60))
+        with self.store.writer('USDJPY', 'M1', '1.0', NAMES) as writer:
+            for i in range(60, 130):
+                timestamp, values = make_rows(i, 1)
+                writer.append(int(timestamp[0]), values[0])
+            with self.assertRaises(ValueError):
+                writer.append(START_NS, values[0])
+        manifest = self.store.manifest('USDJPY', 'M1', '1.0')
+        self.assertEqual([c['rows'] for c in manifest['chunks']], [100, 30])
+        np.testing.assert_array_equal(self.store.read('USDJPY', 'M1', '1.0').values,
+                                      make_rows(0, 130)[1])
+
+        with self.assertRaises(ValueError):
+            self.store.writer('USDJPY', 'M1', '1.0', ('a', 'b'))
+
+    def test_time_range_reads_only_overlapping_chunks(self):
+        """時刻範囲は重なるチャンクだけを開き、1チャンク内ならメモリマップのビュー"""
+        with self.store.writer('USDJPY', 'M1', '1.0', NAMES, chunk_rows=100) as writer:
+            writer.append_batch(*make_rows(0, 500))
+
+        chunks = list(self.store.iter_chunks('USDJPY', 'M1', '1.0',
+                                             START_NS + 120 * MINUTE_NS,
+                                             START_NS + 180 * MINUTE_NS))
+        self.assertEqual(len(chunks), 1)
+        self.assertIsInstance(chunks[0].values.base, np.memmap)
+        np.testing.assert_array_equal(chunks[0].values[:, 0], np.arange(120, 180))
+
+        frame = self.store.read('USDJPY', 'M1', '1.0', '2024-01-01T01:30', '2024-01-01T05:00')
+        np.testing.assert_array_equal(frame.values[:, 0], np.arange(90, 300))
+        self.assertEqual(len(self.store.read('USDJPY', 'M1', '1.0', '2025-01-01')), 0)
+
+    def test_export_manager_writes_bundles(self):
+        """エクスポートマネージャーは列形式バンドルをバージョン別の系列に追記する"""
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        manager = VersionedExportManager()
+        manager.register_exporter("1.0", StandardFeatureExporter("USDJPY", "M1"))
+        manager.attach_feature_store(self.store)
+        bar_times = [datetime(2024, 1, 1) + timedelta(minutes=i) for i in range(5)]
+        bundles = [manager.export_columnar({"391^4-001": {"unified_signal": 0.1 * i}},
+                                           timestamp=bar_times[i])
+                   for i in range(5)]
+        manager.flush_feature_store()
+
+        self.assertEqual(self.store.versions('USDJPY', 'M1'), ['1.0'])
+        frame = self.store.read('USDJPY', 'M1', '1.0')
+        self.assertEqual(frame.feature_names, bundles[0].schema.names)
+        np.testing.assert_array_equal(frame.values, np.stack([b.values for b in bundles]))
+        np.testing.assert_array_equal(frame.timestamp, START_NS + np.arange(5) * MINUTE_NS)
+        with self.assertRaises(ValueError):
+            manager.export_columnar({"391^4-001": {"unified_signal": 0.5}})
+
+    def test_aware_datetime_is_exact(self):
+        """タイムゾーン付きの時刻もナノ秒単位で誤差なく変換する"""
+        jst = timezone(timedelta(hours=9))
+        moment = datetime(2024, 6, 3, 21, 15, 42, 123457, tzinfo=jst)
+        expected = to_epoch_ns('2024-06-03T12:15:42.123457')
+        self.assertEqual(to_epoch_ns(moment), expected)
+        self.assertEqual(expected % 1000, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
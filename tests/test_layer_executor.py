@@ -0,0 +1,116 @@
+"""
+階層並列DAG実行のテスト
+
+階層分け、コストモデルによる振り分け、各バックエンドと逐次実行の結果一致を確認
+"""
+
+import unittest
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from src.utils.layer_executor import CostModel, LayerExecutor, NodeTask, group_levels
+from src.pkg.memo_logic.dag_engine_v2 import DAGEngine
+
+
+def square(x):
+    """プロセスプールで実行できるモジュール関数"""
+    return x * x
+
+
+def slow(x, seconds=0.05):
+    """GILを解放する重いノードの代わり"""
+    time.sleep(seconds)
+    return x
+
+
+def build_engine(executor=None) -> DAGEngine:
+    """デモと同じ3階層のDAG"""
+    engine = DAGEngine(executor)
+    engine.register_raw_data("AA001", 3, 9, 1, 110.50)
+    engine.register_raw_data("AA002", 3, 9, 1, 110.45)
+    engine.register_raw_data("BA001", 3, 9, 1, 0.95)
+    engine.register_function("391^1-001", "Z", ["391^0-AA001", "391^0-AA002"], operation_type=2)
+    engine.register_function("391^1-002", "RO", ["391^0-BA001"])
+    engine.register_function("391^2-001", "SL", ["391^1-002", "391^0-AA001", "391^1-001"], default=0)
+    return engine
+
+
+class TestGroupLevels(unittest.TestCase):
+    """階層分けのテスト"""
+
+    def test_levels_follow_dependency_depth(self):
+        """外部入力だけに依存するノードは深さ0、以降は依存の最大深さ+1"""
+        deps = {'a': ['x'], 'b': [], 'c': ['a'], 'd': ['a', 'b'], 'e': ['c', 'd']}
+        self.assertEqual(group_levels(['a', 'b', 'c', 'd', 'e'], deps.__getitem__),
+                         [['a', 'b'], ['c', 'd'], ['e']])
+
+
+class TestLayerExecutor(unittest.TestCase):
+    """実行エンジンのテスト"""
+
+    def test_backends_match(self):
+        """inline / thread / process で同じ結果"""
+        tasks = [NodeTask(str(i), square, (i,), 'TimeKetsugou') for i in range(6)]
+        expected = {str(i): i * i for i in range(6)}
+        for backend in ('inline', 'thread', 'process'):
+            with LayerExecutor(backend, max_workers=2) as executor:
+                self.assertEqual(executor.run_layer(tasks), expected)
+
+    def test_cost_model_decides_offload(self):
+        """重いノードだけ投げ、重いノード1件＋軽いノードだけの階層は投げない"""
+        executor = LayerExecutor('thread')
+        heavy = [NodeTask('t1', square, (1,), 'TimeKetsugou'),
+                 NodeTask('t2', square, (2,), 'TimeKetsugou')]
+        light = [NodeTask('z', square, (3,), 'Z')]
+        offload, local = executor.plan(heavy + light)
+        self.assertEqual([t.node_id for t in offload], ['t1', 't2'])
+        self.assertEqual([t.node_id for t in local], ['z'])
+        self.assertEqual(executor.plan(heavy[:1] + light)[0], [])
+
+    def test_cost_model_learns(self):
+        """初回の実測で事前値を置き換え、以降は指数移動平均"""
+        model = CostModel({'Range': 40.0}, alpha=0.5)
+        model.observe('Range', 2.0)
+        self.assertEqual(model.estimate('Range'), 2.0)
+        model.observe('Range', 4.0)
+        self.assertEqual(model.estimate('Range'), 3.0)
+        self.assertEqual(model.estimate('unknown'), model.default_ms)
+
+    def test_heavy_nodes_run_concurrently(self):
+        """重いノードは同時に実行される"""
+        tasks = [NodeTask(str(i), slow, (i,), 'TimeKetsugou') for i in range(4)]
+        with LayerExecutor('thread', max_workers=4) as executor:
+            start = time.perf_counter()
+            results = executor.run_layer(tasks)
+            elapsed = time.perf_counter() - start
+        self.assertEqual(results, {str(i): i for i in range(4)})
+        self.assertLess(elapsed, 0.15)
+        self.assertEqual(executor.stats.offloaded, 4)
+
+    def test_exceptions(self):
+        """return_exceptions=True なら例外を結果として返す"""
+        tasks = [NodeTask('ok', square, (2,), 'Z'), NodeTask('ng', square, (None,), 'Z')]
+        executor = LayerExecutor('inline')
+        results = executor.run_layer(tasks, return_exceptions=True)
+        self.assertEqual(results['ok'], 4)
+        self.assertIsInstance(results['ng'], TypeError)
+        with self.assertRaises(TypeError):
+            executor.run_layer(tasks)
+
+
+class TestDAGEngineLayers(unittest.TestCase):
+    """DAGエンジンへの組み込みのテスト"""
+
+    def test_layered_matches_serial(self):
+        """階層並列評価と逐次評価の結果一致"""
+        expected = build_engine().evaluate()
+        for backend in ('inline', 'thread'):
+            with LayerExecutor(backend, offload_threshold_ms=0.0) as executor:
+                self.assertEqual(build_engine(executor).evaluate(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+パラメータスイープのテスト
+
+サンプリングの性質と、並列実行（共有メモリ）と逐次実行の結果一致を確認
+"""
+
+import unittest
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from src.data.price_store import CandleArrays
+from src.backtesting import parameter_sweep
+from src.backtesting.parameter_sweep import (
+    STRATEGIES, ParameterSpace, ParameterSweep, SharedCandles, adaptive_atr_series,
+    base_params, best_params, format_table, run_parameter_backtest
+)
+from src.backtesting.optimized_strategy import OptimizedStrategy
+
+
+def make_m15(count: int = 400, seed: int = 0) -> CandleArrays:
+    """テスト用15分足"""
+    rng = np.random.default_rng(seed)
+    close = 150 + rng.standard_normal(count).cumsum() * 0.08
+    open_ = close + rng.standard_normal(count) * 0.03
+    return CandleArrays(
+        'USDJPY', 'M15',
+        timestamp=1704067200 + np.arange(count, dtype=np.int64) * 900,
+        open=open_, high=np.maximum(open_, close) + rng.random(count) * 0.05,
+        low=np.minimum(open_, close) - rng.random(count) * 0.05, close=close,
+        volume=np.full(count, 100.0),
+    )
+
+
+class TestParameterSpace(unittest.TestCase):
+    """探索空間のテスト"""
+
+    def setUp(self):
+        self.space = ParameterSpace(values={'max_consecutive_losses': [2, 3, 4]},
+                                    bounds={'atr_multiplier': (0.5, 1.5)})
+
+    def test_grid(self):
+        """離散候補×分割点の全組み合わせ"""
+        grid = self.space.grid(steps=5)
+        self.assertEqual(len(grid), 15)
+        self.assertEqual({p['atr_multiplier'] for p in grid}, {0.5, 0.75, 1.0, 1.25, 1.5})
+
+    def test_latin_hypercube_is_stratified(self):
+        """ラテン超方格は各層にちょうど1点"""
+        samples = self.space.latin_hypercube(30, seed=1)
+        strata = sorted(int((p['atr_multiplier'] - 0.5) / 1.0 * 30) for p in samples)
+        self.assertEqual(strata, list(range(30)))
+        counts = [sum(p['max_consecutive_losses'] == v for p in samples) for v in (2, 3, 4)]
+        self.assertEqual(counts, [10, 10, 10])
+
+    def test_random_is_reproducible(self):
+        """同じシードなら同じ点列"""
+        self.assertEqual(self.space.random(10, seed=3), self.space.random(10, seed=3))
+        for p in self.space.random(50, seed=4):
+            self.assertTrue(0.5 <= p['atr_multiplier'] <= 1.5)
+
+    def test_around_current_params(self):
+        """現行パラメータ周辺の空間（整数は候補、実数は区間）"""
+        space = ParameterSpace.around(base_params('optimized', 'USDJPY'))
+        self.assertEqual(space.values['max_consecutive_losses'], [2, 3, 4])
+        self.assertAlmostEqual(space.bounds['atr_multiplier'][0], 0.25)
+
+
+class TestParameterSweep(unittest.TestCase):
+    """スイープ実行のテスト"""
+
+    def setUp(self):
+        self.candles = make_m15()
+
+    def test_shared_candles_roundtrip(self):
+        """共有メモリ上の列が元データと一致"""
+        with SharedCandles(self.candles) as shared:
+            shm, view = shared.handle.attach()
+            try:
+                for name, column in self.candles.columns().items():
+                    np.testing.assert_array_equal(getattr(view, name), column)
+            finally:
+                del view
+                shm.close()
+
+    def test_worker_reads_shared_columns(self):
+        """ワーカーは共有メモリの列を直接参照し、終了時に接続を閉じる"""
+        params = base_params('optimized', 'USDJPY')
+        records = self.candles.to_records()
+        with SharedCandles(self.candles) as shared:
+            view, atr = parameter_sweep._worker_data(shared.handle)
+            self.assertNotIsInstance(view, list)
+            self.assertEqual(atr, adaptive_atr_series(records))
+            self.assertEqual(
+                run_parameter_backtest('optimized', 'USDJPY', view, params, atr_cache=atr),
+                run_parameter_backtest('optimized', 'USDJPY', records, params, atr_cache=atr))
+            del view
+            parameter_sweep._release_worker_data()
+            self.assertEqual(parameter_sweep._WORKER_DATA, {})
+
+    def test_unknown_parameter_rejected(self):
+        """どの戦略も未知のパラメータ名は ValueError"""
+        for name, strategy in STRATEGIES.items():
+            with self.assertRaises(ValueError, msg=name):
+                strategy('USDJPY', params={'momi_treshold': 0.1})
+
+    def test_parallel_matches_inline(self):
+        """プロセス並列と逐次で同じ順位表"""
+        for strategy in ('optimized', 'restored'):
+            inline = ParameterSweep(strategy, max_workers=1)
+            plan = inline.plan(['USDJPY'], method='random', samples=6, seed=0)
+            expected = inline.run({'USDJPY': self.candles}, plan)
+            actual = ParameterSweep(strategy, max_workers=2).run({'USDJPY': self.candles}, plan)
+            self.assertEqual(len(actual), 7)
+            self.assertEqual(sorted(r.metrics['return_pct'] for r in actual),
+                             sorted(r.metrics['return_pct'] for r in expected))
+            self.assertEqual(actual[0].metrics['return_pct'], expected[0].metrics['return_pct'])
+
+    def test_results_ranked_and_streamed(self):
+        """コールバックは1件ごとに呼ばれ、結果はスコア降順"""
+        sweep = ParameterSweep('adaptive', max_workers=1, min_trades=0)
+        plan = sweep.plan(['USDJPY'], method='lhs', samples=5, seed=2)
+        seen = []
+        ranked = sweep.run({'USDJPY': self.candles}, plan,
+                           on_result=lambda result, table: seen.append(len(table)))
+        self.assertEqual(seen, [1, 2, 3, 4, 5, 6])
+        scores = [r.metrics['return_pct'] for r in ranked]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(best_params(ranked)['USDJPY'], ranked[0].params)
+        self.assertIn('USDJPY', format_table(ranked))
+
+    def test_current_params_reproduce_direct_run(self):
+        """現行パラメータの結果は直接実行と一致"""
+        params = base_params('optimized', 'USDJPY')
+        direct = run_parameter_backtest('optimized', 'USDJPY', self.candles.to_records(), params)
+        sweep = ParameterSweep('optimized', max_workers=1)
+        ranked = sweep.run({'USDJPY': self.candles}, {'USDJPY': [params]})
+        self.assertEqual(ranked[0].metrics, direct)
+
+    def test_atr_series_matches_strategy(self):
+        """事前計算ATRは戦略の足ごとの計算と完全一致し、結果も変わらない"""
+        records = self.candles.to_records()
+        atr = adaptive_atr_series(records)
+        strategy = OptimizedStrategy('USDJPY', verbose=False)
+        for index in range(15, len(records)):
+            self.assertEqual(atr[index], strategy.calculate_adaptive_atr(
+                records[max(0, index - 15):index + 1]))
+        params = base_params('optimized', 'USDJPY')
+        self.assertEqual(
+            run_parameter_backtest('optimized', 'USDJPY', records, params, atr_cache=atr),
+            run_parameter_backtest('optimized', 'USDJPY', records, params))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+パフォーマンスプロファイラーのサンプリングモードのテスト
+
+固定メモリのヒストグラムのパーセンタイル精度、スレッド別記録の合算、
+サンプリング率、エクスポートを確認
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.performance_profiler import (
+    BUCKET_COUNT, LatencyHistogram, PerformanceProfiler, _bucket_index, _bucket_range
+)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """ヒストグラムのテスト"""
+
+    def test_bucket_ranges_contain_values(self):
+        """各値は自分のバケットの範囲内に入り、範囲幅は相対 1/64 以下"""
+        for value in [0, 1, 127, 128, 129, 1000, 65535, 10 ** 6, 10 ** 9, 2 ** 41 + 12345]:
+            low, high = _bucket_range(_bucket_index(value))
+            self.assertLessEqual(low, value)
+            self.assertLessEqual(value, high)
+            self.assertLessEqual(high - low, max(1, value / 64))
+        self.assertLess(_bucket_index(2 ** 42 - 1), BUCKET_COUNT)
+
+    def test_percentiles_close_to_exact(self):
+        values = np.random.default_rng(0).lognormal(11, 1.0, 20000).astype(np.int64)
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(int(value))
+        self.assertEqual(histogram.count, len(values))
+        for percent in (50, 95, 99):
+            exact = np.sort(values)[int(np.ceil(percent / 100 * len(values))) - 1]
+            self.assertAlmostEqual(histogram.percentile(percent) / exact, 1.0, delta=0.02)
+        self.assertEqual(histogram.max_ns, values.max())
+
+    def test_merge(self):
+        first, second = LatencyHistogram(), LatencyHistogram()
+        first.record(1000)
+        second.record(5000)
+        first.merge(second)
+        self.assertEqual((first.count, first.min_ns, first.max_ns), (2, 1000, 5000))
+        self.assertEqual(len(first.counts), BUCKET_COUNT)
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    """サンプリングモードのテスト"""
+
+    def test_sample_rate(self):
+        """呼び出し回数は全件、時間は N 回に1回だけ計測し、記録は保持しない"""
+        profiler = PerformanceProfiler(mode='sampling', sample_rate=0.1)
+        for _ in range(1000):
+            with profiler.measure('DAG評価') as record:
+                self.assertIsNone(record)
+        stats = profiler.get_statistics('DAG評価')
+        self.assertEqual((stats['count'], stats['sampled']), (1000, 100))
+        self.assertEqual(profiler.timings, [])
+        self.assertEqual(len(profiler.operation_stats), 0)
+
+    def test_threads_merged_on_read(self):
+        """各スレッドの記録は読み出し時に合算され、終了したスレッドの分も残る"""
+        profiler = PerformanceProfiler(mode='sampling')
+
+        def work():
+            for _ in range(500):
+                with profiler.measure('同逆判定'):
+                    pass
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with profiler.measure('同逆判定'):
+            time.sleep(0.002)
+
+        stats = profiler.snapshot()['同逆判定']
+        self.assertEqual(stats['count'], 2001)
+        self.assertGreaterEqual(stats['max_ms'], 2.0)
+        self.assertLessEqual(stats['p50_ms'], stats['p95_ms'])
+        self.assertLessEqual(stats['p95_ms'], stats['p99_ms'])
+        self.assertEqual(profiler.snapshot()['同逆判定']['count'], 2001)
+
+        profiler.clear()
+        self.assertEqual(profiler.snapshot(), {})
+
+    def test_export_and_bottlenecks(self):
+        """エクスポートとボトルネック検出はどちらのモードでも同じ形式"""
+        path = os.path.join(tempfile.mkdtemp(), 'profile.json')
+        for mode in ('detailed', 'sampling'):
+            profiler = PerformanceProfiler(mode=mode)
+            with profiler.measure('同逆判定'):
+                time.sleep(0.012)
+            profiler.export(path)
+            with open(path, encoding='utf-8') as f:
+                document = json.load(f)
+            stats = document['operations']['同逆判定']
+            self.assertEqual(document['mode'], mode)
+            self.assertGreaterEqual(stats['p99_ms'], 10.0)
+            self.assertFalse(stats['target_met'])
+            self.assertEqual(profiler.get_bottlenecks()[0]['operation'], '同逆判定')
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            PerformanceProfiler(mode='fast')
+        with self.assertRaises(ValueError):
+            PerformanceProfiler(mode='sampling', sample_rate=0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+"""
+PKG関数の結果キャッシュのテスト
+
+純粋関数だけが (pkg_id, 設定, 入力の内容) で結果を再利用し、上限で追い出されることを確認
+"""
+
+import unittest
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pkg.memo_logic.core_pkg_functions import (
+    BasePKGFunction, DokyakuFunction, IkikaerikFunction, MarketData, PKGId,
+    PKGResultCache, clear_result_caches, content_hash, get_result_cache_stats
+)
+from src.pkg.memo_logic.specialized_pkg_functions import KairiFunction
+
+
+def make_bars(count: int, base: float = 110.0):
+    """テスト用の足（平均足付き）"""
+    start = datetime(2024, 1, 1)
+    bars = []
+    for i in range(count):
+        price = base + 0.01 * i
+        bars.append(MarketData(
+            timestamp=start + timedelta(minutes=15 * i),
+            open=price, high=price + 0.02, low=price - 0.02, close=price + 0.01,
+            volume=1000.0, heikin_ashi_open=price - 0.005, heikin_ashi_high=price + 0.02,
+            heikin_ashi_low=price - 0.02, heikin_ashi_close=price + 0.005))
+    return bars
+
+
+class CountingFunction(BasePKGFunction):
+    """呼び出し回数を数える純粋関数"""
+
+    pure = True
+
+    def __init__(self, pkg_id):
+        super().__init__(pkg_id)
+        self.calls = 0
+
+    def execute(self, data):
+        self.calls += 1
+        return sum(data['values'])
+
+
+class ImpureFunction(CountingFunction):
+    """純粋でない関数（キャッシュ対象外）"""
+
+    pure = False
+
+    def execute(self, data):
+        self.calls += 1
+        return self.calls
+
+
+class TestResultCache(unittest.TestCase):
+    """結果キャッシュのテスト"""
+
+    def setUp(self):
+        self.pkg_id = PKGId.parse("391^2-126")
+        BasePKGFunction.configure_cache(True, max_size=128, policy='lru')
+
+    def tearDown(self):
+        BasePKGFunction.configure_cache(False)
+        clear_result_caches()
+
+    def test_disabled_by_default(self):
+        """有効化するまでキャッシュしない"""
+        BasePKGFunction.configure_cache(False)
+        function = CountingFunction(self.pkg_id)
+        function.execute({'values': [1, 2]})
+        function.execute({'values': [1, 2]})
+        self.assertEqual(function.calls, 2)
+        self.assertNotIn('CountingFunction', get_result_cache_stats())
+
+    def test_hit_and_miss(self):
+        """同じ内容の入力はヒットし、別インスタンスでも共有される"""
+        function = CountingFunction(self.pkg_id)
+        self.assertEqual(function.execute({'values': [1, 2]}), 3)
+        self.assertEqual(function.execute({'values': [1, 2]}), 3)
+        self.assertEqual(CountingFunction(self.pkg_id).execute({'values': [1, 2]}), 3)
+        self.assertEqual(function.execute({'values': [1, 3]}), 4)
+        self.assertEqual(function.calls, 2)
+        stats = CountingFunction.cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+
+    def test_key_includes_pkg_id_and_state(self):
+        """pkg_id・設定・入力内容のどれかが違えば別のキー"""
+        data = {'market_data': make_bars(5)}
+        kairi = KairiFunction(self.pkg_id)
+        key = kairi.get_cache_key(data)
+        self.assertEqual(key, KairiFunction(self.pkg_id).get_cache_key({'market_data': make_bars(5)}))
+        self.assertNotEqual(key, KairiFunction(PKGId.parse("391^2-127")).get_cache_key(data))
+        self.assertNotEqual(key, kairi.get_cache_key({'market_data': make_bars(5, 111.0)}))
+        kairi.kairi_threshold = 0.002
+        self.assertNotEqual(key, kairi.get_cache_key(data))
+
+    def test_pkg_functions_reuse_results(self):
+        """同逆・行帰は同じ足の列に対して同じシグナル（共有しない複製）を返す"""
+        data = {'market_data': make_bars(6)}
+        for function_class in (DokyakuFunction, IkikaerikFunction):
+            function = function_class(self.pkg_id)
+            first = function.execute(data)
+            first.metadata['tampered'] = True
+            second = function.execute({'market_data': make_bars(6)})
+            self.assertIsNot(second, first)
+            self.assertNotIn('tampered', second.metadata)
+            self.assertEqual(function_class.cache_stats()['hits'], 1)
+
+    def test_key_uses_only_bars_read(self):
+        """判定に使わない古い足はキーに影響しない"""
+        recent = make_bars(20)[-15:]
+        for function_class, window in ((DokyakuFunction, 5), (IkikaerikFunction, 10),
+                                       (KairiFunction, 15)):
+            function = function_class(self.pkg_id)
+            key = function.get_cache_key({'market_data': make_bars(3, 100.0) + recent})
+            self.assertEqual(key, function.get_cache_key({'market_data': recent}))
+            self.assertNotEqual(key, function.get_cache_key({'market_data': recent[:-1]}))
+            self.assertEqual(len(function.cache_input({'market_data': recent})), window)
+
+    def test_side_effects_run_on_hit(self):
+        """キャッシュヒットでも同逆の統計は更新される"""
+        function = DokyakuFunction(self.pkg_id)
+        for _ in range(3):
+            function.execute({'market_data': make_bars(6)})
+        self.assertEqual(DokyakuFunction.cache_stats()['hits'], 2)
+        self.assertEqual(function.performance_stats['total_signals'], 3)
+        function.execute({'market_data': make_bars(2)})
+        self.assertEqual(function.performance_stats['total_signals'], 3)
+
+    def test_impure_never_cached(self):
+        """純粋でない関数はキャッシュ有効でも毎回実行する"""
+        function = ImpureFunction(self.pkg_id)
+        self.assertEqual(function.execute({'values': [1]}), 1)
+        self.assertEqual(function.execute({'values': [1]}), 2)
+
+    def test_unhashable_input_bypasses(self):
+        """内容でハッシュできない入力はキャッシュせずに実行する"""
+        function = CountingFunction(self.pkg_id)
+        data = {'values': [1], 'handle': object()}
+        function.execute(data)
+        function.execute(data)
+        self.assertEqual(function.calls, 2)
+        with self.assertRaises(TypeError):
+            content_hash(data)
+
+
+class TestEvictionPolicy(unittest.TestCase):
+    """追い出し方式のテスト"""
+
+    def fill(self, policy: str) -> PKGResultCache:
+        cache = PKGResultCache(max_size=2, policy=policy)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        return cache
+
+    def test_lru(self):
+        """LRU は最近使われていないものを追い出す"""
+        cache = self.fill('lru')
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_fifo(self):
+        """FIFO は登録順に追い出す"""
+        self.assertEqual(list(self.fill('fifo').entries), ['b', 'c'])
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            BasePKGFunction.configure_cache(policy='random')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+PKGシグナルのストリーミングパイプラインのテスト
+
+ティックから確定足ごとに評価したシグナル・生データ・ATRが、
+確定足の列に対する一括計算と一致することを確認
+"""
+
+import unittest
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.trading.pkg_signal_pipeline import (
+    PKGSignalPipeline, RAW_SYMBOLS, WAIT_SIGNAL
+)
+from src.pkg.trading_signal_pkg import TradingSignalPKG
+from src.optimization.performance_optimizer import fast_atr
+
+START = 1704067200  # 2024-01-01 00:00 UTC
+
+
+def feed_ticks(pipeline: PKGSignalPipeline, symbol: str, count: int,
+               seed: int = 0, base: float = 110.0):
+    """15秒間隔のランダムウォークを流し、確定足のシグナルを返す"""
+    rng = np.random.default_rng(seed)
+    price = base
+    signals = []
+    for i in range(count):
+        price += rng.normal(0, base * 0.001)
+        signal = pipeline.update(symbol, price, START + i * 15)
+        if signal is not None:
+            signals.append(signal)
+    return signals
+
+
+class TestPKGSignalPipeline(unittest.TestCase):
+    """ストリーミングパイプラインのテスト"""
+
+    def setUp(self):
+        self.pipeline = PKGSignalPipeline(timeframe='M1', history_size=1000)
+
+    def completed(self, symbol: str):
+        return [bar.to_dict() for bar in
+                self.pipeline.bar_builder.completed_bars(symbol, 'M1')]
+
+    def test_matches_batch_signals(self):
+        """確定足ごとのシグナルは generate_signals と一致する"""
+        signals = feed_ticks(self.pipeline, 'USDJPY', 800)
+        candles = self.completed('USDJPY')
+        self.assertEqual(len(signals), len(candles))
+        expected = TradingSignalPKG('USDJPY').generate_signals(candles)
+        np.testing.assert_array_equal(signals, expected)
+        self.assertEqual(signals[:3], [WAIT_SIGNAL] * 3)
+
+    def test_raw_slots_match_batch_columns(self):
+        """スロットに書き込む生データ（平均足を含む）は一括計算の最終行と同じ"""
+        pkg = TradingSignalPKG('USDJPY')
+        plan = self.pipeline.plan
+        state = self.pipeline.state('USDJPY')
+        rng = np.random.default_rng(3)
+        candles = []
+        for i in range(30):
+            open_ = 110.0 + rng.normal(0, 0.2)
+            close = open_ + rng.normal(0, 0.1)
+            candle = {'open': open_, 'high': max(open_, close) + 0.05,
+                      'low': min(open_, close) - 0.05, 'close': close}
+            candles.append(candle)
+            self.pipeline.update_bar('USDJPY', candle['open'], candle['high'],
+                                     candle['low'], candle['close'])
+            if i < 3:
+                continue
+            columns = pkg._calculate_raw_columns(pkg._candle_columns(candles))
+            for slot, symbol in enumerate(plan.raw_symbols, start=1):
+                self.assertIn(symbol, RAW_SYMBOLS)
+                self.assertAlmostEqual(state.slots[slot], columns[symbol][-1],
+                                       places=12, msg=symbol)
+
+    def test_symbols_are_independent(self):
+        """通貨ペアごとに状態を持ち、スロット列は確保後に作り直さない"""
+        slots = self.pipeline.state('USDJPY').slots
+        usdjpy = feed_ticks(self.pipeline, 'USDJPY', 400, seed=1)
+        feed_ticks(self.pipeline, 'EURUSD', 400, seed=2, base=1.10)
+
+        reference = PKGSignalPipeline(timeframe='M1')
+        self.assertEqual(feed_ticks(reference, 'USDJPY', 400, seed=1), usdjpy)
+        self.assertIs(self.pipeline.state('USDJPY').slots, slots)
+        self.assertEqual(self.pipeline.signal('GBPJPY'), WAIT_SIGNAL)
+
+    def test_atr_after_warmup(self):
+        """ATRは期間分の足が揃うまで None、以降は確定足の fast_atr と一致"""
+        self.assertIsNone(self.pipeline.atr('USDJPY'))
+        feed_ticks(self.pipeline, 'USDJPY', 40)
+        self.assertIsNone(self.pipeline.atr('USDJPY'))
+
+        pipeline = PKGSignalPipeline(timeframe='M1', history_size=1000)
+        feed_ticks(pipeline, 'USDJPY', 400)
+        candles = [bar.to_dict() for bar in pipeline.bar_builder.completed_bars('USDJPY', 'M1')]
+        expected = fast_atr([c['high'] for c in candles], [c['low'] for c in candles],
+                            [c['close'] for c in candles], 14)
+        self.assertAlmostEqual(pipeline.atr('USDJPY'), expected, places=9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+列指向価格ストアのテスト
+"""
+
+import unittest
+import csv
+import os
+import sys
+import tempfile
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.price_store import (
+    ColumnarPriceStore, convert_csv, load_columnar, read_header
+)
+
+
+def write_sample_csv(path: str, rows: int = 50):
+    """テスト用M1 CSV"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+        for i in range(rows):
+            hour, minute = divmod(i, 60)
+            price = 150.0 + i * 0.01
+            writer.writerow([f"2024-01-01 {hour:02d}:{minute:02d}:00",
+                             price, price + 0.02, price - 0.02, price + 0.01, 100 + i])
+
+
+class TestColumnarPriceStore(unittest.TestCase):
+    """列指向ストアのテスト"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source_dir = os.path.join(self.tmp.name, 'histdata')
+        os.makedirs(self.source_dir)
+        self.csv_path = os.path.join(self.source_dir, 'USDJPY_M1.csv')
+        write_sample_csv(self.csv_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_matches_csv(self):
+        """変換後の列がCSVの値と一致し、読み取り専用ビューである"""
+        arrays = load_columnar(convert_csv(self.csv_path, pair='USDJPY', timeframe='M1'))
+        with open(self.csv_path) as f:
+            rows = list(csv.DictReader(f))
+
+        self.assertEqual(len(arrays), len(rows))
+        self.assertEqual(arrays.pair, 'USDJPY')
+        for record, row in zip(arrays.to_records(), rows):
+            self.assertEqual(record['timestamp'], row['timestamp'])
+            for name in ('open', 'high', 'low', 'close', 'volume'):
+                self.assertEqual(record[name], float(row[name]))
+
+        self.assertFalse(arrays.close.flags.writeable)
+        self.assertIsInstance(arrays.close.base, np.memmap)
+        for field in read_header(self.csv_path[:-4] + '.fxc')['fields']:
+            self.assertEqual(field['offset'] % 64, 0)
+
+    def test_record_view_matches_records(self):
+        """レコードビューは to_records() と同じ行を返す"""
+        arrays = load_columnar(convert_csv(self.csv_path, pair='USDJPY', timeframe='M1'))
+        records = arrays.to_records()
+        view = arrays.record_view()
+        self.assertEqual(len(view), len(records))
+        self.assertEqual(list(view), records)
+        self.assertEqual(view[-1], records[-1])
+        self.assertEqual(view[5:12], records[5:12])
+        with self.assertRaises(IndexError):
+            view[len(records)]
+
+    def test_store_converts_once_and_slices(self):
+        """ストアは初回のみ変換し、時刻範囲で切り出せる"""
+        store = ColumnarPriceStore(self.source_dir, os.path.join(self.tmp.name, 'columnar'))
+        self.assertTrue(store.is_stale('USDJPY'))
+        arrays = store.load('USDJPY', start_date='2024-01-01 00:10:00',
+                            end_date='2024-01-01 00:20:00')
+        self.assertFalse(store.is_stale('USDJPY'))
+        self.assertEqual(len(arrays), 10)
+        self.assertEqual(arrays.timestamps_str()[0], '2024-01-01 00:10:00')
+
+        write_sample_csv(self.csv_path, rows=70)
+        self.assertTrue(store.is_stale('USDJPY'))
+        self.assertEqual(len(store.load('USDJPY')), 70)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+マルチタイムフレーム・リサンプラーのテスト
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from src.data.price_store import CandleArrays, write_columnar
+from src.data.resampler import (
+    TIMEFRAME_MINUTES, MultiTimeframeCache, resample, resample_all
+)
+
+
+def make_m1(seed: int = 0) -> CandleArrays:
+    """ギャップと週末の空白を含む1分足"""
+    rng = np.random.default_rng(seed)
+    times = []
+    t = datetime(2024, 1, 5, 18, 3)  # 金曜、境界外から開始
+    while len(times) < 3000:
+        times.append(t)
+        t += timedelta(minutes=1)
+        if rng.random() < 0.01:
+            t += timedelta(minutes=int(rng.integers(2, 40)))  # 欠損
+        if t.weekday() == 5 and t.hour >= 6:
+            t = datetime(t.year, t.month, t.day, 6, 0) + timedelta(days=2)  # 週末
+    close = 150 + rng.standard_normal(len(times)).cumsum() * 0.01
+    return CandleArrays(
+        'USDJPY', 'M1',
+        timestamp=np.array(times, dtype='datetime64[s]').astype(np.int64),
+        open=close + 0.001, high=close + rng.random(len(times)) * 0.02,
+        low=close - rng.random(len(times)) * 0.02, close=close,
+        volume=rng.integers(100, 1000, len(times)).astype(float),
+    )
+
+
+def reference(m1: CandleArrays, minutes: int):
+    """行ごとの辞書集約（参照実装）"""
+    buckets = {}
+    for row in zip(m1.timestamp.tolist(), m1.open.tolist(), m1.high.tolist(),
+                   m1.low.tolist(), m1.close.tolist(), m1.volume.tolist()):
+        buckets.setdefault(row[0] // (minutes * 60) * minutes * 60, []).append(row)
+    return [(start, rows[0][1], max(r[2] for r in rows), min(r[3] for r in rows),
+             rows[-1][4], sum(r[5] for r in rows), len(rows))
+            for start, rows in sorted(buckets.items())]
+
+
+class TestResampler(unittest.TestCase):
+    """区間集約のテスト"""
+
+    def setUp(self):
+        self.m1 = make_m1()
+
+    def test_all_timeframes_match_reference(self):
+        """全時間足が参照実装と一致（ギャップ・週末を含む）"""
+        bars = resample_all(self.m1)
+        self.assertEqual(list(bars), ['M1', 'M5', 'M15', 'M30', 'H1', 'H4'])
+        for timeframe, minutes in TIMEFRAME_MINUTES.items():
+            if timeframe == 'M1':
+                continue
+            expected = [row[:6] for row in reference(self.m1, minutes)]
+            b = bars[timeframe]
+            actual = list(zip(b.timestamp.tolist(), b.open.tolist(), b.high.tolist(),
+                              b.low.tolist(), b.close.tolist(), b.volume.tolist()))
+            self.assertEqual(actual, expected, timeframe)
+
+    def test_drop_incomplete_and_aliases(self):
+        """構成本数不足の足の除外と M60/M240 表記"""
+        complete = [row[0] for row in reference(self.m1, 60) if row[6] == 60]
+        self.assertEqual(resample(self.m1, 'M60', drop_incomplete=True).timestamp.tolist(),
+                         complete)
+        self.assertEqual(resample(self.m1, 'M240').timeframe, 'H4')
+        with self.assertRaises(ValueError):
+            resample(self.m1, 'M7')
+
+    def test_disk_cache_keyed_by_source_hash(self):
+        """元ファイルの内容が変わるとキャッシュキーも変わる"""
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'USDJPY_M1.fxc')
+            write_columnar(source, self.m1.columns())
+            cache = MultiTimeframeCache(os.path.join(tmp, 'cache'))
+            first = cache.load(source, self.m1, ('M15',))
+            np.testing.assert_array_equal(first['M15'].close, resample(self.m1, 'M15').close)
+
+            shorter = self.m1.slice(0, 1000)
+            write_columnar(source, shorter.columns())
+            os.utime(source, (0, 0))
+            second = cache.load(source, shorter, ('M15',))
+            self.assertEqual(len(os.listdir(os.path.join(tmp, 'cache'))), 2)
+            self.assertLess(len(second['M15']), len(first['M15']))
+
+
+if __name__ == '__main__':
+    unittest.main()
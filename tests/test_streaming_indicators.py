@@ -0,0 +1,117 @@
+"""
+逐次更新型指標のテスト
+
+1件ずつの更新結果が全期間再計算（fast_* / pandas）と一致し、
+エンジンが同じスナップショットを共有することを確認
+"""
+
+import asyncio
+import unittest
+import os
+import sys
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.indicators.streaming_indicators import (
+    IndicatorSet, RollingHighLow, StreamingATR, StreamingEMA, StreamingMACD, StreamingSMA
+)
+from src.optimization.performance_optimizer import (
+    EventDrivenEngine, MarketEvent, fast_atr, fast_ema, fast_sma
+)
+
+
+def make_bars(count: int, seed: int = 0) -> pd.DataFrame:
+    """テスト用の足"""
+    rng = np.random.default_rng(seed)
+    close = 150 + rng.standard_normal(count).cumsum() * 0.05
+    return pd.DataFrame({
+        'high': close + rng.uniform(0, 0.1, count),
+        'low': close - rng.uniform(0, 0.1, count),
+        'close': close,
+    })
+
+
+class TestStreamingIndicators(unittest.TestCase):
+    """逐次更新と一括計算の一致"""
+
+    def setUp(self):
+        self.bars = make_bars(300)
+        self.closes = self.bars['close'].tolist()
+
+    def test_sma_matches_fast_sma(self):
+        sma = StreamingSMA(20)
+        for i, price in enumerate(self.closes):
+            self.assertAlmostEqual(sma.update(price), fast_sma(self.closes[:i + 1], 20), places=9)
+
+    def test_ema_matches_fast_ema(self):
+        ema = StreamingEMA(12)
+        for i, price in enumerate(self.closes):
+            self.assertAlmostEqual(ema.update(price), fast_ema(self.closes[:i + 1], 12), places=9)
+
+    def test_macd_and_osma(self):
+        """MACD は EMA 差、シグナルは MACD の EMA、OsMA はその差"""
+        macd = StreamingMACD(12, 26, 9)
+        results = [macd.update(price) for price in self.closes]
+        self.assertEqual(results[24], (0.0, 0.0, 0.0))
+
+        close = self.bars['close']
+        line = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+        signal = line.ewm(span=9, adjust=False).mean()
+        np.testing.assert_allclose([r[0] for r in results[25:]], line[25:], atol=1e-9)
+        np.testing.assert_allclose([r[1] for r in results[25:]], signal[25:], atol=1e-9)
+        np.testing.assert_allclose([r[2] for r in results[25:]], (line - signal)[25:], atol=1e-9)
+
+    def test_atr_matches_fast_atr(self):
+        atr = StreamingATR(14)
+        highs, lows = self.bars['high'].tolist(), self.bars['low'].tolist()
+        for i in range(len(self.closes)):
+            value = atr.update(highs[i], lows[i], self.closes[i])
+            expected = fast_atr(highs[:i + 1], lows[:i + 1], self.closes[:i + 1], 14)
+            self.assertAlmostEqual(value, expected, places=9)
+
+    def test_rolling_high_low(self):
+        high_low = RollingHighLow(20)
+        results = [high_low.update(h, l) for h, l in zip(self.bars['high'], self.bars['low'])]
+        np.testing.assert_array_equal([r[0] for r in results],
+                                      self.bars['high'].rolling(20, min_periods=1).max())
+        np.testing.assert_array_equal([r[1] for r in results],
+                                      self.bars['low'].rolling(20, min_periods=1).min())
+
+    def test_snapshot_shared_until_update(self):
+        """スナップショットは更新まで同じオブジェクトで、書き換えできない"""
+        indicators = IndicatorSet()
+        bars = self.bars.to_dict('records')
+        indicators.update_bar(bars[0])
+        snapshot = indicators.snapshot()
+        self.assertIs(indicators.snapshot(), snapshot)
+        with self.assertRaises(TypeError):
+            snapshot['sma_20'] = 1.0
+        indicators.update_bar(bars[1])
+        self.assertIsNot(indicators.snapshot(), snapshot)
+
+
+class TestEventDrivenEngineIndicators(unittest.TestCase):
+    """エンジンへの組み込み"""
+
+    def test_engine_updates_once_per_price(self):
+        engine = EventDrivenEngine()
+        bars = make_bars(40).to_dict('records')
+
+        async def run():
+            for i, bar in enumerate(bars):
+                await engine._handle_price_update(MarketEvent("PRICE_UPDATE", "USDJPY", str(i), bar))
+                if i == 18:
+                    self.assertEqual(engine.calculate_indicators("USDJPY"), {})
+
+        asyncio.run(run())
+        indicators = engine.calculate_indicators("USDJPY")
+        self.assertIs(engine.calculate_indicators("USDJPY"), indicators)
+        closes = [bar['close'] for bar in bars]
+        self.assertAlmostEqual(indicators['sma_20'], fast_sma(closes, 20), places=9)
+        self.assertAlmostEqual(indicators['ema_12'], fast_ema(closes, 12), places=9)
+        self.assertEqual(engine.calculate_indicators("EURUSD"), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+TradingSignalPKG / PKGDAGManager のテスト
+
+コンパイル済み実行計画が従来のコンテキスト辞書による評価と
+同一の結果を返すことを確認する
+"""
+
+import unittest
+import random
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pkg.trading_signal_pkg import PKGDAGManager, PKGNode, TradingSignalPKG
+
+
+def make_candles(count: int, seed: int = 7):
+    """テスト用のランダムウォークキャンドル"""
+    rng = random.Random(seed)
+    candles = []
+    price = 110.0
+    for _ in range(count):
+        open_price = price
+        price += rng.gauss(0, 0.3)
+        candles.append({
+            'open': open_price,
+            'high': max(open_price, price) + abs(rng.gauss(0, 0.2)),
+            'low': min(open_price, price) - abs(rng.gauss(0, 0.2)),
+            'close': price,
+        })
+    return candles
+
+
+def reference_evaluate(dag: PKGDAGManager, raw_data):
+    """コンテキスト辞書を用いた逐次評価（参照実装）"""
+    context = {'raw_data': raw_data, 'pkg_cache': {}}
+    for node_id in dag.plan.node_ids:
+        context['pkg_cache'][node_id] = dag.nodes[node_id].evaluate(context)
+    return context['pkg_cache']
+
+
+class TestCompiledPKGPlan(unittest.TestCase):
+    """コンパイル済み実行計画のテスト"""
+
+    def setUp(self):
+        self.dag = PKGDAGManager()
+
+    def test_plan_orders_nodes_by_layer(self):
+        """階層順にノードが並ぶ"""
+        layers = [int(node_id.split('^')[1][0]) for node_id in self.dag.plan.node_ids]
+        self.assertEqual(layers, sorted(layers))
+        self.assertEqual(self.dag.plan.node_ids[-1], '191^3-301')
+
+    def test_matches_reference_evaluation(self):
+        """全ノードの値が参照実装と一致"""
+        system = TradingSignalPKG(pair="USDJPY")
+        candles = make_candles(300)
+        for i in range(3, len(candles)):
+            raw_data = system._calculate_raw_data(candles[i], i, candles)
+            expected = reference_evaluate(self.dag, raw_data)
+            signal, debug_info = self.dag.evaluate(raw_data)
+
+            actual = {}
+            for layer_values in debug_info.values():
+                actual.update(layer_values)
+            self.assertEqual(actual, expected)
+            self.assertEqual(signal, expected['191^3-301'])
+
+    def test_debug_output_is_optional(self):
+        """debug=False ではデバッグ情報を構築しない"""
+        raw_data = {'AA001': 111.0, 'AA002': 110.5, 'AB301': 110.45, 'AB304': 110.8}
+        signal, debug_info = self.dag.evaluate(raw_data, debug=False)
+        self.assertEqual(debug_info, {})
+        self.assertEqual(signal, self.dag.evaluate(raw_data)[0])
+        self.assertEqual(set(self.dag.evaluate(raw_data)[1]),
+                         {'layer1', 'layer2', 'layer3'})
+
+    def test_recompile_after_node_change(self):
+        """ノード変更後の再コンパイルが反映される"""
+        del self.dag.nodes['191^2-203']
+        plan = self.dag.compile()
+        self.assertNotIn('191^2-203', plan.node_ids)
+        signal, _ = self.dag.evaluate({'AA001': 111.0, 'AA002': 110.0})
+        self.assertIn(signal, (1, 2, 3))
+
+
+class TestVectorizedSignals(unittest.TestCase):
+    """系列一括評価のテスト"""
+
+    def test_node_kernels_match_scalar_evaluate(self):
+        """各ノードの配列評価が要素ごとの評価と一致"""
+        rng = np.random.default_rng(0)
+        size = 500
+        for node_id, node in PKGDAGManager().nodes.items():
+            inputs = {}
+            for dep in node.dependencies:
+                if PKGNode.dependency_source(dep) == 'pkg':
+                    inputs[dep] = rng.integers(0, 4, size)
+                else:
+                    inputs[dep] = rng.choice([0.1, 0.5, 9.9, 10.0, 10.01, 110.0], size)
+            expected = [
+                node.function.evaluate({k: v[i].item() for k, v in inputs.items()})
+                for i in range(size)
+            ]
+            actual = node.function.evaluate_array(inputs, size)
+            self.assertEqual(actual.tolist(), expected, node_id)
+
+    def test_raw_columns_are_bit_identical(self):
+        """生データ列が per-bar 計算と完全一致"""
+        system = TradingSignalPKG(pair="USDJPY")
+        candles = make_candles(200)
+        raw_columns = system._calculate_raw_columns(system._candle_columns(candles))
+        for i in range(3, len(candles)):
+            raw_data = system._calculate_raw_data(candles[i], i, candles)
+            for symbol, column in raw_columns.items():
+                self.assertEqual(column[i], raw_data[symbol], (symbol, i))
+
+    def test_generate_signals_matches_per_bar_path(self):
+        """一括生成と generate_signal の結果が一致"""
+        system = TradingSignalPKG(pair="EURJPY")
+        candles = make_candles(400, seed=3)
+        expected = [system.generate_signal(c, i, candles)[0]
+                    for i, c in enumerate(candles)]
+        self.assertEqual(system.generate_signals(candles).tolist(), expected)
+
+        columns = {key: [c[key] for c in candles]
+                   for key in ('open', 'high', 'low', 'close')}
+        self.assertEqual(system.generate_signals(columns).tolist(), expected)
+
+    def test_short_series(self):
+        """3本以下は全て待機"""
+        system = TradingSignalPKG()
+        self.assertEqual(system.generate_signals(make_candles(2)).tolist(), [3, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+統一PKGシステムの通貨バッチ評価のテスト
+
+DAGは1回だけコンパイルされ、各ノードが全通貨分まとめて計算されることを確認
+"""
+
+import unittest
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pkg.unified_pkg_system import UnifiedPKGSystem
+
+
+MULTI_DATA = {
+    "USDJPY": {"current_price": 110.50, "prev_close": 110.45, "ha_open": 110.43,
+               "ha_close": 110.48, "range_width": 0.20},
+    "EURUSD": {"current_price": 1.1840, "prev_close": 1.1845, "ha_open": 1.1843,
+               "ha_close": 1.1848, "range_width": 0.0015},
+    "EURJPY": {"current_price": 130.10, "prev_close": 130.10, "ha_open": 130.00,
+               "ha_close": 130.05, "range_width": 0.15},
+    "GBPJPY": {"current_price": 150.20, "prev_close": 150.00, "ha_open": 150.10,
+               "ha_close": 150.00, "range_width": 0.30},
+}
+
+
+def price_direction(current, prev):
+    """価格方向（1=上, 2=下, 0=なし）"""
+    return np.where(current > prev, 1, np.where(current < prev, 2, 0))
+
+
+class TestMultiCurrencyBatch(unittest.TestCase):
+    """通貨バッチ評価のテスト"""
+
+    def setUp(self):
+        self.system = UnifiedPKGSystem(pair="USDJPY", timeframe="15M")
+
+    def test_matches_per_node_evaluation(self):
+        """既定のノード関数では従来の簡略評価と同じ結果"""
+        results = self.system.evaluate_multi_currency(MULTI_DATA)
+        for pair, result in results.items():
+            code = self.system._get_currency_code(pair)
+            self.assertEqual(result['signal_id'], f"39{code}^3-301")
+            self.assertEqual(result['signal'], self.system._evaluate_node(result['signal_id'], {}))
+            self.assertEqual(result['currency_code'], code)
+
+    def test_compiled_once(self):
+        """コンパイル結果は再利用され、ノード関数の登録で作り直される"""
+        graph = self.system.compile()
+        self.system.evaluate_multi_currency(MULTI_DATA)
+        self.assertIs(self.system.compile(), graph)
+        self.assertEqual(graph.template_ids[graph.output_slot], "39{cur}^3-301")
+        self.system.set_kernel(102, price_direction)
+        self.assertIsNot(self.system.compile(), graph)
+
+    def test_kernels_run_once_per_bar(self):
+        """各ノード関数は通貨数によらず1回だけ呼ばれ、全通貨分を計算する"""
+        calls = []
+
+        def direction(current, prev):
+            calls.append(len(current))
+            return price_direction(current, prev)
+
+        self.system.set_kernel(102, direction)
+        self.system.set_kernel(301, lambda momi, doukyaku, ikikaeri: doukyaku)
+        self.system.set_kernel(201, lambda price_dir, ha_dir: price_dir)
+
+        results = self.system.evaluate_multi_currency(MULTI_DATA)
+        self.assertEqual(calls, [4])
+        self.assertEqual({pair: r['signal'] for pair, r in results.items()},
+                         {"USDJPY": 1, "EURUSD": 2, "EURJPY": 0, "GBPJPY": 1})
+
+    def test_node_without_dependencies(self):
+        """依存のない関数ノードも通貨数分の値になる"""
+        self.system.nodes["391^1-104"] = {'name': '定数判定', 'type': 'function',
+                                          'dependencies': []}
+        self.system.set_kernel(301, lambda momi, doukyaku, ikikaeri: doukyaku)
+        graph = self.system.compile()
+        self.assertIn("39{cur}^1-104", graph.template_ids)
+        results = self.system.evaluate_multi_currency(MULTI_DATA)
+        self.assertEqual({r['signal'] for r in results.values()}, {1})
+
+    def test_empty_input(self):
+        """入力がなければ空の結果"""
+        self.assertEqual(self.system.evaluate_multi_currency({}), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
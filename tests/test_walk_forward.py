@@ -0,0 +1,92 @@
+"""
+ウォークフォワード最適化のテスト
+"""
+
+import unittest
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from src.backtesting.parameter_sweep import ParameterSweep, run_parameter_backtest
+from src.backtesting.walk_forward import (
+    WalkForwardOptimizer, WalkForwardReport, WindowResult, walk_forward_windows
+)
+from tests.test_parameter_sweep import make_m15
+
+
+class TestWalkForwardWindows(unittest.TestCase):
+    """窓生成のテスト"""
+
+    def test_rolling_windows(self):
+        """検証区間は重ならず、直前のインサンプルに続く"""
+        windows = walk_forward_windows(1000, train_bars=300, test_bars=100)
+        self.assertEqual(len(windows), 7)
+        for prev, window in zip(windows, windows[1:]):
+            self.assertEqual(window.test_start, prev.test_end)
+        for window in windows:
+            self.assertEqual(window.train_end - window.train_start, 300)
+            self.assertEqual(window.test_start, window.train_end)
+
+    def test_anchored_windows(self):
+        """拡大窓ではインサンプル開始が先頭に固定"""
+        windows = walk_forward_windows(1000, 300, 100, step=200, anchored=True)
+        self.assertEqual([w.train_start for w in windows], [0, 0, 0, 0])
+        self.assertEqual([w.train_end for w in windows], [300, 500, 700, 900])
+
+    def test_not_enough_bars(self):
+        with self.assertRaises(ValueError):
+            walk_forward_windows(100, 80, 40)
+
+
+class TestWalkForwardOptimizer(unittest.TestCase):
+    """最適化・検証のテスト"""
+
+    def setUp(self):
+        self.candles = make_m15(count=600, seed=5)
+
+    def run_optimizer(self, max_workers):
+        sweep = ParameterSweep('optimized', max_workers=max_workers, min_trades=0)
+        plan = sweep.plan(['USDJPY'], method='lhs', samples=4, seed=1)
+        optimizer = WalkForwardOptimizer(sweep, train_bars=200, test_bars=100)
+        return plan, optimizer.run({'USDJPY': self.candles}, plan)['USDJPY']
+
+    def test_out_of_sample_uses_in_sample_best(self):
+        """各窓はインサンプル最良のパラメータで直後の区間を検証"""
+        plan, report = self.run_optimizer(max_workers=1)
+        records = self.candles.to_records()
+        self.assertEqual(len(report.windows), 4)
+        for result in report.windows:
+            w = result.window
+            scores = [run_parameter_backtest('optimized', 'USDJPY', records, p,
+                                             start=w.train_start, end=w.train_end)['return_pct']
+                      for p in plan['USDJPY']]
+            self.assertEqual(result.in_sample['return_pct'], max(scores))
+            self.assertEqual(result.out_of_sample,
+                             run_parameter_backtest('optimized', 'USDJPY', records, result.params,
+                                                    start=w.test_start, end=w.test_end))
+        summary = report.summary()
+        self.assertEqual(summary['total_trades'],
+                         sum(r.out_of_sample['total_trades'] for r in report.windows))
+
+    def test_efficiency_is_per_bar(self):
+        """1本あたりの収益が同じなら train/test の本数が違っても効率は1"""
+        windows = walk_forward_windows(960 + 480 * 2, train_bars=960, test_bars=480)
+        oos = {'total_pnl': 10000.0, 'total_trades': 2, 'winning_trades': 1,
+               'losing_trades': 1, 'max_drawdown': 0.5}
+        report = WalkForwardReport('USDJPY', 'optimized', 1000000, [
+            WindowResult(w, {}, {'return_pct': 2.0}, oos, 1) for w in windows])
+        summary = report.summary()
+        self.assertAlmostEqual(summary['return_per_bar'], summary['in_sample_return_per_bar'])
+        self.assertAlmostEqual(summary['efficiency'], 1.0)
+
+    def test_parallel_matches_inline(self):
+        """プロセス並列と逐次で同じ結果"""
+        _, inline = self.run_optimizer(max_workers=1)
+        _, parallel = self.run_optimizer(max_workers=2)
+        self.assertEqual([r.params for r in inline.windows], [r.params for r in parallel.windows])
+        self.assertEqual(inline.summary(), parallel.summary())
+
+
+if __name__ == '__main__':
+    unittest.main()